@@ -13,7 +13,10 @@ import {
   CircularProgress,
 } from "@mui/material";
 import { useAppDispatch, useAppSelector } from "../store";
-import { fetchLectures, setActiveLecture } from "../store/slices/lectureSlice";
+import {
+  refreshLectures,
+  setActiveLecture,
+} from "../store/slices/lectureSlice";
 import { useNavigate, useSearchParams } from "react-router-dom";
 import { Lecture } from "../types/lecture";
 
@@ -34,9 +37,9 @@ const LectureSelector: React.FC<LectureSelectorProps> = ({ open, onClose }) => {
   // Memoize the fetch function to prevent it from changing on every render
   const fetchLecturesData = useCallback(() => {
     if (token && !hasFetchedRef.current) {
-      console.log("Dispatching fetchLectures");
+      console.log("Dispatching refreshLectures");
       hasFetchedRef.current = true;
-      dispatch(fetchLectures());
+      dispatch(refreshLectures());
     }
   }, [dispatch, token]);
 
@@ -0,0 +1,155 @@
+import { useEffect } from "react";
+import { useAppDispatch, useAppSelector } from "../store";
+import { liveEventReceived } from "../store/sync";
+import { refreshQuestions } from "../store/slices/questionSlice";
+import { refreshLectures } from "../store/slices/lectureSlice";
+import { LiveEvent } from "../types/events";
+
+const API_URL = `${
+  import.meta.env.VITE_API_URL || "http://localhost:3000/api"
+}/events`;
+const MAX_RETRY_MS = 30000;
+
+interface Message {
+  id?: string;
+  event: string;
+  data: string;
+  retry?: number;
+}
+
+// One server-sent event block ("field: value" lines); null for comments
+const parseMessage = (block: string): Message | null => {
+  const message: Message = { event: "message", data: "" };
+  let fields = 0;
+  for (const line of block.split("\n")) {
+    if (!line || line.startsWith(":")) {
+      continue;
+    }
+    const colon = line.indexOf(":");
+    const field = colon === -1 ? line : line.slice(0, colon);
+    const value = colon === -1 ? "" : line.slice(colon + 1).replace(/^ /, "");
+    fields += 1;
+    if (field === "id") {
+      message.id = value;
+    } else if (field === "event") {
+      message.event = value;
+    } else if (field === "data") {
+      message.data = message.data ? `${message.data}\n${value}` : value;
+    } else if (field === "retry") {
+      message.retry = parseInt(value, 10) || undefined;
+    }
+  }
+  return fields > 0 ? message : null;
+};
+
+const wait = (ms: number, signal: AbortSignal) =>
+  new Promise<void>((resolve) => {
+    const timer = setTimeout(resolve, ms);
+    signal.addEventListener("abort", () => {
+      clearTimeout(timer);
+      resolve();
+    });
+  });
+
+// Keep cached questions and lectures current while mounted by following
+// GET /api/events for the given lectures and questions. Reads the stream with
+// fetch rather than EventSource so the token goes in the Authorization
+// header, and resumes from the last event seen after a disconnect.
+export const useLiveEvents = ({
+  lectures = [],
+  questions = [],
+}: {
+  lectures?: string[];
+  questions?: string[];
+}) => {
+  const dispatch = useAppDispatch();
+  const token = useAppSelector((state) => state.auth.token);
+  const lectureList = lectures.join(",");
+  const questionList = questions.join(",");
+
+  useEffect(() => {
+    if (!token || (!lectureList && !questionList)) {
+      return;
+    }
+    const controller = new AbortController();
+    const params = new URLSearchParams();
+    if (lectureList) {
+      params.set("lectures", lectureList);
+    }
+    if (questionList) {
+      params.set("questions", questionList);
+    }
+
+    const follow = async () => {
+      let lastEventId: string | undefined;
+      let retry = 1000;
+      let delay = retry;
+      while (!controller.signal.aborted) {
+        try {
+          const response = await fetch(`${API_URL}?${params}`, {
+            headers: {
+              Authorization: `Bearer ${token}`,
+              Accept: "text/event-stream",
+              ...(lastEventId ? { "Last-Event-ID": lastEventId } : {}),
+            },
+            signal: controller.signal,
+          });
+          if (response.status >= 400 && response.status < 500) {
+            return; // retrying will not help
+          }
+          if (!response.ok || !response.body) {
+            throw new Error(`Event stream failed (${response.status})`);
+          }
+          delay = retry;
+          const reader = response.body.getReader();
+          const decoder = new TextDecoder();
+          let buffered = "";
+          for (;;) {
+            const { done, value } = await reader.read();
+            if (done) {
+              break;
+            }
+            buffered += decoder.decode(value, { stream: true });
+            const blocks = buffered.split("\n\n");
+            buffered = blocks.pop() ?? "";
+            for (const block of blocks) {
+              const message = parseMessage(block);
+              if (!message) {
+                continue;
+              }
+              if (message.retry) {
+                retry = message.retry;
+              }
+              if (message.id) {
+                lastEventId = message.id;
+              }
+              if (message.event === "reset") {
+                // Missed more than the server kept: reload what changed
+                void dispatch(refreshQuestions());
+                void dispatch(refreshLectures());
+              } else if (message.data) {
+                dispatch(
+                  liveEventReceived({
+                    ...JSON.parse(message.data),
+                    type: message.event,
+                    id: message.id,
+                  } as LiveEvent)
+                );
+              }
+            }
+          }
+        } catch (error) {
+          if (controller.signal.aborted) {
+            return;
+          }
+          console.error("Live events:", (error as Error).message);
+          delay = Math.min(delay * 2, MAX_RETRY_MS);
+        }
+        await wait(delay, controller.signal);
+      }
+    };
+
+    void follow();
+    return () => controller.abort();
+  }, [dispatch, token, lectureList, questionList]);
+};
@@ -2,7 +2,7 @@ import React, { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import { useAppDispatch, useAppSelector } from "../store";
 import {
-  fetchLectures,
+  refreshLectures,
   setActiveLecture,
   deleteLecture,
   createLecture,
@@ -34,7 +34,7 @@ const LectureList: React.FC = () => {
   const [newLectureDescription, setNewLectureDescription] = useState("");
 
   useEffect(() => {
-    dispatch(fetchLectures());
+    dispatch(refreshLectures());
   }, [dispatch]);
 
   const handleSelectLecture = (lecture: Lecture) => {
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { useParams, useNavigate } from "react-router-dom";
+import { useParams, useNavigate, Link as RouterLink } from "react-router-dom";
 import { useAppDispatch, useAppSelector } from "../store";
 import {
   Box,
@@ -24,11 +24,12 @@ import {
   ListItem,
   ListItemText,
   IconButton,
+  Link,
 } from "@mui/material";
 import DeleteIcon from "@mui/icons-material/Delete";
 import { toast } from "react-toastify";
 import {
-  fetchQuestions,
+  refreshQuestions,
   submitEditSuggestion,
   handleSuggestion,
   submitGrades,
@@ -36,11 +37,12 @@ import {
   deleteQuestion,
 } from "../store/slices/questionSlice";
 import {
-  fetchLectures,
+  refreshLectures,
   removeQuestionsFromLecture,
 } from "../store/slices/lectureSlice";
 import { Question, Answer, EditSuggestion } from "../types/question";
 import { RootState } from "../store";
+import { useLiveEvents } from "../hooks/useLiveEvents";
 
 interface EditFormData {
   suggestedQuestion: string;
@@ -76,12 +78,13 @@ const QuestionDetail = () => {
 
   const question = questions.find((q: Question) => q._id === id);
 
+  // Only the changes are downloaded once both lists are cached
   useEffect(() => {
-    if (!questions.length) {
-      void dispatch(fetchQuestions());
-    }
-    void dispatch(fetchLectures());
-  }, [dispatch, questions.length]);
+    void dispatch(refreshQuestions());
+    void dispatch(refreshLectures());
+  }, [dispatch]);
+
+  useLiveEvents({ questions: id ? [id] : [] });
 
   useEffect(() => {
     if (question) {
@@ -255,6 +258,27 @@ const QuestionDetail = () => {
           </Box>
         </Box>
 
+        {user?.role === "faculty" &&
+          !editMode &&
+          question.possibleDuplicates &&
+          question.possibleDuplicates.length > 0 && (
+            <Alert severity="warning" sx={{ mb: 2 }}>
+              Possible duplicate of{" "}
+              {question.possibleDuplicates.map((duplicate, index) => (
+                <span key={duplicate.question}>
+                  {index > 0 && ", "}
+                  <Link
+                    component={RouterLink}
+                    to={`/questions/${duplicate.question}`}
+                  >
+                    {duplicate.question.slice(-6)}
+                  </Link>{" "}
+                  ({Math.round(duplicate.similarity * 100)}% similar)
+                </span>
+              ))}
+            </Alert>
+          )}
+
         {/* Add Lectures Section */}
         {!editMode && !gradeMode && (
           <Box sx={{ mt: 2, mb: 3 }}>
@@ -28,9 +28,13 @@ import AddIcon from "@mui/icons-material/Add";
 import ViewComfyIcon from "@mui/icons-material/ViewComfy";
 import ViewCompactIcon from "@mui/icons-material/ViewCompact";
 import ViewModuleIcon from "@mui/icons-material/ViewModule";
-import { fetchQuestions, deleteQuestion } from "../store/slices/questionSlice";
+import {
+  refreshQuestions,
+  deleteQuestion,
+} from "../store/slices/questionSlice";
 import { addQuestionsToLecture } from "../store/slices/lectureSlice";
 import { RootState } from "../store";
+import { useLiveEvents } from "../hooks/useLiveEvents";
 import { Question } from "../types/question";
 import { toast } from "react-toastify";
 
@@ -54,9 +58,12 @@ const QuestionList = () => {
   const [viewMode, setViewMode] = useState<ViewMode>("comfortable");
 
   useEffect(() => {
-    void dispatch(fetchQuestions());
+    void dispatch(refreshQuestions());
   }, [dispatch]);
 
+  // Grades, suggestions and finalizations in the active lecture as they happen
+  useLiveEvents({ lectures: activeLecture ? [activeLecture._id] : [] });
+
   // Only set lecture filter from URL params on mount
   useEffect(() => {
     const lectureId = searchParams.get("lectureId");
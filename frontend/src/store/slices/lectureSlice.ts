@@ -1,12 +1,14 @@
 import { createSlice, createAsyncThunk, PayloadAction } from "@reduxjs/toolkit";
 import axios, { AxiosError } from "axios";
 import { logout } from "./authSlice";
+import { syncChanges, mergeById, liveEventReceived } from "../sync";
 import {
   CreateLectureDto,
   UpdateLectureDto,
   LectureState,
   Lecture,
 } from "../../types/lecture";
+import { LectureQuestionsChange } from "../../types/events";
 import { RootState } from "..";
 
 const API_URL = `${
@@ -17,6 +19,28 @@ interface ApiError {
   message: string;
 }
 
+// Apply questions added to or removed from a lecture, from a live event or a
+// ?return=patch response, wherever the lecture is cached
+const applyQuestionsChange = (
+  state: LectureState,
+  change: LectureQuestionsChange
+) => {
+  const removed = new Set(change.removed || []);
+  const update = (lecture: Lecture) => {
+    const kept = lecture.questions.filter((id) => !removed.has(id));
+    const added = (change.added || []).filter((id) => !kept.includes(id));
+    lecture.questions = [...kept, ...added];
+  };
+  const cached = state.lectures.find((l) => l._id === change.lecture);
+  if (cached) {
+    update(cached);
+  }
+  if (state.activeLecture?._id === change.lecture) {
+    update(state.activeLecture);
+    localStorage.setItem("activeLecture", JSON.stringify(state.activeLecture));
+  }
+};
+
 // Get active lecture from localStorage
 const activeLecture = localStorage.getItem("activeLecture");
 
@@ -25,6 +49,7 @@ const initialState: LectureState = {
   activeLecture: activeLecture ? JSON.parse(activeLecture) : null,
   loading: false,
   error: null,
+  syncCursor: null,
 };
 
 export const fetchLectures = createAsyncThunk(
@@ -38,7 +63,10 @@ export const fetchLectures = createAsyncThunk(
         headers: { Authorization: `Bearer ${state.auth.token}` },
       });
       console.log(`Fetched ${response.data.length} lectures successfully`);
-      return response.data;
+      return {
+        lectures: response.data as Lecture[],
+        syncCursor: (response.headers["x-sync-cursor"] as string) || null,
+      };
     } catch (error) {
       console.error("Error fetching lectures:", error);
       const err = error as AxiosError<ApiError>;
@@ -49,6 +77,22 @@ export const fetchLectures = createAsyncThunk(
   }
 );
 
+// Bring the cached lectures up to date: only the changes when they have been
+// loaded before, the whole list otherwise or if that fails
+export const refreshLectures = createAsyncThunk(
+  "lectures/refresh",
+  async (_, { getState, dispatch }) => {
+    const state = getState() as RootState;
+    if (state.lectures.syncCursor) {
+      const result = await dispatch(syncChanges());
+      if (syncChanges.fulfilled.match(result)) {
+        return;
+      }
+    }
+    await dispatch(fetchLectures());
+  }
+);
+
 export const createLecture = createAsyncThunk(
   "lectures/create",
   async (lectureData: CreateLectureDto, { getState, rejectWithValue }) => {
@@ -159,10 +203,13 @@ export const addQuestionsToLecture = createAsyncThunk(
   ) => {
     try {
       const state = getState() as RootState;
-      const response = await axios.post(
+      const response = await axios.post<LectureQuestionsChange>(
         `${API_URL}/${lectureId}/questions`,
         { questionIds },
-        { headers: { Authorization: `Bearer ${state.auth.token}` } }
+        {
+          headers: { Authorization: `Bearer ${state.auth.token}` },
+          params: { return: "patch" },
+        }
       );
       return response.data;
     } catch (error) {
@@ -182,10 +229,14 @@ export const removeQuestionsFromLecture = createAsyncThunk(
   ) => {
     try {
       const state = getState() as RootState;
-      const response = await axios.delete(`${API_URL}/${lectureId}/questions`, {
-        headers: { Authorization: `Bearer ${state.auth.token}` },
-        data: { questionIds },
-      });
+      const response = await axios.delete<LectureQuestionsChange>(
+        `${API_URL}/${lectureId}/questions`,
+        {
+          headers: { Authorization: `Bearer ${state.auth.token}` },
+          params: { return: "patch" },
+          data: { questionIds },
+        }
+      );
       return response.data;
     } catch (error) {
       const err = error as AxiosError<ApiError>;
@@ -219,16 +270,14 @@ const lectureSlice = createSlice({
         state.loading = true;
         state.error = null;
       })
-      .addCase(
-        fetchLectures.fulfilled,
-        (state, action: PayloadAction<Lecture[]>) => {
-          console.log(
-            `Lectures fetch fulfilled with ${action.payload.length} lectures`
-          );
-          state.loading = false;
-          state.lectures = action.payload;
-        }
-      )
+      .addCase(fetchLectures.fulfilled, (state, action) => {
+        console.log(
+          `Lectures fetch fulfilled with ${action.payload.lectures.length} lectures`
+        );
+        state.loading = false;
+        state.lectures = action.payload.lectures;
+        state.syncCursor = action.payload.syncCursor;
+      })
       .addCase(fetchLectures.rejected, (state, action) => {
         console.log("Lectures fetch rejected:", action.payload);
         state.loading = false;
@@ -333,36 +382,48 @@ const lectureSlice = createSlice({
           }
         }
       )
-      .addCase(
-        addQuestionsToLecture.fulfilled,
-        (state, action: PayloadAction<Lecture>) => {
-          const index = state.lectures.findIndex(
-            (l) => l._id === action.payload._id
-          );
-          if (index !== -1) {
-            state.lectures[index] = action.payload;
-            if (state.activeLecture?._id === action.payload._id) {
-              state.activeLecture = action.payload;
-            }
-          }
+      .addCase(addQuestionsToLecture.fulfilled, (state, action) => {
+        applyQuestionsChange(state, action.payload);
+      })
+      .addCase(removeQuestionsFromLecture.fulfilled, (state, action) => {
+        applyQuestionsChange(state, action.payload);
+      })
+      // Merge changes from the server; lectures no longer listed are gone
+      .addCase(syncChanges.fulfilled, (state, action) => {
+        if (!state.syncCursor) {
+          return; // never loaded; the next fetch brings everything
         }
-      )
-      .addCase(
-        removeQuestionsFromLecture.fulfilled,
-        (state, action: PayloadAction<Lecture>) => {
-          const index = state.lectures.findIndex(
-            (l) => l._id === action.payload._id
-          );
-          if (index !== -1) {
-            state.lectures[index] = action.payload;
-            if (state.activeLecture?._id === action.payload._id) {
-              state.activeLecture = action.payload;
-            }
+        const { lectures, lectureIds, cursor } = action.payload;
+        const visible = new Set(lectureIds);
+        state.lectures = mergeById(
+          state.lectures,
+          lectures,
+          state.lectures
+            .map((lecture) => lecture._id)
+            .filter((id) => !visible.has(id))
+        );
+        state.syncCursor = cursor;
+        const active = state.activeLecture;
+        if (active && !visible.has(active._id)) {
+          state.activeLecture = null;
+          localStorage.removeItem("activeLecture");
+        } else if (active) {
+          const updated = lectures.find((l) => l._id === active._id);
+          if (updated) {
+            state.activeLecture = updated;
+            localStorage.setItem("activeLecture", JSON.stringify(updated));
           }
         }
-      )
+      })
+      // Questions added to or removed from a lecture by its faculty
+      .addCase(liveEventReceived, (state, action) => {
+        if (action.payload.type === "lecture-questions") {
+          applyQuestionsChange(state, action.payload);
+        }
+      })
       // Clear state on logout
       .addCase(logout.fulfilled, (state) => {
+        state.syncCursor = null;
         state.lectures = [];
         state.activeLecture = null;
         state.loading = false;
@@ -1,4 +1,9 @@
-import { createSlice, createAsyncThunk, PayloadAction } from "@reduxjs/toolkit";
+import {
+  createSlice,
+  createAsyncThunk,
+  createAction,
+  PayloadAction,
+} from "@reduxjs/toolkit";
 import axios, { AxiosError } from "axios";
 import {
   QuestionState,
@@ -7,6 +12,10 @@ import {
   EditSuggestionData,
   GradeSubmissionData,
 } from "../../types/question";
+import { logout } from "./authSlice";
+import { syncChanges, mergeById, liveEventReceived } from "../sync";
+import { QuestionChange } from "../../types/events";
+import { RootState } from "..";
 
 const API_URL = `${
   import.meta.env.VITE_API_URL || "http://localhost:3000/api"
@@ -17,29 +26,155 @@ const initialState: QuestionState = {
   currentQuestion: null,
   isLoading: false,
   error: null,
+  syncCursor: null,
+};
+
+// Dispatched for each batch of questions read from the NDJSON stream, so the
+// list can render before the whole collection has arrived
+const questionsReceived = createAction<{
+  questions: Question[];
+  reset: boolean;
+}>("questions/received");
+
+const parseLines = (lines: string[]): Question[] =>
+  lines
+    .filter((line) => line.trim())
+    .map((line) => JSON.parse(line) as Question);
+
+// Apply a change, from a live event or a ?return=patch response, to a cached
+// question. Changes carry the new state, not a difference, so applying one
+// twice (the response and then its event) changes nothing.
+const applyChange = (question: Question, change: QuestionChange) => {
+  switch (change.type) {
+    case "grades":
+      question.gradeStats = change.gradeStats;
+      for (const { _id, gradeStats } of change.answers) {
+        const answer = question.answers.find((a) => a._id === _id);
+        if (answer) {
+          answer.gradeStats = gradeStats;
+        }
+      }
+      break;
+    case "suggestion":
+      if (
+        !question.editSuggestions.some((s) => s._id === change.suggestion._id)
+      ) {
+        question.editSuggestions.push(change.suggestion);
+      }
+      question.suggestionStats = change.suggestionStats;
+      break;
+    case "suggestion-status": {
+      const suggestion = question.editSuggestions.find(
+        (s) => s._id === change.suggestion._id
+      );
+      if (suggestion) {
+        suggestion.status = change.suggestion.status;
+        suggestion.rebuttalComment = change.suggestion.rebuttalComment;
+      }
+      question.suggestionStats = change.suggestionStats;
+      break;
+    }
+    case "finalized":
+      question.isFinal = true;
+      break;
+    case "comment":
+      if (!question.facultyComments.some((c) => c._id === change.comment._id)) {
+        question.facultyComments.push(change.comment);
+      }
+      break;
+  }
 };
 
+const applyToCache = (state: QuestionState, change: QuestionChange) => {
+  const cached = state.questions.find((q) => q._id === change.question);
+  if (cached) {
+    applyChange(cached, change);
+  }
+  if (state.currentQuestion?._id === change.question) {
+    applyChange(state.currentQuestion, change);
+  }
+};
+
+// Mutations below ask for only what changed rather than the whole question
+const PATCH = { return: "patch" };
+
 // Async thunks
 export const fetchQuestions = createAsyncThunk(
   "questions/fetchAll",
-  async (_, { getState, rejectWithValue }) => {
+  async (_, { getState, dispatch, rejectWithValue }) => {
     try {
       const {
         auth: { token },
       } = getState() as { auth: { token: string } };
-      const response = await axios.get(`${API_URL}`, {
-        headers: { Authorization: `Bearer ${token}` },
+      const response = await fetch(`${API_URL}?format=ndjson`, {
+        headers: {
+          Authorization: `Bearer ${token}`,
+          Accept: "application/x-ndjson",
+        },
       });
-      return response.data;
+      const syncCursor = response.headers.get("X-Sync-Cursor");
+      if (!response.ok) {
+        const body = (await response
+          .json()
+          .catch(() => null)) as { message?: string } | null;
+        return rejectWithValue(body?.message || "Failed to fetch questions");
+      }
+      if (!response.body) {
+        return {
+          questions: parseLines((await response.text()).split("\n")),
+          syncCursor,
+        };
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      const questions: Question[] = [];
+      let buffered = "";
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) {
+          break;
+        }
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split("\n");
+        buffered = lines.pop() ?? "";
+        const batch = parseLines(lines);
+        if (batch.length > 0) {
+          dispatch(
+            questionsReceived({
+              questions: batch,
+              reset: questions.length === 0,
+            })
+          );
+          questions.push(...batch);
+        }
+      }
+      questions.push(...parseLines([buffered + decoder.decode()]));
+      return { questions, syncCursor };
     } catch (error) {
-      const err = error as AxiosError<{ message: string }>;
       return rejectWithValue(
-        err.response?.data?.message || "Failed to fetch questions"
+        (error as Error).message || "Failed to fetch questions"
       );
     }
   }
 );
 
+// Bring the cached questions up to date: only the changes when they have been
+// loaded before, the whole list otherwise or if that fails
+export const refreshQuestions = createAsyncThunk(
+  "questions/refresh",
+  async (_, { getState, dispatch }) => {
+    const { questions } = getState() as RootState;
+    if (questions.syncCursor) {
+      const result = await dispatch(syncChanges());
+      if (syncChanges.fulfilled.match(result)) {
+        return;
+      }
+    }
+    await dispatch(fetchQuestions());
+  }
+);
+
 export const createQuestion = createAsyncThunk(
   "questions/create",
   async (questionData: CreateQuestionData, { getState, rejectWithValue }) => {
@@ -73,10 +208,10 @@ export const submitEditSuggestion = createAsyncThunk(
       const {
         auth: { token },
       } = getState() as { auth: { token: string } };
-      const response = await axios.post(
+      const response = await axios.post<QuestionChange>(
         `${API_URL}/${questionId}/suggestions`,
         suggestion,
-        { headers: { Authorization: `Bearer ${token}` } }
+        { headers: { Authorization: `Bearer ${token}` }, params: PATCH }
       );
       return response.data;
     } catch (error) {
@@ -108,10 +243,10 @@ export const handleSuggestion = createAsyncThunk(
       const {
         auth: { token },
       } = getState() as { auth: { token: string } };
-      const response = await axios.put(
+      const response = await axios.put<QuestionChange>(
         `${API_URL}/${questionId}/suggestions/${suggestionId}`,
         { status, rebuttalComment },
-        { headers: { Authorization: `Bearer ${token}` } }
+        { headers: { Authorization: `Bearer ${token}` }, params: PATCH }
       );
       return response.data;
     } catch (error) {
@@ -133,10 +268,10 @@ export const submitGrades = createAsyncThunk(
       const {
         auth: { token },
       } = getState() as { auth: { token: string } };
-      const response = await axios.post(
+      const response = await axios.post<QuestionChange>(
         `${API_URL}/${questionId}/grades`,
         grades,
-        { headers: { Authorization: `Bearer ${token}` } }
+        { headers: { Authorization: `Bearer ${token}` }, params: PATCH }
       );
       return response.data;
     } catch (error) {
@@ -155,10 +290,10 @@ export const finalizeQuestion = createAsyncThunk(
       const {
         auth: { token },
       } = getState() as { auth: { token: string } };
-      const response = await axios.put(
+      const response = await axios.put<QuestionChange>(
         `${API_URL}/${questionId}/finalize`,
         {},
-        { headers: { Authorization: `Bearer ${token}` } }
+        { headers: { Authorization: `Bearer ${token}` }, params: PATCH }
       );
       return response.data;
     } catch (error) {
@@ -208,10 +343,17 @@ const questionSlice = createSlice({
         state.isLoading = true;
         state.error = null;
       })
+      .addCase(questionsReceived, (state, action) => {
+        state.isLoading = false;
+        state.questions = action.payload.reset
+          ? action.payload.questions
+          : state.questions.concat(action.payload.questions);
+      })
       .addCase(fetchQuestions.fulfilled, (state, action) => {
         state.isLoading = false;
         state.error = null;
-        state.questions = action.payload;
+        state.questions = action.payload.questions;
+        state.syncCursor = action.payload.syncCursor;
       })
       .addCase(fetchQuestions.rejected, (state, action) => {
         state.isLoading = false;
@@ -237,15 +379,7 @@ const questionSlice = createSlice({
       })
       .addCase(submitEditSuggestion.fulfilled, (state, action) => {
         state.error = null;
-        const index = state.questions.findIndex(
-          (q) => q._id === action.payload._id
-        );
-        if (index !== -1) {
-          state.questions[index] = action.payload;
-        }
-        if (state.currentQuestion?._id === action.payload._id) {
-          state.currentQuestion = action.payload;
-        }
+        applyToCache(state, action.payload);
       })
       .addCase(submitEditSuggestion.rejected, (state, action) => {
         state.error = action.payload as string;
@@ -258,15 +392,7 @@ const questionSlice = createSlice({
       .addCase(handleSuggestion.fulfilled, (state, action) => {
         state.isLoading = false;
         state.error = null;
-        const index = state.questions.findIndex(
-          (q) => q._id === action.payload._id
-        );
-        if (index !== -1) {
-          state.questions[index] = action.payload;
-        }
-        if (state.currentQuestion?._id === action.payload._id) {
-          state.currentQuestion = action.payload;
-        }
+        applyToCache(state, action.payload);
       })
       .addCase(handleSuggestion.rejected, (state, action) => {
         state.isLoading = false;
@@ -278,15 +404,7 @@ const questionSlice = createSlice({
       })
       .addCase(submitGrades.fulfilled, (state, action) => {
         state.error = null;
-        const index = state.questions.findIndex(
-          (q) => q._id === action.payload._id
-        );
-        if (index !== -1) {
-          state.questions[index] = action.payload;
-        }
-        if (state.currentQuestion?._id === action.payload._id) {
-          state.currentQuestion = action.payload;
-        }
+        applyToCache(state, action.payload);
       })
       .addCase(submitGrades.rejected, (state, action) => {
         state.error = action.payload as string;
@@ -297,15 +415,7 @@ const questionSlice = createSlice({
       })
       .addCase(finalizeQuestion.fulfilled, (state, action) => {
         state.error = null;
-        const index = state.questions.findIndex(
-          (q) => q._id === action.payload._id
-        );
-        if (index !== -1) {
-          state.questions[index] = action.payload;
-        }
-        if (state.currentQuestion?._id === action.payload._id) {
-          state.currentQuestion = action.payload;
-        }
+        applyToCache(state, action.payload);
       })
       .addCase(finalizeQuestion.rejected, (state, action) => {
         state.error = action.payload as string;
@@ -323,7 +433,33 @@ const questionSlice = createSlice({
       })
       .addCase(deleteQuestion.rejected, (state, action) => {
         state.error = action.payload as string;
-      });
+      })
+      // Merge changes from the server into the cached list
+      .addCase(syncChanges.fulfilled, (state, action) => {
+        if (!state.syncCursor) {
+          return; // never loaded; the next fetch brings everything
+        }
+        const { questions, deleted, cursor } = action.payload;
+        state.questions = mergeById(
+          state.questions,
+          questions,
+          deleted.questions
+        );
+        state.syncCursor = cursor;
+        const current = state.currentQuestion;
+        if (current) {
+          state.currentQuestion = deleted.questions.includes(current._id)
+            ? null
+            : questions.find((q) => q._id === current._id) ?? current;
+        }
+      })
+      .addCase(liveEventReceived, (state, action) => {
+        if (action.payload.type !== "lecture-questions") {
+          applyToCache(state, action.payload);
+        }
+      })
+      // The cache belongs to the user who loaded it
+      .addCase(logout.fulfilled, () => initialState);
   },
 });
 
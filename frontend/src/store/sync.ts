@@ -0,0 +1,94 @@
+import { createAction, createAsyncThunk } from "@reduxjs/toolkit";
+import axios, { AxiosError } from "axios";
+import { SyncChanges } from "../types/sync";
+import { LiveEvent } from "../types/events";
+import { RootState } from ".";
+
+const API_URL = `${
+  import.meta.env.VITE_API_URL || "http://localhost:3000/api"
+}/sync/changes`;
+
+// Replace the items an update matches by _id, append new ones and drop the
+// removed ids, keeping the list in its existing order
+export const mergeById = <T extends { _id: string }>(
+  items: T[],
+  updates: T[],
+  removed: string[] = []
+): T[] => {
+  const merged = items.slice();
+  const positions = new Map(merged.map((item, i) => [item._id, i]));
+  for (const update of updates) {
+    const position = positions.get(update._id);
+    if (position === undefined) {
+      positions.set(update._id, merged.length);
+      merged.push(update);
+    } else {
+      merged[position] = update;
+    }
+  }
+  if (removed.length === 0) {
+    return merged;
+  }
+  const gone = new Set(removed);
+  return merged.filter((item) => !gone.has(item._id));
+};
+
+// Pages that mount together share one round of requests
+let inFlight: Promise<SyncChanges> | null = null;
+
+const requestChanges = async (since: string, token: string | null) => {
+  const changes: SyncChanges = {
+    cursor: since,
+    hasMore: true,
+    questions: [],
+    lectures: [],
+    lectureIds: [],
+    deleted: { questions: [] },
+  };
+  // Follow the cursor until the server has sent every change
+  while (changes.hasMore) {
+    const { data } = await axios.get<SyncChanges>(API_URL, {
+      params: { since: changes.cursor },
+      headers: { Authorization: `Bearer ${token}` },
+    });
+    changes.questions.push(...data.questions);
+    changes.lectures.push(...data.lectures);
+    changes.deleted.questions.push(...data.deleted.questions);
+    changes.lectureIds = data.lectureIds;
+    changes.cursor = data.cursor;
+    changes.hasMore = data.hasMore;
+  }
+  return changes;
+};
+
+// Fetch the questions and lectures changed since the cached lists were
+// loaded. Rejects when nothing is cached yet or the cursor has expired, in
+// which case the caller reloads in full.
+export const syncChanges = createAsyncThunk(
+  "sync/changes",
+  async (_, { getState, rejectWithValue }) => {
+    const { auth, questions, lectures } = getState() as RootState;
+    // Start from the older cursor so neither list misses a change
+    const since = [questions.syncCursor, lectures.syncCursor]
+      .filter((cursor): cursor is string => Boolean(cursor))
+      .sort((a, b) => parseInt(a, 10) - parseInt(b, 10))[0];
+    if (!since) {
+      return rejectWithValue("Nothing to sync");
+    }
+    try {
+      inFlight = inFlight || requestChanges(since, auth.token);
+      return await inFlight;
+    } catch (error) {
+      const err = error as AxiosError<{ message: string }>;
+      return rejectWithValue(
+        err.response?.data?.message || "Failed to sync changes"
+      );
+    } finally {
+      inFlight = null;
+    }
+  }
+);
+
+// Dispatched for each event from GET /api/events (see hooks/useLiveEvents);
+// the question and lecture slices apply it to their cached lists in place
+export const liveEventReceived = createAction<LiveEvent>("events/received");
@@ -0,0 +1,50 @@
+import {
+  EditSuggestion,
+  FacultyComment,
+  GradeStats,
+  SuggestionStats,
+} from "./question";
+
+// What a mutation changed, as sent by GET /api/events and returned by the
+// mutation itself with ?return=patch
+export type QuestionChange = { question: string } & (
+  | {
+      type: "grades";
+      gradeStats: GradeStats;
+      answers: { _id: string; gradeStats: GradeStats }[];
+    }
+  | {
+      type: "suggestion";
+      suggestion: EditSuggestion;
+      suggestionStats: SuggestionStats;
+    }
+  | {
+      type: "suggestion-status";
+      suggestion: Pick<EditSuggestion, "status" | "rebuttalComment"> & {
+        _id: string;
+      };
+      suggestionStats: SuggestionStats;
+    }
+  | { type: "finalized" }
+  | { type: "comment"; comment: FacultyComment }
+);
+
+export interface LectureQuestionsChange {
+  type: "lecture-questions";
+  lecture: string;
+  added?: string[];
+  removed?: string[];
+}
+
+// Events sent by GET /api/events. `at` is when the server recorded the event
+// (ms since the epoch); `id` is its Last-Event-ID.
+interface EventBase {
+  id: string;
+  at: number;
+}
+
+export type QuestionEvent = EventBase & QuestionChange;
+
+export type LectureQuestionsEvent = EventBase & LectureQuestionsChange;
+
+export type LiveEvent = QuestionEvent | LectureQuestionsEvent;
@@ -29,4 +29,5 @@ export interface LectureState {
   activeLecture: Lecture | null;
   loading: boolean;
   error: string | null;
+  syncCursor: string | null; // where GET /api/sync/changes resumes
 }
@@ -1,10 +1,24 @@
 import { User } from "./auth";
 
+export interface GradeStats {
+  count: number;
+  sum: number;
+  distribution: number[];
+}
+
+export interface SuggestionStats {
+  count: number;
+  pending: number;
+  accepted: number;
+  rejected: number;
+}
+
 export interface Answer {
   _id?: string;
   text: string;
   isCorrect: boolean;
   grades: Grade[];
+  gradeStats?: GradeStats;
 }
 
 export interface Grade {
@@ -23,11 +37,17 @@ export interface EditSuggestion {
 }
 
 export interface FacultyComment {
+  _id?: string;
   faculty: User;
   comment: string;
   createdAt: Date;
 }
 
+export interface PossibleDuplicate {
+  question: string;
+  similarity: number;
+}
+
 export interface Question {
   _id: string;
   owner: User;
@@ -37,6 +57,9 @@ export interface Question {
   editSuggestions: EditSuggestion[];
   grades: Grade[];
   facultyComments: FacultyComment[];
+  possibleDuplicates?: PossibleDuplicate[];
+  gradeStats?: GradeStats;
+  suggestionStats?: SuggestionStats;
   createdAt: Date;
   updatedAt: Date;
 }
@@ -46,6 +69,7 @@ export interface QuestionState {
   currentQuestion: Question | null;
   isLoading: boolean;
   error: string | null;
+  syncCursor: string | null; // where GET /api/sync/changes resumes
 }
 
 export interface CreateQuestionData {
@@ -0,0 +1,14 @@
+import { Question } from "./question";
+import { Lecture } from "./lecture";
+
+// Response of GET /api/sync/changes
+export interface SyncChanges {
+  cursor: string;
+  hasMore: boolean;
+  questions: Question[];
+  lectures: Lecture[];
+  lectureIds: string[]; // every lecture the user can still see
+  deleted: {
+    questions: string[];
+  };
+}
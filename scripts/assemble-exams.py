@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Assemble personalised practice exams through POST /api/lectures/:id/exams.
+
+The server draws --count finalized questions from the lecture for every
+enrolled student (or only those passed with --student), weighted towards
+better graded questions, with at most --max-per-owner questions by the same
+author and none the student was given in the last --recent-days. Exams are
+streamed back one per line and written to --out-dir as one file per student
+in the chosen export format, with a manifest.csv listing each student's
+questions. Pass --seed to make a run reproducible; the seed used is always
+printed. --dry-run draws the exams without recording them, so the next run
+does not treat them as already seen.
+
+Usage:
+    python3 scripts/assemble-exams.py <lectureId> --email smith@example.com --count 20 --format qti
+    python3 scripts/assemble-exams.py <lectureId> --min-score 2.2 --min-grades 5 --seed week-7 --out-dir exams/week-7
+    python3 scripts/assemble-exams.py <lectureId> --student <userId> --student <userId> --dry-run
+"""
+
+import os
+import re
+import csv
+import sys
+import json
+import time
+import getpass
+import argparse
+import requests
+
+BASE_URL = "http://localhost:3000/api"
+EXTENSIONS = {"csv": "csv", "jsonl": "jsonl", "qti": "xml", "gift": "gift"}
+
+
+def login(base_url: str, email: str, password: str) -> str:
+    response = requests.post(f"{base_url}/users/login", json={"email": email, "password": password}, timeout=30)
+    if not response.ok:
+        raise SystemExit(f"Login failed ({response.status_code}): {response.text}")
+    return response.json()["token"]
+
+
+def exam_filename(student: dict, extension: str) -> str:
+    """File name for a student's exam: their email, else their id, made path-safe"""
+    name = student.get("email") or student["_id"]
+    return re.sub(r"[^A-Za-z0-9@._-]", "_", name) + f".{extension}"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Assemble personalised practice exams for a lecture")
+    parser.add_argument("lecture", help="Lecture id")
+    parser.add_argument("--base-url", default=BASE_URL, help=f"API base URL (default: {BASE_URL})")
+    parser.add_argument("--email", help="Faculty account that owns the lecture")
+    parser.add_argument("--password", help="Its password (default: $EXAMS_PASSWORD, else prompt)")
+    parser.add_argument("--token", help="Use this JWT instead of logging in")
+    parser.add_argument("--count", type=int, default=20, help="Questions per exam (default: 20)")
+    parser.add_argument("--format", choices=sorted(EXTENSIONS), default="jsonl")
+    parser.add_argument("--min-score", type=float, help="Lowest mean question grade (1-3) a question may have")
+    parser.add_argument("--min-grades", type=int, help="Fewest question grades a question may have")
+    parser.add_argument("--max-per-owner", type=int, help="Most questions per author in one exam (default: count / 5)")
+    parser.add_argument("--recent-days", type=int,
+                        help="Avoid questions a student was given this many days back (server default: 30)")
+    parser.add_argument("--seed", help="Seed for the draw (default: random, printed at the end)")
+    parser.add_argument("--student", action="append", help="Only assemble for this student id (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Draw the exams without recording them")
+    parser.add_argument("--out-dir", help="Directory for the exams (default: exams-<lecture>-<seed>)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    base_url = args.base_url.rstrip("/")
+    token = args.token
+    if not token:
+        if not args.email:
+            raise SystemExit("Pass --email (and --password) or --token")
+        password = args.password or os.environ.get("EXAMS_PASSWORD") or getpass.getpass(f"Password for {args.email}: ")
+        token = login(base_url, args.email, password)
+
+    body = {
+        "count": args.count,
+        "format": args.format,
+        "minScore": args.min_score,
+        "minGrades": args.min_grades,
+        "maxPerOwner": args.max_per_owner,
+        "recentDays": args.recent_days,
+        "seed": args.seed,
+        "students": args.student,
+        "dryRun": args.dry_run,
+    }
+    started = time.perf_counter()
+    response = requests.post(
+        f"{base_url}/lectures/{args.lecture}/exams", json={k: v for k, v in body.items() if v is not None},
+        headers={"Authorization": f"Bearer {token}"}, stream=True, timeout=600,
+    )
+    if not response.ok:
+        raise SystemExit(f"Assembly failed ({response.status_code}): {response.text}")
+
+    out_dir = None
+    manifest = None
+    manifest_file = None
+    summary = None
+    written = 0
+    try:
+        for line in response.iter_lines():
+            if not line:
+                continue
+            message = json.loads(line)
+            if message["type"] == "exam":
+                if out_dir is None:
+                    out_dir = args.out_dir or f"exams-{args.lecture}-{message['seed']}"
+                    os.makedirs(out_dir, exist_ok=True)
+                    manifest_file = open(os.path.join(out_dir, "manifest.csv"), "w", newline="", encoding="utf-8")
+                    manifest = csv.writer(manifest_file)
+                    manifest.writerow(["student", "name", "email", "file", "questions", "repeats", "over_owner_cap"])
+                student = message["student"]
+                filename = exam_filename(student, EXTENSIONS[args.format])
+                with open(os.path.join(out_dir, filename), "w", encoding="utf-8", newline="") as f:
+                    f.write(message["content"])
+                manifest.writerow([student["_id"], student.get("name", ""), student.get("email", ""), filename,
+                                   ";".join(message["questions"]), message["repeats"], message["overOwnerCap"]])
+                written += 1
+            elif message["type"] == "summary":
+                summary = message
+            else:
+                print(f"Assembly stopped after {written} exams: {message['message']}")
+                sys.exit(2)
+    finally:
+        if manifest_file:
+            manifest_file.close()
+    if summary is None:
+        print(f"Assembly stopped after {written} exams: connection closed before the summary")
+        sys.exit(2)
+
+    elapsed = time.perf_counter() - started
+    prefix = "Dry run: " if summary["dryRun"] else ""
+    print(f"{prefix}{summary['exams']} exams of {summary['count']} questions in {elapsed:.1f}s, seed {summary['seed']}")
+    print(f"  pool: {summary['eligible']} of {summary['finalized']} finalized questions eligible, "
+          f"{summary['distinctQuestions']} used")
+    if summary["short"]:
+        print(f"  {summary['short']} exams are short: the pool has fewer than {summary['count']} questions")
+    if summary["repeats"] or summary["overOwnerCap"]:
+        print(f"  relaxed: {summary['repeats']} recent repeats, {summary['overOwnerCap']} questions over the owner cap")
+    if out_dir:
+        print(f"Exams written to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
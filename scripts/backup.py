@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""Parallel, compressed and incremental MongoDB backups with an integrity manifest.
+
+Each collection is dumped by its own gzip-compressed mongodump process, a few
+at a time. An incremental backup only dumps the documents whose updatedAt
+(createdAt for the append-only scoreevents ledger) is newer than the start of
+the backup it builds on, plus the list of _ids still present in each
+collection so that deletions are restored too. Every backup writes
+manifest.json with per-collection document counts, sizes and SHA-256
+checksums.
+
+Restoring verifies the checksums of every backup in the chain first. A
+collection from a full backup is handed to mongorestore as is; for an
+incremental chain the newest copy of each live document is merged into a
+staging file first. Collections are restored in parallel, and each restore is
+checked against the expected document count.
+
+Usage:
+    python3 scripts/backup.py dump [--name NAME] [--jobs 4]
+    python3 scripts/backup.py dump --incremental [--base NAME]
+    python3 scripts/backup.py verify NAME
+    python3 scripts/backup.py restore NAME [--jobs 4] [--collections users,questions]
+    python3 scripts/backup.py list
+
+Environment variables:
+    MONGODB_URI   Override the MongoDB connection URI
+    MONGODB_HOST  Override the MongoDB host (default: localhost)
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import datetime
+import subprocess
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from mcq_bson import decode, iter_raw_stream
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BACKUPS_DIR = PROJECT_ROOT / "backups"
+MONGO_DB = "mcq-writing-app"
+MANIFEST = "manifest.json"
+
+# Collections of the Mongoose models and the timestamp an incremental backup
+# filters on. Collections found in the database but not listed here are
+# always dumped in full.
+COLLECTIONS = {
+    "users": "updatedAt",
+    "lectures": "updatedAt",
+    "questions": "updatedAt",
+    "gradebuckets": "updatedAt",
+    "suggestionbuckets": "updatedAt",
+    "lecturescores": "updatedAt",
+    "scoringconfigs": "updatedAt",
+    "scoreevents": "createdAt",
+}
+
+# Timestamps are set by the application servers' clocks, so an incremental
+# backup starts this long before the previous backup did. Documents dumped
+# twice are harmless: the newest copy wins on restore.
+CLOCK_SKEW_MARGIN = datetime.timedelta(minutes=5)
+
+RESTORE_SUMMARY = re.compile(r"(\d+) document\(s\) restored successfully\. (\d+) document\(s\) failed")
+
+
+def mongo_uri() -> str:
+    """Connection URI, detected the same way as backup-db.sh"""
+    if os.environ.get("MONGODB_URI"):
+        return os.environ["MONGODB_URI"]
+    if os.environ.get("MONGODB_HOST"):
+        return f"mongodb://{os.environ['MONGODB_HOST']}:27017/{MONGO_DB}"
+    if os.path.exists("/.dockerenv") and not os.path.exists("/usr/local/share/docker-init.sh"):
+        return f"mongodb://mongodb:27017/{MONGO_DB}"
+    return f"mongodb://localhost:27017/{MONGO_DB}"
+
+
+def database_name(uri: str) -> str:
+    return urlparse(uri).path.lstrip("/") or MONGO_DB
+
+
+def require_tool(name: str):
+    if not shutil.which(name):
+        raise SystemExit(f"Error: {name} command not found\nPlease install MongoDB Database Tools")
+
+
+def iso(when: datetime.datetime) -> str:
+    return when.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def parse_iso(text: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(text.replace("Z", "+00:00"))
+
+
+def list_collections(uri: str) -> List[str]:
+    """Collections in the database, via mongosh when available"""
+    if shutil.which("mongosh"):
+        result = subprocess.run(
+            ["mongosh", uri, "--quiet", "--eval", "db.getCollectionNames().join('\\n')"],
+            capture_output=True, text=True,
+        )
+        if result.returncode == 0:
+            names = [name for name in result.stdout.split() if not name.startswith("system.")]
+            if names:
+                return sorted(names)
+    print("mongosh not available, backing up the known model collections", file=sys.stderr)
+    return list(COLLECTIONS)
+
+
+# Manifests
+
+def load_manifest(name: str) -> Dict[str, Any]:
+    path = BACKUPS_DIR / name / MANIFEST
+    if not path.exists():
+        raise SystemExit(f"Error: {path} not found (backups made by backup-db.sh have no manifest)")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def all_manifests() -> List[Dict[str, Any]]:
+    manifests = []
+    if BACKUPS_DIR.exists():
+        for path in BACKUPS_DIR.glob(f"*/{MANIFEST}"):
+            with open(path, "r", encoding="utf-8") as f:
+                manifests.append(json.load(f))
+    return sorted(manifests, key=lambda m: m["startedAt"])
+
+
+def backup_chain(name: str) -> List[Dict[str, Any]]:
+    """The backup and the backups it builds on, newest first, ending with a full backup"""
+    chain = [load_manifest(name)]
+    while chain[-1]["type"] == "incremental":
+        chain.append(load_manifest(chain[-1]["base"]))
+    return chain
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def summarize_dump(path: Path) -> Dict[str, Any]:
+    """Document count, uncompressed size and checksum of a .bson.gz file"""
+    documents = size = 0
+    with gzip.open(path, "rb") as stream:
+        for raw in iter_raw_stream(stream):
+            documents += 1
+            size += len(raw)
+    return {"documents": documents, "bytes": size, "sha256": file_digest(path)}
+
+
+def summarize_ids(path: Path) -> Dict[str, Any]:
+    with gzip.open(path, "rb") as f:
+        count = sum(1 for _ in f)
+    return {"count": count, "sha256": file_digest(path)}
+
+
+# Dump
+
+def dump_ids(uri: str, collection: str, path: Path):
+    """Write the _ids of every document in a collection, one hex string per line"""
+    process = subprocess.Popen(
+        ["mongoexport", f"--uri={uri}", f"--collection={collection}", "--fields=_id", "--type=json", "--quiet"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    with gzip.open(path, "wt", encoding="utf-8") as out:
+        for line in process.stdout:
+            value = json.loads(line)["_id"]
+            if not isinstance(value, dict) or "$oid" not in value:
+                process.kill()
+                raise RuntimeError(f"{collection}: incremental backups need ObjectId _ids")
+            out.write(value["$oid"] + "\n")
+    if process.wait() != 0:
+        raise RuntimeError(f"mongoexport {collection} failed: {process.stderr.read().strip()}")
+
+
+def dump_collection(uri: str, backup_dir: Path, collection: str, since: Optional[datetime.datetime]) -> Dict[str, Any]:
+    started = time.monotonic()
+    field = COLLECTIONS.get(collection) if since else None
+    db = database_name(uri)
+    if field:
+        # Listed before the dump, so every live _id has a copy in this backup
+        # or an earlier one
+        (backup_dir / db).mkdir(parents=True, exist_ok=True)
+        dump_ids(uri, collection, backup_dir / db / f"{collection}.ids.gz")
+    command = ["mongodump", f"--uri={uri}", f"--collection={collection}", "--gzip", f"--out={backup_dir}"]
+    if field:
+        command.append("--query=" + json.dumps({field: {"$gte": {"$date": iso(since)}}}))
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"mongodump {collection} failed: {result.stderr.strip()}")
+
+    entry = {"file": f"{db}/{collection}.bson.gz", "field": field, "since": iso(since) if field else None}
+    entry.update(summarize_dump(backup_dir / entry["file"]))
+    if field:
+        ids_file = f"{db}/{collection}.ids.gz"
+        entry["ids"] = {"file": ids_file, **summarize_ids(backup_dir / ids_file)}
+    entry["seconds"] = round(time.monotonic() - started, 2)
+    print(f"  {collection}: {entry['documents']} documents, {entry['bytes'] / 1e6:.1f} MB in {entry['seconds']}s")
+    return entry
+
+
+def dump(args) -> int:
+    require_tool("mongodump")
+    uri = mongo_uri()
+    base = None
+    since = None
+    if args.incremental:
+        require_tool("mongoexport")
+        if args.base:
+            base = load_manifest(args.base)
+        else:
+            manifests = all_manifests()
+            if not manifests:
+                raise SystemExit("Error: no earlier backup with a manifest to build on")
+            base = manifests[-1]
+        since = parse_iso(base["startedAt"]) - CLOCK_SKEW_MARGIN
+
+    started = datetime.datetime.now(datetime.timezone.utc)
+    name = args.name or f"backup_{started.astimezone().strftime('%Y%m%d_%H%M%S')}"
+    backup_dir = BACKUPS_DIR / name
+    if backup_dir.exists():
+        raise SystemExit(f"Error: backup directory already exists: {backup_dir}")
+    backup_dir.mkdir(parents=True)
+
+    collections = args.collections.split(",") if args.collections else list_collections(uri)
+    kind = "incremental" if base else "full"
+    print(f"Starting {kind} backup {name} of {len(collections)} collections"
+          + (f" (changes since {base['name']})" if base else ""))
+    print(f"Using MongoDB URI: {uri}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+            entries = dict(zip(collections, pool.map(
+                lambda collection: dump_collection(uri, backup_dir, collection, since), collections
+            )))
+    except RuntimeError as e:
+        print(f"Error: Backup failed: {e}", file=sys.stderr)
+        shutil.rmtree(backup_dir, ignore_errors=True)
+        return 1
+
+    manifest = {
+        "name": name,
+        "type": kind,
+        "base": base["name"] if base else None,
+        "startedAt": iso(started),
+        "finishedAt": iso(datetime.datetime.now(datetime.timezone.utc)),
+        "uri": uri,
+        "database": database_name(uri),
+        "collections": entries,
+    }
+    with open(backup_dir / MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    # Same fields as backup-db.sh writes, so restore-db.sh and the demo tooling recognise the backup
+    with open(backup_dir / "backup_info.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": manifest["startedAt"],
+            "name": name,
+            "type": "incremental" if base else ("demo" if name.startswith("demo") else "regular"),
+            "uri": uri,
+            "manifest": MANIFEST,
+        }, f, indent=4)
+
+    total = sum(entry["documents"] for entry in entries.values())
+    elapsed = (parse_iso(manifest["finishedAt"]) - started).total_seconds()
+    print(f"Backup completed: {total} documents in {elapsed:.1f}s")
+    print(f"Backup location: {backup_dir}")
+    return 0
+
+
+# Verify
+
+def verify_backup(manifest: Dict[str, Any], jobs: int) -> List[str]:
+    backup_dir = BACKUPS_DIR / manifest["name"]
+
+    def check(item):
+        collection, entry = item
+        problems = []
+        path = backup_dir / entry["file"]
+        if not path.exists():
+            return [f"{manifest['name']}/{collection}: {entry['file']} is missing"]
+        if file_digest(path) != entry["sha256"]:
+            return [f"{manifest['name']}/{collection}: checksum does not match the manifest"]
+        try:
+            actual = summarize_dump(path)
+        except (OSError, EOFError, ValueError, zlib.error) as e:
+            return [f"{manifest['name']}/{collection}: unreadable ({e})"]
+        for key in ("sha256", "documents", "bytes"):
+            if actual[key] != entry[key]:
+                problems.append(f"{manifest['name']}/{collection}: {key} {actual[key]} != manifest {entry[key]}")
+        if "ids" in entry:
+            ids_path = backup_dir / entry["ids"]["file"]
+            if not ids_path.exists() or file_digest(ids_path) != entry["ids"]["sha256"]:
+                problems.append(f"{manifest['name']}/{collection}: {entry['ids']['file']} does not match the manifest")
+        return problems
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return [problem for problems in pool.map(check, manifest["collections"].items()) for problem in problems]
+
+
+def verify(args) -> int:
+    problems = []
+    for manifest in backup_chain(args.name):
+        found = verify_backup(manifest, args.jobs)
+        print(f"{manifest['name']} ({manifest['type']}): {'OK' if not found else f'{len(found)} problems'}")
+        problems.extend(found)
+    for problem in problems:
+        print(f"  {problem}")
+    return 1 if problems else 0
+
+
+# Restore
+
+def raw_id(raw: bytes) -> bytes:
+    """ObjectId bytes of a raw document; _id is the first field of every stored document"""
+    if raw[4] == 0x07 and raw[5:9] == b"_id\x00":
+        return raw[9:21]
+    return decode(raw)["_id"].binary
+
+
+def merge_chain(chain: List[Dict[str, Any]], collection: str, staging: Path, db: str) -> int:
+    """Write the newest copy of every live document of an incremental chain to staging"""
+    newest = chain[0]
+    with gzip.open(BACKUPS_DIR / newest["name"] / newest["collections"][collection]["ids"]["file"], "rt") as f:
+        live = {bytes.fromhex(line.strip()) for line in f if line.strip()}
+
+    seen = set()
+    written = 0
+    with gzip.open(staging / db / f"{collection}.bson.gz", "wb", compresslevel=1) as out:
+        for manifest in chain:
+            entry = manifest["collections"].get(collection)
+            if entry is None:
+                continue
+            with gzip.open(BACKUPS_DIR / manifest["name"] / entry["file"], "rb") as stream:
+                for raw in iter_raw_stream(stream):
+                    key = raw_id(raw)
+                    if key in seen or key not in live:
+                        continue
+                    seen.add(key)
+                    out.write(raw)
+                    written += 1
+            if not entry["field"]:
+                break
+    if written != len(live):
+        # Deleted while the incremental backup was being taken
+        print(f"  {collection}: {len(live) - written} listed documents have no copy in the backup chain")
+    return written
+
+
+def restore_collection(uri: str, chain: List[Dict[str, Any]], collection: str, staging: Path,
+                       workers: int) -> Dict[str, Any]:
+    started = time.monotonic()
+    newest = chain[0]
+    db = database_name(uri)
+    entry = newest["collections"][collection]
+    source_db = newest["database"]
+
+    if entry["field"]:
+        # One staging directory per collection, so mongorestore never sees
+        # another collection's half-written file
+        source_dir = staging / collection
+        (source_dir / db).mkdir(parents=True, exist_ok=True)
+        expected = merge_chain(chain, collection, source_dir, db)
+        metadata = BACKUPS_DIR / newest["name"] / source_db / f"{collection}.metadata.json.gz"
+        if metadata.exists():
+            shutil.copy(metadata, source_dir / db / metadata.name)
+        namespace = [f"--nsInclude={db}.{collection}"]
+    else:
+        source_dir = BACKUPS_DIR / newest["name"]
+        expected = entry["documents"]
+        namespace = [f"--nsInclude={source_db}.{collection}"]
+        if source_db != db:
+            namespace += [f"--nsFrom={source_db}.{collection}", f"--nsTo={db}.{collection}"]
+
+    result = subprocess.run(
+        ["mongorestore", f"--uri={uri}", "--gzip", "--drop", *namespace,
+         f"--numInsertionWorkersPerCollection={workers}", str(source_dir)],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"mongorestore {collection} failed: {result.stderr.strip()}")
+    summary = RESTORE_SUMMARY.search(result.stderr)
+    restored, failed = (int(summary.group(1)), int(summary.group(2))) if summary else (None, None)
+    seconds = round(time.monotonic() - started, 2)
+    ok = restored == expected and failed == 0
+    print(f"  {collection}: {restored}/{expected} documents restored in {seconds}s{'' if ok else '  MISMATCH'}")
+    return {"collection": collection, "expected": expected, "restored": restored, "failed": failed, "ok": ok}
+
+
+def restore(args) -> int:
+    require_tool("mongorestore")
+    uri = mongo_uri()
+    chain = backup_chain(args.name)
+    print(f"Verifying {len(chain)} backup(s): {' <- '.join(m['name'] for m in reversed(chain))}")
+    problems = [problem for manifest in chain for problem in verify_backup(manifest, args.jobs)]
+    if problems:
+        for problem in problems:
+            print(f"  {problem}")
+        print("Error: backup verification failed, nothing was restored", file=sys.stderr)
+        return 1
+
+    collections = list(chain[0]["collections"])
+    if args.collections:
+        wanted = args.collections.split(",")
+        unknown = set(wanted) - set(collections)
+        if unknown:
+            raise SystemExit(f"Error: not in backup {args.name}: {', '.join(sorted(unknown))}")
+        collections = wanted
+
+    if chain[0]["uri"] != uri:
+        print(f"Warning: Current MongoDB URI ({uri}) differs from backup URI ({chain[0]['uri']})")
+    print(f"Restoring {len(collections)} collections into {uri}")
+
+    staging = BACKUPS_DIR / f".restore-{args.name}-{os.getpid()}"
+    try:
+        with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(
+                lambda collection: restore_collection(uri, chain, collection, staging, args.insertion_workers),
+                collections,
+            ))
+    except RuntimeError as e:
+        print(f"Error: Database restore failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    failed = [result["collection"] for result in results if not result["ok"]]
+    if failed:
+        print(f"Error: restored document counts do not match for {', '.join(failed)}", file=sys.stderr)
+        return 1
+    print("Database restore completed and verified.")
+    print("Run 'node scripts/rebuild-leaderboard.js' to recreate missing indexes and lecture leaderboards.")
+    return 0
+
+
+def list_backups(args) -> int:
+    for manifest in all_manifests():
+        entries = manifest["collections"].values()
+        documents = sum(entry["documents"] for entry in entries)
+        size = sum(entry["bytes"] for entry in entries)
+        base = f" <- {manifest['base']}" if manifest["base"] else ""
+        print(f"{manifest['name']:32} {manifest['type']:11} {manifest['startedAt']}  "
+              f"{documents:>10} docs {size / 1e6:>9.1f} MB{base}")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Parallel, compressed and incremental MongoDB backups")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--jobs", type=int, default=4, help="Collections dumped, verified or restored at once")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    dump_parser = commands.add_parser("dump", parents=[common], help="Back up the database")
+    dump_parser.add_argument("--name", help="Backup name (default: backup_YYYYMMDD_HHMMSS)")
+    dump_parser.add_argument("--incremental", action="store_true",
+                             help="Only dump documents changed since the base backup")
+    dump_parser.add_argument("--base", help="Backup an incremental builds on (default: the latest)")
+    dump_parser.add_argument("--collections", help="Comma-separated collections (default: all)")
+    dump_parser.set_defaults(run=dump)
+
+    verify_parser = commands.add_parser("verify", parents=[common], help="Check a backup and its base backups against their manifests")
+    verify_parser.add_argument("name")
+    verify_parser.set_defaults(run=verify)
+
+    restore_parser = commands.add_parser("restore", parents=[common], help="Verify and restore a backup, replacing the collections")
+    restore_parser.add_argument("name")
+    restore_parser.add_argument("--collections", help="Comma-separated collections (default: all in the backup)")
+    restore_parser.add_argument("--insertion-workers", type=int, default=2,
+                                help="mongorestore insertion workers per collection")
+    restore_parser.set_defaults(run=restore)
+
+    list_parser = commands.add_parser("list", help="List backups that have a manifest")
+    list_parser.set_defaults(run=list_backups)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sys.exit(args.run(args))
+
+
+if __name__ == "__main__":
+    main()
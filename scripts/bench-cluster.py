@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Measure how API throughput scales with the number of cluster workers.
+
+For each worker count the backend is started with src/cluster.js
+(CLUSTER_WORKERS=N; 0 runs src/server.js as a single process), then the
+open-loop load generator from loadgen.py offers a ladder of arrival rates.
+The highest rate a configuration sustains, with p99 latency under the SLO,
+an error rate under --max-error-rate and no client-side drops, is its
+capacity. Each server is stopped with SIGTERM, so the report also records how
+long a graceful drain took.
+
+The database must already hold seeded accounts, and MONGO_URI / JWT_SECRET
+must be set the way `npm start` expects (a .env file works). Write
+operations in the mix change the data, so reseed or restore a backup between
+runs that should be compared.
+
+Usage:
+    python3 scripts/create-demo-data.py --scale 2000
+    python3 scripts/bench-cluster.py --scale 2000 --workers 1,2,4
+    python3 scripts/bench-cluster.py --scale 2000 --workers 0,1,4 --rates 50,100,200,400 --slo-p99-ms 250
+"""
+
+import os
+import sys
+import json
+import signal
+import argparse
+import threading
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from demo_dataset import DatasetGenerator, load_profile
+from loadgen import ApiClient, LoadGenerator, DEFAULT_MIX, REPORTS_DIR, git_commit, parse_mix
+from perf_stats import EndpointStats, LatencyHistogram
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+READY_TIMEOUT = 60
+
+
+class BackendProcess:
+    """The API started as a child process, with its output kept in a log file"""
+
+    def __init__(self, workers: int, port: int, log_path: Path):
+        self.workers = workers
+        self.port = port
+        self.log_path = log_path
+        self.ready = threading.Event()
+        self.process: Optional[subprocess.Popen] = None
+
+    def start(self):
+        entry = "src/server.js" if self.workers == 0 else "src/cluster.js"
+        env = {**os.environ, "PORT": str(self.port), "CLUSTER_WORKERS": str(self.workers)}
+        self.process = subprocess.Popen(
+            ["node", entry], cwd=PROJECT_ROOT, env=env, text=True,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        )
+        threading.Thread(target=self._pump, daemon=True).start()
+        if not self.ready.wait(READY_TIMEOUT) or self.process.poll() is not None:
+            self.stop()
+            raise SystemExit(f"Backend with {self.workers} workers did not start; see {self.log_path}")
+        # Workers listen before their database connection is up
+        time.sleep(2)
+
+    def _pump(self):
+        marker = "Server is running on port" if self.workers == 0 else "workers listening on port"
+        with open(self.log_path, "w", encoding="utf-8") as log:
+            for line in self.process.stdout:
+                log.write(line)
+                log.flush()
+                if marker in line:
+                    self.ready.set()
+        self.ready.set()
+
+    def stop(self, timeout: float = 30) -> Optional[float]:
+        """SIGTERM the server and return how long it took to drain, or None if it had to be killed"""
+        if self.process is None or self.process.poll() is not None:
+            return None
+        started = time.monotonic()
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+            return None
+        return time.monotonic() - started
+
+
+def step_result(rate: float, load: LoadGenerator, stats: EndpointStats) -> Dict[str, Any]:
+    overall = LatencyHistogram()
+    for histogram in stats.histograms.values():
+        overall.merge(histogram)
+    totals = stats.totals()
+    return {
+        "rate": rate,
+        "rps": totals["rps"],
+        "count": totals["count"],
+        "errors": totals["errors"] + load.failures,
+        "dropped": load.dropped,
+        "p50": overall.percentile(50),
+        "p95": overall.percentile(95),
+        "p99": overall.percentile(99),
+    }
+
+
+def sustained(step: Dict[str, Any], args) -> bool:
+    error_rate = step["errors"] / step["count"] if step["count"] else 1.0
+    return (
+        step["dropped"] == 0
+        and error_rate <= args.max_error_rate
+        and step["p99"] <= args.slo_p99_ms
+    )
+
+
+def run_level(workers: int, args, accounts: Dict[str, List], shared: Dict[str, Any], run_name: str) -> Dict[str, Any]:
+    base_url = f"http://localhost:{args.port}/api"
+    backend = BackendProcess(workers, args.port, Path(args.report_dir or REPORTS_DIR) / f"{run_name}-w{workers}.log")
+    label = "single process" if workers == 0 else f"{workers} workers"
+    print(f"\n== {label} ==")
+    backend.start()
+    try:
+        if not shared:
+            seed_client = LoadGenerator(ApiClient(base_url), seed=args.seed)
+            print(f"Logging in {len(accounts['faculty'])} faculty and {len(accounts['students'])} students...")
+            seed_client.login_accounts(accounts["faculty"], "faculty")
+            seed_client.login_accounts(accounts["students"], "student")
+            if not seed_client.students:
+                raise SystemExit("No student accounts could log in; seed data with create-demo-data.py first")
+            seed_client.load_questions()
+            # Tokens and the open-question pool carry over to later levels and steps
+            shared.update(students=seed_client.students, faculty=seed_client.faculty,
+                          open_questions=seed_client.open_questions)
+
+        steps = []
+        for rate in args.rates:
+            client = ApiClient(base_url)
+            load = LoadGenerator(client, seed=args.seed, max_in_flight=args.max_in_flight)
+            load.students, load.faculty, load.open_questions = (
+                shared["students"], shared["faculty"], shared["open_questions"])
+            load.run(args.mix, rate, args.step_duration, args.warmup)
+            step = step_result(rate, load, client.stats)
+            step["sustained"] = sustained(step, args)
+            steps.append(step)
+            print(f"  {rate:>7g} req/s offered: {step['rps']:7.1f} achieved, p99 {step['p99']:7.1f} ms, "
+                  f"{step['errors']} errors, {step['dropped']} dropped{'' if step['sustained'] else '  (saturated)'}")
+            if not step["sustained"]:
+                break
+    finally:
+        drain = backend.stop()
+
+    best = max((s for s in steps if s["sustained"]), key=lambda s: s["rps"], default=None)
+    return {
+        "workers": workers,
+        "steps": steps,
+        "capacityRps": best["rps"] if best else 0.0,
+        # Every rate held up, so the real capacity lies above the ladder
+        "ladderExhausted": bool(steps) and steps[-1]["sustained"],
+        "p99AtCapacity": best["p99"] if best else None,
+        "shutdownSeconds": drain,
+    }
+
+
+def render_markdown(report: Dict[str, Any]) -> str:
+    """Render the scaling results in the style of STATISTICS.md"""
+    lines = [
+        "# Cluster Scaling Report",
+        f"Generated on {report['generatedAt']}",
+        f"Commit: {report.get('commit') or 'unknown'}",
+        "",
+        "## Configuration",
+    ]
+    lines += [f"- {key}: {value}" for key, value in report["config"].items()]
+    lines += [
+        "",
+        "## Capacity",
+        "",
+        "| Workers | Capacity req/s | Speedup | Efficiency | p99 ms at capacity | Drain s |",
+        "|---:|---:|---:|---:|---:|---:|",
+    ]
+    for level in report["levels"]:
+        p99 = f"{level['p99AtCapacity']:.1f}" if level["p99AtCapacity"] is not None else "-"
+        drain = f"{level['shutdownSeconds']:.1f}" if level["shutdownSeconds"] is not None else "killed"
+        efficiency = f"{level['efficiency']:.0%}" if level.get("efficiency") is not None else "-"
+        lines.append(
+            f"| {level['workers'] or 'single'} | {'>= ' if level['ladderExhausted'] else ''}"
+            f"{level['capacityRps']:.1f} | {level.get('speedup', 0):.2f}x | "
+            f"{efficiency} | {p99} | {drain} |"
+        )
+    lines += [
+        "",
+        "## Steps",
+        "",
+        "| Workers | Offered req/s | Achieved req/s | Errors | Dropped | p50 ms | p95 ms | p99 ms | Sustained |",
+        "|---:|---:|---:|---:|---:|---:|---:|---:|---|",
+    ]
+    for level in report["levels"]:
+        for step in level["steps"]:
+            lines.append(
+                f"| {level['workers'] or 'single'} | {step['rate']:g} | {step['rps']:.1f} | {step['errors']} | "
+                f"{step['dropped']} | {step['p50']:.1f} | {step['p95']:.1f} | {step['p99']:.1f} | "
+                f"{'yes' if step['sustained'] else 'no'} |"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark API throughput against cluster worker count")
+    parser.add_argument("--workers", default=f"1,2,{os.cpu_count() or 4}",
+                        help="Comma-separated worker counts; 0 = single process (default: 1,2,<cpus>)")
+    parser.add_argument("--rates", default="25,50,100,200,400,800,1600",
+                        help="Arrival rate ladder in req/s (default: 25,50,...,1600)")
+    parser.add_argument("--step-duration", type=float, default=20, help="Measured seconds per rate (default: 20)")
+    parser.add_argument("--warmup", type=float, default=3, help="Unrecorded warm-up per rate (default: 3)")
+    parser.add_argument("--slo-p99-ms", type=float, default=500, help="p99 latency a rate must stay under")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate a rate must stay under")
+    parser.add_argument("--mix", help=f"Operation weights as for create-demo-data.py load "
+                                      f"(operations: {', '.join(DEFAULT_MIX)})")
+    parser.add_argument("--profile", help="Dataset profile the accounts were seeded from")
+    parser.add_argument("--scale", type=int, default=0, help="--scale the accounts were seeded with")
+    parser.add_argument("--students", type=int, default=200, help="Student accounts to log in (default: 200)")
+    parser.add_argument("--faculty", type=int, default=2, help="Faculty accounts to log in (default: 2)")
+    parser.add_argument("--max-in-flight", type=int, default=512, help="Client concurrency cap (default: 512)")
+    parser.add_argument("--port", type=int, default=5055, help="Port the benchmarked server listens on")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for arrivals and payloads")
+    parser.add_argument("--name", help="Report file name (default: cluster-scaling_<timestamp>)")
+    parser.add_argument("--report-dir", help="Report directory (default: load-reports/)")
+    args = parser.parse_args()
+    args.workers = [int(w) for w in args.workers.split(",")]
+    args.rates = sorted(float(r) for r in args.rates.split(","))
+    args.mix = parse_mix(args.mix)
+    return args
+
+
+def main():
+    args = parse_args()
+    generator = DatasetGenerator(load_profile(args.profile, args.scale))
+    accounts = {
+        "faculty": list(generator.faculty())[:args.faculty],
+        "students": [s for _, s in zip(range(args.students), generator.students())],
+    }
+    name = args.name or f"cluster-scaling_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    directory = Path(args.report_dir) if args.report_dir else REPORTS_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+
+    shared: Dict[str, Any] = {}
+    levels = [run_level(workers, args, accounts, shared, name) for workers in args.workers]
+    baseline = next((level["capacityRps"] for level in levels if level["capacityRps"]), 0.0)
+    base_workers = next((max(level["workers"], 1) for level in levels if level["capacityRps"]), 1)
+    for level in levels:
+        level["speedup"] = level["capacityRps"] / baseline if baseline else 0.0
+        level["efficiency"] = level["speedup"] * base_workers / max(level["workers"], 1) if baseline else None
+
+    report = {
+        "generatedAt": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "config": {
+            "workers": args.workers,
+            "rates": args.rates,
+            "stepDuration": args.step_duration,
+            "warmup": args.warmup,
+            "sloP99Ms": args.slo_p99_ms,
+            "maxErrorRate": args.max_error_rate,
+            "mix": args.mix,
+            "students": len(shared.get("students", [])),
+            "faculty": len(shared.get("faculty", [])),
+            "cpus": os.cpu_count(),
+        },
+        "levels": levels,
+    }
+    json_path, md_path = directory / f"{name}.json", directory / f"{name}.md"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(render_markdown(report))
+    print("\n" + render_markdown(report).split("## Steps")[0].strip())
+    print(f"\nReport written to {json_path} and {md_path}")
+    if not any(level["capacityRps"] for level in levels):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""Stress the live event stream (GET /api/events) and measure delivery latency.
+
+Opens --connections concurrent server-sent-event subscriptions, each
+following the same --questions open questions, then submits grades on those
+questions at --rate per second for --duration seconds. Every grade publishes
+one event that every subscription should receive, so the report compares
+deliveries with what was expected and gives the latency from the server
+recording an event to each subscriber reading it. That latency uses the
+server's clock, so run this on the same host as the API (or with synchronised
+clocks). Server-side event counters are scraped from /metrics when available.
+
+The database must already hold seeded accounts and open questions.
+
+Usage:
+    python3 scripts/create-demo-data.py --scale 2000
+    python3 scripts/bench-events.py --scale 2000 --connections 2000 --rate 20 --duration 30
+    python3 scripts/bench-events.py --connections 5000 --connect-rate 1000 --questions 1
+"""
+
+import os
+import re
+import ssl
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from demo_dataset import DatasetGenerator, load_profile
+from loadgen import ApiClient, LoadGenerator, REPORTS_DIR, git_commit, parse_prometheus
+from perf_stats import EndpointStats, LatencyHistogram
+
+BASE_URL = "http://localhost:3000/api"
+EVENT_METRICS = ("event_stream_subscribers", "events_delivered_total", "event_stream_dropped_total")
+
+
+def raise_file_limit(wanted: int):
+    """Allow one socket per subscription, up to the hard limit"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+    if soft < target:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+class Subscriptions:
+    """Many SSE connections on one asyncio loop, read with a minimal HTTP/1.1 client"""
+
+    def __init__(self, base_url: str, query: str, timeout: float):
+        parts = urlsplit(base_url)
+        self.secure = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.secure else 80)
+        self.path = f"{parts.path.rstrip('/')}/events?{query}"
+        self.timeout = timeout
+        self.connect_latency = LatencyHistogram()
+        self.delivery_latency = LatencyHistogram()
+        self.opened = 0
+        self.failed = 0
+        self.disconnected = 0
+        self.received = 0
+        self.resets = 0
+        self.errors: Dict[str, int] = {}
+        self.writers: List[asyncio.StreamWriter] = []
+
+    def _fail(self, reason: str):
+        self.failed += 1
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+    def _dispatch(self, block: str):
+        event, data = "message", []
+        for line in block.split("\n"):
+            if not line or line.startswith(":"):
+                continue
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                event = value
+            elif field == "data":
+                data.append(value)
+        if event == "reset":
+            self.resets += 1
+        elif data:
+            payload = json.loads("\n".join(data))
+            if "at" in payload:
+                self.received += 1
+                self.delivery_latency.record(max(0.0, time.time() - payload["at"] / 1000))
+
+    async def _read_body(self, reader: asyncio.StreamReader, chunked: bool):
+        buffered = ""
+        while True:
+            if chunked:
+                size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    return
+                chunk = await reader.readexactly(size + 2)
+                data = chunk[:-2]
+            else:
+                data = await reader.read(65536)
+                if not data:
+                    return
+            buffered += data.decode("utf-8").replace("\r\n", "\n")
+            *blocks, buffered = buffered.split("\n\n")
+            for block in blocks:
+                self._dispatch(block)
+
+    async def subscribe(self, token: str):
+        started = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=ssl.create_default_context() if self.secure else None),
+                self.timeout,
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            return self._fail(type(e).__name__)
+        self.writers.append(writer)
+        writer.write((
+            f"GET {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Authorization: Bearer {token}\r\nAccept: text/event-stream\r\n\r\n"
+        ).encode())
+        try:
+            status = (await asyncio.wait_for(reader.readline(), self.timeout)).decode().split()
+            if len(status) < 2 or status[1] != "200":
+                return self._fail(f"HTTP {status[1] if len(status) > 1 else '?'}")
+            chunked = False
+            while True:
+                line = (await reader.readline()).decode().strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                if name.lower() == "transfer-encoding" and "chunked" in value.lower():
+                    chunked = True
+            self.opened += 1
+            self.connect_latency.record(time.perf_counter() - started)
+            await self._read_body(reader, chunked)
+            self.disconnected += 1
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+            if self.opened == 0:
+                self._fail(type(e).__name__)
+            else:
+                self.disconnected += 1
+        except asyncio.CancelledError:
+            pass
+        finally:
+            writer.close()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "opened": self.opened,
+            "failed": self.failed,
+            "disconnected": self.disconnected,
+            "errors": self.errors,
+            "received": self.received,
+            "resets": self.resets,
+            "connect": {f"p{p}": self.connect_latency.percentile(p) for p in (50, 95, 99)},
+            "delivery": {
+                **{f"p{p}": self.delivery_latency.percentile(p) for p in (50, 95, 99)},
+                "max": self.delivery_latency.max_us / 1000.0,
+                "mean": self.delivery_latency.mean(),
+            },
+            "deliveryHistogram": self.delivery_latency.to_dict(),
+        }
+
+
+class Publisher(threading.Thread):
+    """Submits grades on the followed questions at a fixed average rate"""
+
+    def __init__(self, client: ApiClient, students: List[Dict[str, Any]], questions: List[Dict[str, Any]],
+                 rate: float, duration: float, seed: int):
+        super().__init__(daemon=True)
+        self.client = client
+        self.students = students
+        self.questions = questions
+        self.rate = rate
+        self.duration = duration
+        self.rng = random.Random(seed)
+        self.published = 0
+        self.failed = 0
+
+    def run(self):
+        started = time.perf_counter()
+        due = started
+        while due - started < self.duration:
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            question = self.rng.choice(self.questions)
+            try:
+                response = self.client.request(
+                    "POST", "/questions/:id/grades", f"/questions/{question['_id']}/grades",
+                    self.rng.choice(self.students)["token"],
+                    json={
+                        "questionScore": self.rng.randint(1, 3),
+                        "answerGrades": [{"answerId": a["_id"], "score": self.rng.randint(1, 3)}
+                                         for a in question["answers"]],
+                    },
+                )
+                if response.ok:
+                    self.published += 1
+                else:
+                    self.failed += 1
+            except requests.RequestException:
+                self.failed += 1
+            due += self.rng.expovariate(self.rate)
+
+
+def scrape_event_metrics(url: str, token: Optional[str]) -> Optional[Dict[str, float]]:
+    try:
+        response = requests.get(url, headers={"Authorization": f"Bearer {token}"} if token else {}, timeout=10)
+        response.raise_for_status()
+    except requests.RequestException:
+        return None
+    samples = parse_prometheus(response.text)
+    return {name: sum(v for (n, _), v in samples.items() if n == name) for name in EVENT_METRICS}
+
+
+async def run(args, tokens: List[str], query: str, publisher: Publisher) -> Subscriptions:
+    subscriptions = Subscriptions(args.base_url, query, args.timeout)
+    tasks = []
+    print(f"Opening {args.connections} subscriptions at up to {args.connect_rate}/s...")
+    for i in range(args.connections):
+        tasks.append(asyncio.ensure_future(subscriptions.subscribe(tokens[i % len(tokens)])))
+        if (i + 1) % max(1, int(args.connect_rate / 10)) == 0:
+            await asyncio.sleep(0.1)
+    deadline = time.monotonic() + args.timeout
+    while subscriptions.opened + subscriptions.failed < args.connections and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    print(f"{subscriptions.opened} open, {subscriptions.failed} failed; "
+          f"publishing {args.rate}/s for {args.duration}s")
+
+    publisher.start()
+    while publisher.is_alive():
+        await asyncio.sleep(0.2)
+    # Let the last events arrive
+    await asyncio.sleep(args.grace)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return subscriptions
+
+
+def render_markdown(report: Dict[str, Any]) -> str:
+    """Render the results in the style of STATISTICS.md"""
+    streams = report["subscriptions"]
+    lines = [
+        "# Event Stream Report",
+        f"Generated on {report['generatedAt']}",
+        f"Commit: {report.get('commit') or 'unknown'}",
+        "",
+        "## Configuration",
+    ]
+    lines += [f"- {key}: {value}" for key, value in report["config"].items()]
+    lines += [
+        "",
+        "## Subscriptions",
+        f"- Opened: {streams['opened']}",
+        f"- Failed: {streams['failed']}" + (f" ({streams['errors']})" if streams["errors"] else ""),
+        f"- Closed by the server before the end: {streams['disconnected']}",
+        f"- Connect p50/p95/p99: {streams['connect']['p50']:.1f} / {streams['connect']['p95']:.1f} / "
+        f"{streams['connect']['p99']:.1f} ms",
+        "",
+        "## Delivery",
+        f"- Events published: {report['published']} ({report['publishFailed']} grade requests failed)",
+        f"- Deliveries expected: {report['expected']}",
+        f"- Deliveries received: {streams['received']} ({report['deliveryRatio']:.2%})",
+        f"- Reset events: {streams['resets']}",
+        "",
+        "| p50 ms | p95 ms | p99 ms | max ms | mean ms |",
+        "|---:|---:|---:|---:|---:|",
+        f"| {streams['delivery']['p50']:.1f} | {streams['delivery']['p95']:.1f} | {streams['delivery']['p99']:.1f} | "
+        f"{streams['delivery']['max']:.1f} | {streams['delivery']['mean']:.1f} |",
+    ]
+    server = report.get("server")
+    if server:
+        lines += [
+            "",
+            "## Server",
+            f"Scraped from {report['config']['metricsUrl']} at the end of the run (single process or one worker)",
+            "",
+        ]
+        lines += [f"- {name}: {value:g}" for name, value in server.items()]
+    return "\n".join(lines) + "\n"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Stress GET /api/events and measure event delivery latency")
+    parser.add_argument("--base-url", default=BASE_URL, help=f"API base URL (default: {BASE_URL})")
+    parser.add_argument("--connections", type=int, default=1000, help="Concurrent subscriptions (default: 1000)")
+    parser.add_argument("--connect-rate", type=float, default=500, help="New connections per second (default: 500)")
+    parser.add_argument("--questions", type=int, default=5, help="Open questions every subscription follows (default: 5)")
+    parser.add_argument("--rate", type=float, default=10, help="Grades (events) published per second (default: 10)")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of publishing (default: 30)")
+    parser.add_argument("--grace", type=float, default=5, help="Seconds to wait for late events (default: 5)")
+    parser.add_argument("--timeout", type=float, default=60, help="Connect timeout in seconds (default: 60)")
+    parser.add_argument("--profile", help="Dataset profile the accounts were seeded from")
+    parser.add_argument("--scale", type=int, default=0, help="--scale the accounts were seeded with")
+    parser.add_argument("--students", type=int, default=100, help="Student accounts to log in (default: 100)")
+    parser.add_argument("--metrics-url", help="Prometheus endpoint (default: derived from --base-url)")
+    parser.add_argument("--metrics-token", help="Bearer token for /metrics (default: $METRICS_TOKEN)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    parser.add_argument("--name", help="Report file name (default: event-stream_<timestamp>)")
+    parser.add_argument("--report-dir", help="Report directory (default: load-reports/)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    raise_file_limit(args.connections + 256)
+    generator = DatasetGenerator(load_profile(args.profile, args.scale))
+    students = [s for _, s in zip(range(args.students), generator.students())]
+
+    client = ApiClient(args.base_url, EndpointStats())
+    load = LoadGenerator(client, seed=args.seed)
+    print(f"Logging in {len(students)} student accounts...")
+    load.login_accounts(students, "student")
+    if not load.students:
+        print("Error: No student accounts could log in; seed data first")
+        sys.exit(1)
+    load.load_questions()
+    questions = [q for q in load.open_questions if q["answers"]][:args.questions]
+    if not questions:
+        print("Error: No open questions to grade")
+        sys.exit(1)
+    query = "questions=" + ",".join(q["_id"] for q in questions)
+
+    metrics_url = args.metrics_url or re.sub(r"/api/?$", "", args.base_url) + "/metrics"
+    metrics_token = args.metrics_token or os.environ.get("METRICS_TOKEN")
+    publisher = Publisher(client, load.students, questions, args.rate, args.duration, args.seed)
+    subscriptions = asyncio.run(run(args, [s["token"] for s in load.students], query, publisher))
+    server = scrape_event_metrics(metrics_url, metrics_token)
+
+    streams = subscriptions.summary()
+    expected = publisher.published * subscriptions.opened
+    report = {
+        "generatedAt": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "config": {
+            "baseUrl": args.base_url,
+            "connections": args.connections,
+            "connectRate": args.connect_rate,
+            "questions": len(questions),
+            "rate": args.rate,
+            "duration": args.duration,
+            "students": len(load.students),
+            "metricsUrl": metrics_url,
+            "seed": args.seed,
+        },
+        "published": publisher.published,
+        "publishFailed": publisher.failed,
+        "expected": expected,
+        "deliveryRatio": streams["received"] / expected if expected else 0.0,
+        "subscriptions": streams,
+        "publishLatency": client.stats.summary(),
+        **({"server": server} if server else {}),
+    }
+    name = args.name or f"event-stream_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    directory = Path(args.report_dir) if args.report_dir else REPORTS_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    json_path, md_path = directory / f"{name}.json", directory / f"{name}.md"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(render_markdown(report))
+    print("\n" + render_markdown(report).split("## Subscriptions")[1].strip())
+    print(f"\nReport written to {json_path} and {md_path}")
+    if subscriptions.opened == 0 or publisher.published == 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
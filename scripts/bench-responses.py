@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""Measure what each API endpoint costs per request: CPU time and heap
+allocation on the server, and bytes on the wire.
+
+Every endpoint is called --requests times in a row, one call at a time, in
+each of its response variants (the whole document or ?view=list for reads,
+the whole document or ?return=patch for mutations) and with each
+Accept-Encoding in --encodings. Around each batch the server's /metrics is
+scraped: process_cpu_seconds_total and nodejs_heap_allocated_bytes_total give
+CPU and allocation per request (less what a scrape itself costs), and
+http_response_size_bytes the bytes sent per response, headers included,
+after compression. The "full, identity" row of an endpoint is how it
+answered before slim responses and compression; the summary compares it with
+the cheapest variant. --compare adds the change against an earlier report,
+e.g. one taken on an older commit.
+
+Run it against a single server process (not cluster mode) that nothing else
+is using, on the same machine. The mutations add grades, suggestions and
+comments, so reseed between runs that should be compared.
+
+Usage:
+    python3 scripts/create-demo-data.py --scale 2000
+    python3 scripts/bench-responses.py --scale 2000
+    python3 scripts/bench-responses.py --scale 2000 --requests 200 --compare load-reports/responses_before.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from demo_dataset import DatasetGenerator, load_profile
+from loadgen import ApiClient, LoadGenerator, REPORTS_DIR, git_commit, parse_prometheus
+from perf_stats import EndpointStats, LatencyHistogram
+
+BASE_URL = "http://localhost:3000/api"
+ENCODINGS = ("identity", "gzip", "br")
+CALIBRATION_SCRAPES = 5
+
+# (name, method, route as labelled by the server, role, variants)
+READS = [
+    ("list questions", "GET", "/api/questions", "student", {"full": {}, "list": {"view": "list"}}),
+    ("list lectures", "GET", "/api/lectures", "faculty", {"full": {}}),
+    ("profile", "GET", "/api/users/profile", "student", {"full": {}}),
+    ("active users", "GET", "/api/users/active", "faculty", {"full": {}}),
+]
+READ_PATHS = {name: route[len("/api"):] for name, _, route, _, _ in READS}
+PATCH_VARIANTS = {"full": {}, "patch": {"return": "patch"}}
+MUTATIONS = [
+    ("grade", "POST", "/api/questions/:id/grades", "student"),
+    ("suggest", "POST", "/api/questions/:id/suggestions", "student"),
+    ("review suggestion", "PUT", "/api/questions/:id/suggestions/:suggestionId", "faculty"),
+    ("comment", "POST", "/api/questions/:id/comments", "faculty"),
+    ("add to lecture", "POST", "/api/lectures/:id/questions", "faculty"),
+    ("remove from lecture", "DELETE", "/api/lectures/:id/questions", "faculty"),
+]
+
+
+class MetricsProbe:
+    """Server-wide CPU, allocation and per-route response bytes from /metrics"""
+
+    def __init__(self, url: str, token: Optional[str]):
+        self.url = url
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.scrape_cost = {"cpu": 0.0, "heap": 0.0}
+
+    def snapshot(self) -> Dict[str, Any]:
+        response = requests.get(self.url, headers=self.headers, timeout=10)
+        response.raise_for_status()
+        samples = parse_prometheus(response.text)
+        sizes: Dict[Tuple[str, str], List[float]] = {}
+        for (name, labels), value in samples.items():
+            if name in ("http_response_size_bytes_sum", "http_response_size_bytes_count"):
+                labels = dict(labels)
+                row = sizes.setdefault((labels["method"], labels["route"]), [0.0, 0.0])
+                row[0 if name.endswith("_sum") else 1] = value
+        heap = [v for (name, _), v in samples.items() if name == "nodejs_heap_allocated_bytes_total"]
+        return {
+            "cpu": sum(v for (name, _), v in samples.items() if name == "process_cpu_seconds_total"),
+            "heap": heap[0] if heap else None,
+            "sizes": sizes,
+        }
+
+    def calibrate(self):
+        """What one scrape costs the server, to subtract from every batch"""
+        snapshots = [self.snapshot() for _ in range(CALIBRATION_SCRAPES + 1)]
+        for key in ("cpu", "heap"):
+            if snapshots[0][key] is not None:
+                self.scrape_cost[key] = (snapshots[-1][key] - snapshots[0][key]) / CALIBRATION_SCRAPES
+
+    def difference(self, before: Dict[str, Any], after: Dict[str, Any], method: str, route: str,
+                   calls: int) -> Dict[str, Optional[float]]:
+        cpu = max(0.0, after["cpu"] - before["cpu"] - self.scrape_cost["cpu"])
+        heap = None
+        if before["heap"] is not None and after["heap"] is not None:
+            heap = max(0.0, after["heap"] - before["heap"] - self.scrape_cost["heap"])
+        size_before = before["sizes"].get((method, route), [0.0, 0.0])
+        size_after = after["sizes"].get((method, route), [0.0, 0.0])
+        responses = size_after[1] - size_before[1]
+        return {
+            "cpuMs": cpu * 1000 / calls,
+            "heapKb": heap / 1024 / calls if heap is not None else None,
+            "wireBytes": (size_after[0] - size_before[0]) / responses if responses else None,
+        }
+
+
+class ResponseBench:
+    """Builds each endpoint's calls, runs them in batches and measures them"""
+
+    def __init__(self, args, load: LoadGenerator, probe: MetricsProbe):
+        self.args = args
+        self.load = load
+        self.probe = probe
+        self.base_url = args.base_url.rstrip("/")
+        self.sessions = {encoding: requests.Session() for encoding in args.encodings}
+        self.questions = [q for q in load.open_questions if q["answers"]]
+        self.lecture = self._faculty_lecture()
+        self.lecture_added: Dict[Tuple[str, str], List[str]] = {}
+        self.cursor = 0
+
+    def _token(self, role: str) -> str:
+        return (self.load.faculty if role == "faculty" else self.load.students)[0]["token"]
+
+    def _faculty_lecture(self) -> Optional[Dict[str, Any]]:
+        lectures = self.load.client.call("GET", "/lectures", "/lectures", self._token("faculty"))
+        return lectures[0] if lectures else None
+
+    def _next_question(self) -> Dict[str, Any]:
+        question = self.questions[self.cursor % len(self.questions)]
+        self.cursor += 1
+        return question
+
+    def _suggestions(self, count: int) -> List[Tuple[str, str]]:
+        """Create suggestions to review, outside the measured batch"""
+        created = []
+        for _ in range(count):
+            question = self._next_question()
+            change = self.load.client.call(
+                "POST", "/questions/:id/suggestions", f"/questions/{question['_id']}/suggestions",
+                self._token("student"), params={"return": "patch"},
+                json={"suggestedQuestion": f"{question['question']} (Reworded)", "suggestedAnswers": question["answers"]},
+            )
+            created.append((question["_id"], change["suggestion"]["_id"]))
+        return created
+
+    def calls(self, name: str, variant: str, encoding: str, count: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """(path, request arguments) for each call of a batch"""
+        if name in READ_PATHS:
+            return [(READ_PATHS[name], {})] * count
+        if name == "grade":
+            calls = []
+            for _ in range(count):
+                question = self._next_question()
+                calls.append((f"/questions/{question['_id']}/grades", {"json": {
+                    "questionScore": 2,
+                    "answerGrades": [{"answerId": a["_id"], "score": 2} for a in question["answers"]],
+                }}))
+            return calls
+        if name == "suggest":
+            calls = []
+            for _ in range(count):
+                question = self._next_question()
+                calls.append((f"/questions/{question['_id']}/suggestions", {"json": {
+                    "suggestedQuestion": f"{question['question']} (Reworded)",
+                    "suggestedAnswers": question["answers"],
+                }}))
+            return calls
+        if name == "review suggestion":
+            return [(f"/questions/{question}/suggestions/{suggestion}",
+                     {"json": {"status": "accepted", "rebuttalComment": "Thanks"}})
+                    for question, suggestion in self._suggestions(count)]
+        if name == "comment":
+            return [(f"/questions/{self._next_question()['_id']}/comments",
+                     {"json": {"comment": "Please check the distractors"}}) for _ in range(count)]
+        if self.lecture is None:
+            return []
+        path = f"/lectures/{self.lecture['_id']}/questions"
+        if name == "add to lecture":
+            present = set(self.lecture["questions"]).union(*self.lecture_added.values())
+            ids = [q["_id"] for q in self.questions if q["_id"] not in present][:count]
+            self.lecture_added[(variant, encoding)] = ids
+            return [(path, {"json": {"questionIds": [qid]}}) for qid in ids]
+        # Remove what the matching add batch put in, leaving the lecture as it was
+        return [(path, {"json": {"questionIds": [qid]}}) for qid in self.lecture_added.pop((variant, encoding), [])]
+
+    def run_batch(self, method: str, route: str, role: str, params: Dict[str, str], encoding: str,
+                  calls: List[Tuple[str, Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        if not calls:
+            return None
+        session = self.sessions[encoding]
+        headers = {"Authorization": f"Bearer {self._token(role)}", "Accept-Encoding": encoding}
+        latency = LatencyHistogram()
+        body_bytes = errors = 0
+        before = self.probe.snapshot()
+        for path, kwargs in calls:
+            started = time.perf_counter()
+            response = session.request(method, f"{self.base_url}{path}", headers=headers, params=params,
+                                       stream=True, timeout=60, **kwargs)
+            # Read the body as sent, without decompressing it
+            body = response.raw.read(decode_content=False)
+            latency.record(time.perf_counter() - started)
+            body_bytes += len(body)
+            errors += 0 if response.ok else 1
+        after = self.probe.snapshot()
+        return {
+            **self.probe.difference(before, after, method, route, len(calls)),
+            "bodyBytes": body_bytes / len(calls),
+            "p50": latency.percentile(50),
+            "calls": len(calls),
+            "errors": errors,
+        }
+
+    def run(self) -> List[Dict[str, Any]]:
+        cases = [(name, method, route, role, variants) for name, method, route, role, variants in READS]
+        cases += [(name, method, route, role, PATCH_VARIANTS) for name, method, route, role in MUTATIONS]
+        rows = []
+        for name, method, route, role, variants in cases:
+            for variant, params in variants.items():
+                for encoding in self.args.encodings:
+                    # Warm up outside the measurement (JIT, connection, caches)
+                    warm = self.calls(name, variant, encoding, self.args.warmup) if method == "GET" else []
+                    self.run_batch(method, route, role, params, encoding, warm)
+                    result = self.run_batch(method, route, role, params, encoding,
+                                            self.calls(name, variant, encoding, self.args.requests))
+                    if result is None:
+                        print(f"  {name}: skipped (nothing to run it on)")
+                        continue
+                    rows.append({"endpoint": name, "method": method, "route": route, "variant": variant,
+                                 "encoding": encoding, **result})
+                    print(f"  {name:<20} {variant:<6} {encoding:<9} {format_row(rows[-1])}")
+        return rows
+
+
+def fmt(value: Optional[float], spec: str = ".2f") -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def format_row(row: Dict[str, Any]) -> str:
+    return (f"cpu {fmt(row['cpuMs'])} ms, heap {fmt(row['heapKb'], '.1f')} KB, "
+            f"wire {fmt(row['wireBytes'], '.0f')} B, p50 {row['p50']:.1f} ms")
+
+
+def summarise(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per endpoint, the full uncompressed response against the fewest bytes"""
+    summary = []
+    for endpoint in dict.fromkeys(row["endpoint"] for row in rows):
+        mine = [row for row in rows if row["endpoint"] == endpoint]
+        before = next((row for row in mine if row["variant"] == "full" and row["encoding"] == "identity"), None)
+        after = min(mine, key=lambda row: row["wireBytes"] if row["wireBytes"] is not None else row["bodyBytes"])
+        if before is None:
+            continue
+        summary.append({"endpoint": endpoint, "before": before, "after": after})
+    return summary
+
+
+def ratio(new: Optional[float], old: Optional[float]) -> str:
+    if new is None or not old:
+        return "-"
+    return f"{(new - old) / old:+.0%}"
+
+
+def render_markdown(report: Dict[str, Any]) -> str:
+    lines = [
+        "# Response Cost Report",
+        f"Generated on {report['generatedAt']}",
+        f"Commit: {report.get('commit') or 'unknown'}",
+        "",
+        f"{report['config']['requests']} sequential calls per row against {report['config']['baseUrl']}. "
+        "CPU and heap are the server process's totals over the batch, less the cost of scraping /metrics; "
+        "wire bytes are per response, headers included, after compression.",
+        "",
+        "## Before and after",
+        "",
+        "| Endpoint | Before | After | CPU ms | Heap KB | Wire bytes |",
+        "|---|---|---|---:|---:|---:|",
+    ]
+    for item in report["summary"]:
+        before, after = item["before"], item["after"]
+        lines.append(
+            f"| {item['endpoint']} | full, identity | {after['variant']}, {after['encoding']} | "
+            f"{fmt(before['cpuMs'])} → {fmt(after['cpuMs'])} | "
+            f"{fmt(before['heapKb'], '.1f')} → {fmt(after['heapKb'], '.1f')} | "
+            f"{fmt(before['wireBytes'], '.0f')} → {fmt(after['wireBytes'], '.0f')} "
+            f"({ratio(after['wireBytes'], before['wireBytes'])}) |"
+        )
+
+    compare = report.get("compare")
+    header = "| Endpoint | Variant | Encoding | CPU ms/req | Heap KB/req | Body bytes | Wire bytes | p50 ms | Errors |"
+    rule = "|---|---|---|---:|---:|---:|---:|---:|---:|"
+    if compare:
+        header += " CPU vs before | Heap vs before | Wire vs before |"
+        rule += "---:|---:|---:|"
+    lines += ["", "## All variants", ""]
+    if compare:
+        lines += [f"Compared with {compare['file']} (commit {compare.get('commit') or 'unknown'}).", ""]
+    lines += [header, rule]
+    previous = {(r["endpoint"], r["variant"], r["encoding"]): r for r in (compare or {}).get("rows", [])}
+    for row in report["rows"]:
+        line = (
+            f"| {row['endpoint']} | {row['variant']} | {row['encoding']} | {fmt(row['cpuMs'])} | "
+            f"{fmt(row['heapKb'], '.1f')} | {row['bodyBytes']:.0f} | {fmt(row['wireBytes'], '.0f')} | "
+            f"{row['p50']:.1f} | {row['errors']} |"
+        )
+        if compare:
+            old = previous.get((row["endpoint"], row["variant"], row["encoding"]), {})
+            line += (f" {ratio(row['cpuMs'], old.get('cpuMs'))} | {ratio(row['heapKb'], old.get('heapKb'))} | "
+                     f"{ratio(row['wireBytes'], old.get('wireBytes'))} |")
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure CPU, heap allocation and bytes per API request")
+    parser.add_argument("--base-url", default=BASE_URL, help=f"API base URL (default: {BASE_URL})")
+    parser.add_argument("--requests", type=int, default=50, help="Measured calls per row (default: 50)")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured calls before each read batch (default: 10)")
+    parser.add_argument("--encodings", default=",".join(ENCODINGS),
+                        help=f"Accept-Encoding values to compare (default: {','.join(ENCODINGS)})")
+    parser.add_argument("--profile", help="Dataset profile the accounts were seeded from")
+    parser.add_argument("--scale", type=int, default=0, help="--scale the accounts were seeded with")
+    parser.add_argument("--metrics-url", help="Prometheus endpoint (default: derived from --base-url)")
+    parser.add_argument("--metrics-token", help="Bearer token for /metrics (default: $METRICS_TOKEN)")
+    parser.add_argument("--compare", help="Earlier report (.json) to compare each row with")
+    parser.add_argument("--name", help="Report file name (default: responses_<timestamp>)")
+    parser.add_argument("--report-dir", help="Report directory (default: load-reports/)")
+    args = parser.parse_args()
+    args.encodings = [e.strip() for e in args.encodings.split(",") if e.strip()]
+    return args
+
+
+def main():
+    args = parse_args()
+    generator = DatasetGenerator(load_profile(args.profile, args.scale))
+    load = LoadGenerator(ApiClient(args.base_url, EndpointStats()))
+    load.login_accounts(list(generator.faculty())[:1], "faculty")
+    load.login_accounts([next(generator.students())], "student")
+    if not load.faculty or not load.students:
+        print("Error: Could not log in a faculty and a student account; seed data first")
+        sys.exit(1)
+    load.load_questions()
+    if not any(q["answers"] for q in load.open_questions):
+        print("Error: No open questions to call the mutations on")
+        sys.exit(1)
+
+    metrics_url = args.metrics_url or re.sub(r"/api/?$", "", args.base_url) + "/metrics"
+    probe = MetricsProbe(metrics_url, args.metrics_token or os.environ.get("METRICS_TOKEN"))
+    try:
+        probe.calibrate()
+    except requests.RequestException as e:
+        print(f"Error: Could not scrape {metrics_url}: {e}")
+        sys.exit(1)
+
+    compare = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            earlier = json.load(f)
+        compare = {"file": args.compare, "commit": earlier.get("commit"), "rows": earlier.get("rows", [])}
+
+    print(f"Measuring {args.requests} calls per endpoint, variant and encoding...")
+    rows = ResponseBench(args, load, probe).run()
+    report = {
+        "generatedAt": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "config": {
+            "baseUrl": args.base_url,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "encodings": args.encodings,
+            "metricsUrl": metrics_url,
+        },
+        "scrapeCost": probe.scrape_cost,
+        "rows": rows,
+        "summary": summarise(rows),
+        **({"compare": compare} if compare else {}),
+    }
+    name = args.name or f"responses_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    directory = Path(args.report_dir) if args.report_dir else REPORTS_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    json_path, md_path = directory / f"{name}.json", directory / f"{name}.md"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(render_markdown(report))
+    print("\n" + render_markdown(report).split("## All variants")[0].strip())
+    print(f"\nReport written to {json_path} and {md_path}")
+    if not rows or any(row["errors"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""Reproducible benchmark suite for the main API routes, with results kept
+per git commit and a compare command that flags regressions.
+
+Datasets come in named tiers (small, medium, large). `fixtures` writes a
+tier with bulk_load.py into backups/bench-<tier>, a mongodump-format backup
+that scripts/restore-db.sh can restore. Generation is seeded and ids are
+derived from indexes, so a tier is the same database on every machine.
+`run` restores the tier (unless --no-restore), logs in as the tier's
+faculty and students, and calls each scenario, one call at a time:
+--warmup unmeasured calls, then --iterations measured ones, repeated for
+--rounds rounds with the scenarios interleaved so that drift on the machine
+spreads over all of them. A scenario's p50 and p95 are the medians of its
+per-round values. Results are written to
+load-reports/bench/<commit>/<tier>.json (and .md); a tree with uncommitted
+changes is recorded as <commit>-dirty. `compare` reads two such results and
+flags every scenario whose p50 or p95 rose by more than --threshold percent
+and by more than --min-delta-ms, exiting with status 1 if any did.
+
+Everything runs locally: the server started with `npm start` (a single
+process gives steadier numbers than cluster mode) and the MongoDB
+container. Restoring drops what the previous run wrote, so consecutive runs
+start from the same data; restart the server after a restore if you also
+want its in-memory caches cold.
+
+Usage:
+    python3 scripts/bench-suite.py fixtures --tier small
+    python3 scripts/bench-suite.py run --tier small
+    python3 scripts/bench-suite.py run --tier medium --rounds 5 --iterations 50 --scenarios "questions.*,lectures.list"
+    python3 scripts/bench-suite.py compare main HEAD --tier small --threshold 10
+    python3 scripts/bench-suite.py compare load-reports/bench/1a2b3c4/small.json 5d6e7f8 --tier small
+"""
+
+import os
+import sys
+import json
+import time
+import fnmatch
+import platform
+import argparse
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from statistics import median
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from bulk_load import write_dataset
+from demo_dataset import DatasetGenerator, load_profile
+from loadgen import REPORTS_DIR, git_commit
+from perf_stats import LatencyHistogram
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BACKUPS_DIR = PROJECT_ROOT / "backups"
+RESULTS_DIR = REPORTS_DIR / "bench"
+BASE_URL = "http://localhost:3000/api"
+COHORT_PROFILE = str(PROJECT_ROOT / "scripts" / "profiles" / "cohort.json")
+QUESTION_PAGE = 500
+
+# Named dataset tiers: the cohort profile at a fixed number of students
+TIERS = {
+    "small": {"profile": COHORT_PROFILE, "scale": 200},
+    "medium": {"profile": COHORT_PROFILE, "scale": 2000},
+    "large": {"profile": COHORT_PROFILE, "scale": 20000},
+}
+
+# (name, method, route, role); mutations run in this order within a round,
+# so "lectures.remove-questions" takes out what "lectures.add-questions" put in
+SCENARIOS = [
+    ("users.login", "POST", "/users/login", "student"),
+    ("users.profile", "GET", "/users/profile", "student"),
+    ("users.rank", "GET", "/users/:id/rank", "student"),
+    ("users.active", "GET", "/users/active", "faculty"),
+    ("users.leaderboard", "GET", "/users/leaderboard", "faculty"),
+    ("questions.list", "GET", "/questions", "student"),
+    ("questions.list-lecture", "GET", "/questions", "faculty"),
+    ("questions.analytics", "GET", "/questions/:id/analytics", "faculty"),
+    ("questions.export", "GET", "/questions/export", "faculty"),
+    ("questions.create", "POST", "/questions", "student"),
+    ("questions.grade", "POST", "/questions/:id/grades", "student"),
+    ("questions.suggest", "POST", "/questions/:id/suggestions", "student"),
+    ("questions.comment", "POST", "/questions/:id/comments", "faculty"),
+    ("questions.finalize", "PUT", "/questions/:id/finalize", "faculty"),
+    ("lectures.list", "GET", "/lectures", "student"),
+    ("lectures.list-faculty", "GET", "/lectures", "faculty"),
+    ("lectures.analytics", "GET", "/lectures/:id/analytics", "faculty"),
+    ("lectures.add-questions", "POST", "/lectures/:id/questions", "faculty"),
+    ("lectures.remove-questions", "DELETE", "/lectures/:id/questions", "faculty"),
+    ("lectures.exams", "POST", "/lectures/:id/exams", "faculty"),
+]
+
+
+def tier_profile(tier: str) -> Dict[str, Any]:
+    config = TIERS[tier]
+    return load_profile(config["profile"], config["scale"])
+
+
+def fixture_dir(tier: str) -> Path:
+    return BACKUPS_DIR / f"bench-{tier}"
+
+
+def fixture_info(tier: str) -> Optional[Dict[str, Any]]:
+    path = fixture_dir(tier) / "backup_info.json"
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def ensure_fixture(tier: str, force: bool = False, jobs: int = 0) -> Dict[str, Any]:
+    """Write the tier's backup unless an identical one (same profile) exists"""
+    profile = tier_profile(tier)
+    info = fixture_info(tier)
+    if info and info.get("profile") == profile and not force:
+        return info
+    out_dir = fixture_dir(tier)
+    print(f"===== Writing the {tier} tier to {out_dir} =====")
+    counts = write_dataset(profile, str(out_dir), "bson", jobs)
+    info_path = out_dir / "backup_info.json"
+    with open(info_path, "r", encoding="utf-8") as f:
+        info = json.load(f)
+    info.update({"type": "bench", "tier": tier, "profile": profile})
+    with open(info_path, "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=4)
+    print("  " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+    return info
+
+
+def restore_fixture(tier: str):
+    """Restore through restore-db.sh, then rebuild the leaderboards it leaves out"""
+    env = {**os.environ, "BACKUPS_DIR": str(BACKUPS_DIR)}
+    for command in (
+        ["bash", str(PROJECT_ROOT / "scripts" / "restore-db.sh"), fixture_dir(tier).name],
+        ["node", str(PROJECT_ROOT / "scripts" / "rebuild-leaderboard.js")],
+    ):
+        result = subprocess.run(command, cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise SystemExit(f"{' '.join(command[:2])} failed:\n{result.stdout}{result.stderr}")
+
+
+def commit_key() -> str:
+    """Short HEAD commit, with -dirty when tracked files have uncommitted changes"""
+    commit = git_commit() or "unknown"
+    try:
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=PROJECT_ROOT,
+                                check=True, capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return commit
+    return f"{commit}-dirty" if status.strip() else commit
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        node = subprocess.run(["node", "--version"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        node = None
+    return {
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "node": node,
+    }
+
+
+class Suite:
+    """Builds each scenario's calls from the tier's accounts and data, and times them"""
+
+    def __init__(self, base_url: str, generator: DatasetGenerator):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        self.students = list(generator.students())
+        self.login_cursor = 0
+        self.faculty = self._login(next(generator.faculty()))
+        self.student = self._login(self.students[0])
+        lectures = self._call("GET", "/lectures", self.faculty["token"])
+        if not lectures:
+            raise SystemExit("The first faculty account has no lectures; restore a bench tier first")
+        self.lecture = lectures[0]
+        in_lecture = set(self.lecture["questions"])
+        questions = self._call("GET", f"/questions?view=list&isFinal=false&limit={QUESTION_PAGE}",
+                               self.faculty["token"])
+        self.questions = [q for q in questions if q["answers"]]
+        if len(self.questions) < 2:
+            raise SystemExit("Too few open questions to run the mutations on")
+        # Grades, suggestions and comments cycle through the first half;
+        # finalize and add-to-lecture use up the second, one question per call
+        half = len(self.questions) // 2
+        self.shared = self.questions[:half]
+        self.spare = [q for q in self.questions[half:] if q["_id"] not in in_lecture]
+        self.cursor = 0
+        self.added: List[str] = []
+
+    def _call(self, method: str, path: str, token: Optional[str] = None, **kwargs) -> Any:
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = self.session.request(method, f"{self.base_url}{path}", headers=headers, timeout=120, **kwargs)
+        if not response.ok:
+            raise SystemExit(f"{method} {path} failed ({response.status_code}): {response.text[:200]}")
+        return response.json()
+
+    def _login(self, account: Dict[str, Any]) -> Dict[str, Any]:
+        user = self._call("POST", "/users/login", json={"email": account["email"], "password": account["password"]})
+        return {**account, "token": user["token"], "_id": user["_id"]}
+
+    def _next_shared(self) -> Dict[str, Any]:
+        question = self.shared[self.cursor % len(self.shared)]
+        self.cursor += 1
+        return question
+
+    def _take_spare(self) -> Optional[Dict[str, Any]]:
+        return self.spare.pop() if self.spare else None
+
+    def calls(self, name: str, count: int) -> List[Tuple[str, Optional[str], Dict[str, Any]]]:
+        """(path, token, request arguments) for count calls of a scenario"""
+        faculty, student = self.faculty["token"], self.student["token"]
+        lecture = self.lecture["_id"]
+        if name == "users.login":
+            # A different account each time, so the per-account login limit never applies
+            calls = []
+            for _ in range(count):
+                account = self.students[self.login_cursor % len(self.students)]
+                self.login_cursor += 1
+                calls.append(("/users/login", None,
+                              {"json": {"email": account["email"], "password": account["password"]}}))
+            return calls
+        fixed = {
+            "users.profile": ("/users/profile", student),
+            "users.rank": (f"/users/{self.student['_id']}/rank?lecture={lecture}", student),
+            "users.active": ("/users/active", faculty),
+            "users.leaderboard": (f"/users/leaderboard?lecture={lecture}&limit=50", faculty),
+            "questions.list": ("/questions?view=list&limit=50", student),
+            "questions.list-lecture": (f"/questions?lecture={lecture}&limit=50", faculty),
+            "questions.analytics": (f"/questions/{self.shared[0]['_id']}/analytics", faculty),
+            "questions.export": (f"/questions/export?format=jsonl&lecture={lecture}", faculty),
+            "lectures.list": ("/lectures", student),
+            "lectures.list-faculty": ("/lectures", faculty),
+            "lectures.analytics": (f"/lectures/{lecture}/analytics", faculty),
+        }
+        if name in fixed:
+            path, token = fixed[name]
+            return [(path, token, {})] * count
+        if name == "lectures.exams":
+            return [(f"/lectures/{lecture}/exams", faculty,
+                     {"json": {"count": 20, "seed": "bench", "dryRun": True}})] * count
+        if name == "questions.create":
+            return [("/questions", student, {"json": {
+                "question": f"Benchmark question {i}: which statement is correct?",
+                "answers": [{"text": "Correct", "isCorrect": True}, {"text": "Wrong", "isCorrect": False},
+                            {"text": "Also wrong", "isCorrect": False}],
+            }}) for i in range(count)]
+
+        calls = []
+        for _ in range(count):
+            if name == "questions.grade":
+                question = self._next_shared()
+                calls.append((f"/questions/{question['_id']}/grades", student, {"json": {
+                    "questionScore": 2,
+                    "answerGrades": [{"answerId": a["_id"], "score": 2} for a in question["answers"]],
+                }}))
+            elif name == "questions.suggest":
+                question = self._next_shared()
+                calls.append((f"/questions/{question['_id']}/suggestions", student, {"json": {
+                    "suggestedQuestion": f"{question['question']} (Reworded)",
+                    "suggestedAnswers": [{"text": a["text"], "isCorrect": a["isCorrect"]}
+                                         for a in question["answers"]],
+                }}))
+            elif name == "questions.comment":
+                calls.append((f"/questions/{self._next_shared()['_id']}/comments", faculty,
+                               {"json": {"comment": "Please check the distractors"}}))
+            elif name == "questions.finalize":
+                question = self._take_spare()
+                if question:
+                    calls.append((f"/questions/{question['_id']}/finalize", faculty, {}))
+            elif name == "lectures.add-questions":
+                question = self._take_spare()
+                if question:
+                    self.added.append(question["_id"])
+                    calls.append((f"/lectures/{lecture}/questions", faculty,
+                                  {"json": {"questionIds": [question["_id"]]}}))
+            elif name == "lectures.remove-questions" and self.added:
+                calls.append((f"/lectures/{lecture}/questions", faculty,
+                              {"json": {"questionIds": [self.added.pop()]}}))
+        return calls
+
+    def time_calls(self, method: str, calls: List[Tuple[str, Optional[str], Dict[str, Any]]]
+                   ) -> Tuple[LatencyHistogram, int]:
+        latency = LatencyHistogram()
+        errors = 0
+        for path, token, kwargs in calls:
+            headers = {"Authorization": f"Bearer {token}"} if token else {}
+            # Without stream=True the timing includes reading the whole body
+            started = time.perf_counter()
+            response = self.session.request(method, f"{self.base_url}{path}", headers=headers,
+                                            timeout=120, **kwargs)
+            latency.record(time.perf_counter() - started)
+            errors += 0 if response.ok else 1
+        return latency, errors
+
+
+def run_suite(suite: Suite, scenarios: List[Tuple[str, str, str, str]], args) -> Dict[str, Dict[str, Any]]:
+    rounds: Dict[str, List[Dict[str, Any]]] = {name: [] for name, _, _, _ in scenarios}
+    merged = {name: LatencyHistogram() for name, _, _, _ in scenarios}
+    errors = {name: 0 for name, _, _, _ in scenarios}
+    for round_index in range(args.rounds):
+        print(f"Round {round_index + 1}/{args.rounds}")
+        for name, method, _, _ in scenarios:
+            suite.time_calls(method, suite.calls(name, args.warmup))
+            latency, failed = suite.time_calls(method, suite.calls(name, args.iterations))
+            if latency.total == 0:
+                print(f"  {name:<28} skipped (nothing left to run it on)")
+                continue
+            merged[name].merge(latency)
+            errors[name] += failed
+            rounds[name].append({"p50": latency.percentile(50), "p95": latency.percentile(95),
+                                 "mean": latency.mean(), "calls": latency.total, "errors": failed})
+            print(f"  {name:<28} p50 {rounds[name][-1]['p50']:8.2f} ms  p95 {rounds[name][-1]['p95']:8.2f} ms"
+                  + (f"  {failed} errors" if failed else ""))
+
+    results = {}
+    for name, method, route, role in scenarios:
+        if not rounds[name]:
+            continue
+        results[name] = {
+            "method": method,
+            "route": route,
+            "role": role,
+            "p50": median(r["p50"] for r in rounds[name]),
+            "p95": median(r["p95"] for r in rounds[name]),
+            "mean": median(r["mean"] for r in rounds[name]),
+            "p99": merged[name].percentile(99),
+            "max": merged[name].max_us / 1000.0,
+            "calls": merged[name].total,
+            "errors": errors[name],
+            "rounds": rounds[name],
+        }
+    return results
+
+
+def render_run(report: Dict[str, Any]) -> str:
+    config = report["config"]
+    lines = [
+        f"# Benchmark: {report['tier']} tier at {report['commit']}",
+        f"Generated on {report['generatedAt']}",
+        "",
+        f"{config['rounds']} rounds of {config['iterations']} calls per scenario after {config['warmup']} "
+        f"warm-up calls, one at a time against {config['baseUrl']}. p50, p95 and mean are medians of the "
+        "per-round values; p99 and max cover every measured call.",
+        "",
+        "| Scenario | Route | p50 ms | p95 ms | p99 ms | Mean ms | Max ms | Calls | Errors |",
+        "|---|---|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    for name, result in report["scenarios"].items():
+        lines.append(
+            f"| {name} | {result['method']} {result['route']} | {result['p50']:.2f} | {result['p95']:.2f} | "
+            f"{result['p99']:.2f} | {result['mean']:.2f} | {result['max']:.2f} | {result['calls']} | "
+            f"{result['errors']} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def resolve_result(ref: str, tier: str, results_dir: Path) -> Tuple[Path, Dict[str, Any]]:
+    """A result file from a path, a commit key under results_dir, or any git revision"""
+    candidates = [Path(ref)]
+    if results_dir.exists():
+        keys = sorted(p.name for p in results_dir.iterdir() if (p / f"{tier}.json").exists())
+        candidates += [results_dir / key / f"{tier}.json" for key in keys if key == ref]
+        candidates += [results_dir / key / f"{tier}.json" for key in keys if key.startswith(ref)]
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", ref], cwd=PROJECT_ROOT, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        candidates.append(results_dir / commit / f"{tier}.json")
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    for path in candidates:
+        if path.is_file():
+            with open(path, "r", encoding="utf-8") as f:
+                return path, json.load(f)
+    raise SystemExit(f"No {tier} result for {ref} (looked in {results_dir}); run the suite on that commit first")
+
+
+def change(new: float, old: float) -> float:
+    return (new - old) / old if old else 0.0
+
+
+def compare_results(base: Dict[str, Any], head: Dict[str, Any], threshold: float, min_delta_ms: float
+                    ) -> List[Dict[str, Any]]:
+    rows = []
+    names = list(dict.fromkeys(list(base["scenarios"]) + list(head["scenarios"])))
+    for name in names:
+        old, new = base["scenarios"].get(name), head["scenarios"].get(name)
+        if old is None or new is None:
+            rows.append({"scenario": name, "status": "new" if old is None else "missing", "base": old, "head": new})
+            continue
+        status = "ok"
+        for metric in ("p50", "p95"):
+            delta = new[metric] - old[metric]
+            if abs(delta) <= min_delta_ms or abs(change(new[metric], old[metric])) <= threshold:
+                continue
+            if delta > 0:
+                status = "regression"
+            elif status == "ok":
+                status = "improvement"
+        if new["errors"] > old["errors"]:
+            status = "regression"
+        rows.append({"scenario": name, "status": status, "base": old, "head": new})
+    return rows
+
+
+def render_compare(base_path: Path, base: Dict[str, Any], head_path: Path, head: Dict[str, Any],
+                   rows: List[Dict[str, Any]], args) -> str:
+    lines = [
+        f"# Benchmark comparison: {base['commit']} → {head['commit']} ({head['tier']} tier)",
+        "",
+        f"Base: {base_path}  ",
+        f"Head: {head_path}",
+        "",
+        f"A scenario regresses when its p50 or p95 rises by more than {args.threshold:g}% and by more than "
+        f"{args.min_delta_ms:g} ms, or it has more errors.",
+        "",
+    ]
+    if base.get("fixture", {}).get("profile") != head.get("fixture", {}).get("profile"):
+        lines += ["**Warning:** the two runs used different datasets.", ""]
+    if base["config"].get("iterations") != head["config"].get("iterations") or \
+            base["config"].get("rounds") != head["config"].get("rounds"):
+        lines += ["**Warning:** the two runs used different --iterations or --rounds.", ""]
+    if base.get("environment", {}).get("platform") != head.get("environment", {}).get("platform"):
+        lines += ["**Warning:** the two runs were on different platforms.", ""]
+    lines += [
+        "| Scenario | p50 base | p50 head | p50 change | p95 base | p95 head | p95 change | Errors | Status |",
+        "|---|---:|---:|---:|---:|---:|---:|---:|---|",
+    ]
+    marks = {"regression": "**regression**", "improvement": "improvement", "ok": "", "new": "new",
+             "missing": "missing"}
+    for row in rows:
+        old, new = row["base"], row["head"]
+        if old is None or new is None:
+            lines.append(f"| {row['scenario']} | | | | | | | | {marks[row['status']]} |")
+            continue
+        lines.append(
+            f"| {row['scenario']} | {old['p50']:.2f} | {new['p50']:.2f} | {change(new['p50'], old['p50']):+.1%} | "
+            f"{old['p95']:.2f} | {new['p95']:.2f} | {change(new['p95'], old['p95']):+.1%} | "
+            f"{old['errors']} → {new['errors']} | {marks[row['status']]} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the API on fixed datasets and compare commits")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    fixtures = subcommands.add_parser("fixtures", help="Write a tier's dataset as a restorable backup")
+    fixtures.add_argument("--tier", choices=sorted(TIERS), action="append",
+                          help="Tier to write (repeatable; default: all)")
+    fixtures.add_argument("--force", action="store_true", help="Rewrite even if an identical backup exists")
+    fixtures.add_argument("--jobs", type=int, default=0, help="Worker processes (default: CPU count)")
+
+    run = subcommands.add_parser("run", help="Restore a tier, run the scenarios and store the result")
+    run.add_argument("--tier", choices=sorted(TIERS), default="small")
+    run.add_argument("--base-url", default=BASE_URL, help=f"API base URL (default: {BASE_URL})")
+    run.add_argument("--iterations", type=int, default=30, help="Measured calls per scenario per round (default: 30)")
+    run.add_argument("--warmup", type=int, default=5,
+                     help="Unmeasured calls before each scenario's measured calls (default: 5)")
+    run.add_argument("--rounds", type=int, default=3, help="Times to run the whole suite (default: 3)")
+    run.add_argument("--scenarios", help="Comma-separated names or patterns to run, e.g. 'questions.*' "
+                                         "(default: all)")
+    run.add_argument("--no-restore", action="store_true",
+                     help="Run on the database as it is (the tier must already be restored)")
+    run.add_argument("--results-dir", default=str(RESULTS_DIR), help=f"Results directory (default: {RESULTS_DIR})")
+
+    compare = subcommands.add_parser("compare", help="Compare two stored results and flag regressions")
+    compare.add_argument("base", help="Baseline: a result file, a commit key or a git revision")
+    compare.add_argument("head", nargs="?", help="Result to check (default: the current commit)")
+    compare.add_argument("--tier", choices=sorted(TIERS), default="small")
+    compare.add_argument("--threshold", type=float, default=10.0, help="Allowed rise in percent (default: 10)")
+    compare.add_argument("--min-delta-ms", type=float, default=1.0,
+                         help="Ignore changes smaller than this many milliseconds (default: 1)")
+    compare.add_argument("--results-dir", default=str(RESULTS_DIR), help=f"Results directory (default: {RESULTS_DIR})")
+    compare.add_argument("--out", help="Also write the comparison to this Markdown file")
+    return parser.parse_args()
+
+
+def cmd_fixtures(args):
+    for tier in args.tier or list(TIERS):
+        info = ensure_fixture(tier, args.force, args.jobs)
+        print(f"{tier}: backups/{fixture_dir(tier).name} ({info['counts']['questions']} questions)")
+        print(f"  Restore with: BACKUPS_DIR={BACKUPS_DIR} ./scripts/restore-db.sh {fixture_dir(tier).name}")
+
+
+def cmd_run(args):
+    scenarios = SCENARIOS
+    if args.scenarios:
+        patterns = [p.strip() for p in args.scenarios.split(",") if p.strip()]
+        scenarios = [s for s in SCENARIOS if any(fnmatch.fnmatch(s[0], p) for p in patterns)]
+        if not scenarios:
+            raise SystemExit(f"No scenario matches {args.scenarios}")
+
+    info = ensure_fixture(args.tier)
+    if not args.no_restore:
+        print(f"Restoring the {args.tier} tier...")
+        restore_fixture(args.tier)
+
+    suite = Suite(args.base_url, DatasetGenerator(tier_profile(args.tier)))
+    results = run_suite(suite, scenarios, args)
+    key = commit_key()
+    report = {
+        "generatedAt": datetime.now().isoformat(timespec="seconds"),
+        "commit": key,
+        "tier": args.tier,
+        "fixture": {"name": fixture_dir(args.tier).name, "profile": info.get("profile"), "counts": info.get("counts")},
+        "config": {
+            "baseUrl": args.base_url,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "rounds": args.rounds,
+            "restored": not args.no_restore,
+        },
+        "environment": environment(),
+        "scenarios": results,
+    }
+    directory = Path(args.results_dir) / key
+    directory.mkdir(parents=True, exist_ok=True)
+    json_path, md_path = directory / f"{args.tier}.json", directory / f"{args.tier}.md"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(render_run(report))
+    print("\n" + render_run(report))
+    print(f"Results written to {json_path} and {md_path}")
+    if any(result["errors"] for result in results.values()):
+        sys.exit(1)
+
+
+def cmd_compare(args):
+    results_dir = Path(args.results_dir)
+    base_path, base = resolve_result(args.base, args.tier, results_dir)
+    head_path, head = resolve_result(args.head or commit_key(), args.tier, results_dir)
+    rows = compare_results(base, head, args.threshold / 100.0, args.min_delta_ms)
+    markdown = render_compare(base_path, base, head_path, head, rows, args)
+    print(markdown)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(markdown)
+    regressions = [row["scenario"] for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+        sys.exit(1)
+    print("No regressions")
+
+
+def main():
+    args = parse_args()
+    {"fixtures": cmd_fixtures, "run": cmd_run, "compare": cmd_compare}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""Offline bulk writer turning a generated dataset into mongorestore/mongoimport files.
+
+Documents follow the Mongoose schemas in src/models (User, Lecture, Question,
+ScoringConfig), including embedded answers[].grades, grades and
+editSuggestions, and user scores are computed the way the API would award
+them. Password hashes are computed once per distinct password and reused.
+Questions are written by a pool of worker processes, each covering an index
+range of the generator, and the parts are concatenated afterwards.
+"""
+
+import os
+import json
+import shutil
+import datetime
+import subprocess
+from array import array
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, List, Any, Tuple
+
+from demo_dataset import DatasetGenerator
+from mcq_bson import ObjectId, encode, dumps_extended_json
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MONGO_DB = "mcq-writing-app"
+
+# Mirrors the defaults in src/models/ScoringConfig.js
+SCORING_DEFAULTS = {
+    "newQuestionScore": 10,
+    "editSuggestionBaseScore": 3,
+    "editAcceptBonus": 2,
+    "editRejectPenalty": -2,
+    "gradingScore": 1,
+}
+
+# Indexes declared on the Mongoose schemas, in mongodump metadata format
+COLLECTION_INDEXES = {
+    "users": [
+        {"key": {"email": 1}, "name": "email_1", "unique": True},
+        {"key": {"role": 1, "active": 1, "score": -1, "_id": 1}, "name": "role_1_active_1_score_-1__id_1"},
+    ],
+    "lectures": [
+        {"key": {"students": 1}, "name": "students_1"},
+        {"key": {"faculty": 1}, "name": "faculty_1"},
+        {"key": {"isActive": 1}, "name": "isActive_1"},
+        {"key": {"questions": 1}, "name": "questions_1"},
+    ],
+    "questions": [
+        {"key": {"owner": 1, "_id": 1}, "name": "owner_1__id_1"},
+        {"key": {"isFinal": 1, "_id": 1}, "name": "isFinal_1__id_1"},
+        {"key": {"similarity.bands": 1}, "name": "similarity.bands_1"},
+    ],
+    "scoreevents": [
+        {"key": {"user": 1, "createdAt": 1}, "name": "user_1_createdAt_1"},
+        {"key": {"question": 1}, "name": "question_1"},
+    ],
+    "gradebuckets": [
+        {"key": {"question": 1, "count": 1}, "name": "question_1_count_1"},
+    ],
+    "suggestionbuckets": [
+        {"key": {"question": 1, "count": 1}, "name": "question_1_count_1"},
+        {"key": {"suggestions._id": 1}, "name": "suggestions._id_1"},
+    ],
+    "scoringconfigs": [],
+}
+
+# ObjectId kinds; ids are <timestamp:4><kind:1><index:7> so they are unique and reproducible
+KIND_FACULTY, KIND_STUDENT, KIND_LECTURE, KIND_QUESTION = 1, 2, 3, 4
+KIND_ANSWER, KIND_GRADE, KIND_ANSWER_GRADE, KIND_SUGGESTION, KIND_SUGGESTED_ANSWER = 5, 6, 7, 8, 9
+KIND_CONFIG, KIND_SCORE_EVENT = 10, 11
+
+DEFAULT_START = "2025-01-06T08:00:00+00:00"
+TERM_DAYS = 84
+CHUNK_SIZE = 5000
+
+
+def object_id(kind: int, index: int, when: datetime.datetime) -> ObjectId:
+    return ObjectId(int(when.timestamp()).to_bytes(4, "big") + kind.to_bytes(1, "big") + index.to_bytes(7, "big"))
+
+
+def grade_stats(scores: List[int]) -> Dict[str, Any]:
+    """Aggregate 1-3 grades the way src/utils/questionStore.js maintains them"""
+    distribution = [0, 0, 0]
+    for score in scores:
+        distribution[score - 1] += 1
+    return {"count": len(scores), "sum": sum(scores), "distribution": distribution}
+
+
+def hash_passwords(passwords: List[str]) -> Dict[str, str]:
+    """bcrypt-hash each distinct password once (10 rounds, as in models/User.js)"""
+    distinct = sorted(set(passwords))
+    try:
+        import bcrypt
+        return {p: bcrypt.hashpw(p.encode(), bcrypt.gensalt(10, prefix=b"2a")).decode() for p in distinct}
+    except ImportError:
+        pass
+    # Fall back to the backend's own bcryptjs so hashes are guaranteed to verify
+    script = (
+        "const b=require('bcryptjs');"
+        "const p=JSON.parse(process.argv[1]);"
+        "console.log(JSON.stringify(p.map((x)=>b.hashSync(x,10))));"
+    )
+    result = subprocess.run(
+        ["node", "-e", script, json.dumps(distinct)],
+        cwd=PROJECT_ROOT, check=True, capture_output=True, text=True,
+    )
+    return dict(zip(distinct, json.loads(result.stdout)))
+
+
+class DocumentBuilder:
+    """Maps generator records onto Mongoose-shaped documents"""
+
+    def __init__(self, generator: DatasetGenerator, config: Dict[str, int]):
+        self.generator = generator
+        self.config = config
+        self.start = datetime.datetime.fromisoformat(generator.profile.get("startDate", DEFAULT_START))
+        if self.start.tzinfo is None:
+            self.start = self.start.replace(tzinfo=datetime.timezone.utc)
+
+    def user_id(self, role: str, index: int) -> ObjectId:
+        return object_id(KIND_FACULTY if role == "faculty" else KIND_STUDENT, index, self.start)
+
+    def lecture_id(self, index: int) -> ObjectId:
+        return object_id(KIND_LECTURE, index, self.start + datetime.timedelta(hours=1))
+
+    def question_time(self, index: int) -> datetime.datetime:
+        spread = TERM_DAYS * 86400 * index / max(1, self.generator.question_count)
+        return self.start + datetime.timedelta(days=1, seconds=spread)
+
+    def question_id(self, index: int) -> ObjectId:
+        return object_id(KIND_QUESTION, index, self.question_time(index))
+
+    def user(self, record: Dict[str, Any], password_hash: str, score: int) -> Dict[str, Any]:
+        return {
+            "_id": self.user_id(record["role"], record["index"]),
+            "email": record["email"],
+            "password": password_hash,
+            "name": record["name"],
+            "role": record["role"],
+            "score": score,
+            "active": True,
+            "passwordReset": False,
+            "resetToken": None,
+            "resetTokenExpires": None,
+            "createdAt": self.start,
+            "updatedAt": self.start,
+            "__v": 0,
+        }
+
+    def lecture(self, record: Dict[str, Any], question_indexes: array) -> Dict[str, Any]:
+        created = self.start + datetime.timedelta(hours=1)
+        return {
+            "_id": self.lecture_id(record["index"]),
+            "title": record["title"],
+            "description": record["description"],
+            "faculty": self.user_id("faculty", record["faculty"]),
+            "students": [self.user_id("student", s) for s in self.generator.lecture_students(record["index"])],
+            "questions": [self.question_id(q) for q in question_indexes],
+            "isActive": True,
+            "createdAt": created,
+            "updatedAt": created,
+            "__v": 0,
+        }
+
+    def question(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        index = record["index"]
+        created = self.question_time(index)
+        updated = created + datetime.timedelta(hours=len(record["grades"]) + len(record["suggestions"]))
+        answers = []
+        for a, answer in enumerate(record["answers"]):
+            answers.append({
+                "text": answer["text"],
+                "isCorrect": answer["isCorrect"],
+                "grades": [
+                    {
+                        "student": self.user_id("student", grade["student"]),
+                        "score": grade["answerScores"][a],
+                        "_id": object_id(KIND_ANSWER_GRADE, (index << 16) | (g << 3) | a, created),
+                    }
+                    for g, grade in enumerate(record["grades"])
+                ],
+                "gradeStats": grade_stats([grade["answerScores"][a] for grade in record["grades"]]),
+                "_id": object_id(KIND_ANSWER, (index << 16) | a, created),
+            })
+
+        suggestions = []
+        for s, suggestion in enumerate(record["suggestions"]):
+            document = {
+                "student": self.user_id("student", suggestion["student"]),
+                "suggestedQuestion": suggestion["suggestedQuestion"],
+                "suggestedAnswers": [
+                    {
+                        "text": answer["text"],
+                        "isCorrect": answer["isCorrect"],
+                        "grades": [],
+                        "_id": object_id(KIND_SUGGESTED_ANSWER, (index << 16) | (s << 3) | a, created),
+                    }
+                    for a, answer in enumerate(record["answers"])
+                ],
+                "status": suggestion["status"],
+                "createdAt": created + datetime.timedelta(minutes=30 * (s + 1)),
+                "_id": object_id(KIND_SUGGESTION, (index << 16) | s, created),
+            }
+            if suggestion["status"] != "pending":
+                document["rebuttalComment"] = "Reviewed during seeding"
+            suggestions.append(document)
+
+        return {
+            "_id": self.question_id(index),
+            "owner": self.user_id(record["owner"]["role"], record["owner"]["index"]),
+            "question": record["question"],
+            "answers": answers,
+            "isFinal": record["isFinal"],
+            "editSuggestions": suggestions,
+            "grades": [
+                {
+                    "student": self.user_id("student", grade["student"]),
+                    "questionScore": grade["questionScore"],
+                    "_id": object_id(KIND_GRADE, (index << 16) | g, created),
+                }
+                for g, grade in enumerate(record["grades"])
+            ],
+            "gradeStats": grade_stats([grade["questionScore"] for grade in record["grades"]]),
+            "suggestionStats": {
+                "count": len(suggestions),
+                **{
+                    status: sum(1 for suggestion in suggestions if suggestion["status"] == status)
+                    for status in ("pending", "accepted", "rejected")
+                },
+            },
+            "facultyComments": [],
+            "createdAt": created,
+            "updatedAt": updated,
+            "__v": 0,
+        }
+
+    def award(self, record: Dict[str, Any], faculty_scores: array, student_scores: array):
+        """Apply the scores the API awards for this question's history (create, contribute, finalize)"""
+        config = self.config
+        owner_scores = faculty_scores if record["owner"]["role"] == "faculty" else student_scores
+        owner_scores[record["owner"]["index"]] += config["newQuestionScore"]
+        for suggestion in record["suggestions"]:
+            student_scores[suggestion["student"]] += config["editSuggestionBaseScore"]
+            if suggestion["status"] == "accepted":
+                student_scores[suggestion["student"]] += config["editAcceptBonus"]
+            elif suggestion["status"] == "rejected":
+                student_scores[suggestion["student"]] += config["editRejectPenalty"]
+        for grade in record["grades"]:
+            student_scores[grade["student"]] += config["gradingScore"]
+
+        if record["isFinal"]:
+            owner_scores[record["owner"]["index"]] += config["newQuestionScore"]
+            first_status: Dict[int, str] = {}
+            for suggestion in record["suggestions"]:
+                first_status.setdefault(suggestion["student"], suggestion["status"])
+            for student, status in first_status.items():
+                student_scores[student] += config["editSuggestionBaseScore"]
+                if status == "accepted":
+                    student_scores[student] += config["editAcceptBonus"]
+                elif status == "rejected":
+                    student_scores[student] += config["editRejectPenalty"]
+            for student in {grade["student"] for grade in record["grades"]}:
+                student_scores[student] += config["gradingScore"]
+
+
+class DocumentWriter:
+    """Appends documents to a BSON or extended-JSON-lines file"""
+
+    def __init__(self, path: str, fmt: str):
+        self.fmt = fmt
+        self.count = 0
+        self.file = open(path, "wb" if fmt == "bson" else "w", encoding=None if fmt == "bson" else "utf-8")
+
+    def write(self, document: Dict[str, Any]):
+        if self.fmt == "bson":
+            self.file.write(encode(document))
+        else:
+            self.file.write(dumps_extended_json(document))
+            self.file.write("\n")
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+def _write_question_range(task: Tuple[Dict[str, Any], Dict[str, int], int, int, str, str]):
+    """Worker: write questions [start, stop) to a part file and return score and lecture bookkeeping"""
+    profile, config, start, stop, path, fmt = task
+    generator = DatasetGenerator(profile)
+    builder = DocumentBuilder(generator, config)
+    faculty_scores = array("q", [0]) * generator.faculty_count
+    student_scores = array("q", [0]) * generator.student_count
+    lecture_questions: Dict[int, array] = {}
+    writer = DocumentWriter(path, fmt)
+    for record in generator.questions(start, stop):
+        writer.write(builder.question(record))
+        builder.award(record, faculty_scores, student_scores)
+        lecture_questions.setdefault(record["lecture"], array("L")).append(record["index"])
+    writer.close()
+    return writer.count, faculty_scores, student_scores, lecture_questions
+
+
+def write_dataset(profile: Dict[str, Any], out_dir: str, fmt: str = "bson", jobs: int = 0) -> Dict[str, int]:
+    """Write the whole dataset under out_dir/<db>/ and return per-collection document counts"""
+    generator = DatasetGenerator(profile)
+    config = dict(SCORING_DEFAULTS)
+    builder = DocumentBuilder(generator, config)
+    db_dir = os.path.join(out_dir, MONGO_DB)
+    os.makedirs(db_dir, exist_ok=True)
+    extension = "bson" if fmt == "bson" else "json"
+    jobs = jobs or os.cpu_count() or 1
+
+    # Questions first: they determine user scores and lecture question lists
+    ranges = [
+        (start, min(start + CHUNK_SIZE, generator.question_count))
+        for start in range(0, generator.question_count, CHUNK_SIZE)
+    ]
+    tasks = [
+        (profile, config, start, stop, os.path.join(db_dir, f"questions.part{n:05d}.{extension}"), fmt)
+        for n, (start, stop) in enumerate(ranges)
+    ]
+    faculty_scores = array("q", [0]) * generator.faculty_count
+    student_scores = array("q", [0]) * generator.student_count
+    lecture_questions: Dict[int, array] = {}
+    question_count = 0
+    questions_path = os.path.join(db_dir, f"questions.{extension}")
+    with open(questions_path, "wb") as combined, Pool(jobs) as pool:
+        # imap keeps part order, so the combined file is in index order
+        for (count, faculty_part, student_part, lectures_part), task in zip(
+            pool.imap(_write_question_range, tasks), tasks
+        ):
+            question_count += count
+            for i, value in enumerate(faculty_part):
+                faculty_scores[i] += value
+            for i, value in enumerate(student_part):
+                student_scores[i] += value
+            for lecture, indexes in lectures_part.items():
+                lecture_questions.setdefault(lecture, array("L")).extend(indexes)
+            with open(task[4], "rb") as part:
+                shutil.copyfileobj(part, combined)
+            os.remove(task[4])
+            if question_count % (CHUNK_SIZE * 20) == 0 or question_count == generator.question_count:
+                print(f"  {question_count}/{generator.question_count} questions written")
+
+    hashes = hash_passwords(list(profile["passwords"].values()))
+    users = DocumentWriter(os.path.join(db_dir, f"users.{extension}"), fmt)
+    # Scores enter the ledger as one baseline event per user rather than one per award
+    events = DocumentWriter(os.path.join(db_dir, f"scoreevents.{extension}"), fmt)
+    for records, scores in ((generator.faculty(), faculty_scores), (generator.students(), student_scores)):
+        for record in records:
+            score = scores[record["index"]]
+            users.write(builder.user(record, hashes[record["password"]], score))
+            if score:
+                events.write({
+                    "_id": object_id(KIND_SCORE_EVENT, events.count, builder.start),
+                    "user": builder.user_id(record["role"], record["index"]),
+                    "type": "baseline",
+                    "points": score,
+                    "createdAt": builder.start,
+                    "__v": 0,
+                })
+    users.close()
+    events.close()
+
+    lectures = DocumentWriter(os.path.join(db_dir, f"lectures.{extension}"), fmt)
+    for record in generator.lectures():
+        lectures.write(builder.lecture(record, lecture_questions.get(record["index"], array("L"))))
+    lectures.close()
+
+    configs = DocumentWriter(os.path.join(db_dir, f"scoringconfigs.{extension}"), fmt)
+    configs.write({
+        "_id": object_id(KIND_CONFIG, 0, builder.start),
+        **config,
+        "lastUpdatedBy": builder.user_id("faculty", 0),
+        "createdAt": builder.start,
+        "updatedAt": builder.start,
+        "__v": 0,
+    })
+    configs.close()
+
+    counts = {
+        "users": users.count,
+        "lectures": lectures.count,
+        "questions": question_count,
+        "scoreevents": events.count,
+        "scoringconfigs": 1,
+    }
+    if fmt == "bson":
+        for collection, indexes in COLLECTION_INDEXES.items():
+            if collection not in counts:
+                continue  # bucket collections start empty
+            metadata = {
+                "indexes": [{"v": 2, "key": {"_id": 1}, "name": "_id_"}]
+                + [{"v": 2, **index, "background": True} for index in indexes],
+                "collectionName": collection,
+                "type": "collection",
+            }
+            with open(os.path.join(db_dir, f"{collection}.metadata.json"), "w", encoding="utf-8") as f:
+                json.dump(metadata, f)
+
+    with open(os.path.join(out_dir, "backup_info.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "name": os.path.basename(os.path.normpath(out_dir)),
+            "type": "bulk",
+            "format": fmt,
+            "seed": profile["seed"],
+            "counts": counts,
+        }, f, indent=4)
+    return counts
@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 
 import os
-import glob
 import re
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -12,6 +14,13 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 # Output file
 STATS_FILE = PROJECT_ROOT / "STATISTICS.md"
 
+# Per-file line counts from previous runs, keyed by path, mtime and size
+CACHE_FILE = PROJECT_ROOT / ".stats-cache.json"
+CACHE_VERSION = 1
+
+# Below this many changed files, counting inline beats starting a process pool
+PARALLEL_THRESHOLD = 32
+
 # Project directories - now using absolute paths
 PROJECT_DIRS = [
     PROJECT_ROOT / "src/config",
@@ -25,11 +34,18 @@ PROJECT_DIRS = [
     PROJECT_ROOT / "frontend/src/types",
 ]
 
+FILE_TYPES = ["js", "jsx", "ts", "tsx", "css"]
+
+# Comment and blank-line rules per file type, compiled once
+SCRIPT_SKIP = re.compile(r"^\s*(?://|/\*|\*)")
+CSS_SKIP = re.compile(r"^\s*(?:/\*.*?\*/|\*)")
+
+
 def get_gitignore_patterns():
     """Read patterns from .gitignore and convert them to regex patterns."""
     gitignore_path = PROJECT_ROOT / ".gitignore"
     patterns = []
-    
+
     if gitignore_path.exists():
         with open(gitignore_path, "r", encoding="utf-8") as f:
             for line in f:
@@ -43,9 +59,10 @@ def get_gitignore_patterns():
                 # Convert glob pattern to regex pattern
                 pattern = re.escape(line).replace(r'\*', '.*')
                 patterns.append(pattern)
-    
+
     return patterns
 
+
 def get_stats_specific_patterns():
     """Get patterns specific to stats collection (non-gitignore patterns)."""
     return [
@@ -58,93 +75,183 @@ def get_stats_specific_patterns():
         ]
     ]
 
-def should_exclude_file(file_path, patterns):
-    """Check if a file should be excluded based on patterns."""
-    file_name = os.path.basename(file_path)
-    relative_path = str(Path(file_path).relative_to(PROJECT_ROOT))
-    
-    return any(
-        re.search(pattern, file_name) or re.search(pattern, relative_path)
-        for pattern in patterns
+
+def compile_matcher(patterns):
+    """Combine patterns into a single regex; None when there are no patterns."""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+def should_exclude_file(relative_path, matcher):
+    """Check if a file should be excluded, by its name or its path relative to the project root."""
+    if matcher is None:
+        return False
+    return bool(
+        matcher.search(relative_path.rsplit("/", 1)[-1]) or matcher.search(relative_path)
     )
 
-def analyze_gitignore_status():
-    """Analyze files that match and don't match .gitignore patterns across the entire project."""
-    gitignore_patterns = get_gitignore_patterns()
-    matched_files = set()
-    unmatched_files = set()
 
-    # Walk through the entire project directory
-    for root, _, files in os.walk(PROJECT_ROOT):
+def count_tree_files(path):
+    """Count every file below a directory without matching anything."""
+    count = 0
+    for _, _, files in os.walk(path):
+        count += len(files)
+    return count
+
+
+def analyze_gitignore_status(full=False):
+    """Analyze files that match and don't match .gitignore patterns across the entire project.
+
+    Directories whose path matches a pattern are skipped during the walk, since
+    every file below them would match too. Their files are only counted with
+    full=True.
+    """
+    matcher = compile_matcher(get_gitignore_patterns())
+    matched_files = []
+    unmatched_files = []
+    pruned_dirs = []
+    pruned_file_count = 0
+
+    root_prefix = len(str(PROJECT_ROOT)) + 1
+    for root, dirs, files in os.walk(PROJECT_ROOT):
+        relative_root = root[root_prefix:].replace(os.sep, "/")
+        prefix = f"{relative_root}/" if relative_root else ""
+
+        kept = []
+        for directory in dirs:
+            if matcher is not None and matcher.search(f"{prefix}{directory}/"):
+                pruned_dirs.append(f"{prefix}{directory}")
+                if full:
+                    pruned_file_count += count_tree_files(os.path.join(root, directory))
+            else:
+                kept.append(directory)
+        dirs[:] = kept
+
         for file in files:
-            file_path = Path(root) / file
-            try:
-                relative_path = str(file_path.relative_to(PROJECT_ROOT))
-                if should_exclude_file(file_path, gitignore_patterns):
-                    matched_files.add(relative_path)
-                else:
-                    unmatched_files.add(relative_path)
-            except Exception:
-                continue
-    
-    return (
-        len(matched_files), 
-        sorted(matched_files),
-        len(unmatched_files),
-        sorted(unmatched_files)
-    )
+            relative_path = f"{prefix}{file}"
+            if should_exclude_file(relative_path, matcher):
+                matched_files.append(relative_path)
+            else:
+                unmatched_files.append(relative_path)
+
+    return {
+        "matched_count": len(matched_files) + pruned_file_count,
+        "matched_files": sorted(matched_files),
+        "unmatched_count": len(unmatched_files),
+        "unmatched_files": sorted(unmatched_files),
+        "pruned_dirs": sorted(pruned_dirs),
+        "full": full,
+    }
+
+
+def count_lines(task):
+    """Count lines of code in one file; runs in worker processes."""
+    file_path, ext = task
+    try:
+        with open(file_path, "r", encoding="utf-8") as file:
+            if ext in ("js", "jsx", "ts", "tsx"):
+                return sum(1 for line in file if line.strip() and not SCRIPT_SKIP.match(line))
+            if ext == "css":
+                return sum(1 for line in file if line.strip() and not CSS_SKIP.match(line))
+            return sum(1 for line in file if line.strip())
+    except Exception as e:
+        print(f"Error reading file {file_path}: {e}")
+        return 0
+
+
+def load_cache(enabled):
+    if not enabled or not CACHE_FILE.exists():
+        return {}
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("files", {}) if data.get("version") == CACHE_VERSION else {}
+    except (OSError, ValueError):
+        return {}
 
-def count_stats(ext):
-    """Count files and lines of code for a specific extension."""
-    file_count = 0
-    lines = 0
-    exclude_patterns = get_gitignore_patterns() + get_stats_specific_patterns()
 
+def save_cache(entries):
+    try:
+        with open(CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "files": entries}, f)
+    except OSError as e:
+        print(f"Warning: could not write cache {CACHE_FILE}: {e}")
+
+
+def collect_source_files():
+    """List implementation files directly inside PROJECT_DIRS, one scandir per directory."""
+    matcher = compile_matcher(get_gitignore_patterns() + get_stats_specific_patterns())
+    sources = []
     for directory in PROJECT_DIRS:
-        # Create the glob pattern
-        pattern = os.path.join(directory, f"*.{ext}")
-        
-        # Use glob to find files matching the extension
-        files = glob.glob(str(pattern))
-
-        # Filter out excluded files
-        filtered_files = [
-            f for f in files
-            if not should_exclude_file(f, exclude_patterns)
-        ]
-        
-        file_count += len(filtered_files)
-
-        for file_path in filtered_files:
-            try:
-                with open(file_path, "r", encoding="utf-8") as file:
-                    if ext in ("js", "jsx", "ts", "tsx"):
-                        lines += sum(
-                            1
-                            for line in file
-                            if not re.match(r"^\s*//", line)
-                            and not re.match(r"^\s*/\*", line)
-                            and not re.match(r"^\s*\*", line)
-                            and not line.strip() == ""
-                        )
-                    elif ext == "css":
-                        lines += sum(
-                            1
-                            for line in file
-                            if not re.match(r"^\s*/\*.*?\*/", line)
-                            and not re.match(r"^\s*\*", line)
-                            and not line.strip() == ""
-                        )
-                    else:
-                        lines += sum(1 for line in file if line.strip())
-            except Exception as e:
-                print(f"Error reading file {file_path}: {e}")
-
-    return file_count, lines
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            ext = entry.name.rsplit(".", 1)[-1] if "." in entry.name else ""
+            if ext not in FILE_TYPES or not entry.is_file():
+                continue
+            relative_path = str(Path(entry.path).relative_to(PROJECT_ROOT)).replace(os.sep, "/")
+            if should_exclude_file(relative_path, matcher):
+                continue
+            stat = entry.stat()
+            sources.append((relative_path, entry.path, ext, stat.st_mtime_ns, stat.st_size))
+    return sources
+
+
+def count_stats(use_cache=True, jobs=0):
+    """Count files and lines of code per extension, re-reading only files that changed."""
+    cache = load_cache(use_cache)
+    sources = collect_source_files()
+
+    entries = {}
+    stale = []
+    for relative_path, file_path, ext, mtime, size in sources:
+        cached = cache.get(relative_path)
+        if cached and cached["mtime"] == mtime and cached["size"] == size:
+            entries[relative_path] = cached
+        else:
+            entries[relative_path] = {"mtime": mtime, "size": size, "ext": ext, "lines": 0}
+            stale.append((relative_path, file_path, ext))
+
+    tasks = [(file_path, ext) for _, file_path, ext in stale]
+    if len(tasks) >= PARALLEL_THRESHOLD and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs or None) as pool:
+            counts = list(pool.map(count_lines, tasks, chunksize=16))
+    else:
+        counts = [count_lines(task) for task in tasks]
+    for (relative_path, _, _), lines in zip(stale, counts):
+        entries[relative_path]["lines"] = lines
+
+    if use_cache:
+        save_cache(entries)
+
+    stats = {ext: [0, 0] for ext in FILE_TYPES}
+    for entry in entries.values():
+        stats[entry["ext"]][0] += 1
+        stats[entry["ext"]][1] += entry["lines"]
+    return stats, len(stale)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Collect code statistics into STATISTICS.md")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Re-read every file and do not update {CACHE_FILE.name}")
+    parser.add_argument("--full", action="store_true",
+                        help="Also count the files inside ignored directories (slow on large node_modules)")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="Worker processes for line counting (default: CPU count)")
+    return parser.parse_args()
+
 
 def main():
     """Main function to collect and write statistics."""
+    args = parse_args()
     try:
+        status = analyze_gitignore_status(full=args.full)
+        stats, recounted = count_stats(use_cache=not args.no_cache, jobs=args.jobs)
+
         with open(STATS_FILE, "w", encoding="utf-8") as f:
             f.write("# Code Statistics\n")
             f.write(f"Generated on {datetime.now()}\n")
@@ -154,15 +261,20 @@ def main():
             total_lines = 0
 
             # Analyze .gitignore status
-            matched_count, matched_files, unmatched_count, unmatched_files = analyze_gitignore_status()
+            matched_count = status["matched_count"]
+            unmatched_count = status["unmatched_count"]
             f.write("## Files Status According to .gitignore\n")
             f.write(f"- Files that MATCH .gitignore patterns (excluded): {matched_count}\n")
             f.write(f"- Files that DO NOT match .gitignore (tracked): {unmatched_count}\n")
-            f.write("\nNote: These counts include ALL files in the workspace, not just implementation files.\n\n")
+            f.write(f"- Ignored directories skipped: {len(status['pruned_dirs'])}\n")
+            if status["full"]:
+                f.write("\nNote: These counts include ALL files in the workspace, not just implementation files.\n\n")
+            else:
+                f.write("\nNote: These counts include all workspace files outside ignored directories; "
+                        "run with --full to also count files inside them.\n\n")
 
-            file_types = ["js", "jsx", "ts", "tsx", "css"]
-            for ext in file_types:
-                files, lines = count_stats(ext)
+            for ext in FILE_TYPES:
+                files, lines = stats[ext]
                 total_files += files
                 total_lines += lines
 
@@ -177,7 +289,7 @@ def main():
             f.write(f"- Total workspace files matched by .gitignore: {matched_count}\n")
             f.write(f"- Total workspace files NOT matched by .gitignore: {unmatched_count}\n")
 
-        print(f"Statistics have been written to {STATS_FILE}")
+        print(f"Statistics have been written to {STATS_FILE} ({recounted} files recounted)")
     except PermissionError as e:
         print(f"Error: Permission denied when writing to {STATS_FILE}")
         print("Try running the script with appropriate permissions")
@@ -186,5 +298,6 @@ def main():
         print(f"An error occurred: {e}")
         raise
 
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,19 +1,31 @@
 #!/usr/bin/env python3
 import os
+import re
 import sys
 import json
 import time
 import random
+import argparse
 import requests
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Callable, Iterable
+
+from loadgen import ApiClient, LoadGenerator, ServerMetrics, DEFAULT_MIX, parse_mix, build_report, write_report
+from demo_dataset import DatasetGenerator, load_profile
+from bulk_load import write_dataset, MONGO_DB as BULK_DB
 
 # Configuration
 BASE_URL = "http://localhost:3000/api"
 WORKSPACE_DIR = "/workspaces/QuestionWriting"
 MONGO_DB = "mcq-writing-app"
 
+# Scaled seeding (--scale / --profile); dataset shape comes from demo_dataset.py profiles
+SCALE_BATCH_SIZE = 500  # ids per enrolment / question assignment request
+SCALE_CHUNK_SIZE = 2000  # generated questions seeded per pipeline chunk
+LIMITED_RETRIES = 10  # retries of a rate-limited (429) or busy (503) login or set-password
+
 # Demo users data
 FACULTY_USERS = [
     {"name": "Professor Smith", "email": "smith@example.com", "password": "faculty123"},
@@ -431,8 +443,11 @@ class DemoDataCreator:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             backup_name = f"demo-data_{timestamp}"
             
-            script_path = f"{WORKSPACE_DIR}/scripts/backup-db.sh"
-            result = subprocess.run([script_path, backup_name], check=True, capture_output=True, text=True)
+            script_path = f"{WORKSPACE_DIR}/scripts/backup.py"
+            result = subprocess.run(
+                [sys.executable, script_path, "dump", "--name", backup_name],
+                check=True, capture_output=True, text=True,
+            )
             print(f"Database backup created: {backup_name}")
             return backup_name
         except subprocess.CalledProcessError as e:
@@ -446,7 +461,7 @@ class DemoDataCreator:
         print(f"\n===== Demo Data Creation {'Complete' if backup_name else 'Incomplete'} =====")
         if backup_name:
             print(f"A backup of the demo database has been created: {backup_name}")
-            print(f"You can restore this backup at any time using: ./scripts/restore-db.sh {backup_name}")
+            print(f"You can restore this backup at any time using: python3 scripts/backup.py restore {backup_name}")
         
         print("\nDemo user accounts:")
         print("-------------------")
@@ -505,6 +520,448 @@ class DemoDataCreator:
         # Print summary
         self.print_summary(backup_name)
 
+class ConcurrentDemoDataCreator(DemoDataCreator):
+    """Seeds a generated dataset through a bounded pool of keep-alive connections.
+
+    Each phase only starts once the previous one has finished, so users exist
+    before lectures, lectures before enrolment and questions before their
+    suggestions, grades and reviews. Questions are streamed from the generator
+    in chunks so memory stays bounded. Every call is timed per endpoint.
+    """
+
+    def __init__(self, profile: Dict[str, Any], workers: int = 32):
+        super().__init__()
+        self.generator = DatasetGenerator(profile)
+        self.workers = workers
+        self.client = ApiClient(BASE_URL)
+        self.stats = self.client.stats
+        self.question_count = 0
+
+    def _call(self, method: str, endpoint: str, path: str, token: Optional[str] = None, **kwargs) -> Any:
+        """Perform a timed API call; `endpoint` is the route template used for stats"""
+        return self.client.call(method, endpoint, path, token, **kwargs)
+
+    def _call_limited(self, method: str, endpoint: str, path: str, token: Optional[str] = None, **kwargs) -> Any:
+        """Like _call, for routes behind loginRateLimit: 429s and 503s are retried after Retry-After"""
+        for attempt in range(LIMITED_RETRIES + 1):
+            response = self.client.request(method, endpoint, path, token, **kwargs)
+            if response.status_code not in (429, 503) or attempt == LIMITED_RETRIES:
+                break
+            time.sleep(min(float(response.headers.get("Retry-After") or 1), 30) * random.uniform(1, 1.5))
+        response.raise_for_status()
+        return response.json()
+
+    def _run_phase(self, label: str, fn: Callable[[Any], Any], items: Iterable[Any], quiet: bool = False) -> List[Any]:
+        """Run fn over items on the worker pool, keeping at most a few tasks queued per worker.
+
+        Returns results in input order, with None for items that failed.
+        """
+        items = list(items)
+        results: List[Any] = [None] * len(items)
+        failures = 0
+        done = 0
+        max_pending = self.workers * 4
+        step = max(1, len(items) // 10)
+        started = time.monotonic()
+        if not quiet:
+            print(f"\n{label}: {len(items)} tasks on {self.workers} workers...")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {}
+            position = 0
+            while position < len(items) or pending:
+                while position < len(items) and len(pending) < max_pending:
+                    pending[executor.submit(fn, items[position])] = position
+                    position += 1
+                future = next(as_completed(pending))
+                index = pending.pop(future)
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    failures += 1
+                    if failures <= 5:
+                        print(f"  {label} task failed: {e}")
+                done += 1
+                if not quiet and (done % step == 0 or done == len(items)):
+                    print(f"  {done}/{len(items)} ({failures} failed)")
+
+        if not quiet:
+            print(f"  {label} finished in {time.monotonic() - started:.1f}s")
+        return results
+
+    def _register(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        role = user["role"]
+        body = {"name": user["name"], "email": user["email"], "password": user["password"], "role": role}
+        registered = self._call("POST", "/users/register", "/users/register", json=body)
+        user_id = registered["_id"]
+        self._call("PUT", "/users/:id/activate", f"/users/{user_id}/activate", self.admin_token, json={"role": role})
+        self._call_limited(
+            "POST", "/users/set-password", "/users/set-password", json={"userId": user_id, "password": user["password"]}
+        )
+        return self._call_limited(
+            "POST", "/users/login", "/users/login", json={"email": user["email"], "password": user["password"]}
+        )
+
+    def create_users(self) -> bool:
+        # Ids and tokens are kept positionally (None on failure) so generator indexes map onto them
+        for user in self._run_phase("Creating faculty users", self._register, self.generator.faculty()):
+            self.faculty_tokens.append(user and user["token"])
+            self.faculty_ids.append(user and user["_id"])
+        if not any(self.faculty_tokens):
+            print("Error: No faculty accounts were created")
+            return False
+
+        for user in self._run_phase("Creating student users", self._register, self.generator.students()):
+            self.student_tokens.append(user and user["token"])
+            self.student_ids.append(user and user["_id"])
+        return any(self.student_tokens)
+
+    def create_lectures(self) -> bool:
+        def create(spec):
+            token = self.faculty_tokens[spec["faculty"]]
+            body = {"title": spec["title"], "description": spec["description"]}
+            return {**self._call("POST", "/lectures", "/lectures", token, json=body), "token": token}
+
+        self.lectures = self._run_phase("Creating lectures", create, self.generator.lectures())
+        return any(self.lectures)
+
+    def _batches(self, ids: List[str]) -> List[List[str]]:
+        return [ids[i:i + SCALE_BATCH_SIZE] for i in range(0, len(ids), SCALE_BATCH_SIZE)]
+
+    def add_students_to_lectures(self) -> bool:
+        jobs = []
+        for index, lecture in enumerate(self.lectures):
+            if not lecture:
+                continue
+            student_ids = [self.student_ids[s] for s in self.generator.lecture_students(index) if self.student_ids[s]]
+            jobs.extend((lecture, batch) for batch in self._batches(student_ids))
+
+        results = self._run_phase(
+            "Enrolling students",
+            lambda job: self._call(
+                "POST", "/lectures/:id/students", f"/lectures/{job[0]['_id']}/students", job[0]["token"],
+                json={"studentIds": job[1]},
+            ),
+            jobs,
+        )
+        return all(results)
+
+    def _owner_token(self, owner: Dict[str, Any]) -> Optional[str]:
+        tokens = self.faculty_tokens if owner["role"] == "faculty" else self.student_tokens
+        return tokens[owner["index"]]
+
+    def _seed_chunk(self, specs: List[Dict[str, Any]]):
+        """Create one chunk of generated questions, then their grades, suggestions and reviews"""
+        specs = [
+            spec for spec in specs
+            if self._owner_token(spec["owner"]) and self.lectures[spec["lecture"]]
+        ]
+
+        def create(spec):
+            body = {"question": spec["question"], "answers": spec["answers"]}
+            created = self._call("POST", "/questions", "/questions", self._owner_token(spec["owner"]), json=body)
+            return {"_id": created["_id"], "answers": created["answers"]}
+
+        created = self._run_phase("questions", create, specs, quiet=True)
+        pairs = [(spec, question) for spec, question in zip(specs, created) if question]
+        self.question_count += len(pairs)
+
+        by_lecture: Dict[int, List[str]] = {}
+        for spec, question in pairs:
+            by_lecture.setdefault(spec["lecture"], []).append(question["_id"])
+        self._run_phase(
+            "lecture assignment",
+            lambda job: self._call(
+                "POST", "/lectures/:id/questions", f"/lectures/{job[0]['_id']}/questions", job[0]["token"],
+                json={"questionIds": job[1]},
+            ),
+            [(self.lectures[index], batch) for index, ids in by_lecture.items() for batch in self._batches(ids)],
+            quiet=True,
+        )
+
+        jobs = []
+        for spec, question in pairs:
+            for grade in spec["grades"]:
+                token = self.student_tokens[grade["student"]]
+                if token:
+                    jobs.append(("grade", question, token, {
+                        "questionScore": grade["questionScore"],
+                        "answerGrades": [
+                            {"answerId": answer["_id"], "score": score}
+                            for answer, score in zip(question["answers"], grade["answerScores"])
+                        ],
+                    }, None))
+            for suggestion in spec["suggestions"]:
+                token = self.student_tokens[suggestion["student"]]
+                if token:
+                    jobs.append(("suggest", question, token, {
+                        "suggestedQuestion": suggestion["suggestedQuestion"],
+                        "suggestedAnswers": question["answers"],
+                    }, suggestion["status"]))
+
+        def contribute(job):
+            kind, question, token, body, status = job
+            if kind == "grade":
+                return self._call(
+                    "POST", "/questions/:id/grades", f"/questions/{question['_id']}/grades", token, json=body
+                )
+            # The patch carries the suggestion just created; the last entry of the
+            # full question may be a concurrent one from another worker
+            result = self._call(
+                "POST", "/questions/:id/suggestions", f"/questions/{question['_id']}/suggestions", token,
+                json=body, params={"return": "patch"},
+            )
+            return (question, result["suggestion"]["_id"], status)
+
+        results = self._run_phase("grades and suggestions", contribute, jobs, quiet=True)
+        reviewer_of = {question["_id"]: self.lectures[spec["lecture"]]["token"] for spec, question in pairs}
+        reviews = [
+            result for (kind, *_), result in zip(jobs, results)
+            if kind == "suggest" and result and result[2] != "pending"
+        ]
+        self._run_phase(
+            "reviews",
+            lambda item: self._call(
+                "PUT", "/questions/:id/suggestions/:suggestionId",
+                f"/questions/{item[0]['_id']}/suggestions/{item[1]}", reviewer_of[item[0]["_id"]],
+                json={"status": item[2], "rebuttalComment": "Reviewed during seeding"},
+            ),
+            reviews,
+            quiet=True,
+        )
+        self._run_phase(
+            "finalization",
+            lambda q: self._call("PUT", "/questions/:id/finalize", f"/questions/{q['_id']}/finalize", reviewer_of[q["_id"]]),
+            [question for spec, question in pairs if spec["isFinal"]],
+            quiet=True,
+        )
+
+    def create_questions(self) -> bool:
+        """Stream generated questions through the seeding pipeline chunk by chunk"""
+        total = self.generator.question_count
+        print(f"\nSeeding {total} questions with grades, suggestions and reviews "
+              f"in chunks of {SCALE_CHUNK_SIZE}...")
+        started = time.monotonic()
+        chunk: List[Dict[str, Any]] = []
+        for spec in self.generator.questions():
+            chunk.append(spec)
+            if len(chunk) == SCALE_CHUNK_SIZE:
+                self._seed_chunk(chunk)
+                chunk = []
+                print(f"  {spec['index'] + 1}/{total} questions ({time.monotonic() - started:.1f}s)")
+        if chunk:
+            self._seed_chunk(chunk)
+        print(f"  Questions finished in {time.monotonic() - started:.1f}s")
+        return self.question_count > 0
+
+    def create_suggestions_and_grades(self) -> bool:
+        # Grades, suggestions and reviews are seeded per chunk in create_questions
+        return self.question_count > 0
+
+    def print_summary(self, backup_name: Optional[str]):
+        self.stats.stop()
+        print(f"\n===== Scaled Demo Data Creation {'Complete' if backup_name else 'Incomplete'} =====")
+        if backup_name:
+            print(f"You can restore this backup at any time using: python3 scripts/backup.py restore {backup_name}")
+        print(f"Faculty: {sum(1 for i in self.faculty_ids if i)}  Students: {sum(1 for i in self.student_ids if i)}  "
+              f"Lectures: {sum(1 for l in self.lectures if l)}  Questions: {self.question_count}")
+        passwords = self.generator.profile["passwords"]
+        print(f"Accounts follow the pattern faculty00000@example.com / Password: {passwords['faculty']}")
+        print(f"                            student000000@example.com / Password: {passwords['student']}")
+        print("\nPer-endpoint statistics:")
+        print(self.stats.format_table())
+
+
+def run_load_test(args):
+    """Replay the demo flows at an open-loop arrival rate and write a JSON + Markdown report"""
+    if args.profile or args.scale:
+        generator = DatasetGenerator(load_profile(args.profile, args.scale))
+        faculty = list(generator.faculty())[:args.faculty]
+        students = [s for _, s in zip(range(args.students), generator.students())]
+    else:
+        faculty = FACULTY_USERS[:args.faculty]
+        students = STUDENT_USERS[:args.students]
+
+    client = ApiClient(BASE_URL)
+    load = LoadGenerator(client, seed=args.seed, max_in_flight=args.max_in_flight)
+    print(f"Logging in {len(faculty)} faculty and {len(students)} student accounts...")
+    load.login_accounts(faculty, "faculty")
+    load.login_accounts(students, "student")
+    if not load.students:
+        print("Error: No student accounts could log in; seed data first")
+        sys.exit(1)
+    load.load_questions()
+    print(f"{len(load.open_questions)} open questions available")
+
+    mix = parse_mix(args.mix)
+    print(f"Offering {args.rate} req/s for {args.duration}s (warm-up {args.warmup}s), mix: {mix}")
+    server = None
+    if not args.no_metrics:
+        metrics_url = args.metrics_url or re.sub(r"/api/?$", "", BASE_URL) + "/metrics"
+        server = ServerMetrics(metrics_url, args.metrics_token or os.environ.get("METRICS_TOKEN"))
+    load.run(mix, args.rate, args.duration, args.warmup, server)
+
+    config = {
+        "baseUrl": BASE_URL,
+        "rate": args.rate,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "mix": mix,
+        "students": len(load.students),
+        "faculty": len(load.faculty),
+        "seed": args.seed,
+    }
+    report = build_report(client.stats, config, {
+        "dropped": load.dropped,
+        "failures": load.failures,
+        "peakInFlight": load.peak_in_flight,
+        **load.server_counters(),
+        **({"server": load.server_metrics} if load.server_metrics else {}),
+    })
+    name = args.name or f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    json_path, md_path = write_report(report, name, args.report_dir)
+    print("\n" + client.stats.format_table())
+    print(f"\nReport written to {json_path} and {md_path}")
+
+
+def run_storm_test(args):
+    """Measure unrelated endpoints while a whole class logs in at once"""
+    if args.profile or args.scale:
+        generator = DatasetGenerator(load_profile(args.profile, args.scale))
+        faculty = list(generator.faculty())[:args.faculty]
+        everyone = [s for _, s in zip(range(max(args.students, args.storm_size)), generator.students())]
+    else:
+        faculty = FACULTY_USERS[:args.faculty]
+        everyone = STUDENT_USERS[:max(args.students, args.storm_size)]
+    storm_accounts = everyone[:args.storm_size]
+
+    client = ApiClient(BASE_URL)
+    load = LoadGenerator(client, seed=args.seed, max_in_flight=args.max_in_flight)
+    print(f"Logging in {len(faculty)} faculty and {args.students} student accounts for background traffic...")
+    load.login_accounts(faculty, "faculty")
+    load.login_accounts(everyone[:args.students], "student")
+    if not load.students:
+        print("Error: No student accounts could log in; seed data first")
+        sys.exit(1)
+    load.load_questions()
+
+    mix = parse_mix(args.mix) if args.mix else {k: v for k, v in DEFAULT_MIX.items() if k != "login"}
+    print(f"Background {args.rate} req/s ({mix}); {len(storm_accounts)} logins within {args.storm_window}s "
+          f"after {args.before}s, then {args.after}s of recovery")
+    result = load.run_storm(mix, args.rate, storm_accounts, args.before, args.storm_window, args.after, args.retries)
+
+    config = {
+        "baseUrl": BASE_URL,
+        "rate": args.rate,
+        "mix": mix,
+        "before": args.before,
+        "after": args.after,
+        "stormSize": len(storm_accounts),
+        "stormWindow": args.storm_window,
+        "retries": args.retries,
+        "seed": args.seed,
+    }
+    phases = {name: {"totals": stats.totals(), "routes": stats.summary()} for name, stats in result["phases"].items()}
+    report = build_report(result["phases"]["during"], config, {
+        "phases": phases,
+        "storm": result["storm"],
+        "dropped": load.dropped,
+        "failures": load.failures,
+        **load.server_counters(),
+    })
+    name = args.name or f"storm_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    json_path, md_path = write_report(report, name, args.report_dir, title="Login Storm Report")
+    storm = result["storm"]
+    print(f"\n{storm['ok']}/{storm['accounts']} logged in, {storm['limitedResponses']} x 429, "
+          f"{storm['busyResponses']} x 503, p99 time to log in {storm['completion']['p99']:.0f} ms")
+    for route in sorted(phases["during"]["routes"]):
+        p99 = [phases[p]["routes"].get(route, {}).get("p99", 0.0) for p in ("before", "during", "after")]
+        print(f"  {route:<40} p99 before {p99[0]:8.1f}  during {p99[1]:8.1f}  after {p99[2]:8.1f} ms")
+    print(f"\nReport written to {json_path} and {md_path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Create demo data for the MCQ writing app")
+    subcommands = parser.add_subparsers(dest="command")
+    load = subcommands.add_parser("load", help="Run an open-loop load test against seeded data")
+    load.add_argument("--base-url", default=argparse.SUPPRESS, help="API base URL")
+    load.add_argument("--rate", type=float, default=20, help="Target arrivals per second (default: 20)")
+    load.add_argument("--duration", type=float, default=60, help="Measured duration in seconds (default: 60)")
+    load.add_argument("--warmup", type=float, default=5, help="Unrecorded warm-up in seconds (default: 5)")
+    load.add_argument("--mix", help="Operation weights, e.g. 'grade=50,list_questions=50', or a JSON file "
+                                    f"(operations: {', '.join(DEFAULT_MIX)})")
+    load.add_argument("--profile", help="Dataset profile the accounts were seeded from")
+    load.add_argument("--scale", type=int, default=0, help="--scale the accounts were seeded with")
+    load.add_argument("--students", type=int, default=100, help="Student accounts to log in (default: 100)")
+    load.add_argument("--faculty", type=int, default=2, help="Faculty accounts to log in (default: 2)")
+    load.add_argument("--max-in-flight", type=int, default=256, help="Client concurrency cap (default: 256)")
+    load.add_argument("--seed", type=int, default=1, help="Random seed for arrivals and payloads")
+    load.add_argument("--name", help="Report file name (default: load_<timestamp>)")
+    load.add_argument("--report-dir", help="Report directory (default: load-reports/)")
+    load.add_argument("--metrics-url", help="Server metrics endpoint (default: <base-url without /api>/metrics)")
+    load.add_argument("--metrics-token", help="Bearer token for the metrics endpoint (default: $METRICS_TOKEN)")
+    load.add_argument("--no-metrics", action="store_true", help="Do not scrape server metrics")
+    storm = subcommands.add_parser("storm", help="Measure other endpoints while many accounts log in at once")
+    storm.add_argument("--base-url", default=argparse.SUPPRESS, help="API base URL")
+    storm.add_argument("--storm-size", type=int, default=300, help="Accounts logging in during the storm (default: 300)")
+    storm.add_argument("--storm-window", type=float, default=5,
+                       help="Seconds over which the storm logins arrive; 0 = all at once (default: 5)")
+    storm.add_argument("--retries", type=int, default=3, help="Retries per login after 429/503 (default: 3)")
+    storm.add_argument("--rate", type=float, default=20, help="Background arrivals per second (default: 20)")
+    storm.add_argument("--before", type=float, default=15, help="Background seconds before the storm (default: 15)")
+    storm.add_argument("--after", type=float, default=15, help="Background seconds after the storm (default: 15)")
+    storm.add_argument("--mix", help="Background operation weights (default: the load mix without login)")
+    storm.add_argument("--profile", help="Dataset profile the accounts were seeded from")
+    storm.add_argument("--scale", type=int, default=0, help="--scale the accounts were seeded with")
+    storm.add_argument("--students", type=int, default=50, help="Student accounts for background traffic (default: 50)")
+    storm.add_argument("--faculty", type=int, default=2, help="Faculty accounts to log in (default: 2)")
+    storm.add_argument("--max-in-flight", type=int, default=512, help="Client concurrency cap (default: 512)")
+    storm.add_argument("--seed", type=int, default=1, help="Random seed for arrivals and payloads")
+    storm.add_argument("--name", help="Report file name (default: storm_<timestamp>)")
+    storm.add_argument("--report-dir", help="Report directory (default: load-reports/)")
+    parser.add_argument("--base-url", default=BASE_URL, help=f"API base URL (default: {BASE_URL})")
+    parser.add_argument("--scale", type=int, default=0,
+                        help="Seed N students plus proportional faculty, lectures and questions concurrently")
+    parser.add_argument("--profile", help="Dataset profile (JSON) for generated seeding, see scripts/profiles/")
+    parser.add_argument("--workers", type=int, default=32, help="Concurrent connections for generated seeding (default: 32)")
+    parser.add_argument("--seed", type=int, help="Override the profile's random seed")
+    parser.add_argument("--bulk-out", metavar="DIR",
+                        help="Write the generated dataset as mongorestore/mongoimport files instead of calling the API")
+    parser.add_argument("--format", choices=["bson", "jsonl"], default="bson", help="Bulk output format (default: bson)")
+    parser.add_argument("--jobs", type=int, default=0, help="Worker processes for --bulk-out (default: CPU count)")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    creator = DemoDataCreator()
+    args = parse_args()
+    BASE_URL = args.base_url.rstrip("/")
+    if args.command == "load":
+        run_load_test(args)
+        sys.exit(0)
+    if args.command == "storm":
+        run_storm_test(args)
+        sys.exit(0)
+    if args.bulk_out:
+        profile = load_profile(args.profile, args.scale)
+        if args.seed is not None:
+            profile["seed"] = args.seed
+        print(f"===== Writing bulk dataset to {args.bulk_out} =====")
+        started = time.monotonic()
+        counts = write_dataset(profile, args.bulk_out, args.format, args.jobs)
+        print(f"Wrote {counts} in {time.monotonic() - started:.1f}s")
+        if args.format == "bson":
+            print(f"Load with: mongorestore --uri=<MONGO_URI> --drop {args.bulk_out}")
+            print("or copy it into backups/ and run ./scripts/restore-db.sh <name>")
+        else:
+            for collection in counts:
+                print(f"mongoimport --uri=<MONGO_URI> --db {BULK_DB} --collection {collection} "
+                      f"--drop --file {os.path.join(args.bulk_out, BULK_DB, collection + '.json')}")
+        sys.exit(0)
+    if args.scale > 0 or args.profile:
+        profile = load_profile(args.profile, args.scale)
+        if args.seed is not None:
+            profile["seed"] = args.seed
+        creator = ConcurrentDemoDataCreator(profile, workers=args.workers)
+    else:
+        creator = DemoDataCreator()
     creator.main()
\ No newline at end of file
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Seeded, streaming synthetic dataset generator for the MCQ writing app.
+
+Every entity is derived from its index and the profile seed, so any slice of
+the dataset can be regenerated without materialising the rest. Users,
+lectures and questions are yielded one at a time; the number of grades and
+edit suggestions per question follows a bounded Zipf distribution.
+
+Usage: ./scripts/demo_dataset.py [--profile profiles/cohort.json] [--scale N] --out DIR
+"""
+
+import os
+import sys
+import json
+import random
+import bisect
+import argparse
+from typing import Dict, List, Any, Iterator, Optional
+
+DEFAULT_PROFILE: Dict[str, Any] = {
+    "seed": 42,
+    "faculty": 2,
+    "students": 5,
+    "lectures": 3,
+    "lecturesPerStudent": 2,
+    "questionsPerStudent": 2,
+    "facultyQuestionRate": 0.1,
+    "answersPerQuestion": [3, 4],
+    # Number of grades / suggestions per question: P(k) ~ 1 / (k + 1) ** exponent, 0 <= k <= max
+    "grades": {"exponent": 1.2, "max": 40},
+    "suggestions": {"exponent": 2.0, "max": 8},
+    "suggestionOutcomes": {"accepted": 0.4, "rejected": 0.3, "pending": 0.3},
+    "finalizeRate": 0.2,
+    "passwords": {"faculty": "faculty123", "student": "student123"},
+}
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Charlie", "Diana", "Ethan", "Fatima", "George", "Hana", "Ivan", "Julia",
+    "Kenji", "Laila", "Mateo", "Nora", "Omar", "Priya", "Quinn", "Rosa", "Samir", "Tara",
+    "Umar", "Vera", "Wei", "Xenia", "Yusuf", "Zoe",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Nguyen", "Garcia", "Müller", "Rossi", "Kowalski", "Haddad", "Okafor",
+    "Tanaka", "Silva", "Novak", "Ivanova", "Dubois", "Larsen", "Cohen", "Kaya", "Moreau",
+]
+
+TOPICS = [
+    ("Cardiology", ["atrial fibrillation", "heart failure", "myocardial infarction", "aortic stenosis"]),
+    ("Pharmacology", ["beta blockers", "ACE inhibitors", "loop diuretics", "statins", "warfarin"]),
+    ("Nephrology", ["acute kidney injury", "nephrotic syndrome", "hyperkalemia", "renal tubular acidosis"]),
+    ("Pulmonology", ["asthma", "COPD", "pulmonary embolism", "pneumothorax"]),
+    ("Endocrinology", ["type 1 diabetes", "hypothyroidism", "Cushing syndrome", "Addison disease"]),
+    ("Infectious Disease", ["sepsis", "tuberculosis", "endocarditis", "meningitis"]),
+    ("Neurology", ["stroke", "epilepsy", "multiple sclerosis", "Parkinson disease"]),
+    ("Computer Science", ["quicksort", "hash tables", "binary search trees", "dynamic programming"]),
+]
+
+STEM_TEMPLATES = [
+    "Which of the following best describes the first-line management of {concept}?",
+    "A patient presents with findings typical of {concept}. What is the most likely underlying mechanism?",
+    "Which statement about {concept} is correct?",
+    "What is the most important complication to monitor for in {concept}?",
+    "Which investigation is most useful to confirm {concept}?",
+    "Which of the following is NOT a characteristic feature of {concept}?",
+]
+
+ANSWER_FRAGMENTS = [
+    "It is primarily caused by {other}",
+    "It is best confirmed by imaging",
+    "It requires immediate surgical referral",
+    "It is associated with {other}",
+    "It typically resolves without treatment",
+    "It is diagnosed clinically",
+    "It is managed in the same way as {other}",
+    "It responds to lifestyle modification alone",
+]
+
+LECTURE_FORMATS = ["Introduction to {topic}", "Advanced {topic}", "{topic} Case Seminar", "{topic} Review"]
+
+
+def load_profile(path: Optional[str] = None, scale: int = 0) -> Dict[str, Any]:
+    """Merge a JSON profile file over the defaults; --scale N derives cohort sizes from N students"""
+    profile = json.loads(json.dumps(DEFAULT_PROFILE))
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            for key, value in json.load(f).items():
+                if isinstance(value, dict) and isinstance(profile.get(key), dict):
+                    profile[key].update(value)
+                else:
+                    profile[key] = value
+    if scale > 0:
+        profile["students"] = scale
+        profile["faculty"] = max(profile["faculty"], scale // 200)
+        profile["lectures"] = max(profile["lectures"], scale // 100)
+    return profile
+
+
+class BoundedZipf:
+    """Samples k in [0, maximum] with probability proportional to 1 / (k + 1) ** exponent"""
+
+    def __init__(self, exponent: float, maximum: int):
+        weights = [1.0 / (k + 1) ** exponent for k in range(maximum + 1)]
+        total = sum(weights)
+        self.cdf: List[float] = []
+        running = 0.0
+        for weight in weights:
+            running += weight / total
+            self.cdf.append(running)
+
+    def sample(self, rng: random.Random) -> int:
+        return min(bisect.bisect_left(self.cdf, rng.random()), len(self.cdf) - 1)
+
+
+class DatasetGenerator:
+    """Deterministic, index-addressable generator for users, lectures and questions."""
+
+    def __init__(self, profile: Dict[str, Any]):
+        self.profile = profile
+        self.seed = int(profile["seed"])
+        self.faculty_count = int(profile["faculty"])
+        self.student_count = int(profile["students"])
+        self.lecture_count = max(1, int(profile["lectures"]))
+        self.lectures_per_student = min(int(profile["lecturesPerStudent"]), self.lecture_count)
+        self.lecture_stride = max(1, self.lecture_count // max(1, self.lectures_per_student))
+        self.question_count = int(profile.get("questions") or self.student_count * profile["questionsPerStudent"])
+        self.grade_counts = BoundedZipf(profile["grades"]["exponent"], profile["grades"]["max"])
+        self.suggestion_counts = BoundedZipf(profile["suggestions"]["exponent"], profile["suggestions"]["max"])
+        outcomes = profile["suggestionOutcomes"]
+        self.outcomes = list(outcomes.keys())
+        self.outcome_weights = list(outcomes.values())
+
+    def _rng(self, kind: int, index: int) -> random.Random:
+        # Independent stream per entity so slices can be regenerated in isolation
+        return random.Random((self.seed * 1_000_003 + kind) * 4_294_967_311 + index)
+
+    # Users
+
+    def faculty(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.faculty_count):
+            yield {
+                "index": i,
+                "name": f"Dr. {LAST_NAMES[i % len(LAST_NAMES)]} {i}",
+                "email": f"faculty{i:05d}@example.com",
+                "password": self.profile["passwords"]["faculty"],
+                "role": "faculty",
+            }
+
+    def students(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.student_count):
+            first = FIRST_NAMES[i % len(FIRST_NAMES)]
+            last = LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]
+            yield {
+                "index": i,
+                "name": f"{first} {last}",
+                "email": f"student{i:06d}@example.com",
+                "password": self.profile["passwords"]["student"],
+                "role": "student",
+            }
+
+    # Lectures and enrolment
+
+    def lectures(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.lecture_count):
+            topic, _ = TOPICS[i % len(TOPICS)]
+            title = LECTURE_FORMATS[(i // len(TOPICS)) % len(LECTURE_FORMATS)].format(topic=topic)
+            yield {
+                "index": i,
+                "title": f"{title} ({i + 1})" if i >= len(TOPICS) * len(LECTURE_FORMATS) else title,
+                "description": f"Question writing sessions for {topic.lower()}",
+                "faculty": i % self.faculty_count,
+            }
+
+    def student_lectures(self, student: int) -> List[int]:
+        return [(student + t * self.lecture_stride) % self.lecture_count for t in range(self.lectures_per_student)]
+
+    def lecture_students(self, lecture: int) -> Iterator[int]:
+        """Yield the students enrolled in a lecture, in ascending order"""
+        residues = sorted({(lecture - t * self.lecture_stride) % self.lecture_count
+                           for t in range(self.lectures_per_student)})
+        for base in range(0, self.student_count, self.lecture_count):
+            for residue in residues:
+                if base + residue < self.student_count:
+                    yield base + residue
+
+    def _sample_lecture_student(self, rng: random.Random, lecture: int) -> Optional[int]:
+        t = rng.randrange(self.lectures_per_student)
+        residue = (lecture - t * self.lecture_stride) % self.lecture_count
+        slots = (self.student_count - residue + self.lecture_count - 1) // self.lecture_count
+        if slots <= 0:
+            return None
+        return residue + rng.randrange(slots) * self.lecture_count
+
+    # Questions
+
+    def question(self, index: int) -> Dict[str, Any]:
+        rng = self._rng(3, index)
+        profile = self.profile
+
+        if self.student_count == 0 or rng.random() < profile["facultyQuestionRate"]:
+            lecture = rng.randrange(self.lecture_count)
+            owner = {"role": "faculty", "index": lecture % self.faculty_count}
+        else:
+            student = rng.randrange(self.student_count)
+            lecture = rng.choice(self.student_lectures(student))
+            owner = {"role": "student", "index": student}
+
+        topic, concepts = TOPICS[lecture % len(TOPICS)]
+        concept = rng.choice(concepts)
+        stem = rng.choice(STEM_TEMPLATES).format(concept=concept)
+        low, high = profile["answersPerQuestion"]
+        answer_count = max(2, min(4, rng.randint(low, high)))
+        correct = rng.randrange(answer_count)
+        answers = []
+        for a in range(answer_count):
+            other = rng.choice([c for c in concepts if c != concept] or concepts)
+            answers.append({
+                "text": rng.choice(ANSWER_FRAGMENTS).format(other=other) + f" ({chr(65 + a)})",
+                "isCorrect": a == correct,
+            })
+
+        def peer() -> Optional[int]:
+            for _ in range(4):
+                student = self._sample_lecture_student(rng, lecture)
+                if student is not None and not (owner["role"] == "student" and student == owner["index"]):
+                    return student
+            return None
+
+        grades = []
+        graders = set()
+        for _ in range(self.grade_counts.sample(rng)):
+            grader = peer()
+            if grader is None or grader in graders:
+                continue
+            graders.add(grader)
+            grades.append({
+                "student": grader,
+                "questionScore": rng.randint(1, 3),
+                "answerScores": [rng.randint(1, 3) for _ in range(answer_count)],
+            })
+
+        suggestions = []
+        for _ in range(self.suggestion_counts.sample(rng)):
+            suggester = peer()
+            if suggester is None:
+                continue
+            suggestions.append({
+                "student": suggester,
+                "suggestedQuestion": f"{stem} (Improved)",
+                "status": rng.choices(self.outcomes, self.outcome_weights)[0],
+            })
+
+        return {
+            "index": index,
+            "owner": owner,
+            "lecture": lecture,
+            "question": f"[{topic}] {stem} (Q{index})",
+            "answers": answers,
+            "grades": grades,
+            "suggestions": suggestions,
+            "isFinal": rng.random() < profile["finalizeRate"],
+        }
+
+    def questions(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        stop = self.question_count if stop is None else min(stop, self.question_count)
+        for index in range(start, stop):
+            yield self.question(index)
+
+
+def write_jsonl(path: str, records: Iterator[Dict[str, Any]]) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a synthetic MCQ dataset as JSONL")
+    parser.add_argument("--profile", help="JSON profile overriding the defaults")
+    parser.add_argument("--scale", type=int, default=0, help="Number of students (derives faculty/lecture counts)")
+    parser.add_argument("--out", required=True, help="Output directory for users/lectures/questions .jsonl")
+    args = parser.parse_args()
+
+    generator = DatasetGenerator(load_profile(args.profile, args.scale))
+    os.makedirs(args.out, exist_ok=True)
+    for name, records in [
+        ("faculty", generator.faculty()),
+        ("students", generator.students()),
+        ("lectures", generator.lectures()),
+        ("questions", generator.questions()),
+    ]:
+        count = write_jsonl(os.path.join(args.out, f"{name}.jsonl"), records)
+        print(f"Wrote {count} {name}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
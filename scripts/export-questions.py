@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Export finalized questions from a mongodump backup, offline.
+
+Produces the same CSV, JSONL, QTI 1.2 or GIFT output as
+GET /api/questions/export, using the writers in qbank_formats.py, without a
+running server or database. Questions are read one at a time from the BSON
+files and written in _id order, so memory stays flat for any bank size.
+
+Usage:
+    python3 scripts/export-questions.py backups/<backup_name> --format gift --out bank.gift
+    python3 scripts/export-questions.py <backup> --format csv --lecture <lectureId> --gzip
+"""
+
+import os
+import sys
+import gzip
+import mmap
+import argparse
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from mcq_bson import ObjectId, decode, iter_collection, iter_spans
+from qbank_formats import EXPORT_FORMATS, export_chunks
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BACKUPS_DIR = PROJECT_ROOT / "backups"
+MONGO_DB = "mcq-writing-app"
+
+
+def find_db_dir(backup: str) -> str:
+    """Accept a backup directory, its database subdirectory, or a name under backups/"""
+    for candidate in (Path(backup), BACKUPS_DIR / backup):
+        for db_dir in (candidate / MONGO_DB, candidate):
+            if (db_dir / "questions.bson").exists() or (db_dir / "questions.bson.gz").exists():
+                return str(db_dir)
+    raise SystemExit(f"No {MONGO_DB}/questions.bson found in {backup}")
+
+
+def lecture_question_ids(db_dir: str, lecture_id: str) -> set:
+    wanted = ObjectId(lecture_id)
+    for lecture in iter_collection(db_dir, "lectures"):
+        if lecture["_id"] == wanted:
+            return set(lecture.get("questions", []))
+    raise SystemExit(f"Lecture {lecture_id} not found in {db_dir}")
+
+
+def final_questions(db_dir: str, only: Optional[set] = None) -> Iterator[Dict[str, Any]]:
+    """Finalized questions in _id order.
+
+    An uncompressed dump is scanned once for (_id, offset) pairs, which are
+    sorted and decoded again from the memory map. A --gzip dump cannot be
+    read out of order and is exported in dump order instead.
+    """
+    def wanted(question):
+        return question.get("isFinal") and (only is None or question["_id"] in only)
+
+    path = os.path.join(db_dir, "questions.bson")
+    if not os.path.exists(path):
+        yield from (q for q in iter_collection(db_dir, "questions") if wanted(q))
+        return
+
+    positions = []
+    for buffer, offset, _ in iter_spans(path):
+        question = decode(buffer, offset)
+        if wanted(question):
+            positions.append((question["_id"], offset))
+    positions.sort()
+    if not positions:
+        return
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        for _, offset in positions:
+            yield decode(buffer, offset)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export finalized questions from a backup")
+    parser.add_argument("backup", help="Backup directory, or its name under backups/")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="jsonl")
+    parser.add_argument("--lecture", help="Only export the questions of this lecture id")
+    parser.add_argument("--gzip", action="store_true", help="Compress the output")
+    parser.add_argument("--out", help="Output file (default: questions-<scope>-<date>.<ext>[.gz]; - for stdout)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    db_dir = find_db_dir(args.backup)
+    fmt = EXPORT_FORMATS[args.format]
+    only = lecture_question_ids(db_dir, args.lecture) if args.lecture else None
+
+    scope = f"lecture-{args.lecture}" if args.lecture else "all"
+    out = args.out or f"questions-{scope}-{date.today().isoformat()}.{fmt.extension}" + (
+        ".gz" if args.gzip else ""
+    )
+    if out == "-":
+        raw = sys.stdout.buffer
+    else:
+        raw = open(out, "wb")
+
+    count = 0
+
+    def counted(questions):
+        nonlocal count
+        for question in questions:
+            count += 1
+            yield question
+
+    stream = gzip.GzipFile(fileobj=raw, mode="wb") if args.gzip else raw
+    try:
+        for chunk in export_chunks(fmt, counted(final_questions(db_dir, only))):
+            stream.write(chunk.encode("utf-8"))
+    finally:
+        if args.gzip:
+            stream.close()
+        if out != "-":
+            raw.close()
+    print(f"Exported {count} questions to {out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""Build the near-duplicate index over a question corpus and report duplicate clusters.
+
+Signatures and LSH band keys are computed exactly as src/utils/similarity.js
+computes them when a question is created, so the index this tool writes can
+be merged into an existing database and new questions are then checked
+against the whole bank:
+
+    python3 scripts/find-duplicates.py backups/<backup_name> --index-out index.jsonl
+    mongoimport --uri=<MONGO_URI> --collection questions --mode merge --file index.jsonl
+
+The corpus is either a mongodump backup (plain or --gzip) or a dataset
+generated from a demo_dataset.py profile (--profile / --scale), whose ids
+match a bulk load of the same profile. Signatures are computed by a pool of
+worker processes. Clusters are found by sorting each band's keys and
+confirming questions that share a key against --threshold, joined with
+union-find. Memory per question is one 64-value signature plus one sort key
+per band, so millions of questions fit in a few GB.
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+import unicodedata
+from array import array
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from mcq_bson import iter_collection
+from demo_dataset import DatasetGenerator, load_profile
+from bulk_load import DocumentBuilder, SCORING_DEFAULTS
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BACKUPS_DIR = PROJECT_ROOT / "backups"
+MONGO_DB = "mcq-writing-app"
+
+# Must match src/utils/similarity.js
+SHINGLE_SIZE = 5
+BIN_BITS = 6
+NUM_BINS = 1 << BIN_BITS
+VALUE_BITS = 32 - BIN_BITS
+VALUE_MASK = (1 << VALUE_BITS) - 1
+EMPTY = 0xFFFFFFFF
+BANDS = 16
+ROWS = NUM_BINS // BANDS
+DUPLICATE_THRESHOLD = 0.7
+
+FNV_OFFSET = 0x811C9DC5
+FNV_PRIME = 0x01000193
+MASK32 = 0xFFFFFFFF
+
+BATCH_SIZE = 2000
+
+# Python's \w is letters, digits (incl. other numerics) and underscore; the
+# JavaScript side keeps \p{L}\p{N}, which agrees except for rare characters
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def fmix32(h: int) -> int:
+    """MurmurHash3 32-bit finalizer"""
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & MASK32
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & MASK32
+    h ^= h >> 16
+    return h
+
+
+def normalize(text: str) -> str:
+    return _SEPARATORS.sub(" ", unicodedata.normalize("NFKC", text).lower()).strip(" ")
+
+
+def question_text(question: str, answers: List[str]) -> str:
+    return " ".join([normalize(question)] + sorted(normalize(a) for a in answers))
+
+
+def minhash(text: str) -> List[int]:
+    """One permutation MinHash with rotation densification"""
+    code_points = [ord(c) for c in text]
+    signature = [EMPTY] * NUM_BINS
+    seen = set()
+    for start in range(max(1, len(code_points) - SHINGLE_SIZE + 1)):
+        h = FNV_OFFSET
+        for cp in code_points[start:start + SHINGLE_SIZE]:
+            h = ((h ^ cp) * FNV_PRIME) & MASK32
+        if h in seen:
+            continue
+        seen.add(h)
+        h = fmix32(h)
+        bin_ = h >> VALUE_BITS
+        value = h & VALUE_MASK
+        if value < signature[bin_]:
+            signature[bin_] = value
+
+    for bin_ in range(NUM_BINS):
+        if signature[bin_] != EMPTY:
+            continue
+        for distance in range(1, NUM_BINS):
+            value = signature[(bin_ + distance) % NUM_BINS]
+            if value != EMPTY and value <= VALUE_MASK:
+                signature[bin_] = value + distance * (VALUE_MASK + 1)
+                break
+    return signature
+
+
+def band_hashes(signature) -> List[int]:
+    hashes = []
+    for band in range(BANDS):
+        h = FNV_OFFSET
+        for row in range(band * ROWS, (band + 1) * ROWS):
+            h = fmix32(h ^ signature[row])
+        hashes.append(h)
+    return hashes
+
+
+def band_keys(hashes) -> List[str]:
+    """Band keys in the form stored on Question.similarity.bands"""
+    return [f"{band}-{h:x}" for band, h in enumerate(hashes)]
+
+
+def similarity(a, b) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_BINS
+
+
+# Corpus sources
+
+def find_db_dir(backup: str) -> str:
+    """Accept a backup directory, its database subdirectory, or a name under backups/"""
+    for candidate in (Path(backup), BACKUPS_DIR / backup):
+        for db_dir in (candidate / MONGO_DB, candidate):
+            if (db_dir / "questions.bson").exists() or (db_dir / "questions.bson.gz").exists():
+                return str(db_dir)
+    raise SystemExit(f"No {MONGO_DB}/questions.bson found in {backup}")
+
+
+def backup_batches(db_dir: str) -> Iterator[List[Tuple[str, str, List[str]]]]:
+    """Yield (id, stem, answer texts) in batches from a dump"""
+    batch = []
+    for question in iter_collection(db_dir, "questions"):
+        batch.append((
+            str(question["_id"]),
+            question.get("question") or "",
+            [answer.get("text") or "" for answer in question.get("answers", [])],
+        ))
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _generated_questions(profile: Dict[str, Any], start: int, stop: int):
+    generator = DatasetGenerator(profile)
+    builder = DocumentBuilder(generator, SCORING_DEFAULTS)
+    for record in generator.questions(start, stop):
+        yield (
+            str(builder.question_id(record["index"])),
+            record["question"],
+            [answer["text"] for answer in record["answers"]],
+        )
+
+
+def _sign_batch(task) -> Tuple[List[str], array, array]:
+    """Worker: signatures and band hashes for one batch of questions, or one generated range"""
+    kind, payload = task
+    if kind == "generated":
+        profile, start, stop = payload
+        questions = _generated_questions(profile, start, stop)
+    else:
+        questions = payload
+    ids = []
+    signatures = array("I")
+    bands = array("I")
+    for question_id, stem, answers in questions:
+        signature = minhash(question_text(stem, answers))
+        ids.append(question_id)
+        signatures.extend(signature)
+        bands.extend(band_hashes(signature))
+    return ids, signatures, bands
+
+
+def tasks_for(args) -> Iterator[Tuple[str, Any]]:
+    if args.source:
+        for batch in backup_batches(find_db_dir(args.source)):
+            yield "batch", batch
+        return
+    profile = load_profile(args.profile, args.scale)
+    total = DatasetGenerator(profile).question_count
+    for start in range(0, total, BATCH_SIZE):
+        yield "generated", (profile, start, min(start + BATCH_SIZE, total))
+
+
+def excerpt_lookup(args, wanted: set) -> Dict[str, str]:
+    """Second pass over the corpus for the stems of questions shown in the report"""
+    stems = {}
+    for kind, payload in tasks_for(args):
+        questions = _generated_questions(*payload) if kind == "generated" else payload
+        for question_id, stem, _ in questions:
+            if question_id in wanted:
+                stems[question_id] = stem
+        if len(stems) == len(wanted):
+            break
+    return stems
+
+
+# Clustering
+
+class UnionFind:
+    def __init__(self, size: int):
+        self.parent = array("l", range(size))
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            if ra < rb:
+                ra, rb = rb, ra
+            self.parent[ra] = rb
+
+
+def cluster(signatures: array, bands: array, count: int, threshold: float) -> Tuple[List[List[int]], int]:
+    """Group questions whose signatures agree on at least threshold of the bins.
+
+    For each band, (band hash, index) pairs are sorted so questions sharing a
+    key are adjacent; each is compared with the first and the previous member
+    of its run. Returns the clusters and the number of comparisons made.
+    """
+    uf = UnionFind(count)
+    comparisons = 0
+
+    def sig(i):
+        return signatures[i * NUM_BINS:(i + 1) * NUM_BINS]
+
+    for band in range(BANDS):
+        keys = sorted((bands[i * BANDS + band] << 32) | i for i in range(count))
+
+        run_start = 0
+        for position in range(1, count + 1):
+            if position < count and keys[position] >> 32 == keys[run_start] >> 32:
+                continue
+            if position - run_start > 1:
+                first = keys[run_start] & MASK32
+                first_sig = sig(first)
+                previous = first
+                for k in range(run_start + 1, position):
+                    member = keys[k] & MASK32
+                    member_sig = sig(member)
+                    others = (first,) if previous == first else (first, previous)
+                    for other in others:
+                        if uf.find(member) == uf.find(other):
+                            continue
+                        comparisons += 1
+                        other_sig = first_sig if other == first else sig(other)
+                        if similarity(member_sig, other_sig) >= threshold:
+                            uf.union(member, other)
+                    previous = member
+            run_start = position
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(count):
+        groups.setdefault(uf.find(i), []).append(i)
+    clusters = sorted((g for g in groups.values() if len(g) > 1), key=len, reverse=True)
+    return clusters, comparisons
+
+
+def write_index(path: str, ids: List[str], signatures: array, bands: array):
+    """Extended JSON lines for mongoimport --mode merge"""
+    with open(path, "w", encoding="utf-8") as f:
+        for i, question_id in enumerate(ids):
+            f.write(json.dumps({
+                "_id": {"$oid": question_id},
+                "similarity": {
+                    "minhash": signatures[i * NUM_BINS:(i + 1) * NUM_BINS].tolist(),
+                    "bands": band_keys(bands[i * BANDS:(i + 1) * BANDS]),
+                },
+            }, separators=(",", ":")))
+            f.write("\n")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Find near-duplicate questions and build the similarity index")
+    parser.add_argument("source", nargs="?", help="Backup directory, or its name under backups/")
+    parser.add_argument("--profile", help="Generate the corpus from a demo_dataset.py profile instead")
+    parser.add_argument("--scale", type=int, default=0, help="Generate the corpus for N students")
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD,
+                        help=f"Minimum estimated similarity (default {DUPLICATE_THRESHOLD})")
+    parser.add_argument("--jobs", type=int, default=0, help="Worker processes (default: CPU count)")
+    parser.add_argument("--index-out", help="Write signatures and band keys for mongoimport --mode merge")
+    parser.add_argument("--report", help="Write all clusters as JSON")
+    parser.add_argument("--top", type=int, default=10, help="Clusters to print (default 10)")
+    args = parser.parse_args()
+    if not args.source and not args.profile and not args.scale:
+        parser.error("give a backup, --profile or --scale")
+    return args
+
+
+def main():
+    args = parse_args()
+    started = time.monotonic()
+
+    ids: List[str] = []
+    signatures = array("I")
+    bands = array("I")
+    with Pool(processes=args.jobs or None) as pool:
+        for batch_ids, batch_signatures, batch_bands in pool.imap(_sign_batch, tasks_for(args)):
+            ids.extend(batch_ids)
+            signatures.extend(batch_signatures)
+            bands.extend(batch_bands)
+            print(f"\r  {len(ids)} questions signed", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    signed = time.monotonic()
+
+    clusters, comparisons = cluster(signatures, bands, len(ids), args.threshold)
+    clustered = time.monotonic()
+
+    duplicates = sum(len(c) - 1 for c in clusters)
+    print(f"Questions: {len(ids)}")
+    print(f"Signatures: {signed - started:.1f}s, clustering: {clustered - signed:.1f}s "
+          f"({comparisons} signature comparisons)")
+    print(f"Duplicate clusters: {len(clusters)} ({duplicates} questions duplicate another)")
+
+    shown = clusters[:args.top]
+    stems = excerpt_lookup(args, {ids[i] for c in shown for i in c[:3]}) if shown else {}
+    for c in shown:
+        print(f"\n  {len(c)} questions:")
+        for i in c[:3]:
+            print(f"    {ids[i]}  {stems.get(ids[i], '')[:90]}")
+        if len(c) > 3:
+            print(f"    ... and {len(c) - 3} more")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({
+                "questions": len(ids),
+                "threshold": args.threshold,
+                "clusters": [[ids[i] for i in c] for c in clusters],
+            }, f)
+        print(f"\nClusters written to {args.report}")
+    if args.index_out:
+        write_index(args.index_out, ids, signatures, bands)
+        print(f"Index written to {args.index_out}; merge it with:")
+        print(f"  mongoimport --uri=<MONGO_URI> --collection questions --mode merge --file {args.index_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Import a class roster into a lecture through POST /api/lectures/:id/roster.
+
+The roster is a CSV file with a header row (email, name and optionally
+password columns; first_name / last_name work instead of name) or a JSON
+array of objects with the same keys. Missing student accounts are created,
+inactive ones activated, and everyone on the roster is enrolled, in batches
+on the server. Progress is printed as the server reports each batch; rows
+that fail are listed at the end and, with --out, written to a CSV together
+with any password reset links.
+
+Usage:
+    python3 scripts/import-roster.py <lectureId> roster.csv --email smith@example.com
+    python3 scripts/import-roster.py <lectureId> roster.json --mode replace --reset-links --out results.csv
+    python3 scripts/import-roster.py <lectureId> roster.csv --dry-run
+"""
+
+import io
+import os
+import csv
+import sys
+import json
+import getpass
+import argparse
+import requests
+
+BASE_URL = "http://localhost:3000/api"
+ROSTER_COLUMNS = ["email", "name", "first_name", "last_name", "password"]
+
+
+def roster_csv(path: str) -> bytes:
+    """Return the roster as CSV bytes; JSON rosters are converted"""
+    if not path.lower().endswith(".json"):
+        with open(path, "rb") as f:
+            return f.read()
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    if isinstance(entries, dict):
+        entries = entries.get("students", [])
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=ROSTER_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for entry in entries:
+        writer.writerow({key.strip().lower().replace(" ", "_"): value for key, value in entry.items()})
+    return out.getvalue().encode("utf-8")
+
+
+def login(base_url: str, email: str, password: str) -> str:
+    response = requests.post(f"{base_url}/users/login", json={"email": email, "password": password}, timeout=30)
+    if not response.ok:
+        raise SystemExit(f"Login failed ({response.status_code}): {response.text}")
+    return response.json()["token"]
+
+
+def write_results(path: str, summary: dict):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["row", "email", "status", "message", "reset_link"])
+        for error in summary.get("errors", []):
+            writer.writerow([error["row"], error["email"], "failed", error["message"], ""])
+        for link in summary.get("links", []):
+            writer.writerow([link["row"], link["email"], "ok", "", link["resetLink"]])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import a roster of students into a lecture")
+    parser.add_argument("lecture", help="Lecture id")
+    parser.add_argument("roster", help="Roster file (.csv, or .json)")
+    parser.add_argument("--base-url", default=BASE_URL, help=f"API base URL (default: {BASE_URL})")
+    parser.add_argument("--email", help="Faculty account that owns the lecture")
+    parser.add_argument("--password", help="Its password (default: $ROSTER_PASSWORD, else prompt)")
+    parser.add_argument("--token", help="Use this JWT instead of logging in")
+    parser.add_argument("--mode", choices=["add", "replace"], default="add",
+                        help="replace also removes enrolled students missing from the roster")
+    parser.add_argument("--reset-links", action="store_true",
+                        help="Return password reset links for accounts without a password")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and count changes without writing")
+    parser.add_argument("--out", help="Write failed rows and reset links to this CSV")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    base_url = args.base_url.rstrip("/")
+    token = args.token
+    if not token:
+        if not args.email:
+            raise SystemExit("Pass --email (and --password) or --token")
+        password = args.password or os.environ.get("ROSTER_PASSWORD") or getpass.getpass(f"Password for {args.email}: ")
+        token = login(base_url, args.email, password)
+
+    params = {"mode": args.mode}
+    if args.reset_links:
+        params["resetLinks"] = "true"
+    if args.dry_run:
+        params["dryRun"] = "true"
+    response = requests.post(
+        f"{base_url}/lectures/{args.lecture}/roster", params=params, data=roster_csv(args.roster),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "text/csv"}, stream=True, timeout=600,
+    )
+    if not response.ok:
+        raise SystemExit(f"Import failed ({response.status_code}): {response.text}")
+
+    summary = None
+    for line in response.iter_lines():
+        if not line:
+            continue
+        message = json.loads(line)
+        if message["type"] == "progress":
+            print(f"  {message['processed']}/{message['total']} rows: {message['created']} created, "
+                  f"{message['activated']} activated, {message['existing']} existing, {message['failed']} failed")
+        elif message["type"] == "summary":
+            summary = message
+        else:
+            print(f"Import stopped: {message['message']} (batches already reported were saved)")
+            sys.exit(2)
+    if summary is None:
+        print("Import stopped: connection closed before the summary")
+        sys.exit(2)
+
+    prefix = "Dry run: would have " if summary["dryRun"] else ""
+    print(f"\n{prefix}{summary['created']} created, {summary['activated']} activated, "
+          f"{summary['enrolled']} newly enrolled ({summary['alreadyEnrolled']} already), "
+          f"{summary['removed']} removed, {summary['failed']} failed")
+    for error in summary["errors"][:20]:
+        print(f"  row {error['row']} {error['email']}: {error['message']}")
+    if summary["failed"] > 20:
+        print(f"  ... {summary['failed'] - 20} more" + ("" if args.out else " (use --out to save them all)"))
+    if args.out:
+        write_results(args.out, summary)
+        print(f"Results written to {args.out}")
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
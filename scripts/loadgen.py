@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+"""Open-loop load generation against the MCQ writing API.
+
+Operations replay the flows the demo seeder scripts (login, list questions,
+suggest, grade, finalize). Arrivals follow a Poisson process at a target
+rate regardless of how quickly the server answers, and each latency is
+measured from the arrival's scheduled time, so server slowdowns show up as
+queueing delay instead of silently lowering the offered load.
+"""
+
+import os
+import re
+import json
+import time
+import random
+import threading
+import subprocess
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from perf_stats import EndpointStats, LatencyHistogram
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+REPORTS_DIR = PROJECT_ROOT / "load-reports"
+
+DEFAULT_MIX = {"login": 5, "list_questions": 40, "grade": 30, "suggest": 20, "finalize": 5}
+
+_SAMPLE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)")
+_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+_UNESCAPE = re.compile(r"\\(.)")
+
+
+class ApiClient:
+    """Timed API calls over one pooled keep-alive session per thread"""
+
+    def __init__(self, base_url: str, stats: Optional[EndpointStats] = None, timeout: float = 60):
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats or EndpointStats()
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def request(self, method: str, endpoint: str, path: str, token: Optional[str] = None,
+                scheduled: Optional[float] = None, **kwargs) -> requests.Response:
+        """Perform a call and record it under `endpoint`, the route template.
+
+        `scheduled` is the perf_counter time the call was meant to start; when
+        given, queueing delay before the call counts towards its latency.
+        """
+        headers = kwargs.pop("headers", {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        started = scheduled if scheduled is not None else time.perf_counter()
+        key = f"{method} {endpoint}"
+        try:
+            response = self.session().request(
+                method, f"{self.base_url}{path}", headers=headers, timeout=self.timeout, **kwargs
+            )
+        except requests.RequestException:
+            self.stats.record(key, time.perf_counter() - started, ok=False)
+            raise
+        self.stats.record(key, time.perf_counter() - started, response.ok, len(response.content), response.status_code)
+        return response
+
+    def call(self, method: str, endpoint: str, path: str, token: Optional[str] = None, **kwargs) -> Any:
+        """Like request(), but raise on HTTP errors and return the decoded JSON body"""
+        response = self.request(method, endpoint, path, token, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+
+def parse_mix(text: Optional[str]) -> Dict[str, float]:
+    """Parse 'op=weight,op=weight' or a JSON file path into an operation mix"""
+    if not text:
+        return dict(DEFAULT_MIX)
+    if os.path.exists(text):
+        with open(text, "r", encoding="utf-8") as f:
+            mix = json.load(f)
+    else:
+        mix = {}
+        for part in text.split(","):
+            name, _, weight = part.partition("=")
+            mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(LoadGenerator.OPERATIONS)
+    if unknown:
+        raise ValueError(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def parse_prometheus(text: str) -> Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]:
+    """Parse the Prometheus text format into {(name, ((label, value), ...)): value}"""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        match = _SAMPLE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        pairs = tuple((key, _UNESCAPE.sub(lambda m: {"n": "\n"}.get(m.group(1), m.group(1)), raw))
+                      for key, raw in _LABEL.findall(labels or ""))
+        samples[(name, pairs)] = float(value)
+    return samples
+
+
+def histogram_quantile(buckets: List[Tuple[float, float]], q: float) -> float:
+    """Estimate a quantile from cumulative (upper bound, count) pairs, as PromQL does"""
+    buckets = sorted(buckets)
+    if not buckets or buckets[-1][1] <= 0:
+        return 0.0
+    rank = q * buckets[-1][1]
+    previous_bound, previous_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float("inf"):
+                return previous_bound
+            if count == previous_count:
+                return bound
+            return previous_bound + (bound - previous_bound) * (rank - previous_count) / (count - previous_count)
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+
+class ServerMetrics:
+    """Scrapes the API's /metrics endpoint before and after a run and
+    summarises the difference per route and per MongoDB command"""
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, url: str, token: Optional[str] = None):
+        self.url = url
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.before: Optional[Dict] = None
+
+    def scrape(self) -> Optional[Dict]:
+        try:
+            response = requests.get(self.url, headers=self.headers, timeout=10)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Could not scrape {self.url}: {e}")
+            return None
+        return parse_prometheus(response.text)
+
+    def start(self):
+        self.before = self.scrape()
+
+    def _histograms(self, after: Dict, name: str, keys: Tuple[str, ...]) -> Dict[str, Dict[str, Any]]:
+        """Per-series count, sum and buckets of a histogram, minus the baseline scrape"""
+        before = self.before or {}
+        series: Dict[str, Dict[str, Any]] = {}
+        for (sample, labels), value in after.items():
+            if not sample.startswith(name):
+                continue
+            labels_dict = dict(labels)
+            key = " ".join(labels_dict.get(k, "") for k in keys)
+            delta = value - before.get((sample, labels), 0.0)
+            row = series.setdefault(key, {"count": 0.0, "sum": 0.0, "buckets": {}})
+            if sample == f"{name}_bucket":
+                bound = float(labels_dict["le"])
+                row["buckets"][bound] = row["buckets"].get(bound, 0.0) + delta
+            elif sample == f"{name}_count":
+                row["count"] += delta
+            elif sample == f"{name}_sum":
+                row["sum"] += delta
+        return {key: row for key, row in series.items() if row["count"] > 0}
+
+    def _summarise(self, series: Dict[str, Dict[str, Any]], scale: float = 1000.0) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for key in sorted(series):
+            row = series[key]
+            buckets = list(row["buckets"].items())
+            summary = {"count": int(row["count"]), "mean": row["sum"] / row["count"] * scale}
+            for pct in self.PERCENTILES:
+                summary[f"p{pct}"] = histogram_quantile(buckets, pct / 100) * scale
+            result[key] = summary
+        return result
+
+    def finish(self) -> Dict[str, Any]:
+        after = self.scrape()
+        if after is None or self.before is None:
+            return {}
+        routes = self._summarise(self._histograms(after, "http_request_duration_seconds", ("method", "route")))
+        commands = self._histograms(after, "http_request_db_commands", ("method", "route"))
+        populates = self._histograms(after, "http_request_populate_calls", ("method", "route"))
+        for key, row in routes.items():
+            for field, source in (("dbCommands", commands), ("populates", populates)):
+                if key in source:
+                    row[field] = source[key]["sum"] / source[key]["count"]
+        gauges = {name: value for (name, labels), value in after.items()
+                  if name.startswith(("nodejs_", "process_", "http_requests_in_flight")) and not labels}
+        gauges.update({f"nodejs_eventloop_lag_p{float(dict(labels)['quantile']) * 100:g}_seconds": value
+                       for (name, labels), value in after.items() if name == "nodejs_eventloop_lag_seconds"})
+        return {
+            "url": self.url,
+            "routes": routes,
+            "mongodb": self._summarise(self._histograms(after, "mongodb_command_duration_seconds",
+                                                       ("command", "collection"))),
+            "gauges": gauges,
+        }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class LoadGenerator:
+    """Replays a weighted mix of user flows at an open-loop arrival rate"""
+
+    OPERATIONS = ("login", "list_questions", "list_questions_page", "list_questions_stream",
+                  "list_questions_revalidate", "sync_changes", "grade", "suggest", "finalize")
+    PAGE_SIZE = 50
+
+    def __init__(self, client: ApiClient, seed: int = 1, max_in_flight: int = 256):
+        self.client = client
+        self.rng = random.Random(seed)
+        self.max_in_flight = max_in_flight
+        self.students: List[Dict[str, Any]] = []
+        self.faculty: List[Dict[str, Any]] = []
+        self.open_questions: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.dropped = 0
+        self.failures = 0
+        self.peak_in_flight = 0
+        self.setup_stats = EndpointStats()
+        self.server_metrics: Dict[str, Any] = {}
+
+    # Setup
+
+    def login_accounts(self, accounts: List[Dict[str, str]], role: str):
+        """Log in the given accounts once up front; load operations reuse their tokens"""
+        setup = ApiClient(self.client.base_url, self.setup_stats)
+        for account in accounts:
+            try:
+                user = setup.call("POST", "/users/login", "/users/login",
+                                  json={"email": account["email"], "password": account["password"]})
+            except requests.RequestException as e:
+                print(f"Could not log in {account['email']}: {e}")
+                continue
+            entry = {**account, "token": user["token"], "_id": user["_id"]}
+            (self.faculty if role == "faculty" else self.students).append(entry)
+
+    def load_questions(self):
+        """Collect non-final questions to grade, suggest on and finalize"""
+        setup = ApiClient(self.client.base_url, self.setup_stats)
+        token = (self.faculty or self.students)[0]["token"]
+        self.open_questions = []
+        path = "/questions?view=list&isFinal=false&limit=500"
+        while path:
+            response = setup.request("GET", "/questions", path, token)
+            response.raise_for_status()
+            self.open_questions += [
+                {"_id": q["_id"], "question": q["question"], "answers": [
+                    {"_id": a["_id"], "text": a["text"], "isCorrect": a["isCorrect"]} for a in q["answers"]
+                ]}
+                for q in response.json() if not q.get("isFinal")
+            ]
+            # Servers without pagination return everything and no cursor
+            cursor = response.headers.get("X-Next-Cursor")
+            path = f"/questions?view=list&isFinal=false&limit=500&cursor={cursor}" if cursor else None
+
+    def server_counters(self) -> Dict[str, Any]:
+        """Fetch server-side counters that help interpret a run (faculty only)"""
+        if not self.faculty:
+            return {}
+        setup = ApiClient(self.client.base_url, self.setup_stats)
+        try:
+            return {"scoringConfigCache": setup.call("GET", "/scoring/cache-stats", "/scoring/cache-stats",
+                                                     self.faculty[0]["token"])}
+        except requests.RequestException:
+            return {}
+
+    # Operations
+
+    def _question(self, rng: random.Random, consume: bool = False) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if not self.open_questions:
+                return None
+            index = rng.randrange(len(self.open_questions))
+            if consume:
+                # Swap-remove so finalized questions are not graded or finalized again
+                self.open_questions[index], self.open_questions[-1] = self.open_questions[-1], self.open_questions[index]
+                return self.open_questions.pop()
+            return self.open_questions[index]
+
+    def op_login(self, scheduled: float, rng: random.Random):
+        student = rng.choice(self.students)
+        self.client.request("POST", "/users/login", "/users/login", scheduled=scheduled,
+                            json={"email": student["email"], "password": student["password"]})
+
+    def op_list_questions(self, scheduled: float, rng: random.Random):
+        self.client.request("GET", "/questions", "/questions", rng.choice(self.students)["token"], scheduled=scheduled)
+
+    def op_list_questions_page(self, scheduled: float, rng: random.Random):
+        self.client.request("GET", "/questions [list page]", f"/questions?view=list&limit={self.PAGE_SIZE}",
+                            rng.choice(self.students)["token"], scheduled=scheduled)
+
+    def op_list_questions_stream(self, scheduled: float, rng: random.Random):
+        # requests reads the whole body before returning, so this times the full stream
+        self.client.request("GET", "/questions [ndjson]", "/questions?format=ndjson",
+                            rng.choice(self.students)["token"], scheduled=scheduled)
+
+    def op_list_questions_revalidate(self, scheduled: float, rng: random.Random):
+        # A client with a cached list sends its ETag and gets 304 if nothing changed
+        student = rng.choice(self.students)
+        etag = student.get("etag")
+        response = self.client.request("GET", "/questions [revalidate]" if etag else "/questions", "/questions",
+                                       student["token"], scheduled=scheduled,
+                                       headers={"If-None-Match": etag} if etag else {})
+        if response.status_code == 200:
+            student["etag"] = response.headers.get("ETag")
+
+    def op_sync_changes(self, scheduled: float, rng: random.Random):
+        # A client loads the list once, then asks only for what changed since
+        student = rng.choice(self.students)
+        cursor = student.get("syncCursor")
+        if not cursor:
+            response = self.client.request("GET", "/questions", "/questions", student["token"], scheduled=scheduled)
+            if response.ok:
+                student["syncCursor"] = response.headers.get("X-Sync-Cursor")
+            return
+        while cursor:
+            response = self.client.request("GET", "/sync/changes", f"/sync/changes?since={cursor}",
+                                           student["token"], scheduled=scheduled)
+            if not response.ok:
+                # An expired cursor (410) means a full reload next time
+                student["syncCursor"] = None
+                return
+            changes = response.json()
+            student["syncCursor"] = changes["cursor"]
+            cursor = changes["cursor"] if changes["hasMore"] else None
+
+    def op_grade(self, scheduled: float, rng: random.Random):
+        question = self._question(rng)
+        if question is None:
+            return
+        self.client.request(
+            "POST", "/questions/:id/grades", f"/questions/{question['_id']}/grades",
+            rng.choice(self.students)["token"], scheduled=scheduled,
+            json={
+                "questionScore": rng.randint(1, 3),
+                "answerGrades": [{"answerId": a["_id"], "score": rng.randint(1, 3)} for a in question["answers"]],
+            },
+        )
+
+    def op_suggest(self, scheduled: float, rng: random.Random):
+        question = self._question(rng)
+        if question is None:
+            return
+        self.client.request(
+            "POST", "/questions/:id/suggestions", f"/questions/{question['_id']}/suggestions",
+            rng.choice(self.students)["token"], scheduled=scheduled,
+            json={"suggestedQuestion": f"{question['question']} (Improved)", "suggestedAnswers": question["answers"]},
+        )
+
+    def op_finalize(self, scheduled: float, rng: random.Random):
+        if not self.faculty:
+            return
+        question = self._question(rng, consume=True)
+        if question is None:
+            return
+        self.client.request("PUT", "/questions/:id/finalize", f"/questions/{question['_id']}/finalize",
+                            rng.choice(self.faculty)["token"], scheduled=scheduled)
+
+    # Driver
+
+    def _execute(self, fn: Callable[[float, random.Random], None], scheduled: float, seed: int):
+        try:
+            fn(scheduled, random.Random(seed))
+        except requests.RequestException:
+            with self._lock:
+                self.failures += 1
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def run(self, mix: Dict[str, float], rate: float, duration: float, warmup: float = 0.0,
+            server: Optional[ServerMetrics] = None):
+        """Offer `rate` requests/second for `duration` seconds, after an unrecorded warm-up.
+
+        With `server`, /metrics is scraped when the measured part starts and
+        ends, so server-side numbers cover the same window as the client's.
+        """
+        operations = [getattr(self, f"op_{name}") for name in mix]
+        weights = list(mix.values())
+        recorded = self.client.stats
+        if warmup > 0:
+            self.client.stats = EndpointStats()
+            self._drive(operations, weights, rate, warmup)
+            self.client.stats = recorded
+            recorded.started = time.monotonic()
+        if server:
+            server.start()
+        self._drive(operations, weights, rate, duration)
+        recorded.stop()
+        if server:
+            self.server_metrics = server.finish()
+
+    def _drive(self, operations, weights, rate: float, duration: float, stop: Optional[threading.Event] = None):
+        workers = min(self.max_in_flight, max(8, int(rate * 2)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            start = time.perf_counter()
+            next_arrival = start
+            end = start + duration
+            while next_arrival < end and not (stop and stop.is_set()):
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                operation = self.rng.choices(operations, weights)[0]
+                with self._lock:
+                    if self._in_flight >= self.max_in_flight:
+                        # Client-side saturation: count it rather than queueing unboundedly
+                        self.dropped += 1
+                        operation = None
+                    else:
+                        self._in_flight += 1
+                        self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+                if operation is not None:
+                    executor.submit(self._execute, operation, next_arrival, self.rng.getrandbits(32))
+                next_arrival += self.rng.expovariate(rate)
+
+    # Login storm
+
+    def run_storm(self, mix: Dict[str, float], rate: float, accounts: List[Dict[str, str]], before: float,
+                  window: float, after: float, retries: int = 3, timeout: float = 300) -> Dict[str, Any]:
+        """Offer the background `mix` at `rate` while `accounts` all log in within `window` seconds.
+
+        Background latencies are recorded separately for the phase before the
+        storm, the storm itself (until the last login has finished or given
+        up) and the phase after it. Storm logins that get 429 or 503 retry
+        after the server's Retry-After, up to `retries` times, so the report
+        shows how long the whole class took to get in. Returns the per-phase
+        stats and the storm summary; self.client.stats ends up holding the
+        storm phase.
+        """
+        operations = [getattr(self, f"op_{name}") for name in mix]
+        weights = list(mix.values())
+        phases = {name: EndpointStats() for name in ("before", "during", "after")}
+        storm_stats = EndpointStats()
+        done = threading.Event()
+        summary: Dict[str, Any] = {}
+
+        def storm():
+            try:
+                summary.update(self._storm(accounts, window, retries, storm_stats))
+            finally:
+                done.set()
+
+        self.client.stats = phases["before"]
+        self._drive(operations, weights, rate, before)
+        phases["before"].stop()
+
+        self.client.stats = phases["during"]
+        thread = threading.Thread(target=storm, daemon=True)
+        thread.start()
+        self._drive(operations, weights, rate, timeout, stop=done)
+        phases["during"].stop()
+        thread.join()
+
+        self.client.stats = phases["after"]
+        self._drive(operations, weights, rate, after)
+        phases["after"].stop()
+
+        self.client.stats = phases["during"]
+        summary["attempts"] = storm_stats.summary()
+        return {"phases": phases, "storm": summary}
+
+    def _storm(self, accounts: List[Dict[str, str]], window: float, retries: int,
+               stats: EndpointStats) -> Dict[str, Any]:
+        client = ApiClient(self.client.base_url, stats)
+        completion = LatencyHistogram()
+        # ok / rejected / failed count accounts; the *Responses keys count attempts
+        outcomes = {"ok": 0, "rejected": 0, "failed": 0, "limitedResponses": 0, "busyResponses": 0}
+        lock = threading.Lock()
+        start = time.perf_counter()
+        offsets = sorted(self.rng.uniform(0, window) for _ in accounts) if window > 0 else [0.0] * len(accounts)
+
+        def login(account, offset):
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            outcome = "failed"
+            for attempt in range(retries + 1):
+                try:
+                    response = client.request("POST", "/users/login [storm]", "/users/login", scheduled=time.perf_counter(),
+                                              json={"email": account["email"], "password": account["password"]})
+                except requests.RequestException:
+                    break
+                if response.status_code not in (429, 503):
+                    outcome = "ok" if response.ok else "rejected"
+                    break
+                with lock:
+                    outcomes["limitedResponses" if response.status_code == 429 else "busyResponses"] += 1
+                if attempt < retries:
+                    time.sleep(min(float(response.headers.get("Retry-After") or 1), 30) * self.rng.uniform(1, 1.5))
+            with lock:
+                outcomes[outcome] += 1
+                if outcome == "ok":
+                    completion.record(time.perf_counter() - scheduled)
+
+        with ThreadPoolExecutor(max_workers=min(len(accounts), self.max_in_flight) or 1) as executor:
+            list(executor.map(login, accounts, offsets))
+        return {
+            "accounts": len(accounts),
+            "window": window,
+            "elapsed": time.perf_counter() - start,
+            **outcomes,
+            "completion": {**{f"p{p}": completion.percentile(p) for p in (50, 95, 99)},
+                           "max": completion.max_us / 1000},
+        }
+
+
+def build_report(stats: EndpointStats, config: Dict[str, Any], extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    report = {
+        "generatedAt": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "config": config,
+        "totals": stats.totals(),
+        "routes": stats.summary(),
+        "histograms": stats.histogram_dicts(),
+    }
+    if extra:
+        report.update(extra)
+    return report
+
+
+def render_markdown(report: Dict[str, Any], title: str = "Load Test Report") -> str:
+    """Render a report in the style of STATISTICS.md"""
+    config = report["config"]
+    totals = report["totals"]
+    lines = [
+        f"# {title}",
+        f"Generated on {report['generatedAt']}",
+        f"Commit: {report.get('commit') or 'unknown'}",
+        "",
+        "## Configuration",
+    ]
+    lines += [f"- {key}: {value}" for key, value in config.items()]
+    lines += [
+        "",
+        "## Totals",
+        f"- Requests: {totals['count']}",
+        f"- Errors: {totals['errors']}",
+        f"- Throughput: {totals['rps']:.1f} req/s",
+        f"- Duration: {totals['elapsed']:.1f}s",
+        f"- Bytes received: {totals['bytes']}",
+    ]
+    for key in ("dropped", "failures", "peakInFlight"):
+        if key in report:
+            lines.append(f"- {key}: {report[key]}")
+    lines += [
+        "",
+        "## Routes",
+        "",
+        "| Route | Requests | Errors | Error rate | req/s | KB/req | p50 ms | p95 ms | p99 ms | max ms |",
+        "|---|---:|---:|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    for route, row in report["routes"].items():
+        kb = row.get("bytes", 0) / max(row["count"], 1) / 1024
+        lines.append(
+            f"| `{route}` | {row['count']} | {row['errors']} | {row['errorRate']:.2%} | {row['rps']:.1f} | "
+            f"{kb:.1f} | {row['p50']:.1f} | {row['p95']:.1f} | {row['p99']:.1f} | {row['max']:.1f} |"
+        )
+    server = report.get("server")
+    if server:
+        lines += [
+            "",
+            "## Server Routes",
+            f"Scraped from {server['url']}",
+            "",
+            "| Route | Requests | mean ms | p50 ms | p95 ms | p99 ms | DB commands/req | populates/req |",
+            "|---|---:|---:|---:|---:|---:|---:|---:|",
+        ]
+        for route, row in server["routes"].items():
+            lines.append(
+                f"| `{route}` | {row['count']} | {row['mean']:.1f} | {row['p50']:.1f} | {row['p95']:.1f} | "
+                f"{row['p99']:.1f} | {row.get('dbCommands', 0):.1f} | {row.get('populates', 0):.1f} |"
+            )
+        lines += [
+            "",
+            "## MongoDB Commands",
+            "",
+            "| Command | Count | mean ms | p50 ms | p95 ms | p99 ms |",
+            "|---|---:|---:|---:|---:|---:|",
+        ]
+        for command, row in server["mongodb"].items():
+            lines.append(
+                f"| `{command}` | {row['count']} | {row['mean']:.2f} | {row['p50']:.2f} | "
+                f"{row['p95']:.2f} | {row['p99']:.2f} |"
+            )
+        lines += ["", "## Server Gauges"]
+        lines += [f"- {key}: {value:g}" for key, value in sorted(server["gauges"].items())]
+    phases = report.get("phases")
+    if phases:
+        lines += [
+            "",
+            "## Unrelated Endpoints by Phase",
+            "",
+            "| Route | before p99 ms | during p99 ms | after p99 ms | during / before |",
+            "|---|---:|---:|---:|---:|",
+        ]
+        routes = sorted({route for phase in phases.values() for route in phase["routes"]})
+        for route in routes:
+            p99 = [phases[name]["routes"].get(route, {}).get("p99") for name in ("before", "during", "after")]
+            ratio = f"{p99[1] / p99[0]:.1f}x" if p99[0] and p99[1] is not None else "-"
+            cells = " | ".join(f"{value:.1f}" if value is not None else "-" for value in p99)
+            lines.append(f"| `{route}` | {cells} | {ratio} |")
+    storm = report.get("storm")
+    if storm:
+        completion = storm["completion"]
+        lines += [
+            "",
+            "## Login Storm",
+            f"- Accounts: {storm['accounts']} within {storm['window']:g}s",
+            f"- Logged in: {storm['ok']}, rejected: {storm['rejected']}, gave up: {storm['failed']}",
+            f"- 429 responses: {storm['limitedResponses']}, 503 responses: {storm['busyResponses']}",
+            f"- Storm duration: {storm['elapsed']:.1f}s",
+            f"- Time to log in (incl. retries): p50 {completion['p50']:.0f} ms, p95 {completion['p95']:.0f} ms, "
+            f"p99 {completion['p99']:.0f} ms, max {completion['max']:.0f} ms",
+        ]
+        for route, row in storm.get("attempts", {}).items():
+            lines.append(f"- `{route}` attempts: {row['count']}, p50 {row['p50']:.0f} ms, p99 {row['p99']:.0f} ms")
+    if "scoringConfigCache" in report:
+        lines += ["", "## Scoring Config Cache"]
+        lines += [f"- {key}: {value}" for key, value in report["scoringConfigCache"].items()]
+    return "\n".join(lines) + "\n"
+
+
+def write_report(report: Dict[str, Any], name: str, out_dir: Optional[str] = None, title: str = "Load Test Report"):
+    """Write <name>.json and <name>.md and return their paths"""
+    directory = Path(out_dir) if out_dir else REPORTS_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    json_path = directory / f"{name}.json"
+    md_path = directory / f"{name}.md"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(render_markdown(report, title))
+    return json_path, md_path
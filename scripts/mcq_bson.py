@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""Minimal pure-Python BSON codec for reading and writing mongodump files.
+
+Only the types used by the app's collections are supported for encoding
+(documents, arrays, strings, numbers, booleans, null, ObjectId and dates).
+Decoding additionally understands binary, regex, timestamp and decimal128
+values so arbitrary dumps can be scanned. Files are read through mmap and
+yielded one document at a time, so memory use does not grow with file size.
+"""
+
+import os
+import gzip
+import mmap
+import json
+import struct
+import binascii
+import datetime
+from typing import Any, Dict, Iterator, Tuple, Optional
+
+_INT32 = struct.Struct("<i")
+_INT64 = struct.Struct("<q")
+_UINT64 = struct.Struct("<Q")
+_DOUBLE = struct.Struct("<d")
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class ObjectId:
+    """12-byte MongoDB ObjectId"""
+
+    __slots__ = ("binary",)
+
+    def __init__(self, oid: Any = None):
+        if oid is None:
+            oid = ObjectId.from_parts(int(datetime.datetime.now().timestamp()), os.urandom(5), os.urandom(3)).binary
+        if isinstance(oid, ObjectId):
+            oid = oid.binary
+        if isinstance(oid, str):
+            oid = binascii.unhexlify(oid)
+        if not isinstance(oid, (bytes, bytearray)) or len(oid) != 12:
+            raise ValueError(f"Invalid ObjectId: {oid!r}")
+        self.binary = bytes(oid)
+
+    @classmethod
+    def from_parts(cls, timestamp: int, middle: bytes, counter: Any) -> "ObjectId":
+        """Build an id from a unix timestamp, 5 process bytes and a 3-byte counter"""
+        if isinstance(counter, int):
+            counter = (counter & 0xFFFFFF).to_bytes(3, "big")
+        return cls(struct.pack(">I", timestamp & 0xFFFFFFFF) + middle[:5] + counter[:3])
+
+    @property
+    def generation_time(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(struct.unpack(">I", self.binary[:4])[0], datetime.timezone.utc)
+
+    def __str__(self) -> str:
+        return self.binary.hex()
+
+    def __repr__(self) -> str:
+        return f"ObjectId('{self}')"
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, ObjectId) and other.binary == self.binary
+
+    def __lt__(self, other: "ObjectId") -> bool:
+        return self.binary < other.binary
+
+    def __hash__(self) -> int:
+        return hash(self.binary)
+
+
+# Encoding
+
+_NAMES: Dict[str, bytes] = {}
+
+
+def _cstring(key: str) -> bytes:
+    name = _NAMES.get(key)
+    if name is None:
+        name = key.encode("utf-8") + b"\x00"
+        if len(_NAMES) < 4096:  # field names and array indexes repeat constantly
+            _NAMES[key] = name
+    return name
+
+
+def _encode_int(name: bytes, value: int) -> bytes:
+    if -2 ** 31 <= value < 2 ** 31:
+        return b"\x10" + name + _INT32.pack(value)
+    return b"\x12" + name + _INT64.pack(value)
+
+
+def _encode_string(name: bytes, value: str) -> bytes:
+    data = value.encode("utf-8")
+    return b"\x02" + name + _INT32.pack(len(data) + 1) + data + b"\x00"
+
+
+def _encode_datetime(name: bytes, value: datetime.datetime) -> bytes:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    millis = (value - _EPOCH) // datetime.timedelta(milliseconds=1)
+    return b"\x09" + name + _INT64.pack(millis)
+
+
+def _encode_list(name: bytes, value: Any) -> bytes:
+    body = b"".join(_element(str(i), v) for i, v in enumerate(value))
+    return b"\x04" + name + _INT32.pack(len(body) + 5) + body + b"\x00"
+
+
+def _encode_bytes(name: bytes, value: Any) -> bytes:
+    return b"\x05" + name + _INT32.pack(len(value)) + b"\x00" + bytes(value)
+
+
+_ENCODERS = {
+    bool: lambda name, value: b"\x08" + name + (b"\x01" if value else b"\x00"),
+    int: _encode_int,
+    float: lambda name, value: b"\x01" + name + _DOUBLE.pack(value),
+    str: _encode_string,
+    ObjectId: lambda name, value: b"\x07" + name + value.binary,
+    datetime.datetime: _encode_datetime,
+    type(None): lambda name, value: b"\x0A" + name,
+    dict: lambda name, value: b"\x03" + name + encode(value),
+    list: _encode_list,
+    tuple: _encode_list,
+    bytes: _encode_bytes,
+    bytearray: _encode_bytes,
+}
+
+
+def _element(key: str, value: Any) -> bytes:
+    encoder = _ENCODERS.get(type(value))
+    if encoder is None:
+        # Subclasses (e.g. OrderedDict, IntEnum) fall back to an isinstance scan
+        for kind, candidate in _ENCODERS.items():
+            if kind is not bool and isinstance(value, kind):
+                encoder = candidate
+                break
+        else:
+            raise TypeError(f"Cannot encode {type(value).__name__} as BSON")
+    return encoder(_cstring(key), value)
+
+
+def encode(document: Dict[str, Any]) -> bytes:
+    body = b"".join([_element(key, value) for key, value in document.items()])
+    return _INT32.pack(len(body) + 5) + body + b"\x00"
+
+
+# Decoding
+
+def _read_cstring(data, offset: int) -> Tuple[str, int]:
+    end = data.find(b"\x00", offset)
+    return bytes(data[offset:end]).decode("utf-8", "replace"), end + 1
+
+
+def _decode_value(data, kind: int, offset: int) -> Tuple[Any, int]:
+    if kind == 0x01:
+        return _DOUBLE.unpack_from(data, offset)[0], offset + 8
+    if kind in (0x02, 0x0D, 0x0E):
+        length = _INT32.unpack_from(data, offset)[0]
+        start = offset + 4
+        return bytes(data[start:start + length - 1]).decode("utf-8", "replace"), start + length
+    if kind == 0x03:
+        length = _INT32.unpack_from(data, offset)[0]
+        return decode(data, offset), offset + length
+    if kind == 0x04:
+        length = _INT32.unpack_from(data, offset)[0]
+        return list(decode(data, offset).values()), offset + length
+    if kind == 0x05:
+        length = _INT32.unpack_from(data, offset)[0]
+        start = offset + 5
+        return bytes(data[start:start + length]), start + length
+    if kind == 0x07:
+        return ObjectId(bytes(data[offset:offset + 12])), offset + 12
+    if kind == 0x08:
+        return data[offset] == 1, offset + 1
+    if kind == 0x09:
+        millis = _INT64.unpack_from(data, offset)[0]
+        return _EPOCH + datetime.timedelta(milliseconds=millis), offset + 8
+    if kind in (0x0A, 0x06, 0x7F, 0xFF):
+        return None, offset
+    if kind == 0x0B:
+        pattern, offset = _read_cstring(data, offset)
+        flags, offset = _read_cstring(data, offset)
+        return {"$regex": pattern, "$options": flags}, offset
+    if kind == 0x10:
+        return _INT32.unpack_from(data, offset)[0], offset + 4
+    if kind == 0x11:
+        return _UINT64.unpack_from(data, offset)[0], offset + 8
+    if kind == 0x12:
+        return _INT64.unpack_from(data, offset)[0], offset + 8
+    if kind == 0x13:
+        return bytes(data[offset:offset + 16]), offset + 16
+    if kind == 0x0F:
+        length = _INT32.unpack_from(data, offset)[0]
+        return None, offset + length
+    raise ValueError(f"Unsupported BSON type 0x{kind:02x} at offset {offset}")
+
+
+def decode(data, offset: int = 0) -> Dict[str, Any]:
+    """Decode the BSON document starting at offset in a bytes-like buffer"""
+    length = _INT32.unpack_from(data, offset)[0]
+    end = offset + length - 1
+    position = offset + 4
+    document: Dict[str, Any] = {}
+    while position < end:
+        kind = data[position]
+        key, position = _read_cstring(data, position + 1)
+        document[key], position = _decode_value(data, kind, position)
+    return document
+
+
+# Sizes of fixed-width values, by element type
+_FIXED_SIZES = {0x01: 8, 0x07: 12, 0x08: 1, 0x09: 8, 0x10: 4, 0x11: 8, 0x12: 8, 0x13: 16,
+                0x06: 0, 0x0A: 0, 0x7F: 0, 0xFF: 0}
+
+
+def iter_elements(data, offset: int = 0) -> Iterator[Tuple[int, str, int, int]]:
+    """Yield (type, key, value offset, value end) for the top-level elements of a
+    document without decoding the values, so callers can skip large fields or
+    descend into only the ones they need"""
+    end = offset + _INT32.unpack_from(data, offset)[0] - 1
+    position = offset + 4
+    while position < end:
+        kind = data[position]
+        key, position = _read_cstring(data, position + 1)
+        if kind in _FIXED_SIZES:
+            value_end = position + _FIXED_SIZES[kind]
+        elif kind in (0x02, 0x0D, 0x0E):
+            value_end = position + 4 + _INT32.unpack_from(data, position)[0]
+        elif kind in (0x03, 0x04, 0x0F):
+            value_end = position + _INT32.unpack_from(data, position)[0]
+        elif kind == 0x05:
+            value_end = position + 5 + _INT32.unpack_from(data, position)[0]
+        elif kind == 0x0B:
+            _, value_end = _read_cstring(data, position)
+            _, value_end = _read_cstring(data, value_end)
+        else:
+            raise ValueError(f"Unsupported BSON type 0x{kind:02x} at offset {position}")
+        yield kind, key, position, value_end
+        position = value_end
+
+
+def iter_spans(path: str) -> Iterator[Tuple[mmap.mmap, int, int]]:
+    """Yield (buffer, offset, length) for each document in a .bson file.
+
+    The buffer is a read-only mmap of the whole file, so callers can inspect
+    sizes or decode selectively with decode(buffer, offset) without copying.
+    """
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        offset = 0
+        size = len(mapped)
+        while offset + 4 <= size:
+            length = _INT32.unpack_from(mapped, offset)[0]
+            if length < 5 or offset + length > size:
+                raise ValueError(f"Corrupt BSON document at offset {offset} in {path}")
+            yield mapped, offset, length
+            offset += length
+
+
+def iter_raw(path: str) -> Iterator[bytes]:
+    """Yield each document in a .bson file as raw bytes"""
+    for buffer, offset, length in iter_spans(path):
+        yield buffer[offset:offset + length]
+
+
+def iter_documents(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield each document in a .bson file, decoded"""
+    for buffer, offset, _ in iter_spans(path):
+        yield decode(buffer, offset)
+
+
+def iter_raw_stream(stream) -> Iterator[bytes]:
+    """Yield each document from a file-like object (e.g. a gzip stream) as raw bytes"""
+    while True:
+        header = stream.read(4)
+        if len(header) < 4:
+            return
+        length = _INT32.unpack(header)[0]
+        body = stream.read(length - 4)
+        if length < 5 or len(body) != length - 4:
+            raise ValueError("Truncated BSON stream")
+        yield header + body
+
+
+def iter_stream(stream) -> Iterator[Dict[str, Any]]:
+    """Yield documents from a file-like object (e.g. a gzip stream) without mmap"""
+    for raw in iter_raw_stream(stream):
+        yield decode(raw)
+
+
+def iter_collection(db_dir: str, collection: str) -> Iterator[Dict[str, Any]]:
+    """Yield the documents of one collection in a mongodump database directory.
+
+    Reads <collection>.bson through mmap, or <collection>.bson.gz (mongodump
+    --gzip) as a stream. Yields nothing if the collection was not dumped.
+    """
+    path = os.path.join(db_dir, f"{collection}.bson")
+    if os.path.exists(path):
+        yield from iter_documents(path)
+    elif os.path.exists(path + ".gz"):
+        with gzip.open(path + ".gz", "rb") as stream:
+            yield from iter_stream(stream)
+
+
+# Extended JSON (canonical v2) for mongoimport
+
+def to_extended_json(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return {"$date": value.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"}
+    if isinstance(value, dict):
+        return {key: to_extended_json(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_extended_json(v) for v in value]
+    if isinstance(value, bytes):
+        return {"$binary": {"base64": binascii.b2a_base64(value, newline=False).decode(), "subType": "00"}}
+    return value
+
+
+def dumps_extended_json(document: Dict[str, Any]) -> str:
+    return json.dumps(to_extended_json(document), ensure_ascii=False, separators=(",", ":"))
+
+
+def read_metadata(path: str) -> Optional[Dict[str, Any]]:
+    """Read a mongodump <collection>.metadata.json file, if present"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
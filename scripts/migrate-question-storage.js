@@ -0,0 +1,272 @@
+require("dotenv").config();
+const mongoose = require("mongoose");
+const Question = require("../src/models/Question");
+const GradeBucket = require("../src/models/GradeBucket");
+const SuggestionBucket = require("../src/models/SuggestionBucket");
+
+// Move grades and edit suggestions between the embedded arrays on Question
+// and the GradeBucket/SuggestionBucket collections, and recompute the
+// gradeStats/suggestionStats aggregates (see src/utils/questionStore.js).
+//
+// Usage: node scripts/migrate-question-storage.js --to bucketed|embedded
+//        node scripts/migrate-question-storage.js --stats-only
+//
+//   --to <mode>    Storage mode to move every question to; set
+//                  QUESTION_STORAGE to match before restarting the server
+//   --stats-only   Only recompute the aggregates, e.g. for questions created
+//                  before they existed
+//   --dry-run      Report what would change without writing anything
+//
+// Items are matched by _id, so an interrupted run can simply be repeated.
+const args = process.argv.slice(2);
+const dryRun = args.includes("--dry-run");
+const statsOnly = args.includes("--stats-only");
+const target = args.includes("--to") ? args[args.indexOf("--to") + 1] : null;
+
+const GRADE_BUCKET_SIZE = 200;
+const SUGGESTION_BUCKET_SIZE = 50;
+
+const connectDB = async () => {
+  const isDocker = process.env.IN_DOCKER === "true";
+  const host = isDocker ? "mongodb" : "localhost";
+  const mongoURI =
+    process.env.MONGO_URI || `mongodb://${host}:27017/mcq-writing-app`;
+
+  console.log(`Connecting to MongoDB at: ${mongoURI}`);
+  await mongoose.connect(mongoURI, {
+    useNewUrlParser: true,
+    useUnifiedTopology: true,
+  });
+};
+
+const gradeStats = (scores) => {
+  const distribution = [0, 0, 0];
+  scores.forEach((score) => (distribution[score - 1] += 1));
+  return {
+    count: scores.length,
+    sum: scores.reduce((total, score) => total + score, 0),
+    distribution,
+  };
+};
+
+const chunk = (items, size) => {
+  const chunks = [];
+  for (let i = 0; i < items.length; i += size) {
+    chunks.push(items.slice(i, i + size));
+  }
+  return chunks;
+};
+
+// Add items not seen yet, by _id
+const addUnique = (items, seen, additions) => {
+  for (const item of additions) {
+    const key = item._id.toString();
+    if (!seen.has(key)) {
+      seen.add(key);
+      items.push(item);
+    }
+  }
+};
+
+// All grades and suggestions of a question, wherever they are stored, as
+// bucket items ({ _id, student, answer, score, createdAt }) and suggestions
+const collect = async (question) => {
+  const grades = [];
+  const suggestions = [];
+  const seenGrades = new Set();
+  const seenSuggestions = new Set();
+
+  addUnique(
+    grades,
+    seenGrades,
+    (question.grades || []).map((g) => ({
+      _id: g._id,
+      student: g.student,
+      answer: null,
+      score: g.questionScore,
+      createdAt: g._id.getTimestamp(),
+    }))
+  );
+  for (const answer of question.answers || []) {
+    addUnique(
+      grades,
+      seenGrades,
+      (answer.grades || []).map((g) => ({
+        _id: g._id,
+        student: g.student,
+        answer: answer._id,
+        score: g.score,
+        createdAt: g._id.getTimestamp(),
+      }))
+    );
+  }
+  addUnique(suggestions, seenSuggestions, question.editSuggestions || []);
+
+  const [gradeBuckets, suggestionBuckets] = await Promise.all([
+    GradeBucket.find({ question: question._id }).lean(),
+    SuggestionBucket.find({ question: question._id }).lean(),
+  ]);
+  gradeBuckets.forEach((b) => addUnique(grades, seenGrades, b.grades));
+  suggestionBuckets.forEach((b) =>
+    addUnique(suggestions, seenSuggestions, b.suggestions)
+  );
+
+  const byCreatedAt = (a, b) => new Date(a.createdAt) - new Date(b.createdAt);
+  grades.sort(byCreatedAt);
+  suggestions.sort(byCreatedAt);
+  return {
+    grades,
+    suggestions,
+    bucketed: gradeBuckets.length + suggestionBuckets.length > 0,
+  };
+};
+
+// $set of the aggregates for the given grades and suggestions
+const statsUpdate = (question, grades, suggestions) => {
+  const update = {
+    gradeStats: gradeStats(
+      grades.filter((g) => !g.answer).map((g) => g.score)
+    ),
+    suggestionStats: {
+      count: suggestions.length,
+      pending: suggestions.filter((s) => s.status === "pending").length,
+      accepted: suggestions.filter((s) => s.status === "accepted").length,
+      rejected: suggestions.filter((s) => s.status === "rejected").length,
+    },
+  };
+  (question.answers || []).forEach((answer, i) => {
+    update[`answers.${i}.gradeStats`] = gradeStats(
+      grades
+        .filter((g) => g.answer && g.answer.equals(answer._id))
+        .map((g) => g.score)
+    );
+  });
+  return update;
+};
+
+const toBucketed = async (question, grades, suggestions) => {
+  await Promise.all([
+    GradeBucket.deleteMany({ question: question._id }),
+    SuggestionBucket.deleteMany({ question: question._id }),
+  ]);
+  const buckets = (field, size, items) =>
+    chunk(items, size).map((part) => ({
+      question: question._id,
+      count: part.length,
+      [field]: part,
+    }));
+  await GradeBucket.insertMany(buckets("grades", GRADE_BUCKET_SIZE, grades));
+  await SuggestionBucket.insertMany(
+    buckets("suggestions", SUGGESTION_BUCKET_SIZE, suggestions)
+  );
+
+  const update = {
+    ...statsUpdate(question, grades, suggestions),
+    grades: [],
+    editSuggestions: [],
+  };
+  (question.answers || []).forEach((_, i) => {
+    update[`answers.${i}.grades`] = [];
+  });
+  // Bypass the model so updatedAt is left alone
+  await Question.collection.updateOne({ _id: question._id }, { $set: update });
+};
+
+const toEmbedded = async (question, grades, suggestions) => {
+  const update = {
+    ...statsUpdate(question, grades, suggestions),
+    grades: grades
+      .filter((g) => !g.answer)
+      .map(({ _id, student, score }) => ({ _id, student, questionScore: score })),
+    editSuggestions: suggestions,
+  };
+  (question.answers || []).forEach((answer, i) => {
+    update[`answers.${i}.grades`] = grades
+      .filter((g) => g.answer && g.answer.equals(answer._id))
+      .map(({ _id, student, score }) => ({ _id, student, score }));
+  });
+  await Question.collection.updateOne({ _id: question._id }, { $set: update });
+  await Promise.all([
+    GradeBucket.deleteMany({ question: question._id }),
+    SuggestionBucket.deleteMany({ question: question._id }),
+  ]);
+};
+
+const run = async () => {
+  if (!statsOnly && !["bucketed", "embedded"].includes(target)) {
+    console.error(
+      "Usage: node scripts/migrate-question-storage.js --to bucketed|embedded [--dry-run]\n" +
+        "       node scripts/migrate-question-storage.js --stats-only [--dry-run]"
+    );
+    process.exit(1);
+  }
+
+  let exitCode = 0;
+  try {
+    await connectDB();
+    if (!dryRun) {
+      await Promise.all([
+        GradeBucket.createIndexes(),
+        SuggestionBucket.createIndexes(),
+      ]);
+    }
+
+    let questions = 0;
+    let moved = 0;
+    let grades = 0;
+    let suggestions = 0;
+    const cursor = Question.collection.find({}).batchSize(100);
+    for await (const question of cursor) {
+      questions += 1;
+      const collected = await collect(question);
+      grades += collected.grades.length;
+      suggestions += collected.suggestions.length;
+
+      if (dryRun) {
+        continue;
+      }
+      if (statsOnly) {
+        await Question.collection.updateOne(
+          { _id: question._id },
+          { $set: statsUpdate(question, collected.grades, collected.suggestions) }
+        );
+        continue;
+      }
+
+      const embeddedItems =
+        (question.grades || []).length +
+        (question.editSuggestions || []).length +
+        (question.answers || []).reduce(
+          (total, a) => total + (a.grades || []).length,
+          0
+        );
+      if (target === "bucketed" && (embeddedItems > 0 || !question.gradeStats)) {
+        await toBucketed(question, collected.grades, collected.suggestions);
+        moved += 1;
+      } else if (target === "embedded" && (collected.bucketed || !question.gradeStats)) {
+        await toEmbedded(question, collected.grades, collected.suggestions);
+        moved += 1;
+      }
+    }
+
+    console.log(
+      `${questions} questions, ${grades} grades, ${suggestions} edit suggestions`
+    );
+    if (dryRun) {
+      console.log("Dry run: nothing written");
+    } else if (statsOnly) {
+      console.log(`Recomputed aggregates of ${questions} questions`);
+    } else {
+      console.log(`Moved ${moved} questions to ${target} storage`);
+      console.log(`Set QUESTION_STORAGE=${target} before restarting the server`);
+    }
+  } catch (error) {
+    console.error("Error migrating question storage:", error);
+    exitCode = 1;
+  } finally {
+    await mongoose.disconnect();
+    process.exit(exitCode);
+  }
+};
+
+run();
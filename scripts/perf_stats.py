@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Latency and throughput bookkeeping shared by the seeding and load scripts."""
+
+import threading
+import time
+from typing import Dict, Any, Optional, List
+
+
+class LatencyHistogram:
+    """HDR-style latency histogram.
+
+    Values are recorded in microseconds into log2 buckets that are each split
+    into linear sub-buckets, so the relative error stays below
+    1 / 2**(precision_bits - 1) regardless of magnitude while memory stays
+    proportional to the number of distinct buckets hit.
+    """
+
+    def __init__(self, precision_bits: int = 7):
+        self._bits = precision_bits
+        self._sub = 1 << precision_bits
+        self._half = self._sub >> 1
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us = 0
+
+    def _index(self, value: int) -> int:
+        if value < self._sub:
+            return value
+        shift = value.bit_length() - self._bits
+        return self._sub + (shift - 1) * self._half + ((value >> shift) - self._half)
+
+    def _value(self, index: int) -> int:
+        """Return the midpoint of the value range covered by a bucket"""
+        if index < self._sub:
+            return index
+        offset = index - self._sub
+        shift = offset // self._half + 1
+        low = ((offset % self._half) + self._half) << shift
+        return low + ((1 << shift) >> 1)
+
+    def record(self, seconds: float):
+        self.record_value(int(seconds * 1_000_000))
+
+    def record_value(self, value: int):
+        """Record a raw integer value (microseconds for latencies, or any other unit)"""
+        value = max(0, value)
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.sum_us += value
+        self.max_us = max(self.max_us, value)
+        self.min_us = value if self.min_us is None else min(self.min_us, value)
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+
+    def value_at(self, pct: float) -> int:
+        """Return the raw recorded value at the given percentile"""
+        if not self.total:
+            return 0
+        rank = max(1, int(round(pct / 100.0 * self.total)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._value(index), self.max_us)
+        return self.max_us
+
+    def percentile(self, pct: float) -> float:
+        """Return the latency in milliseconds at the given percentile"""
+        return self.value_at(pct) / 1000.0
+
+    def mean(self) -> float:
+        return (self.sum_us / self.total) / 1000.0 if self.total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "precisionBits": self._bits,
+            "count": self.total,
+            "sumUs": self.sum_us,
+            "minUs": self.min_us or 0,
+            "maxUs": self.max_us,
+            "buckets": {str(self._value(i)): c for i, c in sorted(self.counts.items())},
+        }
+
+
+class EndpointStats:
+    """Thread-safe per-endpoint latency, error and byte counters."""
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.errors: Dict[str, int] = {}
+        self.bytes: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[int, int]] = {}
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    def record(self, endpoint: str, seconds: float, ok: bool = True, nbytes: int = 0, status: int = 0):
+        """Record one call; status 0 means no HTTP response was received"""
+        with self._lock:
+            histogram = self.histograms.get(endpoint)
+            if histogram is None:
+                histogram = self.histograms[endpoint] = LatencyHistogram()
+                self.errors[endpoint] = 0
+                self.bytes[endpoint] = 0
+                self.statuses[endpoint] = {}
+            histogram.record(seconds)
+            self.bytes[endpoint] += nbytes
+            self.statuses[endpoint][status] = self.statuses[endpoint].get(status, 0) + 1
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def stop(self):
+        self.finished = time.monotonic()
+
+    def elapsed(self) -> float:
+        end = self.finished if self.finished is not None else time.monotonic()
+        return max(end - self.started, 1e-9)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-endpoint statistics, latencies in milliseconds"""
+        elapsed = self.elapsed()
+        with self._lock:
+            result = {}
+            for endpoint in sorted(self.histograms):
+                histogram = self.histograms[endpoint]
+                row = {
+                    "count": histogram.total,
+                    "errors": self.errors[endpoint],
+                    "errorRate": self.errors[endpoint] / histogram.total if histogram.total else 0.0,
+                    "statuses": {str(code): n for code, n in sorted(self.statuses[endpoint].items())},
+                    "rps": histogram.total / elapsed,
+                    "bytes": self.bytes[endpoint],
+                    "mean": histogram.mean(),
+                    "max": histogram.max_us / 1000.0,
+                }
+                for pct in self.PERCENTILES:
+                    row[f"p{pct}"] = histogram.percentile(pct)
+                result[endpoint] = row
+            return result
+
+    def histogram_dicts(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {endpoint: h.to_dict() for endpoint, h in sorted(self.histograms.items())}
+
+    def totals(self) -> Dict[str, Any]:
+        with self._lock:
+            count = sum(h.total for h in self.histograms.values())
+            errors = sum(self.errors.values())
+            nbytes = sum(self.bytes.values())
+        return {
+            "count": count,
+            "errors": errors,
+            "bytes": nbytes,
+            "elapsed": self.elapsed(),
+            "rps": count / self.elapsed(),
+        }
+
+    def format_table(self) -> str:
+        """Render the summary as a fixed-width text table"""
+        rows: List[str] = []
+        header = f"{'endpoint':<42} {'count':>8} {'err':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+        rows.append(header)
+        rows.append("-" * len(header))
+        for endpoint, row in self.summary().items():
+            rows.append(
+                f"{endpoint:<42} {row['count']:>8} {row['errors']:>6} {row['rps']:>9.1f} "
+                f"{row['p50']:>9.1f} {row['p95']:>9.1f} {row['p99']:>9.1f}"
+            )
+        totals = self.totals()
+        rows.append("-" * len(header))
+        rows.append(
+            f"{'total':<42} {totals['count']:>8} {totals['errors']:>6} {totals['rps']:>9.1f}"
+            f"   ({totals['elapsed']:.1f}s)"
+        )
+        return "\n".join(rows)
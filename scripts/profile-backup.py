@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""Profile a mongodump backup offline: document sizes, array growth and index coverage.
+
+Reads the BSON files of a backup in backups/ directly, memory-mapped (or
+streamed for mongodump --gzip), with no database server. Only element
+headers are walked for most fields, so a multi-GB dump is profiled in
+bounded memory: sizes go into log-bucketed histograms and only the top
+documents of each ranking are kept.
+
+The report covers:
+- document-size distributions per collection
+- the questions with the most embedded grades, editSuggestions and
+  answers[].grades (and bucketed grade/suggestion counts)
+- Lecture.students and Lecture.questions array lengths
+- for each query shape used by the controllers, the best index in
+  <collection>.metadata.json and whether it bounds the filter and sort
+
+Usage:
+    python3 scripts/profile-backup.py backups/<backup_name>
+    python3 scripts/profile-backup.py <backup_name> --top 20 --out-dir /tmp/profile
+"""
+
+import os
+import sys
+import gzip
+import json
+import heapq
+import argparse
+import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from mcq_bson import decode, iter_elements, iter_raw_stream, iter_spans
+from perf_stats import LatencyHistogram
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BACKUPS_DIR = PROJECT_ROOT / "backups"
+REPORTS_DIR = PROJECT_ROOT / "load-reports"
+MONGO_DB = "mcq-writing-app"
+
+SIZE_PERCENTILES = (50, 90, 99)
+
+# Query shapes issued by src/controllers and src/utils: equality (or $in)
+# fields, range fields and the sort, in the order MongoDB would want them
+QUERY_SHAPES = [
+    {"collection": "users", "source": "userController login/register", "eq": ["email"], "range": [], "sort": []},
+    {"collection": "users", "source": "userController.getUsersByRole", "eq": ["role", "active"], "range": [],
+     "sort": [("name", 1)]},
+    {"collection": "users", "source": "userController.getPendingUsers", "eq": ["active"], "range": [],
+     "sort": [("createdAt", -1)]},
+    {"collection": "users", "source": "userController.getActiveUsers", "eq": ["active"], "range": [],
+     "sort": [("name", 1)]},
+    {"collection": "users", "source": "leaderboard.topStudents (global)", "eq": ["role", "active"], "range": [],
+     "sort": [("score", -1), ("_id", 1)]},
+    {"collection": "users", "source": "leaderboard.rankOf (global)", "eq": ["role", "active"],
+     "range": ["score"], "sort": []},
+    {"collection": "lectures", "source": "lectureController.getLectures (faculty)", "eq": ["faculty"],
+     "range": [], "sort": []},
+    {"collection": "lectures", "source": "lectureController.getLectures (student)", "eq": ["students"],
+     "range": [], "sort": []},
+    {"collection": "lectures", "source": "leaderboard question attach/detach", "eq": ["questions"], "range": [],
+     "sort": []},
+    {"collection": "questions", "source": "questionController.getQuestions", "eq": [], "range": ["_id"],
+     "sort": [("_id", 1)]},
+    {"collection": "questions", "source": "questionController.getQuestions?owner=", "eq": ["owner"],
+     "range": ["_id"], "sort": [("_id", 1)]},
+    {"collection": "questions", "source": "questionController.getQuestions?isFinal=", "eq": ["isFinal"],
+     "range": ["_id"], "sort": [("_id", 1)]},
+    {"collection": "questions", "source": "questionController.getQuestions?lecture=&isFinal=",
+     "eq": ["_id", "isFinal"], "range": [], "sort": [("_id", 1)]},
+    {"collection": "questions", "source": "questionController.exportQuestions", "eq": ["isFinal"], "range": [],
+     "sort": [("_id", 1)]},
+    {"collection": "questions", "source": "questionController.findPossibleDuplicates",
+     "eq": ["similarity.bands"], "range": [], "sort": []},
+    {"collection": "gradebuckets", "source": "questionStore grade append", "eq": ["question"],
+     "range": ["count"], "sort": []},
+    {"collection": "gradebuckets", "source": "questionStore.loadQuestion", "eq": ["question"], "range": [],
+     "sort": []},
+    {"collection": "suggestionbuckets", "source": "questionStore suggestion append", "eq": ["question"],
+     "range": ["count"], "sort": []},
+    {"collection": "suggestionbuckets", "source": "questionStore suggestion review", "eq": ["suggestions._id"],
+     "range": [], "sort": []},
+    {"collection": "scoreevents", "source": "leaderboard.adjustLectureQuestions", "eq": ["question"],
+     "range": [], "sort": []},
+    {"collection": "scoreevents", "source": "scoreLedger per-user history", "eq": ["user"],
+     "range": ["createdAt"], "sort": []},
+    {"collection": "lecturescores", "source": "leaderboard.topStudents (lecture)", "eq": ["lecture", "active"],
+     "range": [], "sort": [("score", -1), ("user", 1)]},
+    {"collection": "lecturescores", "source": "leaderboard.rankOf (lecture)", "eq": ["lecture", "user"],
+     "range": [], "sort": []},
+    {"collection": "lecturescores", "source": "leaderboard.rankOf (lecture count)", "eq": ["lecture", "active"],
+     "range": ["score"], "sort": []},
+]
+
+# Array fields ranked per collection; answers[].grades is summed over answers
+QUESTION_ARRAYS = ("grades", "editSuggestions", "answerGrades", "facultyComments",
+                   "gradeStats.count", "suggestionStats.count")
+LECTURE_ARRAYS = ("students", "questions")
+
+
+def find_db_dir(backup: str) -> str:
+    """Accept a backup directory, its database subdirectory, or a name under backups/"""
+    for candidate in (Path(backup), BACKUPS_DIR / backup):
+        for db_dir in (candidate / MONGO_DB, candidate):
+            if db_dir.is_dir() and any(name.endswith((".bson", ".bson.gz")) for name in os.listdir(db_dir)):
+                return str(db_dir)
+    raise SystemExit(f"No BSON files found in {backup}")
+
+
+def iter_documents_raw(db_dir: str, collection: str) -> Iterator[Tuple[Any, int, int]]:
+    """(buffer, offset, length) per document, from .bson via mmap or .bson.gz as a stream"""
+    path = os.path.join(db_dir, f"{collection}.bson")
+    if os.path.exists(path):
+        yield from iter_spans(path)
+    else:
+        with gzip.open(path + ".gz", "rb") as stream:
+            for raw in iter_raw_stream(stream):
+                yield raw, 0, len(raw)
+
+
+def array_length(data, offset: int) -> int:
+    return sum(1 for _ in iter_elements(data, offset))
+
+
+class TopN:
+    """The n largest (value, id) pairs seen, in bounded memory"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.heap: List[Tuple[int, str]] = []
+
+    def add(self, value: int, doc_id: Any):
+        if len(self.heap) < self.n:
+            heapq.heappush(self.heap, (value, str(doc_id)))
+        elif value > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (value, str(doc_id)))
+
+    def items(self) -> List[Dict[str, Any]]:
+        return [{"_id": doc_id, "value": value} for value, doc_id in sorted(self.heap, reverse=True)]
+
+
+class Distribution:
+    """Count, total, max and percentiles of integer values"""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+
+    def add(self, value: int):
+        self.histogram.record_value(value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        h = self.histogram
+        result = {"count": h.total, "total": h.sum_us, "mean": round(h.sum_us / h.total, 1) if h.total else 0,
+                  "max": h.max_us}
+        for pct in SIZE_PERCENTILES:
+            result[f"p{pct}"] = h.value_at(pct)
+        return result
+
+
+def question_counts(data, offset: int) -> Tuple[Any, Dict[str, int]]:
+    doc_id = None
+    counts = dict.fromkeys(QUESTION_ARRAYS, 0)
+    for kind, key, start, _ in iter_elements(data, offset):
+        if key == "_id":
+            doc_id = decode_id(data, kind, start)
+        elif key in ("grades", "editSuggestions", "facultyComments") and kind == 0x04:
+            counts[key] = array_length(data, start)
+        elif key == "answers" and kind == 0x04:
+            for answer_kind, _, answer_start, _ in iter_elements(data, start):
+                if answer_kind != 0x03:
+                    continue
+                for sub_kind, sub_key, sub_start, _ in iter_elements(data, answer_start):
+                    if sub_key == "grades" and sub_kind == 0x04:
+                        counts["answerGrades"] += array_length(data, sub_start)
+        elif key in ("gradeStats", "suggestionStats") and kind == 0x03:
+            value = decode(data, start).get("count")
+            counts[f"{key}.count"] = int(value) if isinstance(value, (int, float)) else 0
+    return doc_id, counts
+
+
+def lecture_counts(data, offset: int) -> Tuple[Any, Dict[str, int]]:
+    doc_id = None
+    counts = dict.fromkeys(LECTURE_ARRAYS, 0)
+    for kind, key, start, _ in iter_elements(data, offset):
+        if key == "_id":
+            doc_id = decode_id(data, kind, start)
+        elif key in LECTURE_ARRAYS and kind == 0x04:
+            counts[key] = array_length(data, start)
+    return doc_id, counts
+
+
+def decode_id(data, kind: int, start: int) -> Any:
+    if kind == 0x07:
+        return bytes(data[start:start + 12]).hex()
+    return None
+
+
+def profile_collection(db_dir: str, collection: str, top: int) -> Dict[str, Any]:
+    sizes = Distribution()
+    largest = TopN(top)
+    arrays: Dict[str, Distribution] = {}
+    rankings: Dict[str, TopN] = {}
+    counter = {"questions": (question_counts, QUESTION_ARRAYS),
+               "lectures": (lecture_counts, LECTURE_ARRAYS)}.get(collection)
+    if counter:
+        arrays = {field: Distribution() for field in counter[1]}
+        rankings = {field: TopN(top) for field in counter[1]}
+
+    for buffer, offset, length in iter_documents_raw(db_dir, collection):
+        sizes.add(length)
+        if counter:
+            doc_id, counts = counter[0](buffer, offset)
+            for field, value in counts.items():
+                arrays[field].add(value)
+                rankings[field].add(value, doc_id)
+            largest.add(length, doc_id)
+        else:
+            first = next(iter_elements(buffer, offset), None)
+            largest.add(length, decode_id(buffer, first[0], first[2]) if first and first[1] == "_id" else None)
+
+    result = {"sizes": sizes.to_dict(), "largest": largest.items()}
+    if counter:
+        result["arrays"] = {field: dist.to_dict() for field, dist in arrays.items()}
+        result["top"] = {field: ranking.items() for field, ranking in rankings.items()}
+    return result
+
+
+# Index coverage
+
+def read_indexes(db_dir: str, collection: str) -> Optional[List[Dict[str, Any]]]:
+    path = os.path.join(db_dir, f"{collection}.metadata.json")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("indexes", [])
+    if os.path.exists(path + ".gz"):
+        with gzip.open(path + ".gz", "rt", encoding="utf-8") as f:
+            return json.load(f).get("indexes", [])
+    return None
+
+
+def key_fields(index: Dict[str, Any]) -> List[Tuple[str, int]]:
+    key = index["key"]
+    if isinstance(key, list):
+        key = dict(key)
+    return [(field, int(direction) if isinstance(direction, (int, float)) else 0) for field, direction in key.items()]
+
+
+def match_index(shape: Dict[str, Any], keys: List[Tuple[str, int]]) -> Dict[str, Any]:
+    """How far an index bounds a query shape: equality fields first, then the
+    sort, then ranges (the equality-sort-range rule)"""
+    eq, ranges = set(shape["eq"]), set(shape["range"])
+    bound = set()
+    position = 0
+    while position < len(keys) and keys[position][0] in eq:
+        bound.add(keys[position][0])
+        position += 1
+
+    # Sorting on a field pinned by equality costs nothing
+    sort = [(field, direction) for field, direction in shape["sort"] if field not in bound]
+    window = keys[position:position + len(sort)]
+    sorted_by_index = not sort or (
+        len(window) == len(sort)
+        and all(k[0] == s[0] for k, s in zip(window, sort))
+        and len({k[1] * s[1] for k, s in zip(window, sort)}) == 1
+    )
+    if sort and sorted_by_index:
+        bound.update(field for field, _ in sort if field in ranges or field in eq)
+        position += len(sort)
+
+    while position < len(keys) and keys[position][0] in ranges:
+        bound.add(keys[position][0])
+        position += 1
+
+    return {
+        "bound": sorted(bound),
+        "unbound": sorted((eq | ranges) - bound),
+        "sortedByIndex": sorted_by_index,
+        "usable": bool(bound) or (bool(shape["sort"]) and sorted_by_index),
+    }
+
+
+def index_coverage(db_dir: str, collections: List[str]) -> Dict[str, Any]:
+    shapes = []
+    used = {}
+    for shape in QUERY_SHAPES:
+        indexes = read_indexes(db_dir, shape["collection"])
+        row = {key: shape[key] for key in ("collection", "source", "eq", "range")}
+        row["sort"] = [{field: direction} for field, direction in shape["sort"]]
+        if indexes is None:
+            row.update({"status": "not in backup", "index": None})
+            shapes.append(row)
+            continue
+        if not any(index["name"] == "_id_" for index in indexes):
+            indexes = [{"key": {"_id": 1}, "name": "_id_"}] + indexes
+
+        best = None
+        for index in indexes:
+            match = match_index(shape, key_fields(index))
+            if not match["usable"]:
+                continue
+            rank = (len(match["bound"]), match["sortedByIndex"], -len(index["key"]))
+            if best is None or rank > best[0]:
+                best = (rank, index, match)
+
+        if best is None:
+            row.update({"status": "collection scan", "index": None, "unbound": shape["eq"] + shape["range"],
+                        "sortedByIndex": not shape["sort"]})
+        else:
+            _, index, match = best
+            used.setdefault(shape["collection"], set()).add(index["name"])
+            if not match["unbound"] and match["sortedByIndex"]:
+                status = "indexed"
+            elif not match["bound"]:
+                status = "full index scan"
+            else:
+                status = "partial"
+            row.update({"status": status, "index": index["name"], "unbound": match["unbound"],
+                        "sortedByIndex": match["sortedByIndex"]})
+        shapes.append(row)
+
+    unused = {}
+    for collection in collections:
+        indexes = read_indexes(db_dir, collection) or []
+        names = [index["name"] for index in indexes
+                 if index["name"] != "_id_" and index["name"] not in used.get(collection, set())]
+        if names:
+            unused[collection] = names
+    return {"shapes": shapes, "unusedIndexes": unused}
+
+
+def collection_names(db_dir: str) -> List[str]:
+    names = set()
+    for name in os.listdir(db_dir):
+        for suffix in (".bson", ".bson.gz"):
+            if name.endswith(suffix) and not name.endswith(".metadata.json" + suffix):
+                names.add(name[: -len(suffix)])
+    return sorted(names)
+
+
+def build_report(db_dir: str, top: int) -> Dict[str, Any]:
+    collections = collection_names(db_dir)
+    report = {
+        "generatedAt": datetime.datetime.now().isoformat(sep=" "),
+        "backup": str(Path(db_dir).resolve()),
+        "collections": {},
+    }
+    for collection in collections:
+        print(f"Profiling {collection}...", file=sys.stderr)
+        report["collections"][collection] = profile_collection(db_dir, collection, top)
+    report["indexCoverage"] = index_coverage(db_dir, collections)
+    return report
+
+
+def format_bytes(value: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+def render_markdown(report: Dict[str, Any]) -> str:
+    """Render a report in the style of STATISTICS.md"""
+    lines = [
+        "# Backup Profile",
+        f"Generated on {report['generatedAt']}",
+        f"Backup: {report['backup']}",
+        "",
+        "## Document Sizes",
+        "",
+        "| Collection | Documents | Total | Mean | p50 | p90 | p99 | Max |",
+        "|---|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    for collection, data in report["collections"].items():
+        s = data["sizes"]
+        lines.append(
+            f"| {collection} | {s['count']} | {format_bytes(s['total'])} | {format_bytes(s['mean'])} | "
+            f"{format_bytes(s['p50'])} | {format_bytes(s['p90'])} | {format_bytes(s['p99'])} | {format_bytes(s['max'])} |"
+        )
+
+    for collection in ("questions", "lectures"):
+        data = report["collections"].get(collection)
+        if not data:
+            continue
+        lines += ["", f"## {collection.capitalize()} Array Lengths", "",
+                  "| Field | Mean | p50 | p90 | p99 | Max |", "|---|---:|---:|---:|---:|---:|"]
+        for field, dist in data["arrays"].items():
+            lines.append(f"| {field} | {dist['mean']} | {dist['p50']} | {dist['p90']} | {dist['p99']} | {dist['max']} |")
+        for field, items in data["top"].items():
+            items = [item for item in items if item["value"] > 0]
+            if items:
+                lines += ["", f"### Largest {field}"]
+                lines += [f"- {item['_id']}: {item['value']}" for item in items]
+        lines += ["", f"### Largest {collection} documents"]
+        lines += [f"- {item['_id']}: {format_bytes(item['value'])}" for item in data["largest"]]
+
+    coverage = report["indexCoverage"]
+    lines += ["", "## Index Coverage", "",
+              "| Collection | Query | Filter | Sort | Index | Status | Unbound fields | Sorted by index |",
+              "|---|---|---|---|---|---|---|---|"]
+    for row in coverage["shapes"]:
+        filter_text = ", ".join(row["eq"] + [f"{field} (range)" for field in row["range"]]) or "-"
+        sort_text = ", ".join(f"{field} {direction}" for item in row["sort"] for field, direction in item.items()) or "-"
+        lines.append(
+            f"| {row['collection']} | {row['source']} | {filter_text} | {sort_text} | {row.get('index') or '-'} | "
+            f"{row['status']} | {', '.join(row.get('unbound', [])) or '-'} | "
+            f"{'yes' if row.get('sortedByIndex') else 'no'} |"
+        )
+    lines += ["", "## Indexes Not Used by Any Query Shape"]
+    if coverage["unusedIndexes"]:
+        for collection, names in coverage["unusedIndexes"].items():
+            lines.append(f"- {collection}: {', '.join(names)}")
+    else:
+        lines.append("- None")
+    return "\n".join(lines) + "\n"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Profile a mongodump backup offline")
+    parser.add_argument("backup", help="Backup directory, or its name under backups/")
+    parser.add_argument("--top", type=int, default=10, help="Documents listed per ranking")
+    parser.add_argument("--out-dir", help="Report directory (default: load-reports/)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    db_dir = find_db_dir(args.backup)
+    report = build_report(db_dir, args.top)
+
+    directory = Path(args.out_dir) if args.out_dir else REPORTS_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    backup_dir = Path(db_dir).resolve()
+    if backup_dir.name == MONGO_DB:
+        backup_dir = backup_dir.parent
+    name = f"backup-profile-{backup_dir.name}"
+    json_path = directory / f"{name}.json"
+    md_path = directory / f"{name}.md"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(render_markdown(report))
+    print(f"Report written to {json_path} and {md_path}")
+
+
+if __name__ == "__main__":
+    main()
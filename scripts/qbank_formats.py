@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""Question bank export formats (CSV, JSONL, QTI 1.2, Moodle GIFT).
+
+Mirrors src/utils/exporters.js byte for byte, so an offline export from a
+backup matches GET /api/questions/export. Each format renders one question
+({_id, question, answers, createdAt}) at a time, plus a header and footer.
+"""
+
+import re
+import json
+import datetime
+from typing import Any, Dict, Iterable, Iterator, List
+
+LETTERS = ["A", "B", "C", "D"]
+
+# Characters XML 1.0 does not allow, even escaped
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_CSV_QUOTE = re.compile(r'[",\r\n]')
+_GIFT_SPECIAL = re.compile(r"[\\~=#{}:]")
+_NEWLINE = re.compile(r"\r?\n")
+
+
+def escape_xml(text: Any) -> str:
+    return (
+        _XML_INVALID.sub("", str(text))
+        .replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
+        .replace("'", "&apos;")
+    )
+
+
+def csv_field(value: Any) -> str:
+    text = str(value)
+    return '"' + text.replace('"', '""') + '"' if _CSV_QUOTE.search(text) else text
+
+
+def iso_date(value: Any) -> str:
+    """Date.prototype.toISOString format"""
+    if not isinstance(value, datetime.datetime):
+        return ""
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc)
+    return value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}Z"
+
+
+def correct_letters(question: Dict[str, Any]) -> List[str]:
+    return [LETTERS[i] for i, answer in enumerate(question["answers"]) if answer.get("isCorrect")]
+
+
+class Csv:
+    extension = "csv"
+
+    @staticmethod
+    def header() -> str:
+        return "id,question,answer_a,answer_b,answer_c,answer_d,correct,created_at\r\n"
+
+    @staticmethod
+    def item(question: Dict[str, Any]) -> str:
+        answers = question["answers"]
+        fields = [
+            str(question["_id"]),
+            question["question"],
+            *[answers[i].get("text", "") if i < len(answers) else "" for i in range(len(LETTERS))],
+            ";".join(correct_letters(question)),
+            iso_date(question.get("createdAt")),
+        ]
+        return ",".join(csv_field(field) for field in fields) + "\r\n"
+
+    @staticmethod
+    def footer() -> str:
+        return ""
+
+
+class Jsonl:
+    extension = "jsonl"
+
+    @staticmethod
+    def header() -> str:
+        return ""
+
+    @staticmethod
+    def item(question: Dict[str, Any]) -> str:
+        return json.dumps({
+            "_id": str(question["_id"]),
+            "question": question["question"],
+            "answers": [
+                {"text": answer.get("text"), "isCorrect": bool(answer.get("isCorrect"))}
+                for answer in question["answers"]
+            ],
+            "createdAt": iso_date(question.get("createdAt")),
+        }, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    @staticmethod
+    def footer() -> str:
+        return ""
+
+
+class Qti:
+    """IMS QTI 1.2 single-file item bank; several correct answers make an
+    all-or-nothing multiple-response item"""
+
+    extension = "xml"
+
+    @staticmethod
+    def header() -> str:
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<questestinterop xmlns="http://www.imsglobal.org/xsd/ims_qtiasiv1p2">\n'
+        )
+
+    @staticmethod
+    def item(question: Dict[str, Any]) -> str:
+        correct = set(correct_letters(question))
+        multiple = len(correct) > 1
+
+        def material(text):
+            return f'<material><mattext texttype="text/plain">{escape_xml(text)}</mattext></material>'
+
+        labels = "".join(
+            f'          <response_label ident="{LETTERS[i]}">{material(answer.get("text", ""))}</response_label>\n'
+            for i, answer in enumerate(question["answers"])
+        )
+        conditions = ""
+        for i in range(len(question["answers"])):
+            if LETTERS[i] in correct:
+                conditions += f'<varequal respident="response1">{LETTERS[i]}</varequal>'
+            elif multiple:
+                conditions += f'<not><varequal respident="response1">{LETTERS[i]}</varequal></not>'
+        if multiple:
+            conditions = f"<and>{conditions}</and>"
+
+        question_id = str(question["_id"])
+        return (
+            f'  <item ident="q{question_id}" title="Question {question_id}">\n'
+            "    <presentation>\n"
+            f"      {material(question['question'])}\n"
+            f'      <response_lid ident="response1" rcardinality="{"Multiple" if multiple else "Single"}">\n'
+            '        <render_choice shuffle="No">\n'
+            + labels +
+            "        </render_choice>\n"
+            "      </response_lid>\n"
+            "    </presentation>\n"
+            "    <resprocessing>\n"
+            '      <outcomes><decvar varname="SCORE" vartype="Decimal" minvalue="0" maxvalue="100"/></outcomes>\n'
+            '      <respcondition continue="No">\n'
+            f"        <conditionvar>{conditions}</conditionvar>\n"
+            '        <setvar action="Set" varname="SCORE">100</setvar>\n'
+            "      </respcondition>\n"
+            "    </resprocessing>\n"
+            "  </item>\n"
+        )
+
+    @staticmethod
+    def footer() -> str:
+        return "</questestinterop>\n"
+
+
+def escape_gift(text: Any) -> str:
+    return _NEWLINE.sub(r"\\n", _GIFT_SPECIAL.sub(lambda m: "\\" + m.group(0), str(text)))
+
+
+class Gift:
+    """Moodle GIFT; with several correct answers each carries an equal share
+    of the credit and wrong answers cost the full mark"""
+
+    extension = "gift"
+
+    @staticmethod
+    def header() -> str:
+        return ""
+
+    @staticmethod
+    def item(question: Dict[str, Any]) -> str:
+        answers = question["answers"]
+        correct = sum(1 for answer in answers if answer.get("isCorrect"))
+        # Number((100 / n).toFixed(5)) printed by JavaScript
+        share = f"{100 / max(correct, 1):.5f}".rstrip("0").rstrip(".")
+        choices = []
+        for answer in answers:
+            text = escape_gift(answer.get("text", ""))
+            if correct <= 1:
+                choices.append(("=" if answer.get("isCorrect") else "~") + text)
+            elif answer.get("isCorrect"):
+                choices.append(f"~%{share}%{text}")
+            else:
+                choices.append(f"~%-100%{text}")
+        question_id = str(question["_id"])
+        return (
+            f"// id: {question_id}\n"
+            f"::Q{question_id}::{escape_gift(question['question'])}{{\n"
+            + "".join(f"\t{choice}\n" for choice in choices)
+            + "}\n\n"
+        )
+
+    @staticmethod
+    def footer() -> str:
+        return ""
+
+
+EXPORT_FORMATS = {"csv": Csv, "jsonl": Jsonl, "qti": Qti, "gift": Gift}
+
+
+def export_chunks(fmt, questions: Iterable[Dict[str, Any]], chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """Text chunks for a whole export, items combined into chunks of about chunk_size characters"""
+    buffer = [fmt.header()]
+    size = len(buffer[0])
+    for question in questions:
+        text = fmt.item(question)
+        buffer.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    buffer.append(fmt.footer())
+    text = "".join(buffer)
+    if text:
+        yield text
@@ -0,0 +1,62 @@
+require("dotenv").config();
+const mongoose = require("mongoose");
+const User = require("../src/models/User");
+const Lecture = require("../src/models/Lecture");
+const Question = require("../src/models/Question");
+const ScoreEvent = require("../src/models/ScoreEvent");
+const LectureScore = require("../src/models/LectureScore");
+const { recomputeScores } = require("../src/utils/scoreLedger");
+const { rebuildLectureScores } = require("../src/utils/leaderboard");
+
+// Rebuild leaderboard state after a restore (scripts/restore-db.sh).
+//
+// Usage: node scripts/rebuild-leaderboard.js [--with-scores]
+//
+// Creates any indexes the restored dump is missing (older backups predate the
+// leaderboard indexes) and recomputes the per-lecture leaderboards from the
+// score ledger. --with-scores also rewrites User.score from the ledger first.
+const withScores = process.argv.slice(2).includes("--with-scores");
+
+const connectDB = async () => {
+  const isDocker = process.env.IN_DOCKER === "true";
+  const host = isDocker ? "mongodb" : "localhost";
+  const mongoURI =
+    process.env.MONGO_URI || `mongodb://${host}:27017/mcq-writing-app`;
+
+  console.log(`Connecting to MongoDB at: ${mongoURI}`);
+  await mongoose.connect(mongoURI, {
+    useNewUrlParser: true,
+    useUnifiedTopology: true,
+  });
+};
+
+const run = async () => {
+  let exitCode = 0;
+  try {
+    await connectDB();
+
+    for (const model of [User, Lecture, Question, ScoreEvent, LectureScore]) {
+      await model.createIndexes();
+    }
+    console.log("Indexes verified");
+
+    if (withScores) {
+      const mismatches = await recomputeScores();
+      console.log(`${mismatches.length} user scores rewritten from the ledger`);
+    }
+
+    const started = Date.now();
+    const entries = await rebuildLectureScores();
+    console.log(
+      `Rebuilt ${entries} lecture leaderboard entries in ${Date.now() - started}ms`
+    );
+  } catch (error) {
+    console.error("Error rebuilding leaderboard:", error);
+    exitCode = 1;
+  } finally {
+    await mongoose.disconnect();
+    process.exit(exitCode);
+  }
+};
+
+run();
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Rebuild question quality aggregates from a mongodump backup and verify them.
+
+The API keeps gradeStats on every question and answer and suggestionStats on
+every question, and serves /api/questions/:id/analytics and
+/api/lectures/:id/analytics from them. This job recomputes the same figures
+offline from the raw grades and edit suggestions in a backup (embedded arrays
+and, for QUESTION_STORAGE=bucketed, the gradebuckets and suggestionbuckets
+collections), reports every question whose stored aggregates differ, and
+writes the per-lecture analytics in the endpoint's format.
+
+Usage:
+    python3 scripts/recompute-analytics.py backups/backup_20250101_120000
+    python3 scripts/recompute-analytics.py <backup> --out analytics.json
+
+Exits with status 1 if any stored aggregate is missing or wrong; fix them with
+node scripts/migrate-question-storage.js --stats-only.
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from mcq_bson import iter_collection
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BACKUPS_DIR = PROJECT_ROOT / "backups"
+MONGO_DB = "mcq-writing-app"
+STATUSES = ("pending", "accepted", "rejected")
+
+
+class GradeCounter:
+    """Running { count, sum, distribution } for 1-3 scores"""
+
+    __slots__ = ("distribution",)
+
+    def __init__(self):
+        self.distribution = [0, 0, 0]
+
+    def add(self, score: Any):
+        if score in (1, 2, 3):
+            self.distribution[score - 1] += 1
+
+    def merge(self, other: "GradeCounter"):
+        for i, n in enumerate(other.distribution):
+            self.distribution[i] += n
+
+    def stats(self) -> Dict[str, Any]:
+        d = self.distribution
+        return {"count": sum(d), "sum": d[0] + 2 * d[1] + 3 * d[2], "distribution": list(d)}
+
+
+def summarize_grades(stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Same shape as summarizeGrades in src/utils/analytics.js"""
+    stats = stats or {}
+    count = stats.get("count") or 0
+    distribution = list(stats.get("distribution") or []) + [0, 0, 0]
+    return {
+        "count": count,
+        "mean": stats.get("sum", 0) / count if count else None,
+        "histogram": {str(score): distribution[score - 1] or 0 for score in (1, 2, 3)},
+    }
+
+
+def summarize_suggestions(stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Same shape as summarizeSuggestions in src/utils/analytics.js"""
+    stats = stats or {}
+    counts = {key: stats.get(key) or 0 for key in ("count",) + STATUSES}
+    reviewed = counts["accepted"] + counts["rejected"]
+    return {
+        **counts,
+        "acceptRate": counts["accepted"] / reviewed if reviewed else None,
+        "rejectRate": counts["rejected"] / reviewed if reviewed else None,
+    }
+
+
+def find_db_dir(backup: str) -> str:
+    """Accept a backup directory, its database subdirectory, or a name under backups/"""
+    candidates = [Path(backup), BACKUPS_DIR / backup]
+    for candidate in candidates:
+        for db_dir in (candidate / MONGO_DB, candidate):
+            if (db_dir / "questions.bson").exists() or (db_dir / "questions.bson.gz").exists():
+                return str(db_dir)
+    raise SystemExit(f"No {MONGO_DB}/questions.bson found in {backup}")
+
+
+def load_buckets(db_dir: str):
+    """Fold bucketed grades and suggestions into per-question counters"""
+    grades: Dict[Any, Dict[Any, GradeCounter]] = {}
+    for bucket in iter_collection(db_dir, "gradebuckets"):
+        per_target = grades.setdefault(bucket["question"], {})
+        for grade in bucket.get("grades", []):
+            per_target.setdefault(grade.get("answer"), GradeCounter()).add(grade.get("score"))
+
+    suggestions: Dict[Any, List[str]] = {}
+    for bucket in iter_collection(db_dir, "suggestionbuckets"):
+        statuses = suggestions.setdefault(bucket["question"], [])
+        statuses.extend(s.get("status", "pending") for s in bucket.get("suggestions", []))
+    return grades, suggestions
+
+
+def expected_aggregates(question: Dict[str, Any], bucket_grades, bucket_suggestions) -> Dict[str, Any]:
+    """Recompute gradeStats, answers[].gradeStats and suggestionStats from raw data"""
+    buckets = bucket_grades.get(question["_id"], {})
+
+    own = GradeCounter()
+    for grade in question.get("grades", []):
+        own.add(grade.get("questionScore"))
+    if None in buckets:
+        own.merge(buckets[None])
+
+    answers = []
+    for answer in question.get("answers", []):
+        counter = GradeCounter()
+        for grade in answer.get("grades", []):
+            counter.add(grade.get("score"))
+        if answer.get("_id") in buckets:
+            counter.merge(buckets[answer["_id"]])
+        answers.append(counter.stats())
+
+    statuses = [s.get("status", "pending") for s in question.get("editSuggestions", [])]
+    statuses += bucket_suggestions.get(question["_id"], [])
+    suggestion_stats = {"count": len(statuses)}
+    suggestion_stats.update({status: statuses.count(status) for status in STATUSES})
+
+    return {"gradeStats": own.stats(), "answers": answers, "suggestionStats": suggestion_stats}
+
+
+def stored_aggregates(question: Dict[str, Any]) -> Dict[str, Any]:
+    def grade_stats(stats):
+        if not stats:
+            return None
+        return {
+            "count": stats.get("count", 0),
+            "sum": stats.get("sum", 0),
+            "distribution": list(stats.get("distribution", [])),
+        }
+
+    suggestion_stats = question.get("suggestionStats")
+    return {
+        "gradeStats": grade_stats(question.get("gradeStats")),
+        "answers": [grade_stats(answer.get("gradeStats")) for answer in question.get("answers", [])],
+        "suggestionStats": (
+            {key: suggestion_stats.get(key, 0) for key in ("count",) + STATUSES}
+            if suggestion_stats else None
+        ),
+    }
+
+
+def question_summary(question: Dict[str, Any], aggregates: Dict[str, Any]) -> Dict[str, Any]:
+    """Same shape as one perQuestion entry of the lecture analytics endpoint"""
+    return {
+        "_id": str(question["_id"]),
+        "question": question.get("question"),
+        "isFinal": question.get("isFinal", False),
+        "grades": summarize_grades(aggregates["gradeStats"]),
+        "answers": [
+            {
+                "_id": str(answer["_id"]),
+                "isCorrect": answer.get("isCorrect"),
+                "grades": summarize_grades(stats),
+            }
+            for answer, stats in zip(question.get("answers", []), aggregates["answers"])
+        ],
+        "suggestions": summarize_suggestions(aggregates["suggestionStats"]),
+    }
+
+
+class LectureTotals:
+    def __init__(self, lecture_id: Any):
+        self.lecture = lecture_id
+        self.questions = 0
+        self.finalized = 0
+        self.graded = 0
+        self.grades = GradeCounter()
+        self.answer_grades = GradeCounter()
+        self.suggestions = {key: 0 for key in ("count",) + STATUSES}
+        self.per_question: List[Dict[str, Any]] = []
+
+    def add(self, question: Dict[str, Any], aggregates: Dict[str, Any], keep_question: bool):
+        self.questions += 1
+        self.finalized += 1 if question.get("isFinal") else 0
+        self.graded += 1 if aggregates["gradeStats"]["count"] else 0
+        for i, n in enumerate(aggregates["gradeStats"]["distribution"]):
+            self.grades.distribution[i] += n
+        for stats in aggregates["answers"]:
+            for i, n in enumerate(stats["distribution"]):
+                self.answer_grades.distribution[i] += n
+        for key in self.suggestions:
+            self.suggestions[key] += aggregates["suggestionStats"][key]
+        if keep_question:
+            self.per_question.append(question_summary(question, aggregates))
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "lecture": str(self.lecture),
+            "questions": self.questions,
+            "finalized": self.finalized,
+            "graded": self.graded,
+            "grades": summarize_grades(self.grades.stats()),
+            "answerGrades": summarize_grades(self.answer_grades.stats()),
+            "suggestions": summarize_suggestions(self.suggestions),
+        }
+        if self.per_question:
+            result["perQuestion"] = sorted(self.per_question, key=lambda q: q["_id"])
+        return result
+
+
+def recompute(db_dir: str, per_question: bool = False, max_mismatches: int = 50) -> Dict[str, Any]:
+    bucket_grades, bucket_suggestions = load_buckets(db_dir)
+
+    lectures: Dict[Any, LectureTotals] = {}
+    lectures_by_question: Dict[Any, List[LectureTotals]] = {}
+    for lecture in iter_collection(db_dir, "lectures"):
+        totals = lectures[lecture["_id"]] = LectureTotals(lecture["_id"])
+        for question_id in set(lecture.get("questions", [])):
+            lectures_by_question.setdefault(question_id, []).append(totals)
+
+    checked = 0
+    mismatched = 0
+    missing = 0
+    examples: List[Dict[str, Any]] = []
+    for question in iter_collection(db_dir, "questions"):
+        checked += 1
+        expected = expected_aggregates(question, bucket_grades, bucket_suggestions)
+        stored = stored_aggregates(question)
+        if stored != expected:
+            if stored["gradeStats"] is None or stored["suggestionStats"] is None:
+                missing += 1
+            else:
+                mismatched += 1
+            if len(examples) < max_mismatches:
+                examples.append({"question": str(question["_id"]), "stored": stored, "expected": expected})
+        for totals in lectures_by_question.get(question["_id"], []):
+            totals.add(question, expected, per_question)
+
+    return {
+        "backup": db_dir,
+        "questions": checked,
+        "missing": missing,
+        "mismatched": mismatched,
+        "examples": examples,
+        "lectures": [totals.to_dict() for totals in lectures.values()],
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Recompute and verify question analytics from a backup")
+    parser.add_argument("backup", help="Backup directory, or its name under backups/")
+    parser.add_argument("--out", help="Write the report (lecture analytics and mismatches) as JSON")
+    parser.add_argument("--questions", action="store_true",
+                        help="Include per-question figures in the lecture analytics")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    db_dir = find_db_dir(args.backup)
+    report = recompute(db_dir, per_question=args.questions)
+
+    print(f"Backup: {db_dir}")
+    print(f"Questions checked: {report['questions']}")
+    print(f"Aggregates missing: {report['missing']}")
+    print(f"Aggregates wrong: {report['mismatched']}")
+    for example in report["examples"][:5]:
+        print(f"  {example['question']}: stored {json.dumps(example['stored'])}")
+        print(f"  {' ' * len(example['question'])}  expected {json.dumps(example['expected'])}")
+
+    print(f"\n{'lecture':<26} {'questions':>9} {'graded':>7} {'mean':>6} {'accept':>7}")
+    for lecture in report["lectures"]:
+        mean = lecture["grades"]["mean"]
+        rate = lecture["suggestions"]["acceptRate"]
+        print(
+            f"{lecture['lecture']:<26} {lecture['questions']:>9} {lecture['graded']:>7} "
+            f"{'-' if mean is None else f'{mean:.2f}':>6} {'-' if rate is None else f'{rate:.0%}':>7}"
+        )
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.out}")
+
+    if report["missing"] or report["mismatched"]:
+        print("\nRun node scripts/migrate-question-storage.js --stats-only to rebuild them.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+require("dotenv").config();
+const mongoose = require("mongoose");
+const { recomputeScores, seedBaseline } = require("../src/utils/scoreLedger");
+
+// Rebuild User.score from the score ledger (scoreevents collection).
+//
+// Usage: node scripts/recompute-scores.js [--dry-run] [--seed-baseline]
+//
+//   --dry-run        Report mismatches without writing anything
+//   --seed-baseline  First record each user's unledgered score as a baseline
+//                    event; run once on data created before the ledger existed
+const args = process.argv.slice(2);
+const dryRun = args.includes("--dry-run");
+const baseline = args.includes("--seed-baseline");
+
+const connectDB = async () => {
+  const isDocker = process.env.IN_DOCKER === "true";
+  const host = isDocker ? "mongodb" : "localhost";
+  const mongoURI =
+    process.env.MONGO_URI || `mongodb://${host}:27017/mcq-writing-app`;
+
+  console.log(`Connecting to MongoDB at: ${mongoURI}`);
+  await mongoose.connect(mongoURI, {
+    useNewUrlParser: true,
+    useUnifiedTopology: true,
+  });
+};
+
+const run = async () => {
+  let exitCode = 0;
+  try {
+    await connectDB();
+
+    if (baseline) {
+      const seeded = await seedBaseline({ dryRun });
+      console.log(
+        `${dryRun ? "Would seed" : "Seeded"} ${seeded} baseline events`
+      );
+    }
+
+    const mismatches = await recomputeScores({ dryRun });
+    for (const { user, stored, ledger } of mismatches.slice(0, 20)) {
+      console.log(`  ${user}: stored ${stored}, ledger ${ledger}`);
+    }
+    if (mismatches.length > 20) {
+      console.log(`  ... and ${mismatches.length - 20} more`);
+    }
+    console.log(
+      `${mismatches.length} user scores ${
+        dryRun ? "differ from" : "rewritten from"
+      } the ledger`
+    );
+  } catch (error) {
+    console.error("Error recomputing scores:", error);
+    exitCode = 1;
+  } finally {
+    await mongoose.disconnect();
+    process.exit(exitCode);
+  }
+};
+
+run();
@@ -5,7 +5,7 @@ set -e
 
 # Default values
 WORKSPACE_DIR="/workspaces/QuestionWritingWebApp"
-BACKUPS_DIR="$WORKSPACE_DIR/backups"
+BACKUPS_DIR="${BACKUPS_DIR:-$WORKSPACE_DIR/backups}"
 
 # Function to display usage information
 show_usage() {
@@ -15,6 +15,7 @@ show_usage() {
     echo "Environment variables:"
     echo "  MONGODB_URI  Override the MongoDB connection URI"
     echo "  MONGODB_HOST Override the MongoDB host (default: localhost)"
+    echo "  BACKUPS_DIR  Override the backups directory (default: $WORKSPACE_DIR/backups)"
     echo ""
     echo "Available backups:"
     if [ -d "$BACKUPS_DIR" ]; then
@@ -76,6 +77,19 @@ else
     fi
 fi
 
+# Incremental backups only hold changed documents; restoring one with --drop would lose the rest
+if [ -f "$BACKUP_DIR/backup_info.json" ] && grep -q '"type": *"incremental"' "$BACKUP_DIR/backup_info.json"; then
+    echo "Error: $BACKUP_NAME is an incremental backup"
+    echo "Restore it with: python3 scripts/backup.py restore $BACKUP_NAME"
+    exit 1
+fi
+
+# Backups made by scripts/backup.py are gzip-compressed
+GZIP_FLAG=""
+if ls "$BACKUP_DIR"/mcq-writing-app/*.bson.gz &> /dev/null; then
+    GZIP_FLAG="--gzip"
+fi
+
 # Check if backup has stored URI and warn if different
 if [ -f "$BACKUP_DIR/backup_info.json" ]; then
     BACKUP_URI=$(grep -o '"uri": *"[^"]*"' "$BACKUP_DIR/backup_info.json" | cut -d'"' -f4)
@@ -89,7 +103,7 @@ fi
 
 # Restore the database using mongorestore
 echo "Using MongoDB URI: $MONGO_URI"
-if mongorestore --uri="$MONGO_URI" --drop "$BACKUP_DIR" 2>/dev/null; then
+if mongorestore --uri="$MONGO_URI" --drop $GZIP_FLAG "$BACKUP_DIR" 2>/dev/null; then
     echo "Database restore completed successfully!"
     
     # Show backup info if available
@@ -97,6 +111,8 @@ if mongorestore --uri="$MONGO_URI" --drop "$BACKUP_DIR" 2>/dev/null; then
         echo -e "\nBackup Information:"
         cat "$BACKUP_DIR/backup_info.json"
     fi
+
+    echo -e "\nRun 'node scripts/rebuild-leaderboard.js' to recreate missing indexes and lecture leaderboards."
 else
     echo "Error: Database restore failed"
     exit 1
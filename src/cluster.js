@@ -0,0 +1,104 @@
+const cluster = require("cluster");
+const os = require("os");
+const path = require("path");
+const dotenv = require("dotenv");
+
+// Multi-process entry point: `npm run start:cluster`.
+//
+// The primary forks CLUSTER_WORKERS workers (default: one per CPU; Heroku
+// style WEB_CONCURRENCY is honoured too), each running src/server.js on the
+// shared PORT. Workers that crash are replaced, with a delay that grows when
+// they keep crashing soon after starting. On SIGTERM/SIGINT the primary stops
+// replacing workers, forwards the signal so each one drains its in-flight
+// requests (see shutdown in server.js), and exits once they all have, or
+// kills what is left after SHUTDOWN_TIMEOUT_MS plus a grace period.
+
+dotenv.config();
+
+const cpuCount = () =>
+  os.availableParallelism ? os.availableParallelism() : os.cpus().length;
+
+const WORKERS =
+  parseInt(process.env.CLUSTER_WORKERS || process.env.WEB_CONCURRENCY, 10) ||
+  cpuCount();
+const SHUTDOWN_TIMEOUT_MS = parseInt(
+  process.env.SHUTDOWN_TIMEOUT_MS || "10000",
+  10
+);
+// A worker that exits sooner than this after starting counts as a crash loop
+const MIN_UPTIME_MS = 5000;
+const MAX_RESTART_DELAY_MS = 30000;
+
+// Workers run server.js directly, so this file only ever runs as the primary
+cluster.setupPrimary({ exec: path.join(__dirname, "server.js") });
+
+const startedAt = new Map();
+let restartDelay = 0;
+let listening = 0;
+let stopping = false;
+
+const fork = () => {
+  const worker = cluster.fork();
+  startedAt.set(worker.id, Date.now());
+};
+
+console.log(`Primary ${process.pid} starting ${WORKERS} workers`);
+for (let i = 0; i < WORKERS; i += 1) {
+  fork();
+}
+
+cluster.on("listening", (worker, address) => {
+  listening += 1;
+  if (listening === WORKERS) {
+    console.log(`All ${WORKERS} workers listening on port ${address.port}`);
+  }
+});
+
+cluster.on("exit", (worker, code, signal) => {
+  const uptime = Date.now() - startedAt.get(worker.id);
+  startedAt.delete(worker.id);
+  if (stopping) {
+    if (Object.keys(cluster.workers).length === 0) {
+      console.log("All workers stopped");
+      process.exit(0);
+    }
+    return;
+  }
+  restartDelay =
+    uptime < MIN_UPTIME_MS
+      ? Math.min(Math.max(restartDelay * 2, 1000), MAX_RESTART_DELAY_MS)
+      : 0;
+  console.error(
+    `Worker ${worker.process.pid} exited (${signal || code}); ` +
+      `restarting in ${restartDelay}ms`
+  );
+  setTimeout(() => {
+    if (!stopping) {
+      fork();
+    }
+  }, restartDelay);
+});
+
+const stop = (signal) => {
+  if (stopping) {
+    return;
+  }
+  stopping = true;
+  console.log(`${signal} received: stopping workers`);
+  for (const worker of Object.values(cluster.workers)) {
+    worker.process.kill(signal);
+  }
+  if (Object.keys(cluster.workers).length === 0) {
+    process.exit(0);
+  }
+  setTimeout(() => {
+    console.error("Workers did not stop in time; killing them");
+    for (const worker of Object.values(cluster.workers)) {
+      worker.process.kill("SIGKILL");
+    }
+    process.exit(1);
+  }, SHUTDOWN_TIMEOUT_MS + 5000).unref();
+};
+
+process.on("SIGTERM", () => stop("SIGTERM"));
+process.on("SIGINT", () => stop("SIGINT"));
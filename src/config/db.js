@@ -1,5 +1,39 @@
 const mongoose = require("mongoose");
 
+// Integer option from the environment, or undefined to keep the driver default
+const intFromEnv = (name) => {
+  const value = parseInt(process.env[name], 10);
+  return Number.isNaN(value) ? undefined : value;
+};
+
+// directConnection only makes sense for a single mongodb:// host; SRV and
+// replica set URIs need server discovery. MONGO_DIRECT_CONNECTION overrides.
+const useDirectConnection = (connectionString) => {
+  const setting = process.env.MONGO_DIRECT_CONNECTION;
+  if (setting !== undefined && setting !== "") {
+    return setting === "true";
+  }
+  return (
+    connectionString.startsWith("mongodb://") &&
+    !connectionString.includes(",") &&
+    !/[?&]replicaSet=/.test(connectionString)
+  );
+};
+
+// Each process opens its own pool, so in cluster mode the server sees up to
+// workers x MONGO_MAX_POOL_SIZE connections
+const poolOptions = () => {
+  const options = {
+    maxPoolSize: intFromEnv("MONGO_MAX_POOL_SIZE"),
+    minPoolSize: intFromEnv("MONGO_MIN_POOL_SIZE"),
+    maxIdleTimeMS: intFromEnv("MONGO_MAX_IDLE_TIME_MS"),
+    waitQueueTimeoutMS: intFromEnv("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+  };
+  return Object.fromEntries(
+    Object.entries(options).filter(([, value]) => value !== undefined)
+  );
+};
+
 const connectDB = async () => {
   try {
     // Determine if running in Docker or local environment
@@ -15,9 +49,14 @@ const connectDB = async () => {
     const options = {
       useNewUrlParser: true,
       useUnifiedTopology: true,
-      directConnection: true,
-      serverSelectionTimeoutMS: 5000, // Wait 5 seconds before timing out
-      socketTimeoutMS: 45000, // Close sockets after 45 seconds of inactivity
+      directConnection: useDirectConnection(connectionString),
+      // Wait this long for a usable server before timing out
+      serverSelectionTimeoutMS:
+        intFromEnv("MONGO_SERVER_SELECTION_TIMEOUT_MS") || 5000,
+      // Close sockets after this long without a reply
+      socketTimeoutMS: intFromEnv("MONGO_SOCKET_TIMEOUT_MS") || 45000,
+      monitorCommands: true, // Command timings for /metrics
+      ...poolOptions(),
     };
 
     await mongoose.connect(connectionString, options);
@@ -0,0 +1,81 @@
+const mongoose = require("mongoose");
+const Lecture = require("../models/Lecture");
+const { subscribe } = require("../utils/events");
+
+const MAX_CHANNELS = 100;
+
+const idList = (value) =>
+  value === undefined
+    ? []
+    : [
+        ...new Set(
+          String(value)
+            .split(",")
+            .map((id) => id.trim())
+            .filter(Boolean)
+        ),
+      ];
+
+// @desc    Stream live events for lectures and questions as server-sent events
+// @route   GET /api/events?lectures=<id,...>&questions=<id,...>
+// @access  Private
+const streamEvents = async (req, res) => {
+  try {
+    const lectures = idList(req.query.lectures);
+    const questions = idList(req.query.questions);
+    const ids = [...lectures, ...questions];
+    if (ids.length === 0) {
+      return res
+        .status(400)
+        .json({ message: "Subscribe to at least one lecture or question" });
+    }
+    if (ids.length > MAX_CHANNELS) {
+      return res.status(400).json({
+        message: `At most ${MAX_CHANNELS} lectures and questions per stream`,
+      });
+    }
+    if (ids.some((id) => !mongoose.Types.ObjectId.isValid(id))) {
+      return res
+        .status(400)
+        .json({ message: "Invalid lecture or question id" });
+    }
+
+    // Faculty follow their own lectures, students those they are enrolled
+    // in; admins, like isFaculty routes, may follow any lecture
+    if (lectures.length > 0) {
+      const scope =
+        req.user.role === "admin"
+          ? {}
+          : req.user.role === "faculty"
+          ? { faculty: req.user._id }
+          : { students: req.user._id };
+      const allowed = await Lecture.countDocuments({
+        _id: { $in: lectures },
+        ...scope,
+      });
+      if (allowed !== lectures.length) {
+        return res
+          .status(403)
+          .json({ message: "Not authorized for every lecture requested" });
+      }
+    }
+
+    await subscribe(
+      res,
+      [
+        ...lectures.map((id) => `lecture:${id}`),
+        ...questions.map((id) => `question:${id}`),
+      ],
+      req.get("Last-Event-ID") || req.query.lastEventId
+    );
+  } catch (error) {
+    console.error("Event stream error:", error);
+    if (!res.headersSent) {
+      res.status(500).json({ message: "Error opening event stream" });
+    } else {
+      res.end();
+    }
+  }
+};
+
+module.exports = { streamEvents };
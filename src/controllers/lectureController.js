@@ -1,21 +1,58 @@
 const Lecture = require("../models/Lecture");
 const User = require("../models/User");
+const { adjustLectureQuestions } = require("../utils/leaderboard");
+const { lectureAnalytics } = require("../utils/analytics");
+const { parseRoster, importRoster } = require("../utils/roster");
+const {
+  parseExamOptions,
+  loadCandidates,
+  assembleExams,
+} = require("../utils/exams");
+const { listVersion, sendIfModified, newCursor } = require("../utils/sync");
+const { publish } = require("../utils/events");
+
+// Answer a change to a lecture's questions with the whole lecture as it now
+// is or, with ?return=patch, only the ids added or removed, in the shape of
+// the live event that reports the change (see utils/events.js)
+const sendQuestionsChange = async (req, res, lectureId, change) => {
+  if (req.query.return === "patch") {
+    return res.json({
+      type: "lecture-questions",
+      lecture: lectureId,
+      ...change,
+    });
+  }
+  res.json(await Lecture.findById(lectureId).lean());
+};
 
 // Get all lectures (filtered by role)
 exports.getLectures = async (req, res) => {
   try {
+    const filter =
+      req.user.role === "faculty"
+        ? { faculty: req.user._id }
+        : { students: req.user._id };
+
+    // Answer 304 if none of the user's lectures changed since their copy
+    const syncCursor = newCursor();
+    const version = await listVersion(Lecture, filter);
+    if (sendIfModified(req, res, version)) {
+      return;
+    }
+    res.set("X-Sync-Cursor", syncCursor);
+
     if (req.user.role === "faculty") {
       // Faculty sees their created lectures
-      const lectures = await Lecture.find({ faculty: req.user._id })
+      const lectures = await Lecture.find(filter)
         .populate("faculty", "name email")
-        .populate("students", "name email");
+        .populate("students", "name email")
+        .lean();
       res.json(lectures);
     } else {
       // Students see lectures they're assigned to
-      const lectures = await Lecture.find({ students: req.user._id }).populate(
-        "faculty",
-        "name email"
-      );
+      const lectures = await Lecture.find(filter)
+        .populate("faculty", "name email")
+        .lean();
       res.json(lectures);
     }
   } catch (error) {
@@ -108,34 +145,32 @@ exports.addStudents = async (req, res) => {
       return res.status(403).json({ message: "Only faculty can add students" });
     }
 
-    let lecture = await Lecture.findOne({
-      _id: req.params.id,
-      faculty: req.user._id,
-    });
-
-    if (!lecture) {
-      return res.status(404).json({ message: "Lecture not found" });
-    }
-
     // Verify all students exist and are students
+    const studentIds = [...new Set(req.body.studentIds.map(String))];
     const students = await User.find({
-      _id: { $in: req.body.studentIds },
+      _id: { $in: studentIds },
       role: "student",
-    });
+    })
+      .select("_id")
+      .lean();
 
-    if (students.length !== req.body.studentIds.length) {
+    if (students.length !== studentIds.length) {
       return res.status(400).json({ message: "Invalid student IDs provided" });
     }
 
-    // Add new students (avoid duplicates)
-    const newStudentIds = students.map((s) => s._id);
-    lecture.students = [...new Set([...lecture.students, ...newStudentIds])];
-    await lecture.save();
-
-    // Populate the students before returning
-    lecture = await Lecture.findById(lecture._id)
+    // $addToSet skips students already enrolled, atomically
+    const lecture = await Lecture.findOneAndUpdate(
+      { _id: req.params.id, faculty: req.user._id },
+      { $addToSet: { students: { $each: students.map((s) => s._id) } } },
+      { new: true }
+    )
       .populate("faculty", "name email")
-      .populate("students", "name email");
+      .populate("students", "name email")
+      .lean();
+
+    if (!lecture) {
+      return res.status(404).json({ message: "Lecture not found" });
+    }
 
     res.json(lecture);
   } catch (error) {
@@ -152,63 +187,226 @@ exports.removeStudents = async (req, res) => {
         .json({ message: "Only faculty can remove students" });
     }
 
-    let lecture = await Lecture.findOne({
-      _id: req.params.id,
-      faculty: req.user._id,
-    });
+    const lecture = await Lecture.findOneAndUpdate(
+      { _id: req.params.id, faculty: req.user._id },
+      { $pullAll: { students: req.body.studentIds } },
+      { new: true }
+    )
+      .populate("faculty", "name email")
+      .populate("students", "name email")
+      .lean();
 
     if (!lecture) {
       return res.status(404).json({ message: "Lecture not found" });
     }
 
-    lecture.students = lecture.students.filter(
-      (id) => !req.body.studentIds.includes(id.toString())
-    );
-
-    await lecture.save();
-
-    // Populate the students before returning
-    lecture = await Lecture.findById(lecture._id)
-      .populate("faculty", "name email")
-      .populate("students", "name email");
-
     res.json(lecture);
   } catch (error) {
     res.status(400).json({ message: error.message });
   }
 };
 
-// Add questions to a lecture
-exports.addQuestions = async (req, res) => {
+// Import a roster (CSV, or JSON rows with email, name and optional password)
+// into a lecture: missing student accounts are created, inactive ones are
+// activated, and all of them are enrolled. ?mode=replace also removes
+// enrolled students who are not on the roster, ?resetLinks=true returns a
+// password reset link for accounts without a password, and ?dryRun=true only
+// reports what would change. Progress is streamed as NDJSON, one line per
+// batch, followed by a summary line with the per-row errors.
+exports.importRoster = async (req, res) => {
   try {
     if (req.user.role !== "faculty") {
       return res
         .status(403)
-        .json({ message: "Only faculty can add questions" });
+        .json({ message: "Only faculty can import rosters" });
     }
 
-    const lecture = await Lecture.findOne({
+    const mode = req.query.mode || "add";
+    if (!["add", "replace"].includes(mode)) {
+      return res.status(400).json({ message: "mode must be add or replace" });
+    }
+
+    const lecture = await Lecture.exists({
       _id: req.params.id,
       faculty: req.user._id,
     });
+    if (!lecture) {
+      return res.status(404).json({ message: "Lecture not found" });
+    }
+
+    let rows;
+    try {
+      rows = parseRoster(req.body);
+    } catch (error) {
+      return res.status(400).json({ message: error.message });
+    }
+    if (rows.length === 0) {
+      return res.status(400).json({ message: "The roster is empty" });
+    }
+
+    res.status(200);
+    res.set("Content-Type", "application/x-ndjson; charset=utf-8");
+    res.set("Cache-Control", "no-cache");
+    const summary = await importRoster(req.params.id, rows, {
+      mode,
+      resetLinks: req.query.resetLinks === "true",
+      dryRun: req.query.dryRun === "true",
+      onProgress: (progress) => {
+        const line = JSON.stringify({ type: "progress", ...progress }) + "\n";
+        const written = res.write(line);
+        // Past the compressor, so each batch is reported as it finishes
+        if (res.flush) {
+          res.flush();
+        }
+        // Hold the next batch until a slow reader has caught up
+        if (!written) {
+          return new Promise((resolve) => res.once("drain", resolve));
+        }
+      },
+    });
+    res.end(JSON.stringify({ type: "summary", ...summary }) + "\n");
+  } catch (error) {
+    console.error("Roster import error:", error);
+    if (!res.headersSent) {
+      res.status(500).json({ message: error.message });
+    } else {
+      // Batches already written stay written; tell the client where it stopped
+      res.end(JSON.stringify({ type: "error", message: error.message }) + "\n");
+    }
+  }
+};
+
+// Assemble personalised practice exams from the lecture's finalized
+// questions, one per enrolled student (or per student in body.students).
+// Each exam has body.count questions drawn by a seeded weighted sample,
+// subject to minScore/minGrades quality thresholds, at most maxPerOwner
+// questions per author and no questions the student was given in the last
+// recentDays (see utils/exams.js). Exams are streamed as NDJSON, one line
+// per student with the exam rendered in body.format, followed by a summary
+// line; dryRun: true leaves the students' exam history untouched.
+exports.assembleExams = async (req, res) => {
+  try {
+    if (req.user.role !== "faculty") {
+      return res
+        .status(403)
+        .json({ message: "Only faculty can assemble exams" });
+    }
 
+    let options;
+    try {
+      options = parseExamOptions(req.body);
+    } catch (error) {
+      return res.status(400).json({ message: error.message });
+    }
+
+    const lecture = await Lecture.findOne({
+      _id: req.params.id,
+      faculty: req.user._id,
+    })
+      .select("students questions")
+      .lean();
     if (!lecture) {
       return res.status(404).json({ message: "Lecture not found" });
     }
 
-    // Add new questions (avoid duplicates)
-    lecture.questions = [
-      ...new Set([...lecture.questions, ...req.body.questionIds]),
-    ];
+    const enrolled = lecture.students.map(String);
+    let students = enrolled;
+    if (options.students) {
+      const enrolledSet = new Set(enrolled);
+      const outside = options.students.filter((id) => !enrolledSet.has(id));
+      if (outside.length > 0) {
+        return res.status(400).json({
+          message: `Not enrolled in this lecture: ${outside.join(", ")}`,
+        });
+      }
+      students = options.students;
+    }
+    if (students.length === 0) {
+      return res.status(400).json({ message: "The lecture has no students" });
+    }
 
-    await lecture.save();
-    res.json(lecture);
+    const { finalized, candidates } = await loadCandidates(lecture, options);
+    if (candidates.length === 0) {
+      return res.status(400).json({
+        message: `None of the lecture's ${finalized} finalized questions meet the quality thresholds`,
+      });
+    }
+
+    res.status(200);
+    res.set("Content-Type", "application/x-ndjson; charset=utf-8");
+    res.set("Cache-Control", "no-cache");
+    const summary = await assembleExams(
+      lecture,
+      candidates,
+      students,
+      options,
+      (exam) => {
+        const line = JSON.stringify({ type: "exam", ...exam }) + "\n";
+        // Wait for slow readers rather than buffering every exam
+        if (!res.write(line)) {
+          return new Promise((resolve) => res.once("drain", resolve));
+        }
+      }
+    );
+    res.end(
+      JSON.stringify({
+        type: "summary",
+        lecture: lecture._id,
+        seed: options.seed,
+        format: options.formatName,
+        count: options.count,
+        finalized,
+        eligible: candidates.length,
+        dryRun: options.dryRun,
+        ...summary,
+      }) + "\n"
+    );
+  } catch (error) {
+    console.error("Exam assembly error:", error);
+    if (!res.headersSent) {
+      res.status(500).json({ message: error.message });
+    } else {
+      // Exams already written were recorded; tell the client where it stopped
+      res.end(JSON.stringify({ type: "error", message: error.message }) + "\n");
+    }
+  }
+};
+
+// Add questions to a lecture (?return=patch answers with the ids added)
+exports.addQuestions = async (req, res) => {
+  try {
+    if (req.user.role !== "faculty") {
+      return res
+        .status(403)
+        .json({ message: "Only faculty can add questions" });
+    }
+
+    // $addToSet skips questions already there; the lecture as it was before
+    // tells exactly which ones this request added
+    const questionIds = [...new Set(req.body.questionIds.map(String))];
+    const before = await Lecture.findOneAndUpdate(
+      { _id: req.params.id, faculty: req.user._id },
+      { $addToSet: { questions: { $each: questionIds } } }
+    )
+      .select("questions")
+      .lean();
+
+    if (!before) {
+      return res.status(404).json({ message: "Lecture not found" });
+    }
+
+    const existing = new Set(before.questions.map(String));
+    const added = questionIds.filter((id) => !existing.has(id));
+    // Points already earned on the added questions now count for this lecture
+    await adjustLectureQuestions(before._id, added, 1);
+    publish("lecture-questions", { lecture: before._id, data: { added } });
+    await sendQuestionsChange(req, res, before._id, { added });
   } catch (error) {
     res.status(400).json({ message: error.message });
   }
 };
 
-// Remove questions from a lecture
+// Remove questions from a lecture (?return=patch answers with the ids removed)
 exports.removeQuestions = async (req, res) => {
   try {
     if (req.user.role !== "faculty") {
@@ -217,22 +415,48 @@ exports.removeQuestions = async (req, res) => {
         .json({ message: "Only faculty can remove questions" });
     }
 
+    const questionIds = req.body.questionIds.map(String);
+    const before = await Lecture.findOneAndUpdate(
+      { _id: req.params.id, faculty: req.user._id },
+      { $pullAll: { questions: questionIds } }
+    )
+      .select("questions")
+      .lean();
+
+    if (!before) {
+      return res.status(404).json({ message: "Lecture not found" });
+    }
+
+    const removed = [...new Set(before.questions.map(String))].filter((id) =>
+      questionIds.includes(id)
+    );
+    await adjustLectureQuestions(before._id, removed, -1);
+    publish("lecture-questions", { lecture: before._id, data: { removed } });
+    await sendQuestionsChange(req, res, before._id, { removed });
+  } catch (error) {
+    res.status(400).json({ message: error.message });
+  }
+};
+
+// Question quality analytics for a lecture (?questions=true adds per-question figures)
+exports.getLectureAnalytics = async (req, res) => {
+  try {
     const lecture = await Lecture.findOne({
       _id: req.params.id,
       faculty: req.user._id,
-    });
+    })
+      .select("questions")
+      .lean();
 
     if (!lecture) {
       return res.status(404).json({ message: "Lecture not found" });
     }
 
-    lecture.questions = lecture.questions.filter(
-      (id) => !req.body.questionIds.includes(id.toString())
-    );
-
-    await lecture.save();
-    res.json(lecture);
+    const analytics = await lectureAnalytics(lecture, {
+      perQuestion: req.query.questions === "true",
+    });
+    res.json(analytics);
   } catch (error) {
-    res.status(400).json({ message: error.message });
+    res.status(500).json({ message: error.message });
   }
 };
@@ -1,6 +1,77 @@
+const zlib = require("zlib");
+const { Readable } = require("stream");
+const { pipeline } = require("stream/promises");
+const mongoose = require("mongoose");
 const Question = require("../models/Question");
-const User = require("../models/User");
-const ScoringConfig = require("../models/ScoringConfig");
+const Lecture = require("../models/Lecture");
+const Tombstone = require("../models/Tombstone");
+const { recordScoreEvent, recordScoreEvents } = require("../utils/scoreLedger");
+const { getScoringConfig } = require("../utils/scoringConfigCache");
+const { questionAnalytics } = require("../utils/analytics");
+const {
+  EXPORT_FORMATS,
+  EXPORT_FIELDS,
+  exportChunks,
+} = require("../utils/exporters");
+const {
+  DUPLICATE_THRESHOLD,
+  questionSignature,
+  estimateSimilarity,
+} = require("../utils/similarity");
+const {
+  isValidScore,
+  recordGrades,
+  recordSuggestion,
+  updateSuggestion,
+  participants,
+  hydrateQuestions,
+  loadQuestion,
+  loadSuggestion,
+  removeQuestionData,
+} = require("../utils/questionStore");
+const {
+  listVersion,
+  idListScope,
+  sendIfModified,
+  newCursor,
+} = require("../utils/sync");
+const { publish } = require("../utils/events");
+
+const MAX_DUPLICATE_CANDIDATES = 200;
+const MAX_POSSIBLE_DUPLICATES = 5;
+
+// Existing questions sharing an LSH band with the signature whose estimated
+// similarity reaches DUPLICATE_THRESHOLD, most similar first
+const findPossibleDuplicates = async (similarity) => {
+  const candidates = await Question.find({
+    "similarity.bands": { $in: similarity.bands },
+  })
+    .select("similarity.minhash")
+    .limit(MAX_DUPLICATE_CANDIDATES)
+    .lean();
+
+  return candidates
+    .map((candidate) => ({
+      question: candidate._id,
+      similarity: estimateSimilarity(
+        similarity.minhash,
+        candidate.similarity && candidate.similarity.minhash
+      ),
+    }))
+    .filter((match) => match.similarity >= DUPLICATE_THRESHOLD)
+    .sort((a, b) => b.similarity - a.similarity)
+    .slice(0, MAX_POSSIBLE_DUPLICATES);
+};
+
+// Answer a mutation with the whole question as it now is or, with
+// ?return=patch, only what changed, in the shape of the live event that
+// reports the change (see utils/events.js)
+const sendChange = async (req, res, type, questionId, change) => {
+  if (req.query.return === "patch") {
+    return res.json({ type, question: questionId, ...change });
+  }
+  res.json(await loadQuestion(questionId));
+};
 
 // @desc    Create a new MCQ
 // @route   POST /api/questions
@@ -37,6 +108,10 @@ const createQuestion = async (req, res) => {
         .json({ message: "All answer fields must be filled" });
     }
 
+    // Flag likely near-duplicates; the question is created either way
+    const similarity = questionSignature(question.trim(), answers);
+    const possibleDuplicates = await findPossibleDuplicates(similarity);
+
     // Create and populate the question
     const newQuestion = await Question.create({
       owner: req.user._id,
@@ -50,20 +125,27 @@ const createQuestion = async (req, res) => {
       grades: [], // Initialize empty grades array
       facultyComments: [], // Initialize empty comments array
       isFinal: false,
+      similarity,
+      possibleDuplicates,
     });
 
     // Populate owner field before sending response
     await newQuestion.populate("owner", "name");
 
     // Award points for creating a question
-    const config = await ScoringConfig.getConfig(req.user._id);
+    const config = await getScoringConfig();
     if (config) {
-      const user = await User.findById(req.user._id);
-      user.score += config.newQuestionScore;
-      await user.save();
+      await recordScoreEvent(
+        req.user._id,
+        "newQuestion",
+        config.newQuestionScore,
+        newQuestion._id
+      );
     }
 
-    return res.status(201).json(newQuestion);
+    const response = newQuestion.toObject();
+    delete response.similarity;
+    return res.status(201).json(response);
   } catch (error) {
     console.error("Create question error:", error);
     // Handle mongoose validation errors
@@ -80,245 +162,503 @@ const createQuestion = async (req, res) => {
   }
 };
 
-// @desc    Get all questions
-// @route   GET /api/questions
+const NDJSON_TYPE = "application/x-ndjson";
+const MAX_PAGE_SIZE = 500;
+const STREAM_BATCH_SIZE = 200;
+
+// Top-level fields a client may request with ?fields=
+const SELECTABLE_FIELDS = [
+  "owner",
+  "question",
+  "answers",
+  "isFinal",
+  "editSuggestions",
+  "grades",
+  "facultyComments",
+  "possibleDuplicates",
+  "gradeStats",
+  "suggestionStats",
+  "createdAt",
+  "updatedAt",
+];
+
+// ?view=list drops the embedded grading data, which dominates document size
+const LIST_VIEW_EXCLUDE = [
+  "grades",
+  "answers.grades",
+  "facultyComments",
+  "editSuggestions.suggestedAnswers",
+];
+
+const POPULATE_PATHS = [
+  { path: "owner", field: "owner", select: "name" },
+  { path: "editSuggestions.student", field: "editSuggestions", select: "name" },
+  { path: "grades.student", field: "grades", select: "name" },
+  { path: "facultyComments.faculty", field: "facultyComments", select: "name" },
+];
+
+const isObjectId = (value) =>
+  typeof value === "string" && mongoose.Types.ObjectId.isValid(value);
+
+// Translate query string parameters into a filter, projection and page size
+const parseListOptions = async (query) => {
+  const filter = {};
+  let scope = "";
+
+  if (query.owner !== undefined) {
+    if (!isObjectId(query.owner)) {
+      return { error: "Invalid owner id" };
+    }
+    filter.owner = query.owner;
+  }
+
+  if (query.isFinal !== undefined) {
+    if (!["true", "false"].includes(query.isFinal)) {
+      return { error: "isFinal must be true or false" };
+    }
+    filter.isFinal = query.isFinal === "true";
+  }
+
+  if (query.lecture !== undefined) {
+    if (!isObjectId(query.lecture)) {
+      return { error: "Invalid lecture id" };
+    }
+    const lecture = await Lecture.findById(query.lecture)
+      .select("questions")
+      .lean();
+    if (!lecture) {
+      return { error: "Lecture not found" };
+    }
+    filter._id = { $in: lecture.questions };
+    scope = idListScope(lecture.questions);
+  }
+
+  let limit = null;
+  if (query.limit !== undefined) {
+    limit = parseInt(query.limit, 10);
+    if (!Number.isInteger(limit) || limit < 1) {
+      return { error: "limit must be a positive integer" };
+    }
+    limit = Math.min(limit, MAX_PAGE_SIZE);
+  }
+
+  let cursor = null;
+  if (query.cursor !== undefined) {
+    if (!isObjectId(query.cursor)) {
+      return { error: "Invalid cursor" };
+    }
+    cursor = query.cursor;
+  }
+
+  let projection = null;
+  let included = SELECTABLE_FIELDS;
+  if (query.fields !== undefined) {
+    included = String(query.fields)
+      .split(",")
+      .map((field) => field.trim())
+      .filter(Boolean);
+    const unknown = included.filter((f) => !SELECTABLE_FIELDS.includes(f));
+    if (unknown.length > 0) {
+      return { error: `Unknown fields: ${unknown.join(", ")}` };
+    }
+    projection = included.join(" ");
+  } else if (query.view === "list") {
+    projection = LIST_VIEW_EXCLUDE.map((field) => `-${field}`).join(" ");
+    included = SELECTABLE_FIELDS.filter((f) => !LIST_VIEW_EXCLUDE.includes(f));
+  } else if (query.view !== undefined && query.view !== "full") {
+    return { error: "view must be list or full" };
+  }
+
+  const suggestedAnswers = query.view !== "list";
+  return {
+    filter,
+    scope,
+    projection,
+    included,
+    suggestedAnswers,
+    limit,
+    cursor,
+  };
+};
+
+// Fetch one page in _id order; cursor is the _id of the last question seen
+const findQuestionPage = async ({
+  filter,
+  projection,
+  included,
+  suggestedAnswers,
+  limit,
+  cursor,
+}) => {
+  const pageFilter = cursor
+    ? { ...filter, _id: { ...filter._id, $gt: new mongoose.Types.ObjectId(cursor) } }
+    : filter;
+
+  let query = Question.find(pageFilter).sort({ _id: 1 });
+  if (projection) {
+    query = query.select(projection);
+  }
+  if (limit) {
+    // Read one extra document to learn whether another page exists
+    query = query.limit(limit + 1);
+  }
+  for (const { path, field, select } of POPULATE_PATHS) {
+    if (included.includes(field)) {
+      query = query.populate(path, select);
+    }
+  }
+
+  const questions = await query.lean();
+  let nextCursor = null;
+  if (limit && questions.length > limit) {
+    questions.length = limit;
+    nextCursor = String(questions[limit - 1]._id);
+  }
+  await hydrateQuestions(questions, {
+    grades: included.includes("grades"),
+    suggestions: included.includes("editSuggestions"),
+    suggestedAnswers,
+  });
+  return { questions, nextCursor };
+};
+
+// Write matching questions as newline-delimited JSON, one page at a time
+const streamQuestions = async (req, res, options) => {
+  let closed = false;
+  req.on("close", () => {
+    closed = true;
+  });
+
+  res.status(200);
+  res.set("Content-Type", `${NDJSON_TYPE}; charset=utf-8`);
+  res.set("Cache-Control", "no-cache");
+
+  let remaining = options.limit || Infinity;
+  let cursor = options.cursor;
+  while (!closed && remaining > 0) {
+    const pageSize = Math.min(STREAM_BATCH_SIZE, remaining);
+    const { questions, nextCursor } = await findQuestionPage({
+      ...options,
+      limit: pageSize,
+      cursor,
+    });
+    const chunk = questions.map((q) => JSON.stringify(q)).join("\n");
+    if (chunk && !res.write(chunk + "\n")) {
+      await new Promise((resolve) => res.once("drain", resolve));
+    }
+    // Send each page on rather than waiting for the compressor to fill up
+    if (res.flush) {
+      res.flush();
+    }
+    remaining -= questions.length;
+    if (!nextCursor) {
+      break;
+    }
+    cursor = nextCursor;
+  }
+  res.end();
+};
+
+// @desc    Get questions, optionally filtered, projected and paginated
+// @route   GET /api/questions?lecture=&owner=&isFinal=&view=list|full&fields=&limit=&cursor=&format=ndjson
 // @access  Private
 const getQuestions = async (req, res) => {
   try {
-    const questions = await Question.find()
-      .populate("owner", "name")
-      .populate("editSuggestions.student", "name")
-      .populate("grades.student", "name")
-      .populate("facultyComments.faculty", "name");
+    const options = await parseListOptions(req.query);
+    if (options.error) {
+      return res.status(400).json({ message: options.error });
+    }
+
+    // Answer 304 if nothing matching has changed since the client's copy.
+    // Pages skip this: the version counts the whole filter, which would make
+    // every keyset page cost as much as the full list.
+    const syncCursor = newCursor();
+    if (!options.limit && !options.cursor) {
+      const version = await listVersion(
+        Question,
+        options.filter,
+        options.scope
+      );
+      if (sendIfModified(req, res, version)) {
+        return;
+      }
+    }
+    res.set("X-Sync-Cursor", syncCursor);
+
+    const wantsNdjson =
+      req.query.format === "ndjson" ||
+      (!req.query.format && req.accepts(["json", NDJSON_TYPE]) === NDJSON_TYPE);
+    if (wantsNdjson) {
+      return streamQuestions(req, res, options);
+    }
+
+    const { questions, nextCursor } = await findQuestionPage(options);
+    if (nextCursor) {
+      res.set("X-Next-Cursor", nextCursor);
+    }
     res.json(questions);
   } catch (error) {
-    res.status(500).json({ message: "Error fetching questions" });
+    console.error("Fetch questions error:", error);
+    if (!res.headersSent) {
+      res.status(500).json({ message: "Error fetching questions" });
+    } else {
+      // Abort mid-stream so the client sees a truncated response, not a short list
+      res.destroy();
+    }
   }
 };
 
 // @desc    Submit edit suggestion
-// @route   POST /api/questions/:id/suggestions
+// @route   POST /api/questions/:id/suggestions?return=patch
 // @access  Private
 const submitEditSuggestion = async (req, res) => {
   try {
     const { suggestedQuestion, suggestedAnswers } = req.body;
-    const question = await Question.findById(req.params.id);
-
-    if (!question) {
-      return res.status(404).json({ message: "Question not found" });
-    }
-
-    if (question.isFinal) {
-      return res
-        .status(400)
-        .json({ message: "Cannot edit finalized questions" });
-    }
 
     const suggestion = {
+      _id: new mongoose.Types.ObjectId(),
       student: req.user._id,
       suggestedQuestion,
       suggestedAnswers,
     };
 
-    question.editSuggestions.push(suggestion);
-    await question.save();
+    const recorded = await recordSuggestion(req.params.id, suggestion);
+    if (!recorded) {
+      const exists = await Question.exists({ _id: req.params.id });
+      return exists
+        ? res.status(400).json({ message: "Cannot edit finalized questions" })
+        : res.status(404).json({ message: "Question not found" });
+    }
 
     // Award base points for suggestion
-    const config = await ScoringConfig.getConfig(req.user._id);
+    const config = await getScoringConfig();
     if (config) {
-      const user = await User.findById(req.user._id);
-      user.score += config.editSuggestionBaseScore;
-      await user.save();
+      await recordScoreEvent(
+        req.user._id,
+        "editSuggestion",
+        config.editSuggestionBaseScore,
+        req.params.id
+      );
     }
 
-    res.status(201).json(question);
+    const change = await loadSuggestion(req.params.id, suggestion._id);
+    publish("suggestion", { question: req.params.id, data: change });
+    await sendChange(req, res.status(201), "suggestion", req.params.id, change);
   } catch (error) {
     res.status(500).json({ message: "Error submitting suggestion" });
   }
 };
 
 // @desc    Handle suggestion (accept/reject)
-// @route   PUT /api/questions/:id/suggestions/:suggestionId
+// @route   PUT /api/questions/:id/suggestions/:suggestionId?return=patch
 // @access  Private
 const handleSuggestion = async (req, res) => {
   try {
     const { status, rebuttalComment } = req.body;
-    const question = await Question.findById(req.params.id);
-
-    if (!question) {
-      return res.status(404).json({ message: "Question not found" });
+    if (!["accepted", "rejected"].includes(status)) {
+      return res
+        .status(400)
+        .json({ message: "Status must be accepted or rejected" });
     }
 
-    const suggestion = question.editSuggestions.id(req.params.suggestionId);
-    if (!suggestion) {
-      return res.status(404).json({ message: "Suggestion not found" });
-    }
+    // Loaded and authorized by the isOwnerOrFaculty middleware
+    const question = req.question;
 
-    // Check if user is owner or faculty
-    if (
-      req.user.role !== "faculty" &&
-      question.owner.toString() !== req.user._id.toString()
-    ) {
-      return res.status(403).json({ message: "Not authorized" });
+    const student = await updateSuggestion(
+      question,
+      req.params.suggestionId,
+      status,
+      rebuttalComment
+    );
+    if (!student) {
+      return res.status(404).json({ message: "Suggestion not found" });
     }
 
-    suggestion.status = status;
-    suggestion.rebuttalComment = rebuttalComment;
-
     // Update score based on acceptance/rejection
-    const config = await ScoringConfig.getConfig(req.user._id);
+    const config = await getScoringConfig();
     if (config) {
-      const student = await User.findById(suggestion.student);
-      student.score +=
-        status === "accepted"
-          ? config.editAcceptBonus
-          : config.editRejectPenalty;
-      await student.save();
+      const accepted = status === "accepted";
+      await recordScoreEvent(
+        student,
+        accepted ? "editAccepted" : "editRejected",
+        accepted ? config.editAcceptBonus : config.editRejectPenalty,
+        question._id
+      );
     }
 
-    await question.save();
-    res.json(question);
+    const { suggestionStats } = await Question.findById(question._id)
+      .select("suggestionStats")
+      .lean();
+    const change = {
+      suggestion: { _id: req.params.suggestionId, status, rebuttalComment },
+      suggestionStats,
+    };
+    publish("suggestion-status", { question: question._id, data: change });
+    await sendChange(req, res, "suggestion-status", question._id, change);
   } catch (error) {
     res.status(500).json({ message: "Error handling suggestion" });
   }
 };
 
 // @desc    Submit grades for question/answers
-// @route   POST /api/questions/:id/grades
+// @route   POST /api/questions/:id/grades?return=patch
 // @access  Private
 const submitGrades = async (req, res) => {
   try {
-    const { questionScore, answerGrades } = req.body;
-    const question = await Question.findById(req.params.id);
-
-    if (!question) {
-      return res.status(404).json({ message: "Question not found" });
-    }
+    const { questionScore } = req.body;
+    const answerGrades = req.body.answerGrades || [];
 
-    if (question.isFinal) {
-      return res
-        .status(400)
-        .json({ message: "Cannot grade finalized questions" });
+    if (
+      (questionScore && !isValidScore(questionScore)) ||
+      !Array.isArray(answerGrades) ||
+      answerGrades.some(
+        (grade) =>
+          !grade || typeof grade !== "object" || !isValidScore(grade.score)
+      )
+    ) {
+      return res.status(400).json({ message: "Grades must be 1, 2 or 3" });
     }
 
-    // Add question grade
-    if (questionScore) {
-      question.grades.push({
-        student: req.user._id,
-        questionScore,
-      });
+    const recorded = await recordGrades(
+      req.params.id,
+      req.user._id,
+      questionScore,
+      answerGrades
+    );
+    if (!recorded) {
+      const exists = await Question.exists({ _id: req.params.id });
+      return exists
+        ? res.status(400).json({ message: "Cannot grade finalized questions" })
+        : res.status(404).json({ message: "Question not found" });
     }
 
-    // Add answer grades
-    answerGrades.forEach(({ answerId, score }) => {
-      const answer = question.answers.id(answerId);
-      if (answer) {
-        answer.grades.push({
-          student: req.user._id,
-          score,
-        });
-      }
-    });
-
-    await question.save();
-
     // Award points for grading
-    const config = await ScoringConfig.getConfig(req.user._id);
+    const config = await getScoringConfig();
     if (config) {
-      const user = await User.findById(req.user._id);
-      user.score += config.gradingScore;
-      await user.save();
+      await recordScoreEvent(
+        req.user._id,
+        "grading",
+        config.gradingScore,
+        req.params.id
+      );
     }
 
-    res.json(question);
+    // Aggregates rather than the new grades, so applying twice is harmless
+    const { gradeStats, answers } = await Question.findById(req.params.id)
+      .select("gradeStats answers._id answers.gradeStats")
+      .lean();
+    const change = { gradeStats, answers };
+    publish("grades", { question: req.params.id, data: change });
+    await sendChange(req, res, "grades", req.params.id, change);
   } catch (error) {
     res.status(500).json({ message: "Error submitting grades" });
   }
 };
 
 // @desc    Finalize question
-// @route   PUT /api/questions/:id/finalize
+// @route   PUT /api/questions/:id/finalize?return=patch
 // @access  Private/Faculty
 const finalizeQuestion = async (req, res) => {
   try {
-    const question = await Question.findById(req.params.id)
-      .populate("owner")
-      .populate("editSuggestions.student")
-      .populate("grades.student");
-
-    if (!question) {
-      return res.status(404).json({ message: "Question not found" });
-    }
-
-    const config = await ScoringConfig.getConfig(req.user._id);
+    const config = await getScoringConfig();
     if (!config) {
       return res
         .status(500)
         .json({ message: "Scoring configuration not found" });
     }
 
+    // Flip isFinal atomically so concurrent finalize requests award only once
+    const question = await Question.findOneAndUpdate(
+      { _id: req.params.id, isFinal: false },
+      { $set: { isFinal: true } },
+      { new: true }
+    )
+      .select(
+        "owner editSuggestions.student editSuggestions.status " +
+          "editSuggestions.createdAt grades.student"
+      )
+      .lean();
+
+    if (!question) {
+      const exists = await Question.exists({ _id: req.params.id });
+      return exists
+        ? res.status(400).json({ message: "Question is already finalized" })
+        : res.status(404).json({ message: "Question not found" });
+    }
+
+    const { suggesters, graders } = await participants(question);
+
     // 1. Award credits to owner for entering the MCQ
-    question.owner.score += config.newQuestionScore;
-    await question.owner.save();
-
-    // 2. Award/deduct credits for edit suggestions
-    const processedStudents = new Set(); // To handle multiple suggestions from same student
-    for (const suggestion of question.editSuggestions) {
-      if (!processedStudents.has(suggestion.student._id.toString())) {
-        // Base credits for suggesting
-        suggestion.student.score += config.editSuggestionBaseScore;
-
-        // Additional bonus/penalty for acceptance/rejection
-        if (suggestion.status === "accepted") {
-          suggestion.student.score += config.editAcceptBonus;
-        } else if (suggestion.status === "rejected") {
-          suggestion.student.score += config.editRejectPenalty;
-        }
-
-        await suggestion.student.save();
-        processedStudents.add(suggestion.student._id.toString());
+    const events = [
+      {
+        user: question.owner,
+        type: "finalizeOwner",
+        points: config.newQuestionScore,
+        question: question._id,
+      },
+    ];
+
+    // 2. Award/deduct credits for edit suggestions, once per student
+    for (const { student, status } of suggesters) {
+      let points = config.editSuggestionBaseScore;
+      if (status === "accepted") {
+        points += config.editAcceptBonus;
+      } else if (status === "rejected") {
+        points += config.editRejectPenalty;
       }
+      events.push({
+        user: student,
+        type: "finalizeSuggestion",
+        points,
+        question: question._id,
+      });
     }
 
-    // 3. Award credit for each user who graded the MCQ
-    const gradingStudents = new Set(); // To ensure each student is counted once
-    // Check question grades
-    for (const grade of question.grades) {
-      if (!gradingStudents.has(grade.student._id.toString())) {
-        grade.student.score += config.gradingScore;
-        await grade.student.save();
-        gradingStudents.add(grade.student._id.toString());
-      }
+    // 3. Award credit for each user who graded the MCQ, once per student
+    for (const student of graders) {
+      events.push({
+        user: student,
+        type: "finalizeGrading",
+        points: config.gradingScore,
+        question: question._id,
+      });
     }
 
-    question.isFinal = true;
-    await question.save();
+    // One ledger insert and one bulk $inc for all participants
+    await recordScoreEvents(events);
 
-    res.json(question);
+    publish("finalized", { question: question._id });
+    await sendChange(req, res, "finalized", question._id, {});
   } catch (error) {
     res.status(500).json({ message: "Error finalizing question" });
   }
 };
 
 // @desc    Add faculty comment
-// @route   POST /api/questions/:id/comments
+// @route   POST /api/questions/:id/comments?return=patch
 // @access  Private/Faculty
 const addFacultyComment = async (req, res) => {
   try {
     const { comment } = req.body;
-    const question = await Question.findById(req.params.id);
+    const _id = new mongoose.Types.ObjectId();
 
-    if (!question) {
+    // Append atomically instead of loading and re-saving the whole question
+    const result = await Question.updateOne(
+      { _id: req.params.id },
+      { $push: { facultyComments: { _id, faculty: req.user._id, comment } } }
+    );
+
+    if (result.matchedCount === 0) {
       return res.status(404).json({ message: "Question not found" });
     }
 
-    question.facultyComments.push({
-      faculty: req.user._id,
-      comment,
-    });
-
-    await question.save();
-    res.json(question);
+    const { facultyComments } = await Question.findById(req.params.id)
+      .select({ facultyComments: { $elemMatch: { _id } } })
+      .populate("facultyComments.faculty", "name")
+      .lean();
+    const change = { comment: facultyComments[0] };
+    publish("comment", { question: req.params.id, data: change });
+    await sendChange(req, res, "comment", req.params.id, change);
   } catch (error) {
     res.status(500).json({ message: "Error adding comment" });
   }
@@ -329,19 +669,97 @@ const addFacultyComment = async (req, res) => {
 // @access  Private/Faculty
 const deleteQuestion = async (req, res) => {
   try {
-    const question = await Question.findById(req.params.id);
+    const question = await Question.findByIdAndDelete(req.params.id);
 
     if (!question) {
       return res.status(404).json({ message: "Question not found" });
     }
+    await removeQuestionData(question._id);
+    // Let syncing clients know it is gone
+    await Tombstone.create({ kind: "question", docId: question._id });
 
-    await Question.findByIdAndDelete(req.params.id);
     res.json({ message: "Question deleted successfully" });
   } catch (error) {
     res.status(500).json({ message: "Error deleting question" });
   }
 };
 
+// @desc    Export finalized questions, streamed from a cursor
+// @route   GET /api/questions/export?format=csv|jsonl|qti|gift&lecture=&gzip=true
+// @access  Private/Faculty
+const exportQuestions = async (req, res) => {
+  try {
+    const formatName = req.query.format || "jsonl";
+    const format = EXPORT_FORMATS[formatName];
+    if (!format) {
+      return res.status(400).json({
+        message: `format must be one of ${Object.keys(EXPORT_FORMATS).join(", ")}`,
+      });
+    }
+
+    const filter = { isFinal: true };
+    let scope = "all";
+    if (req.query.lecture) {
+      if (!mongoose.Types.ObjectId.isValid(req.query.lecture)) {
+        return res.status(400).json({ message: "Invalid lecture id" });
+      }
+      const lecture = await Lecture.findById(req.query.lecture)
+        .select("questions")
+        .lean();
+      if (!lecture) {
+        return res.status(404).json({ message: "Lecture not found" });
+      }
+      filter._id = { $in: lecture.questions };
+      scope = `lecture-${lecture._id}`;
+    }
+
+    const gzip = req.query.gzip === "true";
+    const date = new Date().toISOString().slice(0, 10);
+    const filename = `questions-${scope}-${date}.${format.extension}${
+      gzip ? ".gz" : ""
+    }`;
+    res.set("Content-Type", gzip ? "application/gzip" : format.contentType);
+    res.set("Content-Disposition", `attachment; filename="${filename}"`);
+
+    const cursor = Question.find(filter)
+      .select(EXPORT_FIELDS)
+      .sort({ _id: 1 })
+      .lean()
+      .cursor({ batchSize: 500 });
+    const stages = [Readable.from(exportChunks(format, cursor))];
+    if (gzip) {
+      stages.push(zlib.createGzip());
+    }
+    await pipeline(...stages, res);
+  } catch (error) {
+    console.error("Export questions error:", error);
+    if (!res.headersSent) {
+      res.status(500).json({ message: "Error exporting questions" });
+    } else {
+      // Headers are already sent; drop the connection so the client sees a
+      // truncated download rather than a silently short file
+      res.destroy();
+    }
+  }
+};
+
+// @desc    Get grade and suggestion analytics for a question
+// @route   GET /api/questions/:id/analytics
+// @access  Private/Faculty
+const getQuestionAnalytics = async (req, res) => {
+  try {
+    const analytics = await questionAnalytics(req.params.id);
+
+    if (!analytics) {
+      return res.status(404).json({ message: "Question not found" });
+    }
+
+    res.json(analytics);
+  } catch (error) {
+    res.status(500).json({ message: "Error fetching question analytics" });
+  }
+};
+
 module.exports = {
   createQuestion,
   getQuestions,
@@ -351,4 +769,6 @@ module.exports = {
   finalizeQuestion,
   addFacultyComment,
   deleteQuestion,
+  exportQuestions,
+  getQuestionAnalytics,
 };
@@ -1,11 +1,16 @@
 const ScoringConfig = require("../models/ScoringConfig");
+const {
+  getScoringConfig,
+  invalidateScoringConfig,
+  scoringConfigCacheStats,
+} = require("../utils/scoringConfigCache");
 
 // @desc    Get current scoring configuration
 // @route   GET /api/scoring/config
 // @access  Private
 const getConfig = async (req, res) => {
   try {
-    const config = await ScoringConfig.getConfig();
+    const config = await getScoringConfig();
     res.json(config);
   } catch (error) {
     res.status(500).json({ message: "Error fetching scoring configuration" });
@@ -25,20 +30,29 @@ const updateConfig = async (req, res) => {
       gradingScore,
     } = req.body;
 
-    const config = await ScoringConfig.getConfig();
+    const { _id } = await ScoringConfig.getConfig();
 
-    // Update only provided fields
-    if (newQuestionScore !== undefined)
-      config.newQuestionScore = newQuestionScore;
-    if (editSuggestionBaseScore !== undefined)
-      config.editSuggestionBaseScore = editSuggestionBaseScore;
-    if (editAcceptBonus !== undefined) config.editAcceptBonus = editAcceptBonus;
-    if (editRejectPenalty !== undefined)
-      config.editRejectPenalty = editRejectPenalty;
-    if (gradingScore !== undefined) config.gradingScore = gradingScore;
-
-    config.lastUpdatedBy = req.user._id;
-    await config.save();
+    // Update only provided fields, bumping the version in the same atomic
+    // write so concurrent updates can never share one
+    const fields = {
+      newQuestionScore,
+      editSuggestionBaseScore,
+      editAcceptBonus,
+      editRejectPenalty,
+      gradingScore,
+    };
+    const update = { lastUpdatedBy: req.user._id };
+    for (const [field, value] of Object.entries(fields)) {
+      if (value !== undefined) {
+        update[field] = value;
+      }
+    }
+    const config = await ScoringConfig.findOneAndUpdate(
+      { _id },
+      { $set: update, $inc: { version: 1 } },
+      { new: true }
+    ).lean();
+    invalidateScoringConfig(config);
 
     res.json(config);
   } catch (error) {
@@ -46,7 +60,15 @@ const updateConfig = async (req, res) => {
   }
 };
 
+// @desc    Get scoring config cache counters
+// @route   GET /api/scoring/cache-stats
+// @access  Private/Faculty
+const getCacheStats = (req, res) => {
+  res.json(scoringConfigCacheStats());
+};
+
 module.exports = {
   getConfig,
   updateConfig,
+  getCacheStats,
 };
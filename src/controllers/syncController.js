@@ -0,0 +1,93 @@
+const Question = require("../models/Question");
+const Lecture = require("../models/Lecture");
+const Tombstone = require("../models/Tombstone");
+const { hydrateQuestions } = require("../utils/questionStore");
+const {
+  newCursor,
+  pageCursor,
+  parseCursor,
+  changedSince,
+} = require("../utils/sync");
+
+const MAX_CHANGES = 500;
+
+// Lectures the user sees in GET /api/lectures
+const lectureScope = (user) =>
+  user.role === "faculty" ? { faculty: user._id } : { students: user._id };
+
+// @desc    Questions and lectures changed since a sync cursor
+// @route   GET /api/sync/changes?since=&limit=
+// @access  Private
+const getChanges = async (req, res) => {
+  try {
+    const since = parseCursor(req.query.since);
+    if (!since) {
+      return res.status(400).json({ message: "Invalid since cursor" });
+    }
+    if (Date.now() - since.time.getTime() > Tombstone.TTL_MS) {
+      // Deletions this old are forgotten; the client must reload everything
+      return res.status(410).json({ message: "Sync cursor has expired" });
+    }
+
+    let limit = MAX_CHANGES;
+    if (req.query.limit !== undefined) {
+      limit = parseInt(req.query.limit, 10);
+      if (!Number.isInteger(limit) || limit < 1) {
+        return res
+          .status(400)
+          .json({ message: "limit must be a positive integer" });
+      }
+      limit = Math.min(limit, MAX_CHANGES);
+    }
+
+    // Taken before reading, so nothing written meanwhile is skipped
+    let cursor = newCursor();
+    const scope = lectureScope(req.user);
+    let lectureQuery = Lecture.find({
+      ...scope,
+      updatedAt: { $gte: since.time },
+    }).populate("faculty", "name email");
+    if (req.user.role === "faculty") {
+      lectureQuery = lectureQuery.populate("students", "name email");
+    }
+
+    const [questions, deleted, lectures, lectureIds] = await Promise.all([
+      Question.find(changedSince(since))
+        .sort({ updatedAt: 1, _id: 1 })
+        .limit(limit + 1)
+        .populate("owner", "name")
+        .populate("editSuggestions.student", "name")
+        .populate("grades.student", "name")
+        .populate("facultyComments.faculty", "name")
+        .lean(),
+      Tombstone.find({ kind: "question", deletedAt: { $gte: since.time } })
+        .select("docId")
+        .lean(),
+      lectureQuery.lean(),
+      Lecture.find(scope).distinct("_id"),
+    ]);
+
+    // More questions changed than fit: resume after the last one returned
+    const hasMore = questions.length > limit;
+    if (hasMore) {
+      questions.length = limit;
+      cursor = pageCursor(questions[limit - 1]);
+    }
+    await hydrateQuestions(questions);
+
+    res.json({
+      cursor,
+      hasMore,
+      questions,
+      lectures,
+      // Lectures missing from here were removed or the user left them
+      lectureIds,
+      deleted: { questions: deleted.map((t) => t.docId) },
+    });
+  } catch (error) {
+    console.error("Sync changes error:", error);
+    res.status(500).json({ message: "Error fetching changes" });
+  }
+};
+
+module.exports = { getChanges };
@@ -1,7 +1,22 @@
 const jwt = require("jsonwebtoken");
-const bcrypt = require("bcryptjs");
+const mongoose = require("mongoose");
 const User = require("../models/User");
 const ScoringConfig = require("../models/ScoringConfig");
+const { setScore } = require("../utils/scoreLedger");
+const { invalidatePrincipal } = require("../utils/principalCache");
+const {
+  topStudents,
+  rankOf,
+  setLectureScoresActive,
+} = require("../utils/leaderboard");
+const { QUEUE_FULL } = require("../utils/passwordHasher");
+
+// The password hashing queue is full: ask the client to retry shortly
+const serverBusy = (res) =>
+  res
+    .set("Retry-After", "1")
+    .status(503)
+    .json({ message: "Server busy. Please try again shortly." });
 
 const generateToken = (id) => {
   return jwt.sign({ id }, process.env.JWT_SECRET, {
@@ -99,6 +114,9 @@ const loginUser = async (req, res) => {
       res.status(401).json({ message: "Invalid credentials" });
     }
   } catch (error) {
+    if (error.code === QUEUE_FULL) {
+      return serverBusy(res);
+    }
     res.status(500).json({ message: "Server error" });
   }
 };
@@ -132,6 +150,9 @@ const setPassword = async (req, res) => {
       token: generateToken(user._id),
     });
   } catch (error) {
+    if (error.code === QUEUE_FULL) {
+      return serverBusy(res);
+    }
     res.status(500).json({ message: "Error setting password" });
   }
 };
@@ -141,7 +162,9 @@ const setPassword = async (req, res) => {
 // @access  Private
 const getUserProfile = async (req, res) => {
   try {
-    const user = await User.findById(req.user._id);
+    const user = await User.findById(req.user._id)
+      .select("name email role score passwordReset")
+      .lean();
     if (user) {
       res.json({
         _id: user._id,
@@ -164,38 +187,71 @@ const getUserProfile = async (req, res) => {
 // @access  Private/Faculty
 const updateUserScore = async (req, res) => {
   try {
-    const { score } = req.body;
-    const user = await User.findById(req.params.id);
+    const score = Number(req.body.score);
+    if (!Number.isFinite(score)) {
+      return res.status(400).json({ message: "Score must be a number" });
+    }
 
-    if (!user) {
+    // Set atomically and ledgered, so recomputed scores keep the change
+    const stored = await setScore(req.params.id, score);
+    if (!stored) {
       return res.status(404).json({ message: "User not found" });
     }
 
-    user.score = score;
-    await user.save();
-
-    res.json({ message: "Score updated successfully", score: user.score });
+    res.json({ message: "Score updated successfully", score: stored.score });
   } catch (error) {
     res.status(500).json({ message: "Server error" });
   }
 };
 
-// @desc    Get all users (for faculty leaderboard)
-// @route   GET /api/users/leaderboard
+// @desc    Get top students, globally or for one lecture (limit: 100 by
+//          default, at most 1000)
+// @route   GET /api/users/leaderboard?lecture=&limit=
 // @access  Private/Faculty
 const getLeaderboard = async (req, res) => {
   try {
-    // Only get students, sorted by score
-    const users = await User.find({ role: "student", active: true })
-      .select("name score")
-      .sort({ score: -1 });
+    const { lecture, limit } = req.query;
+    if (lecture && !mongoose.Types.ObjectId.isValid(lecture)) {
+      return res.status(400).json({ message: "Invalid lecture id" });
+    }
 
+    const users = await topStudents({ lecture, limit });
     res.json(users);
   } catch (error) {
     res.status(500).json({ message: "Error fetching leaderboard" });
   }
 };
 
+// @desc    Get a student's leaderboard rank, globally or for one lecture
+// @route   GET /api/users/:id/rank?lecture=
+// @access  Private (students may only look up themselves)
+const getUserRank = async (req, res) => {
+  try {
+    const { lecture } = req.query;
+    if (
+      !mongoose.Types.ObjectId.isValid(req.params.id) ||
+      (lecture && !mongoose.Types.ObjectId.isValid(lecture))
+    ) {
+      return res.status(400).json({ message: "Invalid id" });
+    }
+
+    if (
+      req.user.role === "student" &&
+      req.user._id.toString() !== req.params.id
+    ) {
+      return res.status(403).json({ message: "Not authorized" });
+    }
+
+    const rank = await rankOf(req.params.id, { lecture });
+    if (!rank) {
+      return res.status(404).json({ message: "Student not found" });
+    }
+    res.json(rank);
+  } catch (error) {
+    res.status(500).json({ message: "Error fetching rank" });
+  }
+};
+
 // @desc    Get users by role
 // @route   GET /api/users
 // @access  Private/Faculty
@@ -208,7 +264,8 @@ const getUsersByRole = async (req, res) => {
 
     const users = await User.find({ role, active: true })
       .select("name email score")
-      .sort({ name: 1 });
+      .sort({ name: 1 })
+      .lean();
 
     res.json(users);
   } catch (error) {
@@ -223,7 +280,8 @@ const getPendingUsers = async (req, res) => {
   try {
     const users = await User.find({ active: false })
       .select("name email role createdAt")
-      .sort({ createdAt: -1 });
+      .sort({ createdAt: -1 })
+      .lean();
 
     res.json(users);
   } catch (error) {
@@ -258,6 +316,8 @@ const activateUser = async (req, res) => {
     }/reset-password?token=${resetToken}&id=${user._id}`;
 
     await user.save();
+    invalidatePrincipal(user._id);
+    await setLectureScoresActive([user._id], role === "student");
 
     res.json({
       _id: user._id,
@@ -350,6 +410,9 @@ const requestPasswordReset = async (req, res) => {
 
     res.json({ resetLink });
   } catch (error) {
+    if (error.code === QUEUE_FULL) {
+      return serverBusy(res);
+    }
     console.error("Password reset request error:", error);
     res.status(500).json({ message: "Error processing request" });
   }
@@ -386,6 +449,9 @@ const resetPassword = async (req, res) => {
       token: generateToken(user._id),
     });
   } catch (error) {
+    if (error.code === QUEUE_FULL) {
+      return serverBusy(res);
+    }
     console.error("Password reset error:", error);
     res.status(500).json({ message: "Error resetting password" });
   }
@@ -420,7 +486,8 @@ const getActiveUsers = async (req, res) => {
   try {
     const users = await User.find({ active: true })
       .select("name email role")
-      .sort({ name: 1 });
+      .sort({ name: 1 })
+      .lean();
     res.json(users);
   } catch (error) {
     console.error("Error fetching active users:", error);
@@ -435,6 +502,7 @@ module.exports = {
   getUserProfile,
   updateUserScore,
   getLeaderboard,
+  getUserRank,
   getUsersByRole,
   getPendingUsers,
   activateUser,
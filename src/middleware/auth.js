@@ -1,6 +1,6 @@
 const jwt = require("jsonwebtoken");
-const User = require("../models/User");
 const Question = require("../models/Question");
+const { getPrincipal } = require("../utils/principalCache");
 
 const protect = async (req, res, next) => {
   try {
@@ -11,7 +11,7 @@ const protect = async (req, res, next) => {
     const token = req.headers.authorization.split(" ")[1];
     const decoded = jwt.verify(token, process.env.JWT_SECRET);
 
-    req.user = await User.findById(decoded.id).select("-password");
+    req.user = await getPrincipal(decoded.id);
     if (!req.user) {
       return res.status(401).json({ message: "User not found" });
     }
@@ -43,9 +43,18 @@ const isAdmin = (req, res, next) => {
   }
 };
 
+// Reads what authorization and suggestion reviews need of the question, not
+// its grades or suggestion text, and hands it on as req.question
 const isOwnerOrFaculty = async (req, res, next) => {
   try {
-    const question = await Question.findById(req.params.id);
+    const question = await Question.findById(req.params.id)
+      .select({
+        owner: 1,
+        "editSuggestions._id": 1,
+        "editSuggestions.status": 1,
+        "editSuggestions.student": 1,
+      })
+      .lean();
     if (!question) {
       return res.status(404).json({ message: "Question not found" });
     }
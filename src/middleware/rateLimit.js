@@ -0,0 +1,155 @@
+// Token-bucket limits for the public password endpoints (login, set and
+// reset password), which each cost a bcrypt operation.
+//
+// Every account (email, or userId for the set/reset endpoints) gets a bucket
+// of LOGIN_ACCOUNT_BURST attempts that refills at LOGIN_ACCOUNT_PER_MINUTE,
+// which stops password guessing against one account. All attempts together
+// share a bucket of LOGIN_GLOBAL_BURST refilling at LOGIN_GLOBAL_PER_SECOND,
+// so a whole class logging in at once is admitted at a pace the hashing pool
+// can keep up with. Rejected requests get 429 with a Retry-After telling the
+// client when a token will be free. Limits are per process; in cluster mode
+// the global rate applies to each worker. At most MAX_TRACKED_ACCOUNTS
+// buckets are kept, in least recently used order; once full, the stalest
+// tenth is evicted in one pass, so spraying distinct emails neither grows
+// the map nor costs a full scan per request.
+
+const ACCOUNT_BURST = parseInt(process.env.LOGIN_ACCOUNT_BURST || "10", 10);
+const ACCOUNT_PER_MINUTE = parseFloat(
+  process.env.LOGIN_ACCOUNT_PER_MINUTE || "2"
+);
+const GLOBAL_BURST = parseInt(process.env.LOGIN_GLOBAL_BURST || "100", 10);
+const GLOBAL_PER_SECOND = parseFloat(
+  process.env.LOGIN_GLOBAL_PER_SECOND || "50"
+);
+const MAX_TRACKED_ACCOUNTS = 100000;
+const EVICT_BATCH = Math.ceil(MAX_TRACKED_ACCOUNTS / 10);
+
+class TokenBucket {
+  constructor(capacity, perSecond) {
+    this.capacity = capacity;
+    this.perSecond = perSecond;
+    this.tokens = capacity;
+    this.updatedAt = Date.now();
+  }
+
+  refill(now) {
+    const elapsed = (now - this.updatedAt) / 1000;
+    this.tokens = Math.min(
+      this.capacity,
+      this.tokens + elapsed * this.perSecond
+    );
+    this.updatedAt = now;
+  }
+
+  // Take a token, or return the seconds until one is available
+  take(now = Date.now()) {
+    this.refill(now);
+    if (this.tokens >= 1) {
+      this.tokens -= 1;
+      return 0;
+    }
+    return (1 - this.tokens) / this.perSecond;
+  }
+
+  // Return a token taken for a request that was then rejected elsewhere
+  give() {
+    this.tokens = Math.min(this.capacity, this.tokens + 1);
+  }
+
+  isFull(now) {
+    this.refill(now);
+    return this.tokens >= this.capacity;
+  }
+}
+
+const globalBucket = new TokenBucket(GLOBAL_BURST, GLOBAL_PER_SECOND);
+const accountBuckets = new Map();
+const stats = { allowed: 0, limitedAccount: 0, limitedGlobal: 0 };
+
+// Full buckets carry no state worth keeping
+const sweep = () => {
+  const now = Date.now();
+  for (const [key, bucket] of accountBuckets) {
+    if (bucket.isFull(now)) {
+      accountBuckets.delete(key);
+    }
+  }
+};
+setInterval(sweep, 60000).unref();
+
+// Drop the least recently used buckets. Evicting one at a time would be
+// slow: each delete at the head of a Map leaves a hole the next lookup of
+// its first key has to skip.
+const evictOldest = () => {
+  let remaining = EVICT_BATCH;
+  for (const key of accountBuckets.keys()) {
+    accountBuckets.delete(key);
+    remaining -= 1;
+    if (remaining === 0) {
+      break;
+    }
+  }
+};
+
+const accountKey = (req) => {
+  const { email, userId } = req.body || {};
+  if (email) {
+    return `email:${String(email).trim().toLowerCase()}`;
+  }
+  return userId ? `user:${String(userId)}` : null;
+};
+
+const reject = (res, waitSeconds, message) => {
+  res.set("Retry-After", String(Math.max(1, Math.ceil(waitSeconds))));
+  return res.status(429).json({ message });
+};
+
+const loginRateLimit = (req, res, next) => {
+  const now = Date.now();
+  const key = accountKey(req);
+
+  let account = null;
+  if (key) {
+    account = accountBuckets.get(key);
+    if (account) {
+      // Re-insert so the Map's order stays least recently used first
+      accountBuckets.delete(key);
+    } else {
+      if (accountBuckets.size >= MAX_TRACKED_ACCOUNTS) {
+        evictOldest();
+      }
+      account = new TokenBucket(ACCOUNT_BURST, ACCOUNT_PER_MINUTE / 60);
+    }
+    accountBuckets.set(key, account);
+    const wait = account.take(now);
+    if (wait > 0) {
+      stats.limitedAccount += 1;
+      return reject(
+        res,
+        wait,
+        "Too many attempts for this account. Please try again later."
+      );
+    }
+  }
+
+  const wait = globalBucket.take(now);
+  if (wait > 0) {
+    // Busy server, not this account's fault: don't charge its bucket
+    if (account) {
+      account.give();
+    }
+    stats.limitedGlobal += 1;
+    return reject(res, wait, "Server busy. Please try again shortly.");
+  }
+
+  stats.allowed += 1;
+  next();
+};
+
+const loginRateLimitStats = () => ({
+  ...stats,
+  trackedAccounts: accountBuckets.size,
+  globalTokens: Math.floor(globalBucket.tokens),
+});
+
+module.exports = { loginRateLimit, loginRateLimitStats };
@@ -0,0 +1,28 @@
+const mongoose = require("mongoose");
+
+// Live event published by a write path (see utils/events.js). The collection
+// is capped, so it keeps only the most recent EVENT_LOG_BYTES of events in
+// insertion order and every backend process can follow it with a tailable
+// cursor. Channels are "lecture:<id>" and "question:<id>". Reconnecting
+// clients are replayed missed events through the default _id index.
+const eventSchema = new mongoose.Schema(
+  {
+    type: {
+      type: String,
+      required: true,
+    },
+    channels: [String],
+    data: {
+      type: mongoose.Schema.Types.Mixed,
+    },
+  },
+  {
+    timestamps: true,
+    capped: {
+      size: parseInt(process.env.EVENT_LOG_BYTES || "16777216", 10),
+    },
+  }
+);
+
+const Event = mongoose.model("Event", eventSchema);
+module.exports = Event;
@@ -0,0 +1,46 @@
+const mongoose = require("mongoose");
+
+// One generated exam: the questions a student was given from a lecture, so
+// later exams can avoid repeating them. Draws expire after
+// EXAM_HISTORY_TTL_DAYS; utils/exams.js only looks back as far as an
+// assembly's recentDays.
+const TTL_DAYS = parseInt(process.env.EXAM_HISTORY_TTL_DAYS || "180", 10);
+
+const examDrawSchema = new mongoose.Schema(
+  {
+    lecture: {
+      type: mongoose.Schema.Types.ObjectId,
+      ref: "Lecture",
+      required: true,
+    },
+    student: {
+      type: mongoose.Schema.Types.ObjectId,
+      ref: "User",
+      required: true,
+    },
+    questions: [
+      {
+        type: mongoose.Schema.Types.ObjectId,
+        ref: "Question",
+      },
+    ],
+    seed: {
+      type: String,
+      required: true,
+    },
+  },
+  {
+    timestamps: { createdAt: true, updatedAt: false },
+  }
+);
+
+// Index for reading the recent draws of a batch of students
+examDrawSchema.index({ student: 1, createdAt: 1 });
+
+examDrawSchema.index(
+  { createdAt: 1 },
+  { expireAfterSeconds: TTL_DAYS * 24 * 60 * 60 }
+);
+
+const ExamDraw = mongoose.model("ExamDraw", examDrawSchema);
+module.exports = ExamDraw;
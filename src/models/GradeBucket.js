@@ -0,0 +1,49 @@
+const mongoose = require("mongoose");
+
+// Bucketed grade storage (QUESTION_STORAGE=bucketed). Each bucket holds up
+// to GRADE_BUCKET_SIZE grades for one question; answer is null for a grade of
+// the question itself.
+const gradeBucketSchema = new mongoose.Schema(
+  {
+    question: {
+      type: mongoose.Schema.Types.ObjectId,
+      ref: "Question",
+      required: true,
+    },
+    count: {
+      type: Number,
+      default: 0,
+    },
+    grades: [
+      {
+        student: {
+          type: mongoose.Schema.Types.ObjectId,
+          ref: "User",
+          required: true,
+        },
+        answer: {
+          type: mongoose.Schema.Types.ObjectId,
+          default: null,
+        },
+        score: {
+          type: Number,
+          enum: [1, 2, 3],
+          required: true,
+        },
+        createdAt: {
+          type: Date,
+          default: Date.now,
+        },
+      },
+    ],
+  },
+  {
+    timestamps: true,
+  }
+);
+
+// Index for finding a question's open bucket and reading all of its buckets
+gradeBucketSchema.index({ question: 1, count: 1 });
+
+const GradeBucket = mongoose.model("GradeBucket", gradeBucketSchema);
+module.exports = GradeBucket;
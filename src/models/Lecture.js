@@ -42,9 +42,15 @@ lectureSchema.index({ students: 1 });
 // Index for faculty lookup since we often filter by faculty
 lectureSchema.index({ faculty: 1 });
 
+// Index for the changes feed, which reads lectures modified since a cursor
+lectureSchema.index({ updatedAt: 1 });
+
 // Index for active lectures since we filter by isActive
 lectureSchema.index({ isActive: 1 });
 
+// Index for finding the lectures a scored question belongs to
+lectureSchema.index({ questions: 1 });
+
 // Middleware to prevent actual deletion of questions when removing them from a lecture
 lectureSchema.pre("save", async function (next) {
   if (this.isModified("questions")) {
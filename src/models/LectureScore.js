@@ -0,0 +1,40 @@
+const mongoose = require("mongoose");
+
+// Per-lecture leaderboard entry: a student's points from score events on the
+// lecture's questions. Maintained incrementally by utils/leaderboard.js and
+// rebuilt from the ledger by scripts/rebuild-leaderboard.js.
+const lectureScoreSchema = new mongoose.Schema(
+  {
+    lecture: {
+      type: mongoose.Schema.Types.ObjectId,
+      ref: "Lecture",
+      required: true,
+    },
+    user: {
+      type: mongoose.Schema.Types.ObjectId,
+      ref: "User",
+      required: true,
+    },
+    score: {
+      type: Number,
+      default: 0,
+    },
+    // Copy of the student's active flag; only active entries are ranked
+    active: {
+      type: Boolean,
+      default: true,
+    },
+  },
+  {
+    timestamps: true,
+  }
+);
+
+// One entry per student and lecture
+lectureScoreSchema.index({ lecture: 1, user: 1 }, { unique: true });
+
+// Index for top-K and rank queries among a lecture's active students
+lectureScoreSchema.index({ lecture: 1, active: 1, score: -1, user: 1 });
+
+const LectureScore = mongoose.model("LectureScore", lectureScoreSchema);
+module.exports = LectureScore;
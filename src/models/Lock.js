@@ -0,0 +1,29 @@
+const mongoose = require("mongoose");
+
+// Named lease held by one process at a time (see utils/locks.js). The _id is
+// the lock name, so acquiring is a single insert that the unique _id index
+// arbitrates. Expired leases can be taken over, and MongoDB's TTL monitor
+// eventually removes them.
+const lockSchema = new mongoose.Schema(
+  {
+    _id: {
+      type: String,
+    },
+    owner: {
+      type: String,
+      required: true,
+    },
+    expiresAt: {
+      type: Date,
+      required: true,
+    },
+  },
+  {
+    timestamps: true,
+  }
+);
+
+lockSchema.index({ expiresAt: 1 }, { expireAfterSeconds: 0 });
+
+const Lock = mongoose.model("Lock", lockSchema);
+module.exports = Lock;
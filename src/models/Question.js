@@ -1,5 +1,24 @@
 const mongoose = require("mongoose");
 
+// Running totals of 1-3 grades; distribution[i] counts grades of i + 1
+const gradeStatsSchema = new mongoose.Schema(
+  {
+    count: {
+      type: Number,
+      default: 0,
+    },
+    sum: {
+      type: Number,
+      default: 0,
+    },
+    distribution: {
+      type: [Number],
+      default: [0, 0, 0],
+    },
+  },
+  { _id: false }
+);
+
 const answerSchema = new mongoose.Schema({
   text: {
     type: String,
@@ -22,6 +41,10 @@ const answerSchema = new mongoose.Schema({
       },
     },
   ],
+  gradeStats: {
+    type: gradeStatsSchema,
+    default: () => ({}),
+  },
 });
 
 const editSuggestionSchema = new mongoose.Schema({
@@ -73,6 +96,51 @@ const questionSchema = new mongoose.Schema(
         },
       },
     ],
+    // Aggregates kept current in both storage modes (see utils/questionStore.js)
+    gradeStats: {
+      type: gradeStatsSchema,
+      default: () => ({}),
+    },
+    suggestionStats: {
+      count: {
+        type: Number,
+        default: 0,
+      },
+      pending: {
+        type: Number,
+        default: 0,
+      },
+      accepted: {
+        type: Number,
+        default: 0,
+      },
+      rejected: {
+        type: Number,
+        default: 0,
+      },
+    },
+    // MinHash signature and LSH band keys of the stem and answers, used to
+    // flag near-duplicates (see utils/similarity.js); not returned by default
+    similarity: {
+      minhash: {
+        type: [Number],
+        select: false,
+      },
+      bands: {
+        type: [String],
+        select: false,
+      },
+    },
+    possibleDuplicates: [
+      {
+        _id: false,
+        question: {
+          type: mongoose.Schema.Types.ObjectId,
+          ref: "Question",
+        },
+        similarity: Number,
+      },
+    ],
     facultyComments: [
       {
         faculty: {
@@ -92,6 +160,16 @@ const questionSchema = new mongoose.Schema(
   }
 );
 
+// Indexes for the filtered, _id-ordered listing in getQuestions
+questionSchema.index({ owner: 1, _id: 1 });
+questionSchema.index({ isFinal: 1, _id: 1 });
+
+// Index for the changes feed, which reads questions modified since a cursor
+questionSchema.index({ updatedAt: 1, _id: 1 });
+
+// Index for finding near-duplicate candidates by shared LSH band key
+questionSchema.index({ "similarity.bands": 1 });
+
 // Validate at least one correct answer
 questionSchema.pre("save", function (next) {
   const hasCorrectAnswer = this.answers.some((answer) => answer.isCorrect);
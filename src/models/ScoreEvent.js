@@ -0,0 +1,49 @@
+const mongoose = require("mongoose");
+
+// Append-only ledger of score changes; User.score is the running sum of a
+// user's events and can be rebuilt from this collection
+const scoreEventSchema = new mongoose.Schema(
+  {
+    user: {
+      type: mongoose.Schema.Types.ObjectId,
+      ref: "User",
+      required: true,
+    },
+    question: {
+      type: mongoose.Schema.Types.ObjectId,
+      ref: "Question",
+    },
+    type: {
+      type: String,
+      enum: [
+        "newQuestion",
+        "editSuggestion",
+        "editAccepted",
+        "editRejected",
+        "grading",
+        "finalizeOwner",
+        "finalizeSuggestion",
+        "finalizeGrading",
+        "adjustment",
+        "baseline",
+      ],
+      required: true,
+    },
+    points: {
+      type: Number,
+      required: true,
+    },
+  },
+  {
+    timestamps: { createdAt: true, updatedAt: false },
+  }
+);
+
+// Index for per-user recomputation and history
+scoreEventSchema.index({ user: 1, createdAt: 1 });
+
+// Index for looking up the events a question produced
+scoreEventSchema.index({ question: 1 });
+
+const ScoreEvent = mongoose.model("ScoreEvent", scoreEventSchema);
+module.exports = ScoreEvent;
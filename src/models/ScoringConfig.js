@@ -22,6 +22,12 @@ const scoringConfigSchema = new mongoose.Schema(
       type: Number,
       default: 1,
     },
+    // Bumped with $inc by every update so cached copies in other processes
+    // can tell whether they are stale
+    version: {
+      type: Number,
+      default: 0,
+    },
     lastUpdatedBy: {
       type: mongoose.Schema.Types.ObjectId,
       ref: "User",
@@ -0,0 +1,35 @@
+const mongoose = require("mongoose");
+const Question = require("./Question");
+
+// Bucketed edit suggestion storage (QUESTION_STORAGE=bucketed). Suggestions
+// keep the embedded schema, including their _id, so they can be addressed
+// the same way in both storage modes.
+const suggestionBucketSchema = new mongoose.Schema(
+  {
+    question: {
+      type: mongoose.Schema.Types.ObjectId,
+      ref: "Question",
+      required: true,
+    },
+    count: {
+      type: Number,
+      default: 0,
+    },
+    suggestions: [Question.schema.path("editSuggestions").schema],
+  },
+  {
+    timestamps: true,
+  }
+);
+
+// Index for finding a question's open bucket and reading all of its buckets
+suggestionBucketSchema.index({ question: 1, count: 1 });
+
+// Index for addressing a single suggestion when it is accepted or rejected
+suggestionBucketSchema.index({ "suggestions._id": 1 });
+
+const SuggestionBucket = mongoose.model(
+  "SuggestionBucket",
+  suggestionBucketSchema
+);
+module.exports = SuggestionBucket;
@@ -0,0 +1,39 @@
+const mongoose = require("mongoose");
+
+// Record of a hard-deleted document, so clients syncing with
+// GET /api/sync/changes can drop it from their cache. Tombstones expire after
+// SYNC_TOMBSTONE_TTL_DAYS; a client whose cursor is older than that has to
+// reload everything.
+const TTL_DAYS = parseInt(process.env.SYNC_TOMBSTONE_TTL_DAYS || "30", 10);
+
+const tombstoneSchema = new mongoose.Schema(
+  {
+    kind: {
+      type: String,
+      enum: ["question"],
+      required: true,
+    },
+    docId: {
+      type: mongoose.Schema.Types.ObjectId,
+      required: true,
+    },
+    deletedAt: {
+      type: Date,
+      default: Date.now,
+    },
+  },
+  {
+    timestamps: true,
+  }
+);
+
+tombstoneSchema.index({ kind: 1, deletedAt: 1 });
+tombstoneSchema.index(
+  { deletedAt: 1 },
+  { expireAfterSeconds: TTL_DAYS * 24 * 60 * 60 }
+);
+
+tombstoneSchema.statics.TTL_MS = TTL_DAYS * 24 * 60 * 60 * 1000;
+
+const Tombstone = mongoose.model("Tombstone", tombstoneSchema);
+module.exports = Tombstone;
@@ -1,6 +1,6 @@
 const mongoose = require("mongoose");
-const bcrypt = require("bcryptjs");
 const crypto = require("crypto");
+const { hashPassword, verifyPassword } = require("../utils/passwordHasher");
 
 const userSchema = new mongoose.Schema(
   {
@@ -48,23 +48,26 @@ const userSchema = new mongoose.Schema(
   }
 );
 
+// Index for leaderboard top-K and rank queries without scanning all users
+userSchema.index({ role: 1, active: 1, score: -1, _id: 1 });
+
 userSchema.pre("save", async function (next) {
   if (!this.isModified("password")) return next();
   if (this.password) {
-    const salt = await bcrypt.genSalt(10);
-    this.password = await bcrypt.hash(this.password, salt);
+    // Hashed on a worker thread so the event loop keeps serving requests
+    this.password = await hashPassword(this.password, 10);
   }
   next();
 });
 
 userSchema.methods.matchPassword = async function (enteredPassword) {
   if (!this.password) return false;
-  return await bcrypt.compare(enteredPassword, this.password);
+  return await verifyPassword(enteredPassword, this.password);
 };
 
 userSchema.methods.createResetToken = async function () {
   const resetToken = crypto.randomBytes(32).toString("hex");
-  this.resetToken = await bcrypt.hash(resetToken, 10);
+  this.resetToken = await hashPassword(resetToken, 10);
   this.resetTokenExpires = Date.now() + 3600000; // 1 hour
   await this.save();
   return resetToken;
@@ -78,7 +81,7 @@ userSchema.methods.validateResetToken = async function (token) {
   ) {
     return false;
   }
-  return await bcrypt.compare(token, this.resetToken);
+  return await verifyPassword(token, this.resetToken);
 };
 
 const User = mongoose.model("User", userSchema);
@@ -0,0 +1,8 @@
+const express = require("express");
+const router = express.Router();
+const { protect } = require("../middleware/auth");
+const { streamEvents } = require("../controllers/eventController");
+
+router.get("/", protect, streamEvents);
+
+module.exports = router;
@@ -8,9 +8,13 @@ const {
   deleteLecture,
   addStudents,
   removeStudents,
+  importRoster,
   addQuestions,
   removeQuestions,
+  getLectureAnalytics,
+  assembleExams,
 } = require("../controllers/lectureController");
+const { ROSTER_BODY_LIMIT } = require("../utils/roster");
 
 // Base route: /api/lectures
 router.use(protect); // All lecture routes require authentication
@@ -30,9 +34,21 @@ router
   .post(isFaculty, addStudents)
   .delete(isFaculty, removeStudents);
 
+// CSV rosters arrive as text; JSON ones are parsed with the same limit in
+// server.js, ahead of the app-wide parser and its 100kb default
+router.post(
+  "/:id/roster",
+  isFaculty,
+  express.text({ type: ["text/csv", "text/plain"], limit: ROSTER_BODY_LIMIT }),
+  importRoster
+);
+
 router
   .route("/:id/questions")
   .post(isFaculty, addQuestions)
   .delete(isFaculty, removeQuestions);
 
+router.get("/:id/analytics", isFaculty, getLectureAnalytics);
+router.post("/:id/exams", isFaculty, assembleExams);
+
 module.exports = router;
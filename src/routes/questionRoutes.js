@@ -1,6 +1,6 @@
 const express = require("express");
 const router = express.Router();
-const { protect, isFaculty } = require("../middleware/auth");
+const { protect, isFaculty, isOwnerOrFaculty } = require("../middleware/auth");
 const {
   createQuestion,
   getQuestions,
@@ -10,15 +10,24 @@ const {
   finalizeQuestion,
   addFacultyComment,
   deleteQuestion,
+  exportQuestions,
+  getQuestionAnalytics,
 } = require("../controllers/questionController");
 
 router.route("/").post(protect, createQuestion).get(protect, getQuestions);
+router.get("/export", protect, isFaculty, exportQuestions);
 
 router.post("/:id/suggestions", protect, submitEditSuggestion);
-router.put("/:id/suggestions/:suggestionId", protect, handleSuggestion);
+router.put(
+  "/:id/suggestions/:suggestionId",
+  protect,
+  isOwnerOrFaculty,
+  handleSuggestion
+);
 router.post("/:id/grades", protect, submitGrades);
 router.put("/:id/finalize", protect, isFaculty, finalizeQuestion);
 router.post("/:id/comments", protect, isFaculty, addFacultyComment);
 router.delete("/:id", protect, isFaculty, deleteQuestion);
+router.get("/:id/analytics", protect, isFaculty, getQuestionAnalytics);
 
 module.exports = router;
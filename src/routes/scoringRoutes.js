@@ -1,9 +1,14 @@
 const express = require("express");
 const router = express.Router();
 const { protect, isFaculty } = require("../middleware/auth");
-const { getConfig, updateConfig } = require("../controllers/scoringController");
+const {
+  getConfig,
+  updateConfig,
+  getCacheStats,
+} = require("../controllers/scoringController");
 
 router.get("/config", protect, getConfig);
 router.put("/config", protect, isFaculty, updateConfig);
+router.get("/cache-stats", protect, isFaculty, getCacheStats);
 
 module.exports = router;
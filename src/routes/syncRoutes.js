@@ -0,0 +1,8 @@
+const express = require("express");
+const router = express.Router();
+const { protect } = require("../middleware/auth");
+const { getChanges } = require("../controllers/syncController");
+
+router.get("/changes", protect, getChanges);
+
+module.exports = router;
@@ -1,6 +1,7 @@
 const express = require("express");
 const router = express.Router();
 const { protect, isFaculty } = require("../middleware/auth");
+const { loginRateLimit } = require("../middleware/rateLimit");
 const {
   registerUser,
   loginUser,
@@ -8,6 +9,7 @@ const {
   getUserProfile,
   updateUserScore,
   getLeaderboard,
+  getUserRank,
   getUsersByRole,
   getPendingUsers,
   activateUser,
@@ -20,10 +22,10 @@ const {
 
 // Public routes
 router.post("/register", registerUser);
-router.post("/login", loginUser);
-router.post("/request-reset", requestPasswordReset);
-router.post("/reset-password", resetPassword);
-router.post("/set-password", setPassword);
+router.post("/login", loginRateLimit, loginUser);
+router.post("/request-reset", loginRateLimit, requestPasswordReset);
+router.post("/reset-password", loginRateLimit, resetPassword);
+router.post("/set-password", loginRateLimit, setPassword);
 
 // Protected routes
 router.get("/profile", protect, getUserProfile);
@@ -31,6 +33,7 @@ router.get("/", protect, isFaculty, getUsersByRole);
 router.get("/pending", protect, isFaculty, getPendingUsers);
 router.get("/active", protect, isFaculty, getActiveUsers);
 router.get("/leaderboard", protect, isFaculty, getLeaderboard);
+router.get("/:id/rank", protect, getUserRank);
 router.put("/:id/score", protect, isFaculty, updateUserScore);
 router.put("/:id/activate", protect, isFaculty, activateUser);
 router.post("/:id/generate-reset-link", protect, isFaculty, generateResetLink);
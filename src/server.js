@@ -1,9 +1,22 @@
 const express = require("express");
+const mongoose = require("mongoose");
 const cors = require("cors");
+const compression = require("compression");
+const zlib = require("zlib");
 const dotenv = require("dotenv");
 const connectDB = require("./config/db");
 const User = require("./models/User");
-const { exec } = require("child_process");
+const { withLock } = require("./utils/locks");
+const { watchScoringConfig } = require("./utils/scoringConfigCache");
+const { closeEventStreams } = require("./utils/events");
+const { ROSTER_BODY_LIMIT } = require("./utils/roster");
+const {
+  requestMetrics,
+  instrumentMongoose,
+  metricsHandler,
+} = require("./utils/metrics");
+const { execFile } = require("child_process");
+const { promisify } = require("util");
 const path = require("path");
 
 // Route imports
@@ -11,6 +24,8 @@ const userRoutes = require("./routes/userRoutes");
 const questionRoutes = require("./routes/questionRoutes");
 const scoringRoutes = require("./routes/scoringRoutes");
 const lectureRoutes = require("./routes/lectureRoutes");
+const syncRoutes = require("./routes/syncRoutes");
+const eventRoutes = require("./routes/eventRoutes");
 
 dotenv.config();
 
@@ -21,6 +36,8 @@ const app = express();
   try {
     await connectDB();
     console.log("Connected to MongoDB successfully");
+    instrumentMongoose(mongoose);
+    watchScoringConfig();
 
     // Check if admin exists and initialize if needed
     const checkAndInitAdmin = async () => {
@@ -42,14 +59,16 @@ const app = express();
           );
 
           // Run the init-admin.js script with the full path
-          exec(`node ${scriptPath}`, (error, stdout, stderr) => {
-            if (error) {
-              console.error(`Error executing init-admin script: ${error}`);
-              return;
-            }
+          try {
+            const { stdout, stderr } = await promisify(execFile)(
+              process.execPath,
+              [scriptPath]
+            );
             console.log(stdout);
             if (stderr) console.error(stderr);
-          });
+          } catch (error) {
+            console.error(`Error executing init-admin script: ${error}`);
+          }
         } else {
           console.log("Admin account exists. Skipping initialization.");
         }
@@ -58,8 +77,15 @@ const app = express();
       }
     };
 
-    // Call the admin check function
-    await checkAndInitAdmin();
+    // Only one process (cluster worker or container) runs the admin check;
+    // the others see the lock held and skip it
+    const { acquired } = await withLock(
+      "startup:init-admin",
+      checkAndInitAdmin
+    );
+    if (!acquired) {
+      console.log("Admin initialization running in another process.");
+    }
   } catch (error) {
     console.error("MongoDB connection error:", error);
     process.exit(1);
@@ -73,13 +99,59 @@ const corsOptions = {
       ? true // Allow all origins in Docker environment
       : ["http://localhost:3000", "http://127.0.0.1:3000"],
   methods: ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-  allowedHeaders: ["Content-Type", "Authorization"],
+  allowedHeaders: [
+    "Content-Type",
+    "Authorization",
+    "If-None-Match",
+    "If-Modified-Since",
+    "Last-Event-ID",
+  ],
+  exposedHeaders: [
+    "X-Next-Cursor",
+    "X-Sync-Cursor",
+    "ETag",
+    "Last-Modified",
+    "Content-Disposition",
+  ],
   credentials: true,
   optionsSuccessStatus: 200,
 };
 
+// Compress responses larger than COMPRESSION_THRESHOLD bytes with brotli or
+// gzip, whichever the client accepts. Brotli runs at quality 4, which costs
+// about what gzip does; its default of 11 is meant for static files. Event
+// streams are left alone so each event is sent the moment it is written.
+const shouldCompress = (req, res) =>
+  !String(res.getHeader("Content-Type") || "").startsWith(
+    "text/event-stream"
+  ) && compression.filter(req, res);
+const compressionOptions = {
+  threshold: parseInt(process.env.COMPRESSION_THRESHOLD || "1024", 10),
+  filter: shouldCompress,
+  brotli: { params: { [zlib.constants.BROTLI_PARAM_QUALITY]: 4 } },
+};
+
+// Set once shutdown starts; keep-alive clients are asked to reconnect, which
+// in cluster mode lands them on a worker that is not stopping
+let draining = false;
+const closeWhenDraining = (req, res, next) => {
+  if (draining) {
+    res.set("Connection", "close");
+  }
+  next();
+};
+
 // Middleware
+app.use(requestMetrics);
+app.use(closeWhenDraining);
 app.use(cors(corsOptions));
+app.use(compression(compressionOptions));
+// JSON rosters can be far larger than other bodies; once parsed here the
+// app-wide parser leaves them alone
+app.post(
+  "/api/lectures/:id/roster",
+  express.json({ limit: ROSTER_BODY_LIMIT })
+);
 app.use(express.json());
 app.use(express.urlencoded({ extended: true }));
 
@@ -88,6 +160,9 @@ app.use("/api/users", userRoutes);
 app.use("/api/questions", questionRoutes);
 app.use("/api/scoring", scoringRoutes);
 app.use("/api/lectures", lectureRoutes);
+app.use("/api/sync", syncRoutes);
+app.use("/api/events", eventRoutes);
+app.get("/metrics", metricsHandler);
 
 // Error Handling Middleware
 app.use((req, res, next) => {
@@ -107,6 +182,48 @@ app.use((err, req, res, next) => {
 });
 
 const PORT = process.env.PORT || 5000;
-app.listen(PORT, () => {
+const server = app.listen(PORT, () => {
   console.log(`Server is running on port ${PORT}`);
 });
+
+// Graceful shutdown: on SIGTERM/SIGINT stop accepting connections, let
+// in-flight requests finish, then close the database connection. In cluster
+// mode the primary forwards the signal to every worker.
+const SHUTDOWN_TIMEOUT_MS = parseInt(
+  process.env.SHUTDOWN_TIMEOUT_MS || "10000",
+  10
+);
+const shutdown = (signal) => {
+  if (draining) {
+    return;
+  }
+  draining = true;
+  console.log(`${signal} received: draining connections (pid ${process.pid})`);
+
+  const timer = setTimeout(() => {
+    console.error(
+      `Requests still open after ${SHUTDOWN_TIMEOUT_MS}ms; forcing exit`
+    );
+    process.exit(1);
+  }, SHUTDOWN_TIMEOUT_MS);
+  timer.unref();
+
+  server.close(async () => {
+    try {
+      await mongoose.disconnect();
+    } catch (error) {
+      console.error("Error disconnecting from MongoDB:", error.message);
+    }
+    console.log(`Shutdown complete (pid ${process.pid})`);
+    process.exit(0);
+  });
+  // Event streams never finish on their own; clients reconnect elsewhere
+  closeEventStreams();
+  // Idle keep-alive sockets would otherwise hold server.close() open
+  if (server.closeIdleConnections) {
+    server.closeIdleConnections();
+  }
+};
+
+process.on("SIGTERM", () => shutdown("SIGTERM"));
+process.on("SIGINT", () => shutdown("SIGINT"));
@@ -0,0 +1,157 @@
+const mongoose = require("mongoose");
+const Question = require("../models/Question");
+
+// Question quality analytics.
+//
+// Served from the gradeStats and suggestionStats aggregates that
+// utils/questionStore.js keeps on every question and answer, so no grade or
+// suggestion arrays are read. Lecture figures are summed from the aggregates
+// of the lecture's questions in one aggregation.
+// scripts/recompute-analytics.py rebuilds the same figures from a backup.
+
+const SCORES = [1, 2, 3];
+
+const toObjectId = (id) =>
+  id instanceof mongoose.Types.ObjectId ? id : new mongoose.Types.ObjectId(id);
+
+// { count, mean, histogram } from a { count, sum, distribution } aggregate
+const summarizeGrades = (stats) => {
+  const count = (stats && stats.count) || 0;
+  const distribution = (stats && stats.distribution) || [];
+  const histogram = {};
+  SCORES.forEach((score, i) => (histogram[score] = distribution[i] || 0));
+  return {
+    count,
+    mean: count > 0 ? stats.sum / count : null,
+    histogram,
+  };
+};
+
+// Suggestion counts plus the share of reviewed suggestions that were accepted
+const summarizeSuggestions = (stats) => {
+  const { count = 0, pending = 0, accepted = 0, rejected = 0 } = stats || {};
+  const reviewed = accepted + rejected;
+  return {
+    count,
+    pending,
+    accepted,
+    rejected,
+    acceptRate: reviewed > 0 ? accepted / reviewed : null,
+    rejectRate: reviewed > 0 ? rejected / reviewed : null,
+  };
+};
+
+const summarizeQuestion = (question) => ({
+  _id: question._id,
+  question: question.question,
+  isFinal: question.isFinal,
+  grades: summarizeGrades(question.gradeStats),
+  answers: (question.answers || []).map((answer) => ({
+    _id: answer._id,
+    isCorrect: answer.isCorrect,
+    grades: summarizeGrades(answer.gradeStats),
+  })),
+  suggestions: summarizeSuggestions(question.suggestionStats),
+});
+
+const QUESTION_FIELDS =
+  "question isFinal gradeStats suggestionStats " +
+  "answers._id answers.isCorrect answers.gradeStats";
+
+// Analytics for one question, or null if it does not exist
+const questionAnalytics = async (questionId) => {
+  const question = await Question.findById(questionId)
+    .select(QUESTION_FIELDS)
+    .lean();
+  return question ? summarizeQuestion(question) : null;
+};
+
+// Sum of one distribution slot over a question's answers
+const answerDistribution = (i) => ({
+  $sum: {
+    $map: {
+      input: "$answers",
+      in: { $arrayElemAt: ["$$this.gradeStats.distribution", i] },
+    },
+  },
+});
+
+const LECTURE_TOTALS = {
+  _id: null,
+  questions: { $sum: 1 },
+  finalized: { $sum: { $cond: ["$isFinal", 1, 0] } },
+  graded: { $sum: { $cond: [{ $gt: ["$gradeStats.count", 0] }, 1, 0] } },
+  gradeCount: { $sum: "$gradeStats.count" },
+  gradeSum: { $sum: "$gradeStats.sum" },
+  grade1: { $sum: { $arrayElemAt: ["$gradeStats.distribution", 0] } },
+  grade2: { $sum: { $arrayElemAt: ["$gradeStats.distribution", 1] } },
+  grade3: { $sum: { $arrayElemAt: ["$gradeStats.distribution", 2] } },
+  answerCount: { $sum: { $sum: "$answers.gradeStats.count" } },
+  answerSum: { $sum: { $sum: "$answers.gradeStats.sum" } },
+  answer1: { $sum: answerDistribution(0) },
+  answer2: { $sum: answerDistribution(1) },
+  answer3: { $sum: answerDistribution(2) },
+  suggestions: { $sum: "$suggestionStats.count" },
+  pending: { $sum: "$suggestionStats.pending" },
+  accepted: { $sum: "$suggestionStats.accepted" },
+  rejected: { $sum: "$suggestionStats.rejected" },
+};
+
+// Analytics for the questions of a lecture; with perQuestion, each
+// question's own figures are included as well
+const lectureAnalytics = async (lecture, { perQuestion = false } = {}) => {
+  const match = { $match: { _id: { $in: lecture.questions.map(toObjectId) } } };
+  const facets = { totals: [{ $group: LECTURE_TOTALS }] };
+  if (perQuestion) {
+    facets.questions = [
+      { $sort: { _id: 1 } },
+      {
+        $project: {
+          question: 1,
+          isFinal: 1,
+          gradeStats: 1,
+          suggestionStats: 1,
+          "answers._id": 1,
+          "answers.isCorrect": 1,
+          "answers.gradeStats": 1,
+        },
+      },
+    ];
+  }
+  const [result] = await Question.aggregate([match, { $facet: facets }]);
+  const totals = result.totals[0] || {};
+
+  const analytics = {
+    lecture: lecture._id,
+    questions: totals.questions || 0,
+    finalized: totals.finalized || 0,
+    graded: totals.graded || 0,
+    grades: summarizeGrades({
+      count: totals.gradeCount,
+      sum: totals.gradeSum,
+      distribution: [totals.grade1, totals.grade2, totals.grade3],
+    }),
+    answerGrades: summarizeGrades({
+      count: totals.answerCount,
+      sum: totals.answerSum,
+      distribution: [totals.answer1, totals.answer2, totals.answer3],
+    }),
+    suggestions: summarizeSuggestions({
+      count: totals.suggestions,
+      pending: totals.pending,
+      accepted: totals.accepted,
+      rejected: totals.rejected,
+    }),
+  };
+  if (perQuestion) {
+    analytics.perQuestion = result.questions.map(summarizeQuestion);
+  }
+  return analytics;
+};
+
+module.exports = {
+  summarizeGrades,
+  summarizeSuggestions,
+  questionAnalytics,
+  lectureAnalytics,
+};
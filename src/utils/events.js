@@ -0,0 +1,346 @@
+const mongoose = require("mongoose");
+const Event = require("../models/Event");
+const Lecture = require("../models/Lecture");
+
+// Live events (grades, suggestions, finalization, lecture membership) pushed
+// to clients as server-sent events.
+//
+// Write paths call publish(), which appends a small document to the capped
+// events collection. Every process with subscribers follows that collection
+// with one tailable cursor and fans each event out to its own connections,
+// so an event reaches clients whatever process they are connected to. This
+// needs no replica set, unlike a change stream. Subscribers listen on
+// channels, "lecture:<id>" and "question:<id>"; an event is written once per
+// matching connection however many of its channels match.
+//
+// A connection whose socket stops draining gets up to EVENTS_MAX_BUFFERED
+// events queued in memory; one more and it is closed. Clients reconnect with
+// Last-Event-ID and are replayed what they missed from the collection, or
+// told to reload with a "reset" event if it has already been overwritten.
+
+const MAX_BUFFERED = parseInt(process.env.EVENTS_MAX_BUFFERED || "100", 10);
+const HEARTBEAT_MS = parseInt(process.env.EVENTS_HEARTBEAT_MS || "25000", 10);
+const RETRY_MS = 1000; // wait before reopening a failed cursor
+const RESUME_SKEW_MS = 5000; // clock difference tolerated between processes
+const RECENT_EVENTS = 10000; // ids remembered to skip events seen twice
+
+const channels = new Map(); // channel -> Set of subscribers
+const subscribers = new Set();
+const recent = new Set();
+let tailing = false;
+let lastSeen = 0; // createdAt of the newest event fanned out
+let heartbeat = null;
+
+const stats = {
+  published: 0,
+  publishFailed: 0,
+  received: 0,
+  delivered: 0,
+  dropped: 0,
+};
+
+const frame = (event) =>
+  `id: ${event._id}\nevent: ${event.type}\ndata: ${JSON.stringify({
+    ...event.data,
+    at: new Date(event.createdAt).getTime(),
+  })}\n\n`;
+
+class Subscriber {
+  constructor(res, channelNames) {
+    this.res = res;
+    this.channels = channelNames;
+    this.backlog = [];
+    this.blocked = false;
+    this.closed = false;
+    // Live events wait here while missed ones are replayed
+    this.pending = [];
+    this.replaying = true;
+  }
+
+  send(text) {
+    if (this.closed) {
+      return;
+    }
+    if (this.blocked) {
+      if (this.backlog.length >= MAX_BUFFERED) {
+        // Too slow to keep up; it will resume from Last-Event-ID
+        stats.dropped += 1;
+        this.close();
+        return;
+      }
+      this.backlog.push(text);
+      return;
+    }
+    if (!this.res.write(text)) {
+      this.blocked = true;
+      this.res.once("drain", () => this.flush());
+    }
+  }
+
+  flush() {
+    this.blocked = false;
+    while (this.backlog.length > 0 && !this.closed) {
+      if (!this.res.write(this.backlog.shift())) {
+        this.blocked = true;
+        this.res.once("drain", () => this.flush());
+        return;
+      }
+    }
+  }
+
+  close() {
+    if (this.closed) {
+      return;
+    }
+    this.closed = true;
+    unsubscribe(this);
+    this.res.end();
+  }
+}
+
+const fanOut = (event) => {
+  const targets = new Set();
+  for (const channel of event.channels || []) {
+    for (const subscriber of channels.get(channel) || []) {
+      targets.add(subscriber);
+    }
+  }
+  if (targets.size === 0) {
+    return;
+  }
+  const text = frame(event);
+  for (const subscriber of targets) {
+    if (subscriber.replaying) {
+      subscriber.pending.push(event);
+    } else {
+      subscriber.send(text);
+      stats.delivered += 1;
+    }
+  }
+};
+
+const remember = (id) => {
+  const key = String(id);
+  if (recent.has(key)) {
+    return false;
+  }
+  recent.add(key);
+  if (recent.size > RECENT_EVENTS) {
+    recent.delete(recent.values().next().value);
+  }
+  return true;
+};
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Follow the collection while anyone here is subscribed. A fresh start
+// reads from the newest event already there, skipping it and anything
+// before it; a restart after a failure resumes from the last event seen.
+// Tailable cursors cannot use an index, so each (re)open scans the capped
+// collection once; client reconnects go through missedEvents instead.
+const tail = async () => {
+  tailing = true;
+  let from = lastSeen ? new Date(lastSeen - RESUME_SKEW_MS) : null;
+  while (subscribers.size > 0) {
+    let cursor = null;
+    let start = from;
+    let skipUntil = null;
+    try {
+      if (!start) {
+        const newest = await Event.findOne()
+          .sort({ $natural: -1 })
+          .select("createdAt")
+          .lean();
+        if (!newest) {
+          // A tailable cursor on an empty collection dies at once; wait for
+          // the first event and read everything from then on
+          from = new Date(0);
+          await sleep(RETRY_MS);
+          continue;
+        }
+        start = newest.createdAt;
+        skipUntil = newest._id;
+      }
+      cursor = Event.collection.find(
+        { createdAt: { $gte: start } },
+        { tailable: true, awaitData: true }
+      );
+      for await (const event of cursor) {
+        if (subscribers.size === 0) {
+          break;
+        }
+        if (skipUntil) {
+          // Published before this process started following
+          remember(event._id);
+          if (event._id.equals(skipUntil)) {
+            skipUntil = null;
+          }
+          continue;
+        }
+        // "tail" markers were written by earlier versions
+        if (event.type === "tail" || !remember(event._id)) {
+          continue;
+        }
+        stats.received += 1;
+        lastSeen = Math.max(lastSeen, new Date(event.createdAt).getTime());
+        fanOut(event);
+      }
+    } catch (error) {
+      console.error("Event stream cursor failed:", error.message);
+    } finally {
+      if (cursor) {
+        await cursor.close().catch(() => {});
+      }
+    }
+    from = lastSeen ? new Date(lastSeen - RESUME_SKEW_MS) : start;
+    if (subscribers.size > 0) {
+      await sleep(RETRY_MS);
+    }
+  }
+  tailing = false;
+};
+
+// Events after lastEventId that match the subscriber, or null if lastEventId
+// has already been overwritten. The window is read through the _id index,
+// from RESUME_SKEW_MS before lastEventId was created, and put back in
+// insertion order by record id, which is the order the tailing cursor
+// delivered events in; a $natural sort would scan the whole collection.
+const missedEvents = async (subscriber, lastEventId) => {
+  const last = new mongoose.Types.ObjectId(lastEventId);
+  const from = mongoose.Types.ObjectId.createFromTime(
+    Math.floor((last.getTimestamp().getTime() - RESUME_SKEW_MS) / 1000)
+  );
+  const events = await Event.find({
+    _id: { $gte: from },
+    $or: [{ _id: last }, { channels: { $in: subscriber.channels } }],
+  })
+    .setOptions({ showRecordId: true })
+    .lean();
+  events.sort((a, b) => Number(a.$recordId) - Number(b.$recordId));
+  const index = events.findIndex((event) => event._id.equals(last));
+  return index === -1 ? null : events.slice(index + 1);
+};
+
+// Start streaming events on the given channels to an SSE response, first
+// replaying those after lastEventId when the client is reconnecting
+const subscribe = async (res, channelNames, lastEventId) => {
+  const subscriber = new Subscriber(res, channelNames);
+  subscribers.add(subscriber);
+  for (const channel of channelNames) {
+    if (!channels.has(channel)) {
+      channels.set(channel, new Set());
+    }
+    channels.get(channel).add(subscriber);
+  }
+  res.on("close", () => subscriber.close());
+  if (!tailing) {
+    tail();
+  }
+  if (!heartbeat) {
+    // Comments keep proxies from timing out idle streams
+    heartbeat = setInterval(() => {
+      for (const each of subscribers) {
+        each.send(": ping\n\n");
+      }
+    }, HEARTBEAT_MS);
+    heartbeat.unref();
+  }
+
+  res.status(200);
+  res.set({
+    "Content-Type": "text/event-stream; charset=utf-8",
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+  });
+  res.flushHeaders();
+  subscriber.send(`retry: ${RETRY_MS}\n\n`);
+
+  const replayed = new Set();
+  if (lastEventId && mongoose.Types.ObjectId.isValid(lastEventId)) {
+    try {
+      const missed = await missedEvents(subscriber, lastEventId);
+      if (missed === null) {
+        subscriber.send("event: reset\ndata: {}\n\n");
+      } else {
+        for (const event of missed) {
+          replayed.add(String(event._id));
+          subscriber.send(frame(event));
+        }
+      }
+    } catch (error) {
+      console.error("Event replay failed:", error.message);
+      subscriber.send("event: reset\ndata: {}\n\n");
+    }
+  }
+  subscriber.replaying = false;
+  for (const event of subscriber.pending.splice(0)) {
+    if (!replayed.has(String(event._id))) {
+      subscriber.send(frame(event));
+      stats.delivered += 1;
+    }
+  }
+};
+
+const unsubscribe = (subscriber) => {
+  subscribers.delete(subscriber);
+  for (const channel of subscriber.channels) {
+    const members = channels.get(channel);
+    if (members) {
+      members.delete(subscriber);
+      if (members.size === 0) {
+        channels.delete(channel);
+      }
+    }
+  }
+  if (subscribers.size === 0 && heartbeat) {
+    clearInterval(heartbeat);
+    heartbeat = null;
+  }
+};
+
+// Record an event for a question (and the lectures it belongs to) or for a
+// lecture. Never throws: a lost event must not fail the write it reports.
+const publish = async (type, { question, lecture, data = {} }) => {
+  try {
+    const names = [];
+    const payload = { ...data };
+    if (question) {
+      names.push(`question:${question}`);
+      const lectures = await Lecture.find({ questions: question }).distinct(
+        "_id"
+      );
+      names.push(...lectures.map((id) => `lecture:${id}`));
+      payload.question = question;
+    }
+    if (lecture) {
+      names.push(`lecture:${lecture}`);
+      payload.lecture = lecture;
+    }
+    await Event.create({ type, channels: names, data: payload });
+    stats.published += 1;
+  } catch (error) {
+    stats.publishFailed += 1;
+    console.error(`Publish ${type} event error:`, error.message);
+  }
+};
+
+// End every stream, e.g. on shutdown; clients reconnect elsewhere
+const closeEventStreams = () => {
+  for (const subscriber of [...subscribers]) {
+    subscriber.close();
+  }
+};
+
+const eventStreamStats = () => ({
+  ...stats,
+  subscribers: subscribers.size,
+  channels: channels.size,
+  blocked: [...subscribers].filter((s) => s.blocked).length,
+});
+
+module.exports = {
+  publish,
+  subscribe,
+  closeEventStreams,
+  eventStreamStats,
+};
@@ -0,0 +1,297 @@
+const crypto = require("crypto");
+const mongoose = require("mongoose");
+const Question = require("../models/Question");
+const User = require("../models/User");
+const ExamDraw = require("../models/ExamDraw");
+const { EXPORT_FORMATS, EXPORT_FIELDS } = require("./exporters");
+
+// Exam assembly: personalised practice exams drawn from a lecture's
+// finalized questions.
+//
+// The candidates are read once per assembly, by _id from Lecture.questions,
+// with only their owner and gradeStats aggregate, and filtered on the mean
+// and number of students' question grades. Each student's exam is then a
+// weighted sample without replacement from that pool: every candidate gets
+// the key log(u) / weight, with u from a generator seeded by the assembly
+// seed and the student id, and the highest keys win. Weights are the
+// question's mean grade pulled towards 2 by two phantom grades, so better
+// rated questions come up more often without barely graded ones swinging
+// either way. Candidates are taken in key order, skipping questions the
+// student was given in the last recentDays and owners who already have
+// maxPerOwner questions in the exam; if that leaves the exam short, the
+// owner cap and then the repeat rule are relaxed, and the exam reports how
+// often. Students are handled EXAM_BATCH_SIZE at a time: one find for their
+// recent draws, one for the text of questions not yet rendered, and one
+// insertMany recording the new draws.
+
+const BATCH_SIZE = parseInt(process.env.EXAM_BATCH_SIZE || "250", 10);
+const REPEAT_DAYS = parseInt(process.env.EXAM_REPEAT_DAYS || "30", 10);
+const MAX_QUESTIONS = 200;
+const PRIOR_GRADES = 2;
+const PRIOR_MEAN = 2;
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+const integerOption = (value, name, min, max, fallback) => {
+  if (value === undefined || value === null || value === "") {
+    return fallback;
+  }
+  const number = Number(value);
+  if (!Number.isInteger(number) || number < min || number > max) {
+    throw new Error(`${name} must be an integer from ${min} to ${max}`);
+  }
+  return number;
+};
+
+// Assembly options from a request body, with defaults; throws on bad values
+const parseExamOptions = (body = {}) => {
+  const count = integerOption(body.count, "count", 1, MAX_QUESTIONS, 20);
+  const minScore =
+    body.minScore === undefined || body.minScore === null
+      ? 0
+      : Number(body.minScore);
+  if (!(minScore >= 0 && minScore <= 3)) {
+    throw new Error("minScore must be a number from 0 to 3");
+  }
+  const formatName = body.format || "jsonl";
+  if (!EXPORT_FORMATS[formatName]) {
+    throw new Error(
+      `format must be one of ${Object.keys(EXPORT_FORMATS).join(", ")}`
+    );
+  }
+  if (
+    body.students !== undefined &&
+    (!Array.isArray(body.students) ||
+      !body.students.every((id) => mongoose.Types.ObjectId.isValid(id)))
+  ) {
+    throw new Error("students must be an array of user ids");
+  }
+
+  return {
+    count,
+    minScore,
+    minGrades: integerOption(body.minGrades, "minGrades", 0, 1e6, 0),
+    maxPerOwner: integerOption(
+      body.maxPerOwner,
+      "maxPerOwner",
+      1,
+      MAX_QUESTIONS,
+      Math.ceil(count / 5)
+    ),
+    recentDays: integerOption(
+      body.recentDays,
+      "recentDays",
+      0,
+      3650,
+      REPEAT_DAYS
+    ),
+    seed:
+      body.seed !== undefined && body.seed !== null && body.seed !== ""
+        ? String(body.seed)
+        : crypto.randomBytes(8).toString("hex"),
+    formatName,
+    format: EXPORT_FORMATS[formatName],
+    students: body.students && [...new Set(body.students.map(String))],
+    dryRun: body.dryRun === true || body.dryRun === "true",
+  };
+};
+
+// Finalized questions of a lecture that meet the quality thresholds, as
+// { id, owner, weight }, in _id order so a seed always sees the same pool
+const loadCandidates = async (lecture, { minScore, minGrades }) => {
+  const questions = await Question.find({
+    _id: { $in: lecture.questions },
+    isFinal: true,
+  })
+    .select("owner gradeStats.count gradeStats.sum")
+    .lean();
+
+  const minimum = minScore > 0 ? Math.max(minGrades, 1) : minGrades;
+  const candidates = questions
+    .filter(({ gradeStats = {} }) => {
+      const count = gradeStats.count || 0;
+      return (
+        count >= minimum && (count === 0 || gradeStats.sum / count >= minScore)
+      );
+    })
+    .map(({ _id, owner, gradeStats = {} }) => ({
+      id: _id.toString(),
+      owner: String(owner),
+      weight:
+        ((gradeStats.sum || 0) + PRIOR_GRADES * PRIOR_MEAN) /
+        ((gradeStats.count || 0) + PRIOR_GRADES),
+    }))
+    .sort((a, b) => (a.id < b.id ? -1 : 1));
+  return { finalized: questions.length, candidates };
+};
+
+// mulberry32, seeded from the assembly seed and the student, so a student's
+// exam does not depend on who else is in the batch
+const studentRandom = (seed, student) => {
+  let state = crypto
+    .createHash("sha256")
+    .update(`${seed}:${student}`)
+    .digest()
+    .readUInt32LE(0);
+  return () => {
+    state = (state + 0x6d2b79f5) | 0;
+    let t = Math.imul(state ^ (state >>> 15), 1 | state);
+    t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+};
+
+// One student's questions: a weighted sample in key order, under the owner
+// cap and without recent repeats where the pool allows
+const drawExam = (candidates, random, recent, { count, maxPerOwner }) => {
+  const ranked = candidates
+    .map((candidate) => ({
+      candidate,
+      key: Math.log(1 - random()) / candidate.weight,
+    }))
+    .sort((a, b) => b.key - a.key);
+
+  const picked = [];
+  const taken = new Set();
+  const perOwner = new Map();
+  const underCap = ({ owner }) => (perOwner.get(owner) || 0) < maxPerOwner;
+  const passes = [
+    (c) => !recent.has(c.id) && underCap(c),
+    (c) => !recent.has(c.id),
+    () => true,
+  ];
+  let overOwnerCap = 0;
+  let repeats = 0;
+
+  passes.forEach((accept, pass) => {
+    for (const { candidate } of ranked) {
+      if (picked.length === count) {
+        return;
+      }
+      if (taken.has(candidate.id) || !accept(candidate)) {
+        continue;
+      }
+      if (!underCap(candidate)) {
+        overOwnerCap += 1;
+      }
+      if (pass === 2) {
+        repeats += 1;
+      }
+      picked.push(candidate);
+      taken.add(candidate.id);
+      perOwner.set(candidate.owner, (perOwner.get(candidate.owner) || 0) + 1);
+    }
+  });
+  return { questions: picked.map((c) => c.id), overOwnerCap, repeats };
+};
+
+// Ids of the questions each of these students was given since a date
+const recentDraws = async (students, since) => {
+  const recent = new Map(students.map((id) => [id, new Set()]));
+  if (since === null) {
+    return recent;
+  }
+  const draws = await ExamDraw.find({
+    student: { $in: students },
+    createdAt: { $gte: since },
+  })
+    .select("student questions")
+    .lean();
+  for (const { student, questions } of draws) {
+    const seen = recent.get(student.toString());
+    questions.forEach((id) => seen.add(id.toString()));
+  }
+  return recent;
+};
+
+// Draw an exam for each student, calling onExam with each as it is ready
+// (and waiting if it returns a promise), and return a summary. An exam's
+// content is its questions rendered in the requested export format.
+const assembleExams = async (
+  lecture,
+  candidates,
+  students,
+  options,
+  onExam
+) => {
+  const { count, recentDays, seed, format, dryRun } = options;
+  const since =
+    recentDays > 0 ? new Date(Date.now() - recentDays * DAY_MS) : null;
+  const rendered = new Map();
+  const summary = {
+    exams: 0,
+    short: 0,
+    overOwnerCap: 0,
+    repeats: 0,
+    distinctQuestions: 0,
+  };
+
+  for (let start = 0; start < students.length; start += BATCH_SIZE) {
+    const batch = students.slice(start, start + BATCH_SIZE);
+    const [recent, users] = await Promise.all([
+      recentDraws(batch, since),
+      User.find({ _id: { $in: batch } })
+        .select("name email")
+        .lean(),
+    ]);
+    const usersById = new Map(users.map((u) => [u._id.toString(), u]));
+
+    const exams = batch.map((student) => ({
+      student,
+      ...drawExam(
+        candidates,
+        studentRandom(seed, student),
+        recent.get(student),
+        options
+      ),
+    }));
+
+    const missing = [
+      ...new Set(exams.flatMap((exam) => exam.questions)),
+    ].filter((id) => !rendered.has(id));
+    if (missing.length > 0) {
+      const questions = await Question.find({ _id: { $in: missing } })
+        .select(EXPORT_FIELDS)
+        .lean();
+      questions.forEach((q) => rendered.set(q._id.toString(), format.item(q)));
+    }
+
+    for (const exam of exams) {
+      const user = usersById.get(exam.student) || { _id: exam.student };
+      await onExam({
+        student: { _id: user._id, name: user.name, email: user.email },
+        seed,
+        questions: exam.questions,
+        overOwnerCap: exam.overOwnerCap,
+        repeats: exam.repeats,
+        content:
+          format.header() +
+          exam.questions.map((id) => rendered.get(id)).join("") +
+          format.footer(),
+      });
+      summary.exams += 1;
+      summary.short += exam.questions.length < count ? 1 : 0;
+      summary.overOwnerCap += exam.overOwnerCap;
+      summary.repeats += exam.repeats;
+    }
+
+    if (!dryRun) {
+      await ExamDraw.insertMany(
+        exams.map(({ student, questions }) => ({
+          lecture: lecture._id,
+          student,
+          questions,
+          seed,
+        })),
+        { ordered: false }
+      );
+    }
+  }
+  summary.distinctQuestions = rendered.size;
+  return summary;
+};
+
+module.exports = {
+  parseExamOptions,
+  loadCandidates,
+  assembleExams,
+};
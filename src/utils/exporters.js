@@ -0,0 +1,192 @@
+// Question bank export formats.
+//
+// Each format turns one question ({ _id, question, answers, createdAt }) into
+// a self-contained piece of text, with an optional header and footer, so an
+// export can be streamed from a database cursor without holding the bank in
+// memory. scripts/qbank_formats.py produces byte-identical output offline;
+// keep the two in step.
+
+const LETTERS = ["A", "B", "C", "D"];
+
+// Characters XML 1.0 does not allow, even escaped
+const XML_INVALID = /[\u0000-\u0008\u000b\u000c\u000e-\u001f\ufffe\uffff]/g;
+
+const escapeXml = (text) =>
+  String(text)
+    .replace(XML_INVALID, "")
+    .replace(/&/g, "&amp;")
+    .replace(/</g, "&lt;")
+    .replace(/>/g, "&gt;")
+    .replace(/"/g, "&quot;")
+    .replace(/'/g, "&apos;");
+
+const csvField = (value) => {
+  const text = String(value);
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+};
+
+const isoDate = (date) => (date ? new Date(date).toISOString() : "");
+
+const correctLetters = (question) =>
+  question.answers
+    .map((answer, i) => (answer.isCorrect ? LETTERS[i] : null))
+    .filter(Boolean);
+
+const csv = {
+  extension: "csv",
+  contentType: "text/csv; charset=utf-8",
+  header: () =>
+    "id,question,answer_a,answer_b,answer_c,answer_d,correct,created_at\r\n",
+  item: (question) =>
+    [
+      question._id,
+      question.question,
+      ...LETTERS.map((_, i) =>
+        question.answers[i] ? question.answers[i].text : ""
+      ),
+      correctLetters(question).join(";"),
+      isoDate(question.createdAt),
+    ]
+      .map(csvField)
+      .join(",") + "\r\n",
+  footer: () => "",
+};
+
+const jsonl = {
+  extension: "jsonl",
+  contentType: "application/x-ndjson; charset=utf-8",
+  header: () => "",
+  item: (question) =>
+    JSON.stringify({
+      _id: String(question._id),
+      question: question.question,
+      answers: question.answers.map(({ text, isCorrect }) => ({
+        text,
+        isCorrect: Boolean(isCorrect),
+      })),
+      createdAt: isoDate(question.createdAt),
+    }) + "\n",
+  footer: () => "",
+};
+
+// IMS QTI 1.2 single-file item bank; multiple correct answers become a
+// multiple-response item scored all-or-nothing
+const qti = {
+  extension: "xml",
+  contentType: "application/xml; charset=utf-8",
+  header: () =>
+    '<?xml version="1.0" encoding="UTF-8"?>\n' +
+    '<questestinterop xmlns="http://www.imsglobal.org/xsd/ims_qtiasiv1p2">\n',
+  item: (question) => {
+    const correct = new Set(correctLetters(question));
+    const multiple = correct.size > 1;
+    const material = (text) =>
+      `<material><mattext texttype="text/plain">${escapeXml(
+        text
+      )}</mattext></material>`;
+
+    const labels = question.answers
+      .map(
+        (answer, i) =>
+          `          <response_label ident="${LETTERS[i]}">${material(
+            answer.text
+          )}</response_label>\n`
+      )
+      .join("");
+    const conditions = question.answers
+      .map((_, i) =>
+        correct.has(LETTERS[i])
+          ? `<varequal respident="response1">${LETTERS[i]}</varequal>`
+          : multiple
+          ? `<not><varequal respident="response1">${LETTERS[i]}</varequal></not>`
+          : ""
+      )
+      .join("");
+
+    return (
+      `  <item ident="q${question._id}" title="Question ${question._id}">\n` +
+      "    <presentation>\n" +
+      `      ${material(question.question)}\n` +
+      `      <response_lid ident="response1" rcardinality="${
+        multiple ? "Multiple" : "Single"
+      }">\n` +
+      '        <render_choice shuffle="No">\n' +
+      labels +
+      "        </render_choice>\n" +
+      "      </response_lid>\n" +
+      "    </presentation>\n" +
+      "    <resprocessing>\n" +
+      '      <outcomes><decvar varname="SCORE" vartype="Decimal" minvalue="0" maxvalue="100"/></outcomes>\n' +
+      '      <respcondition continue="No">\n' +
+      `        <conditionvar>${
+        multiple ? `<and>${conditions}</and>` : conditions
+      }</conditionvar>\n` +
+      '        <setvar action="Set" varname="SCORE">100</setvar>\n' +
+      "      </respcondition>\n" +
+      "    </resprocessing>\n" +
+      "  </item>\n"
+    );
+  },
+  footer: () => "</questestinterop>\n",
+};
+
+const escapeGift = (text) =>
+  String(text)
+    .replace(/[\\~=#{}:]/g, (c) => `\\${c}`)
+    .replace(/\r?\n/g, "\\n");
+
+// Moodle GIFT; with several correct answers each carries an equal share of
+// the credit and wrong answers cost the full mark
+const gift = {
+  extension: "gift",
+  contentType: "text/plain; charset=utf-8",
+  header: () => "",
+  item: (question) => {
+    const correct = question.answers.filter((a) => a.isCorrect).length;
+    const share = String(Number((100 / Math.max(correct, 1)).toFixed(5)));
+    const choices = question.answers.map((answer) => {
+      const text = escapeGift(answer.text);
+      if (correct <= 1) {
+        return `${answer.isCorrect ? "=" : "~"}${text}`;
+      }
+      return answer.isCorrect ? `~%${share}%${text}` : `~%-100%${text}`;
+    });
+    return (
+      `// id: ${question._id}\n` +
+      `::Q${question._id}::${escapeGift(question.question)}{\n` +
+      choices.map((choice) => `\t${choice}\n`).join("") +
+      "}\n\n"
+    );
+  },
+  footer: () => "",
+};
+
+const EXPORT_FORMATS = { csv, jsonl, qti, gift };
+
+// Fields an export reads from each question
+const EXPORT_FIELDS = "question answers.text answers.isCorrect createdAt";
+
+// Text chunks for a whole export, combining items into chunks of about
+// CHUNK_SIZE characters to keep per-write overhead low
+const CHUNK_SIZE = 64 * 1024;
+
+async function* exportChunks(format, questions) {
+  let buffer = format.header();
+  for await (const question of questions) {
+    buffer += format.item(question);
+    if (buffer.length >= CHUNK_SIZE) {
+      yield buffer;
+      buffer = "";
+    }
+  }
+  buffer += format.footer();
+  if (buffer) {
+    yield buffer;
+  }
+}
+
+module.exports = {
+  EXPORT_FORMATS,
+  EXPORT_FIELDS,
+  exportChunks,
+};
@@ -0,0 +1,309 @@
+const mongoose = require("mongoose");
+const User = require("../models/User");
+const Lecture = require("../models/Lecture");
+const LectureScore = require("../models/LectureScore");
+const ScoreEvent = require("../models/ScoreEvent");
+
+// Leaderboards.
+//
+// The global leaderboard reads User.score, which the score ledger keeps
+// current, through the { role, active, score, _id } index. Lecture
+// leaderboards live in LectureScore: a student's score in a lecture is the
+// sum of their score events on questions currently in that lecture. Entries
+// are updated as events are recorded and as questions are added to or
+// removed from lectures. Each entry carries a copy of the student's active
+// flag, refreshed on every write and by setLectureScoresActive when an
+// account is activated, so lecture top-K and rank queries count active
+// students through the { lecture, active, score, user } index as the global
+// ones do. Ties are broken by user id so ranks are stable.
+
+const DEFAULT_LIMIT = 100;
+const MAX_LIMIT = 1000;
+const STUDENT_FILTER = { role: "student", active: true };
+
+const toObjectId = (id) =>
+  id instanceof mongoose.Types.ObjectId ? id : new mongoose.Types.ObjectId(id);
+
+const clampLimit = (limit) => {
+  const parsed = parseInt(limit, 10);
+  if (!Number.isInteger(parsed) || parsed < 1) {
+    return DEFAULT_LIMIT;
+  }
+  return Math.min(parsed, MAX_LIMIT);
+};
+
+// Write summed { lecture, user } deltas as upserted $inc updates
+const incrementLectureScores = async (deltas) => {
+  const operations = [];
+  for (const { lecture, user, points, active } of deltas.values()) {
+    if (points !== 0) {
+      operations.push({
+        updateOne: {
+          filter: { lecture, user },
+          update: { $inc: { score: points }, $set: { active } },
+          upsert: true,
+        },
+      });
+    }
+  }
+  if (operations.length > 0) {
+    await LectureScore.bulkWrite(operations, { ordered: false });
+  }
+};
+
+const addDelta = (deltas, lecture, user, points, active) => {
+  const key = `${lecture}:${user}`;
+  const delta = deltas.get(key);
+  if (delta) {
+    delta.points += points;
+  } else {
+    deltas.set(key, { lecture, user, points, active });
+  }
+};
+
+// Map the ids of users who are students to their active flag
+const studentIds = async (userIds = null) => {
+  const filter = { role: "student" };
+  if (userIds) {
+    filter._id = { $in: [...userIds].map(toObjectId) };
+  }
+  const students = await User.find(filter).select("_id active").lean();
+  return new Map(
+    students.map((s) => [s._id.toString(), s.active === true])
+  );
+};
+
+// Apply newly recorded score events to the lecture leaderboards
+const applyLectureScores = async (events) => {
+  const questionIds = new Map();
+  for (const event of events) {
+    if (event.question && event.points) {
+      questionIds.set(event.question.toString(), toObjectId(event.question));
+    }
+  }
+  if (questionIds.size === 0) {
+    return;
+  }
+
+  const ids = [...questionIds.values()];
+  const lectures = await Lecture.aggregate([
+    { $match: { questions: { $in: ids } } },
+    { $project: { questions: { $setIntersection: ["$questions", ids] } } },
+  ]);
+  if (lectures.length === 0) {
+    return;
+  }
+
+  const lecturesByQuestion = new Map();
+  for (const lecture of lectures) {
+    for (const question of lecture.questions) {
+      const key = question.toString();
+      if (!lecturesByQuestion.has(key)) {
+        lecturesByQuestion.set(key, []);
+      }
+      lecturesByQuestion.get(key).push(lecture._id);
+    }
+  }
+
+  const students = await studentIds(
+    new Set(events.map((event) => event.user.toString()))
+  );
+  const deltas = new Map();
+  for (const event of events) {
+    const user = event.user.toString();
+    if (!event.question || !event.points || !students.has(user)) {
+      continue;
+    }
+    const matched = lecturesByQuestion.get(event.question.toString()) || [];
+    for (const lecture of matched) {
+      addDelta(
+        deltas,
+        lecture,
+        toObjectId(user),
+        event.points,
+        students.get(user)
+      );
+    }
+  }
+  await incrementLectureScores(deltas);
+};
+
+// Add (sign 1) or remove (sign -1) the ledger points of questions that were
+// attached to or detached from a lecture
+const adjustLectureQuestions = async (lectureId, questionIds, sign) => {
+  if (questionIds.length === 0) {
+    return;
+  }
+  const totals = await ScoreEvent.aggregate([
+    { $match: { question: { $in: questionIds.map(toObjectId) } } },
+    { $group: { _id: "$user", points: { $sum: "$points" } } },
+  ]);
+  const students = await studentIds(totals.map((row) => row._id.toString()));
+
+  const lecture = toObjectId(lectureId);
+  const deltas = new Map();
+  for (const { _id: user, points } of totals) {
+    if (students.has(user.toString())) {
+      addDelta(
+        deltas,
+        lecture,
+        user,
+        sign * points,
+        students.get(user.toString())
+      );
+    }
+  }
+  await incrementLectureScores(deltas);
+};
+
+// Top students, globally or within a lecture, as { _id, name, score }; the
+// first DEFAULT_LIMIT unless a limit (at most MAX_LIMIT) is given
+const topStudents = async ({ lecture, limit } = {}) => {
+  const size = clampLimit(limit);
+  if (!lecture) {
+    return User.find(STUDENT_FILTER)
+      .select("name score")
+      .sort({ score: -1, _id: 1 })
+      .limit(size)
+      .lean();
+  }
+
+  const entries = await LectureScore.find({
+    lecture: toObjectId(lecture),
+    active: true,
+  })
+    .sort({ score: -1, user: 1 })
+    .limit(size)
+    .lean();
+  const users = await User.find({ _id: { $in: entries.map((e) => e.user) } })
+    .select("name")
+    .lean();
+  const names = new Map(users.map((u) => [u._id.toString(), u.name]));
+  return entries.map((entry) => ({
+    _id: entry.user,
+    name: names.get(entry.user.toString()),
+    score: entry.score,
+  }));
+};
+
+// 1-based rank of an active student, globally or within a lecture, or null
+// if there is no such student. Ranks and totals count active students only,
+// as topStudents lists them; a student with no lecture entry yet is unranked
+// (rank null) and not counted in the total.
+const rankOf = async (userId, { lecture } = {}) => {
+  const user = toObjectId(userId);
+  const student = await User.findOne({ _id: user, ...STUDENT_FILTER })
+    .select("score")
+    .lean();
+  if (!student) {
+    return null;
+  }
+
+  if (!lecture) {
+    const [ahead, total] = await Promise.all([
+      User.countDocuments({
+        ...STUDENT_FILTER,
+        $or: [
+          { score: { $gt: student.score } },
+          { score: student.score, _id: { $lt: user } },
+        ],
+      }),
+      User.countDocuments(STUDENT_FILTER),
+    ]);
+    return { user, score: student.score, rank: ahead + 1, total };
+  }
+
+  const lectureId = toObjectId(lecture);
+  const active = { lecture: lectureId, active: true };
+  const entry = await LectureScore.findOne({ lecture: lectureId, user }).lean();
+  const score = entry ? entry.score : 0;
+  const [ahead, total] = await Promise.all([
+    entry
+      ? LectureScore.countDocuments({
+          ...active,
+          $or: [{ score: { $gt: score } }, { score, user: { $lt: user } }],
+        })
+      : 0,
+    LectureScore.countDocuments(active),
+  ]);
+  return {
+    user,
+    lecture: lectureId,
+    score,
+    rank: entry ? ahead + 1 : null,
+    total,
+  };
+};
+
+// Copy a change of the users' active flag onto their lecture entries
+const setLectureScoresActive = (userIds, active) =>
+  LectureScore.updateMany(
+    { user: { $in: userIds.map(toObjectId) } },
+    { $set: { active } }
+  );
+
+// Recompute every LectureScore from the ledger and current lecture contents
+const rebuildLectureScores = async ({ batchSize = 1000 } = {}) => {
+  const lecturesByQuestion = new Map();
+  const lectures = await Lecture.find().select("questions").lean();
+  for (const lecture of lectures) {
+    for (const question of lecture.questions) {
+      const key = question.toString();
+      if (!lecturesByQuestion.has(key)) {
+        lecturesByQuestion.set(key, []);
+      }
+      lecturesByQuestion.get(key).push(lecture._id);
+    }
+  }
+
+  const students = await studentIds();
+
+  const deltas = new Map();
+  const rows = ScoreEvent.aggregate([
+    { $match: { question: { $ne: null } } },
+    {
+      $group: {
+        _id: { question: "$question", user: "$user" },
+        points: { $sum: "$points" },
+      },
+    },
+  ])
+    .allowDiskUse(true)
+    .cursor({ batchSize });
+  for await (const { _id, points } of rows) {
+    const key = _id.user.toString();
+    if (!students.has(key)) {
+      continue;
+    }
+    const matched = lecturesByQuestion.get(_id.question.toString()) || [];
+    for (const lecture of matched) {
+      addDelta(deltas, lecture, _id.user, points, students.get(key));
+    }
+  }
+
+  await LectureScore.deleteMany({});
+  let batch = [];
+  let written = 0;
+  for (const { lecture, user, points, active } of deltas.values()) {
+    batch.push({ lecture, user, score: points, active });
+    if (batch.length >= batchSize) {
+      await LectureScore.insertMany(batch, { ordered: false });
+      written += batch.length;
+      batch = [];
+    }
+  }
+  if (batch.length > 0) {
+    await LectureScore.insertMany(batch, { ordered: false });
+    written += batch.length;
+  }
+  return written;
+};
+
+module.exports = {
+  applyLectureScores,
+  adjustLectureQuestions,
+  topStudents,
+  rankOf,
+  setLectureScoresActive,
+  rebuildLectureScores,
+};
@@ -0,0 +1,54 @@
+const os = require("os");
+const crypto = require("crypto");
+const Lock = require("../models/Lock");
+
+// Database-backed leases for work that must run in only one process, such as
+// the admin bootstrap at startup. Several cluster workers, or several
+// containers sharing a database, can start at the same moment; each calls
+// withLock() and only the one whose insert wins runs the task. The lease
+// expires after ttlMs, so a process that dies while holding it does not block
+// the task forever.
+
+const OWNER = `${os.hostname()}:${process.pid}:${crypto
+  .randomBytes(4)
+  .toString("hex")}`;
+
+const DUPLICATE_KEY = 11000;
+
+const acquire = async (name, ttlMs) => {
+  const now = new Date();
+  const expiresAt = new Date(now.getTime() + ttlMs);
+  try {
+    await Lock.create({ _id: name, owner: OWNER, expiresAt });
+    return true;
+  } catch (error) {
+    if (error.code !== DUPLICATE_KEY) {
+      throw error;
+    }
+  }
+  // Held already: take it over only if the holder's lease has run out
+  const taken = await Lock.findOneAndUpdate(
+    { _id: name, expiresAt: { $lte: now } },
+    { owner: OWNER, expiresAt },
+    { new: true }
+  );
+  return taken !== null;
+};
+
+const release = (name) => Lock.deleteOne({ _id: name, owner: OWNER });
+
+// Run task() if this process gets the lock; resolves to { acquired, result }
+const withLock = async (name, task, { ttlMs = 60000 } = {}) => {
+  if (!(await acquire(name, ttlMs))) {
+    return { acquired: false };
+  }
+  try {
+    return { acquired: true, result: await task() };
+  } finally {
+    await release(name).catch((error) => {
+      console.error(`Could not release lock ${name}:`, error.message);
+    });
+  }
+};
+
+module.exports = { withLock };
@@ -0,0 +1,481 @@
+// Request-level instrumentation exposed in the Prometheus text format.
+//
+// requestMetrics() times every request and runs the rest of the middleware
+// chain inside an AsyncLocalStorage context, so work done on behalf of a
+// request (MongoDB commands reported by the driver's command monitoring,
+// Mongoose populate calls) is attributed to it without threading state
+// through the controllers. Routes are labelled by their Express pattern
+// (/api/questions/:id), never the raw URL, to keep label cardinality fixed.
+// Response sizes are the bytes written to the socket, after compression.
+//
+// Process CPU time and bytes allocated on the V8 heap are totals for the
+// whole process; divided by the requests served between two scrapes of a
+// server doing nothing else they give the cost of one request.
+//
+// metricsHandler() serves everything on GET /metrics. Set METRICS_TOKEN to
+// require "Authorization: Bearer <token>", and SLOW_REQUEST_MS to log every
+// request slower than that with its database work.
+
+const { AsyncLocalStorage } = require("async_hooks");
+const { monitorEventLoopDelay } = require("perf_hooks");
+const v8 = require("v8");
+const { passwordHasherStats } = require("./passwordHasher");
+const { loginRateLimitStats } = require("../middleware/rateLimit");
+const { eventStreamStats } = require("./events");
+
+const storage = new AsyncLocalStorage();
+
+const LATENCY_BUCKETS = [
+  0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+];
+const DB_BUCKETS = [
+  0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5,
+];
+const COUNT_BUCKETS = [0, 1, 2, 5, 10, 25, 50, 100, 250];
+const SIZE_BUCKETS = [
+  256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216,
+];
+
+const escapeLabel = (value) =>
+  String(value)
+    .replace(/\\/g, "\\\\")
+    .replace(/\n/g, "\\n")
+    .replace(/"/g, '\\"');
+
+const labelText = (names, values) =>
+  names.length === 0
+    ? ""
+    : `{${names
+        .map((name, i) => `${name}="${escapeLabel(values[i])}"`)
+        .join(",")}}`;
+
+class Counter {
+  constructor(name, help, labelNames = []) {
+    Object.assign(this, { name, help, labelNames, type: "counter" });
+    this.values = new Map();
+  }
+
+  inc(labels = [], amount = 1) {
+    const key = labels.join("\u0000");
+    const entry = this.values.get(key);
+    if (entry) {
+      entry.value += amount;
+    } else {
+      this.values.set(key, { labels, value: amount });
+    }
+  }
+
+  // Copy a total kept elsewhere, e.g. by a module's own stats object
+  set(labels, value) {
+    this.values.set(labels.join("\u0000"), { labels, value });
+  }
+
+  render() {
+    return [...this.values.values()].map(
+      ({ labels, value }) =>
+        `${this.name}${labelText(this.labelNames, labels)} ${value}`
+    );
+  }
+}
+
+class Gauge extends Counter {
+  constructor(name, help, labelNames = []) {
+    super(name, help, labelNames);
+    this.type = "gauge";
+  }
+}
+
+class Histogram {
+  constructor(name, help, labelNames, buckets) {
+    Object.assign(this, { name, help, labelNames, buckets, type: "histogram" });
+    this.values = new Map();
+  }
+
+  observe(labels, value) {
+    const key = labels.join("\u0000");
+    let entry = this.values.get(key);
+    if (!entry) {
+      entry = {
+        labels,
+        counts: new Array(this.buckets.length).fill(0),
+        sum: 0,
+        count: 0,
+      };
+      this.values.set(key, entry);
+    }
+    const bucket = this.buckets.findIndex((bound) => value <= bound);
+    if (bucket !== -1) {
+      entry.counts[bucket] += 1;
+    }
+    entry.sum += value;
+    entry.count += 1;
+  }
+
+  render() {
+    const lines = [];
+    const names = [...this.labelNames, "le"];
+    for (const { labels, counts, sum, count } of this.values.values()) {
+      const own = labelText(this.labelNames, labels);
+      let cumulative = 0;
+      this.buckets.forEach((bound, i) => {
+        cumulative += counts[i];
+        const le = labelText(names, [...labels, bound]);
+        lines.push(`${this.name}_bucket${le} ${cumulative}`);
+      });
+      const inf = labelText(names, [...labels, "+Inf"]);
+      lines.push(`${this.name}_bucket${inf} ${count}`);
+      lines.push(`${this.name}_sum${own} ${sum}`);
+      lines.push(`${this.name}_count${own} ${count}`);
+    }
+    return lines;
+  }
+}
+
+const httpDuration = new Histogram(
+  "http_request_duration_seconds",
+  "Request latency by route and status",
+  ["method", "route", "status"],
+  LATENCY_BUCKETS
+);
+const httpInFlight = new Gauge(
+  "http_requests_in_flight",
+  "Requests being processed"
+);
+const httpInFlightMax = new Gauge(
+  "http_requests_in_flight_max",
+  "Most requests in flight at once since the previous scrape"
+);
+const dbCommandsPerRequest = new Histogram(
+  "http_request_db_commands",
+  "MongoDB commands issued per request",
+  ["method", "route"],
+  COUNT_BUCKETS
+);
+const populatesPerRequest = new Histogram(
+  "http_request_populate_calls",
+  "Mongoose populate calls per request",
+  ["method", "route"],
+  COUNT_BUCKETS
+);
+const responseSize = new Histogram(
+  "http_response_size_bytes",
+  "Bytes sent per response, headers included, after compression",
+  ["method", "route"],
+  SIZE_BUCKETS
+);
+const dbDuration = new Histogram(
+  "mongodb_command_duration_seconds",
+  "MongoDB command latency as reported by the driver",
+  ["command", "collection"],
+  DB_BUCKETS
+);
+const dbFailures = new Counter(
+  "mongodb_command_failures_total",
+  "MongoDB commands that failed",
+  ["command", "collection"]
+);
+const eventLoopLag = new Gauge(
+  "nodejs_eventloop_lag_seconds",
+  "Event loop delay percentiles since the previous scrape",
+  ["quantile"]
+);
+const eventLoopLagMax = new Gauge(
+  "nodejs_eventloop_lag_max_seconds",
+  "Largest event loop delay since the previous scrape"
+);
+const heapUsed = new Gauge("nodejs_heap_used_bytes", "V8 heap in use");
+const heapAllocated = new Counter(
+  "nodejs_heap_allocated_bytes_total",
+  "Bytes allocated on the V8 heap since the process started"
+);
+const cpuSeconds = new Counter(
+  "process_cpu_seconds_total",
+  "User and system CPU time used by the process",
+  ["mode"]
+);
+const residentMemory = new Gauge(
+  "process_resident_memory_bytes",
+  "Resident set size"
+);
+
+const passwordQueue = new Gauge(
+  "password_hash_queued",
+  "Password hash and verify operations waiting for a thread"
+);
+const passwordBusy = new Gauge(
+  "password_hash_threads_busy",
+  "Password hashing threads currently working"
+);
+const passwordRejected = new Counter(
+  "password_hash_rejected_total",
+  "Password operations refused because the queue was full"
+);
+const loginLimited = new Counter(
+  "login_rate_limited_total",
+  "Password endpoint requests refused by the rate limiter",
+  ["scope"]
+);
+const eventSubscribers = new Gauge(
+  "event_stream_subscribers",
+  "Open server-sent event connections"
+);
+const eventsDelivered = new Counter(
+  "events_delivered_total",
+  "Events written to event stream connections"
+);
+const eventsDropped = new Counter(
+  "event_stream_dropped_total",
+  "Event stream connections closed for falling too far behind"
+);
+
+const METRICS = [
+  httpDuration,
+  httpInFlight,
+  httpInFlightMax,
+  dbCommandsPerRequest,
+  populatesPerRequest,
+  responseSize,
+  dbDuration,
+  dbFailures,
+  eventLoopLag,
+  eventLoopLagMax,
+  heapUsed,
+  heapAllocated,
+  cpuSeconds,
+  residentMemory,
+  passwordQueue,
+  passwordBusy,
+  passwordRejected,
+  loginLimited,
+  eventSubscribers,
+  eventsDelivered,
+  eventsDropped,
+];
+
+// The histogram samples a 10 ms timer, so its values include that interval
+const LOOP_RESOLUTION_MS = 10;
+const loopDelay = monitorEventLoopDelay({ resolution: LOOP_RESOLUTION_MS });
+loopDelay.enable();
+const loopLagSeconds = (nanoseconds) =>
+  Math.max(0, nanoseconds / 1e6 - LOOP_RESOLUTION_MS) / 1000;
+
+// Allocation is the heap in use now plus all that garbage collection has
+// freed. The GC profiler records each collection; its record is folded into
+// the running total every few seconds so it never grows large.
+const heapAtStart = process.memoryUsage().heapUsed;
+let heapFreed = 0;
+let gcProfiler = null;
+const foldGcRecord = () => {
+  if (!gcProfiler) {
+    return;
+  }
+  for (const { beforeGC, afterGC } of gcProfiler.stop().statistics) {
+    heapFreed += Math.max(
+      0,
+      beforeGC.heapStatistics.usedHeapSize - afterGC.heapStatistics.usedHeapSize
+    );
+  }
+  gcProfiler.start();
+};
+if (v8.GCProfiler) {
+  gcProfiler = new v8.GCProfiler();
+  gcProfiler.start();
+  setInterval(foldGcRecord, 5000).unref();
+}
+
+let inFlight = 0;
+let peakInFlight = 0;
+
+const slowRequestMs = () => Number(process.env.SLOW_REQUEST_MS) || 0;
+
+// Express route pattern of a finished request, e.g. /api/questions/:id
+const routeOf = (req) => {
+  if (!req.route) {
+    return "unmatched";
+  }
+  const route = `${req.baseUrl}${req.route.path}`;
+  return route.length > 1 ? route.replace(/\/$/, "") : route;
+};
+
+const requestMetrics = (req, res, next) => {
+  // Event streams stay open for hours; event_stream_* metrics cover them
+  if (req.path === "/metrics" || req.path === "/api/events") {
+    return next();
+  }
+  const context = { populates: 0, dbCommands: 0, dbMs: 0, commands: [] };
+  const started = process.hrtime.bigint();
+  // One request at a time per HTTP/1.1 connection, so the socket's count
+  // of bytes written grows by exactly this response
+  const socket = req.socket;
+  const bytesBefore = socket.bytesWritten;
+  inFlight += 1;
+  peakInFlight = Math.max(peakInFlight, inFlight);
+
+  let done = false;
+  const finish = () => {
+    if (done) {
+      return;
+    }
+    done = true;
+    inFlight -= 1;
+    const seconds = Number(process.hrtime.bigint() - started) / 1e9;
+    const route = routeOf(req);
+    const status = res.headersSent ? res.statusCode : 499;
+    httpDuration.observe([req.method, route, status], seconds);
+    dbCommandsPerRequest.observe([req.method, route], context.dbCommands);
+    populatesPerRequest.observe([req.method, route], context.populates);
+    if (res.headersSent) {
+      responseSize.observe(
+        [req.method, route],
+        socket.bytesWritten - bytesBefore
+      );
+    }
+
+    const threshold = slowRequestMs();
+    if (threshold && seconds * 1000 >= threshold) {
+      console.warn(
+        "Slow request:",
+        JSON.stringify({
+          method: req.method,
+          url: req.originalUrl,
+          route,
+          status,
+          ms: Math.round(seconds * 1000),
+          dbCommands: context.dbCommands,
+          dbMs: Math.round(context.dbMs),
+          populates: context.populates,
+          slowestCommands: context.commands
+            .sort((a, b) => b.ms - a.ms)
+            .slice(0, 5),
+        })
+      );
+    }
+  };
+  res.on("finish", finish);
+  res.on("close", finish);
+  storage.run(context, next);
+};
+
+// Collection a command addresses, e.g. { find: "questions" }
+const commandCollection = (event) => {
+  const target = event.command && event.command[event.commandName];
+  if (typeof target === "string") {
+    return target;
+  }
+  return (event.command && event.command.collection) || "";
+};
+
+// Subscribe to the driver's command monitoring (needs monitorCommands: true
+// on the connection) and count populate calls on queries and documents
+const instrumentMongoose = (mongoose) => {
+  const pending = new Map();
+  const client = mongoose.connection.getClient();
+
+  client.on("commandStarted", (event) => {
+    pending.set(event.requestId, {
+      collection: commandCollection(event),
+      context: storage.getStore(),
+    });
+  });
+  const completed = (failed) => (event) => {
+    const started = pending.get(event.requestId);
+    if (!started) {
+      return;
+    }
+    pending.delete(event.requestId);
+    const labels = [event.commandName, started.collection];
+    dbDuration.observe(labels, event.duration / 1000);
+    if (failed) {
+      dbFailures.inc(labels);
+    }
+    const { context } = started;
+    if (context) {
+      context.dbCommands += 1;
+      context.dbMs += event.duration;
+      if (slowRequestMs()) {
+        context.commands.push({
+          command: event.commandName,
+          collection: started.collection,
+          ms: Math.round(event.duration * 10) / 10,
+        });
+      }
+    }
+  };
+  client.on("commandSucceeded", completed(false));
+  client.on("commandFailed", completed(true));
+
+  const countPopulate = (target) => {
+    const populate = target.populate;
+    target.populate = function (...args) {
+      const context = storage.getStore();
+      if (context) {
+        context.populates += 1;
+      }
+      return populate.apply(this, args);
+    };
+  };
+  // Model.populate is left alone: queries and documents call it internally
+  countPopulate(mongoose.Query.prototype);
+  countPopulate(mongoose.Document.prototype);
+};
+
+const metricsText = () => {
+  httpInFlight.set([], inFlight);
+  httpInFlightMax.set([], peakInFlight);
+  peakInFlight = inFlight;
+
+  for (const quantile of [50, 90, 99]) {
+    const lag = loopLagSeconds(loopDelay.percentile(quantile));
+    eventLoopLag.set([quantile / 100], lag);
+  }
+  eventLoopLagMax.set([], loopLagSeconds(loopDelay.max));
+  loopDelay.reset();
+
+  const memory = process.memoryUsage();
+  heapUsed.set([], memory.heapUsed);
+  if (gcProfiler) {
+    foldGcRecord();
+    heapAllocated.set([], memory.heapUsed - heapAtStart + heapFreed);
+  }
+  const cpu = process.cpuUsage();
+  cpuSeconds.set(["user"], cpu.user / 1e6);
+  cpuSeconds.set(["system"], cpu.system / 1e6);
+  residentMemory.set([], memory.rss);
+
+  const hasher = passwordHasherStats();
+  passwordQueue.set([], hasher.queued);
+  passwordBusy.set([], hasher.busy);
+  passwordRejected.set([], hasher.rejected);
+  const limiter = loginRateLimitStats();
+  loginLimited.set(["account"], limiter.limitedAccount);
+  loginLimited.set(["global"], limiter.limitedGlobal);
+  const events = eventStreamStats();
+  eventSubscribers.set([], events.subscribers);
+  eventsDelivered.set([], events.delivered);
+  eventsDropped.set([], events.dropped);
+
+  return (
+    METRICS.map((metric) =>
+      [
+        `# HELP ${metric.name} ${metric.help}`,
+        `# TYPE ${metric.name} ${metric.type}`,
+        ...metric.render(),
+      ].join("\n")
+    ).join("\n") + "\n"
+  );
+};
+
+const metricsHandler = (req, res) => {
+  const token = process.env.METRICS_TOKEN;
+  if (token && req.headers.authorization !== `Bearer ${token}`) {
+    return res.status(401).json({ message: "Not authorized to read metrics" });
+  }
+  res.set("Content-Type", "text/plain; version=0.0.4; charset=utf-8");
+  res.send(metricsText());
+};
+
+module.exports = {
+  requestMetrics,
+  instrumentMongoose,
+  metricsHandler,
+};
@@ -0,0 +1,140 @@
+const os = require("os");
+const path = require("path");
+const { Worker } = require("worker_threads");
+
+// bcrypt hashing and verification on a small pool of worker threads.
+//
+// A bcrypt round costs tens of milliseconds of CPU. Run on the event loop, a
+// burst of logins at the start of a class stalls every other request; here at
+// most PASSWORD_HASH_THREADS run at once, off the main thread, and the rest
+// wait in a FIFO queue. The queue is bounded by PASSWORD_HASH_MAX_QUEUE: past
+// that, calls fail at once with error.code === QUEUE_FULL so the caller can
+// answer 503 instead of letting latency grow without limit. In cluster mode
+// every worker process has its own pool.
+
+const QUEUE_FULL = "PASSWORD_QUEUE_FULL";
+
+const THREADS =
+  parseInt(process.env.PASSWORD_HASH_THREADS, 10) ||
+  Math.max(1, Math.min(4, os.cpus().length - 1));
+const MAX_QUEUE = parseInt(process.env.PASSWORD_HASH_MAX_QUEUE || "200", 10);
+const WORKER_PATH = path.join(__dirname, "passwordWorker.js");
+
+const idle = [];
+const queue = [];
+let threads = 0;
+let busy = 0;
+let nextId = 1;
+
+const stats = {
+  completed: 0,
+  rejected: 0,
+  failed: 0,
+  waitMs: 0,
+  implementation: null,
+};
+
+const dispatch = () => {
+  while (idle.length > 0 && queue.length > 0) {
+    const thread = idle.pop();
+    const task = queue.shift();
+    stats.waitMs += Date.now() - task.queuedAt;
+    thread.task = task;
+    busy += 1;
+    // Only busy threads keep the process alive, so shutdown is not held up
+    thread.worker.ref();
+    thread.worker.postMessage({ id: task.id, op: task.op, args: task.args });
+  }
+  if (queue.length > 0 && threads < THREADS) {
+    spawn();
+  }
+};
+
+const spawn = () => {
+  threads += 1;
+  const thread = { worker: new Worker(WORKER_PATH), task: null, ready: false };
+  thread.worker.unref();
+
+  thread.worker.on("message", (message) => {
+    if (message.ready) {
+      thread.ready = true;
+      stats.implementation = message.implementation;
+      idle.push(thread);
+      return dispatch();
+    }
+    const { task } = thread;
+    thread.task = null;
+    busy -= 1;
+    thread.worker.unref();
+    idle.push(thread);
+    if (message.error) {
+      stats.failed += 1;
+      task.reject(new Error(message.error));
+    } else {
+      stats.completed += 1;
+      task.resolve(message.result);
+    }
+    dispatch();
+  });
+
+  thread.worker.on("error", (error) => {
+    console.error("Password hashing thread failed:", error.message);
+  });
+
+  thread.worker.on("exit", () => {
+    threads -= 1;
+    const index = idle.indexOf(thread);
+    if (index !== -1) {
+      idle.splice(index, 1);
+    }
+    if (thread.task) {
+      busy -= 1;
+      stats.failed += 1;
+      thread.task.reject(new Error("Password hashing thread exited"));
+    }
+    if (!thread.ready) {
+      // The thread could not even start; respawning would only loop
+      for (const task of queue.splice(0)) {
+        stats.failed += 1;
+        task.reject(new Error("Password hashing thread failed to start"));
+      }
+      return;
+    }
+    dispatch();
+  });
+};
+
+const run = (op, args) =>
+  new Promise((resolve, reject) => {
+    if (queue.length >= MAX_QUEUE) {
+      stats.rejected += 1;
+      const error = new Error("Too many password operations queued");
+      error.code = QUEUE_FULL;
+      return reject(error);
+    }
+    const id = nextId;
+    nextId += 1;
+    queue.push({ id, op, args, resolve, reject, queuedAt: Date.now() });
+    dispatch();
+  });
+
+const hashPassword = (plain, rounds = 10) => run("hash", [plain, rounds]);
+
+const verifyPassword = async (plain, hash) =>
+  plain && hash ? run("compare", [String(plain), hash]) : false;
+
+const passwordHasherStats = () => ({
+  ...stats,
+  threads,
+  busy,
+  queued: queue.length,
+  maxQueue: MAX_QUEUE,
+  maxThreads: THREADS,
+});
+
+module.exports = {
+  hashPassword,
+  verifyPassword,
+  passwordHasherStats,
+  QUEUE_FULL,
+};
@@ -0,0 +1,30 @@
+const { parentPort } = require("worker_threads");
+
+// Worker thread for utils/passwordHasher.js. Uses the native bcrypt binding
+// when it is installed (an optional dependency) and the pure-JS bcryptjs
+// otherwise; both read and write the same $2a$/$2b$ hashes.
+
+let bcrypt;
+let implementation;
+try {
+  bcrypt = require("bcrypt");
+  implementation = "bcrypt";
+} catch (error) {
+  bcrypt = require("bcryptjs");
+  implementation = "bcryptjs";
+}
+
+const operations = {
+  hash: ([plain, rounds]) => bcrypt.hashSync(plain, rounds),
+  compare: ([plain, hash]) => bcrypt.compareSync(plain, hash),
+};
+
+parentPort.postMessage({ ready: true, implementation });
+
+parentPort.on("message", ({ id, op, args }) => {
+  try {
+    parentPort.postMessage({ id, result: operations[op](args) });
+  } catch (error) {
+    parentPort.postMessage({ id, error: error.message });
+  }
+});
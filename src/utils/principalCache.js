@@ -0,0 +1,80 @@
+const User = require("../models/User");
+
+// Short-lived, bounded cache of authenticated users for the protect
+// middleware, keyed by user id. Entries hold only the fields authorization
+// needs; anything else (score, profile data) must still be read from the
+// database. Entries expire after PRINCIPAL_CACHE_TTL_MS, which bounds how long
+// another process's role or activation change can go unnoticed here.
+
+const TTL_MS = parseInt(process.env.PRINCIPAL_CACHE_TTL_MS || "10000", 10);
+const MAX_ENTRIES = parseInt(process.env.PRINCIPAL_CACHE_MAX || "10000", 10);
+const PRINCIPAL_FIELDS = "name email role active";
+
+// Map iteration order is insertion order, so re-inserting on every hit keeps
+// the least recently used entry first
+const entries = new Map();
+const pending = new Map();
+const stats = { hits: 0, misses: 0, evictions: 0, invalidations: 0 };
+
+const remember = (id, user) => {
+  entries.delete(id);
+  entries.set(id, { user, expiresAt: Date.now() + TTL_MS });
+  if (entries.size > MAX_ENTRIES) {
+    entries.delete(entries.keys().next().value);
+    stats.evictions += 1;
+  }
+};
+
+// Return the principal for a user id, or null if the user does not exist
+const getPrincipal = async (userId) => {
+  const id = String(userId);
+  const entry = entries.get(id);
+  if (entry && entry.expiresAt > Date.now()) {
+    stats.hits += 1;
+    entries.delete(id);
+    entries.set(id, entry);
+    return entry.user;
+  }
+  stats.misses += 1;
+
+  // Concurrent requests from the same user share one query
+  let query = pending.get(id);
+  if (!query) {
+    query = User.findById(id)
+      .select(PRINCIPAL_FIELDS)
+      .lean()
+      .then((user) => {
+        // Skip caching if the user was invalidated while the query ran
+        if (pending.get(id) === query) {
+          pending.delete(id);
+          if (user) {
+            remember(id, Object.freeze(user));
+          }
+        }
+        return user;
+      });
+    query.catch(() => {
+      if (pending.get(id) === query) {
+        pending.delete(id);
+      }
+    });
+    pending.set(id, query);
+  }
+  return query;
+};
+
+// Drop a user's cached principal after a change to their role or activation
+const invalidatePrincipal = (userId) => {
+  stats.invalidations += 1;
+  entries.delete(String(userId));
+  pending.delete(String(userId));
+};
+
+const principalCacheStats = () => ({
+  ...stats,
+  size: entries.size,
+  maxEntries: MAX_ENTRIES,
+  ttlMs: TTL_MS,
+});
+
+module.exports = { getPrincipal, invalidatePrincipal, principalCacheStats };
@@ -0,0 +1,432 @@
+const mongoose = require("mongoose");
+const Question = require("../models/Question");
+const GradeBucket = require("../models/GradeBucket");
+const SuggestionBucket = require("../models/SuggestionBucket");
+const User = require("../models/User");
+
+// Storage for grades and edit suggestions.
+//
+// In the default "embedded" mode they live in arrays on the Question, as they
+// always have, each written with one update that pushes it and $incs the
+// question's aggregates. With QUESTION_STORAGE=bucketed they are appended to
+// GradeBucket and SuggestionBucket documents of bounded size. Each write is
+// then one $inc of the question's aggregates plus one $push into an open
+// bucket, whatever the question's history. Every such write also sets the
+// question's updatedAt, so list ETags and the changes feed see it. Reads
+// merge the buckets back into the embedded shape, so API responses look the
+// same in both modes.
+// scripts/migrate-question-storage.js moves existing data between modes.
+
+const BUCKETED = process.env.QUESTION_STORAGE === "bucketed";
+const GRADE_BUCKET_SIZE = 200;
+const SUGGESTION_BUCKET_SIZE = 50;
+const SUGGESTION_STATUSES = ["pending", "accepted", "rejected"];
+
+const storageMode = () => (BUCKETED ? "bucketed" : "embedded");
+
+const statsIncrement = (prefix, score) => ({
+  [`${prefix}.count`]: 1,
+  [`${prefix}.sum`]: score,
+  [`${prefix}.distribution.${score - 1}`]: 1,
+});
+
+// Push items into one of the question's buckets that still has room,
+// starting a new bucket when all are full
+const appendToBucket = (Model, field, size, question, items) =>
+  Model.updateOne(
+    { question, count: { $lte: size - items.length } },
+    { $push: { [field]: { $each: items } }, $inc: { count: items.length } },
+    { upsert: true }
+  );
+
+const isValidScore = (score) => [1, 2, 3].includes(score);
+
+// Record one student's grades for a question and its answers. Returns false
+// if the question is missing or final. Answer ids that are not on the
+// question are ignored. The aggregates are moved with $inc in the same
+// update that pushes embedded grades, so concurrent graders are not lost.
+const recordGrades = async (questionId, student, questionScore, answerGrades) => {
+  const question = await Question.findOne({ _id: questionId, isFinal: false })
+    .select("answers._id")
+    .lean();
+  if (!question) {
+    return false;
+  }
+  const answerIds = new Set(question.answers.map((a) => a._id.toString()));
+
+  const items = [];
+  const increment = {};
+  const push = {};
+  if (questionScore) {
+    items.push({ student, answer: null, score: questionScore });
+    Object.assign(increment, statsIncrement("gradeStats", questionScore));
+    push.grades = { student, questionScore };
+  }
+
+  // One grade per answer per submission; the last one given wins
+  const byAnswer = new Map();
+  answerGrades.forEach(({ answerId, score }) => {
+    if (answerIds.has(String(answerId))) {
+      byAnswer.set(String(answerId), score);
+    }
+  });
+  const arrayFilters = [];
+  for (const [answerId, score] of byAnswer) {
+    const name = `a${arrayFilters.length}`;
+    arrayFilters.push({
+      [`${name}._id`]: new mongoose.Types.ObjectId(answerId),
+    });
+    Object.assign(
+      increment,
+      statsIncrement(`answers.$[${name}].gradeStats`, score)
+    );
+    push[`answers.$[${name}].grades`] = { student, score };
+    items.push({ student, answer: answerId, score });
+  }
+  if (items.length === 0) {
+    return true;
+  }
+
+  const update = { $inc: increment, $set: { updatedAt: new Date() } };
+  if (!BUCKETED) {
+    update.$push = push;
+  }
+  const result = await Question.updateOne(
+    { _id: questionId, isFinal: false },
+    update,
+    { arrayFilters }
+  );
+  if (result.matchedCount === 0) {
+    return false; // finalized in the meantime
+  }
+  if (BUCKETED) {
+    await appendToBucket(
+      GradeBucket,
+      "grades",
+      GRADE_BUCKET_SIZE,
+      questionId,
+      items
+    );
+  }
+  return true;
+};
+
+// Add an edit suggestion. Returns false if the question is missing or final.
+const recordSuggestion = async (questionId, suggestion) => {
+  const update = {
+    $inc: { "suggestionStats.count": 1, "suggestionStats.pending": 1 },
+    $set: { updatedAt: new Date() },
+  };
+  if (!BUCKETED) {
+    update.$push = { editSuggestions: suggestion };
+  }
+  const result = await Question.updateOne(
+    { _id: questionId, isFinal: false },
+    update
+  );
+  if (result.matchedCount === 0) {
+    return false;
+  }
+  if (BUCKETED) {
+    await appendToBucket(
+      SuggestionBucket,
+      "suggestions",
+      SUGGESTION_BUCKET_SIZE,
+      questionId,
+      [suggestion]
+    );
+  }
+  return true;
+};
+
+const MAX_REVIEW_ATTEMPTS = 5;
+
+// $inc moving one suggestion between status counts ({} if it stays put)
+const statusChange = (previous, status) =>
+  previous === status
+    ? {}
+    : {
+        [`suggestionStats.${previous}`]: -1,
+        [`suggestionStats.${status}`]: 1,
+      };
+
+// Accept or reject a suggestion on a question read with at least its
+// embedded suggestions' _id, status and student (a lean read will do).
+// Returns the student who made it, or null if there is no such suggestion.
+// The counts in suggestionStats are moved with $inc, never written back
+// whole, so concurrent suggestions and reviews are not lost.
+const updateSuggestion = async (question, suggestionId, status, comment) => {
+  if (!SUGGESTION_STATUSES.includes(status)) {
+    throw new Error(`Invalid suggestion status: ${status}`);
+  }
+  if (!mongoose.Types.ObjectId.isValid(suggestionId)) {
+    return null;
+  }
+  const id = new mongoose.Types.ObjectId(suggestionId);
+
+  const embedded = (question.editSuggestions || []).find((suggestion) =>
+    id.equals(suggestion._id)
+  );
+  if (embedded) {
+    // Guarded on the status last read, so a review racing another one
+    // re-reads it and each moves the counts exactly once
+    let previous = embedded.status;
+    for (let attempt = 0; attempt < MAX_REVIEW_ATTEMPTS; attempt += 1) {
+      const change = statusChange(previous, status);
+      const update = {
+        $set: {
+          "editSuggestions.$.status": status,
+          "editSuggestions.$.rebuttalComment": comment,
+        },
+      };
+      if (Object.keys(change).length > 0) {
+        update.$inc = change;
+      }
+      const result = await Question.updateOne(
+        {
+          _id: question._id,
+          editSuggestions: { $elemMatch: { _id: id, status: previous } },
+        },
+        update
+      );
+      if (result.matchedCount > 0) {
+        return embedded.student;
+      }
+      const current = await Question.findById(question._id)
+        .select({ editSuggestions: { $elemMatch: { _id: id } } })
+        .lean();
+      if (!current || !current.editSuggestions || !current.editSuggestions[0]) {
+        return null;
+      }
+      previous = current.editSuggestions[0].status;
+    }
+    throw new Error("Suggestion is being reviewed concurrently, try again");
+  }
+
+  if (!BUCKETED) {
+    return null;
+  }
+  // The bucket's pre-image gives the status this update replaced, atomically
+  const bucket = await SuggestionBucket.findOneAndUpdate(
+    { question: question._id, "suggestions._id": id },
+    {
+      $set: {
+        "suggestions.$.status": status,
+        "suggestions.$.rebuttalComment": comment,
+      },
+    }
+  )
+    .select({ suggestions: { $elemMatch: { _id: id } } })
+    .lean();
+  if (!bucket) {
+    return null;
+  }
+  const [{ status: previous, student }] = bucket.suggestions;
+  // Touch the question even when only the rebuttal changed
+  const update = { $set: { updatedAt: new Date() } };
+  if (previous !== status) {
+    update.$inc = statusChange(previous, status);
+  }
+  await Question.updateOne({ _id: question._id }, update);
+  return student;
+};
+
+// Students who suggested edits (with the status of their first suggestion)
+// and students who graded the question itself, each listed once
+const participants = async (question) => {
+  const suggesters = new Map();
+  const graders = new Set();
+
+  const addSuggestion = ({ student, status }) => {
+    const id = (student._id || student).toString();
+    if (!suggesters.has(id)) {
+      suggesters.set(id, { student: student._id || student, status });
+    }
+  };
+  const addGrader = (student) => graders.add((student._id || student).toString());
+
+  question.editSuggestions.filter((s) => s.student).forEach(addSuggestion);
+  question.grades.filter((g) => g.student).forEach((g) => addGrader(g.student));
+
+  if (BUCKETED) {
+    const [suggestions, grades] = await Promise.all([
+      SuggestionBucket.aggregate([
+        { $match: { question: question._id } },
+        { $unwind: "$suggestions" },
+        { $sort: { "suggestions.createdAt": 1 } },
+        {
+          $group: {
+            _id: "$suggestions.student",
+            status: { $first: "$suggestions.status" },
+          },
+        },
+      ]),
+      GradeBucket.aggregate([
+        { $match: { question: question._id } },
+        { $unwind: "$grades" },
+        { $match: { "grades.answer": null } },
+        { $group: { _id: "$grades.student" } },
+      ]),
+    ]);
+    suggestions.forEach(({ _id, status }) =>
+      addSuggestion({ student: _id, status })
+    );
+    grades.forEach(({ _id }) => addGrader(_id));
+  }
+
+  return {
+    suggesters: [...suggesters.values()],
+    graders: [...graders].map((id) => new mongoose.Types.ObjectId(id)),
+  };
+};
+
+const byCreatedAt = (a, b) => new Date(a.createdAt) - new Date(b.createdAt);
+
+// Merge bucketed grades and suggestions into plain (lean) question objects,
+// in the shape the embedded arrays have, with students populated by name
+const hydrateQuestions = async (
+  questions,
+  { grades = true, suggestions = true, suggestedAnswers = true } = {}
+) => {
+  if (!BUCKETED || questions.length === 0 || (!grades && !suggestions)) {
+    return questions;
+  }
+  const ids = questions.map((q) => q._id);
+  const byId = new Map(questions.map((q) => [q._id.toString(), q]));
+  const students = new Set();
+  const added = [];
+
+  const [gradeBuckets, suggestionBuckets] = await Promise.all([
+    grades
+      ? GradeBucket.find({ question: { $in: ids } })
+          .select("question grades")
+          .lean()
+      : [],
+    suggestions
+      ? SuggestionBucket.find({ question: { $in: ids } })
+          .select(
+            suggestedAnswers
+              ? "question suggestions"
+              : "question -suggestions.suggestedAnswers"
+          )
+          .lean()
+      : [],
+  ]);
+
+  for (const bucket of gradeBuckets) {
+    const question = byId.get(bucket.question.toString());
+    for (const { _id, student, answer, score } of bucket.grades) {
+      const entry = answer
+        ? { _id, student, score }
+        : { _id, student, questionScore: score };
+      const target = answer
+        ? (question.answers || []).find((a) => a._id.equals(answer))
+        : question;
+      if (!target) {
+        continue;
+      }
+      target.grades = target.grades || [];
+      target.grades.push(entry);
+      students.add(student.toString());
+      added.push(entry);
+    }
+  }
+
+  for (const bucket of suggestionBuckets) {
+    const question = byId.get(bucket.question.toString());
+    question.editSuggestions = question.editSuggestions || [];
+    for (const suggestion of bucket.suggestions) {
+      question.editSuggestions.push(suggestion);
+      students.add(suggestion.student.toString());
+      added.push(suggestion);
+    }
+  }
+  for (const question of questions) {
+    if (question.editSuggestions) {
+      question.editSuggestions.sort(byCreatedAt);
+    }
+  }
+
+  if (students.size > 0) {
+    const users = await User.find({ _id: { $in: [...students] } })
+      .select("name")
+      .lean();
+    const names = new Map(users.map((u) => [u._id.toString(), u]));
+    for (const entry of added) {
+      entry.student = names.get(entry.student.toString()) || null;
+    }
+  }
+  return questions;
+};
+
+// Load one question for an API response, with suggestions merged in.
+// Bucketed grades are left out so write responses stay cheap; the
+// aggregates in gradeStats summarise them.
+const loadQuestion = async (questionId) => {
+  const question = await Question.findById(questionId)
+    .populate("owner", "name")
+    .populate("editSuggestions.student", "name")
+    .populate("grades.student", "name")
+    .populate("facultyComments.faculty", "name")
+    .lean();
+  if (!question) {
+    return null;
+  }
+  await hydrateQuestions([question], { grades: false });
+  return question;
+};
+
+// Load one edit suggestion, with its student's name, and the question's
+// suggestion counts: all a ?return=patch response or live event needs
+const loadSuggestion = async (questionId, suggestionId) => {
+  const id = new mongoose.Types.ObjectId(suggestionId);
+  const question = await Question.findById(questionId)
+    .select({
+      suggestionStats: 1,
+      editSuggestions: { $elemMatch: { _id: id } },
+    })
+    .populate("editSuggestions.student", "name")
+    .lean();
+  if (!question) {
+    return null;
+  }
+  let [suggestion = null] = question.editSuggestions || [];
+  if (!suggestion && BUCKETED) {
+    const bucket = await SuggestionBucket.findOne({
+      question: question._id,
+      "suggestions._id": id,
+    })
+      .select({ suggestions: { $elemMatch: { _id: id } } })
+      .lean();
+    if (bucket) {
+      [suggestion] = bucket.suggestions;
+      suggestion.student = await User.findById(suggestion.student)
+        .select("name")
+        .lean();
+    }
+  }
+  return { suggestion, suggestionStats: question.suggestionStats };
+};
+
+// Delete a removed question's buckets
+const removeQuestionData = async (questionId) => {
+  if (BUCKETED) {
+    await Promise.all([
+      GradeBucket.deleteMany({ question: questionId }),
+      SuggestionBucket.deleteMany({ question: questionId }),
+    ]);
+  }
+};
+
+module.exports = {
+  storageMode,
+  isValidScore,
+  recordGrades,
+  recordSuggestion,
+  updateSuggestion,
+  participants,
+  hydrateQuestions,
+  loadQuestion,
+  loadSuggestion,
+  removeQuestionData,
+};
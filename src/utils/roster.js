@@ -0,0 +1,389 @@
+const crypto = require("crypto");
+const mongoose = require("mongoose");
+const User = require("../models/User");
+const Lecture = require("../models/Lecture");
+const { hashPassword, passwordHasherStats } = require("./passwordHasher");
+const { invalidatePrincipal } = require("./principalCache");
+const { setLectureScoresActive } = require("./leaderboard");
+
+// Bulk roster import: create or activate student accounts and enrol them in a
+// lecture, ROSTER_BATCH_SIZE rows at a time.
+//
+// Each batch costs one find for the existing accounts, one insertMany for the
+// new ones, one bulkWrite for the inactive ones being activated and one
+// $addToSet on the lecture, instead of a register/activate/set-password round
+// trip per student. Passwords are hashed on the worker-thread pool, a few
+// more at a time than it has threads so it never sits idle nor overflows its
+// queue. A row that fails (bad email, faculty account, duplicate insert) is
+// reported with its row number and the rest of the roster carries on; in
+// replace mode an enrolled student whose row failed is not removed.
+// onProgress is called after each batch, and awaited if it returns a promise.
+
+const BATCH_SIZE = parseInt(process.env.ROSTER_BATCH_SIZE || "500", 10);
+const ROSTER_BODY_LIMIT = "20mb"; // CSV or JSON request body
+const MAX_REPORTED_ERRORS = 1000;
+const RESET_TOKEN_TTL_MS = 3600000; // 1 hour, as for createResetToken
+const EMAIL = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
+
+// RFC 4180 CSV: quoted fields may hold commas, quotes ("") and line breaks
+const parseCsv = (text) => {
+  const records = [];
+  let record = [];
+  let field = "";
+  let quoted = false;
+  const input = text.replace(/^\uFEFF/, "");
+  for (let i = 0; i < input.length; i += 1) {
+    const ch = input[i];
+    if (quoted) {
+      if (ch === '"' && input[i + 1] === '"') {
+        field += '"';
+        i += 1;
+      } else if (ch === '"') {
+        quoted = false;
+      } else {
+        field += ch;
+      }
+    } else if (ch === '"') {
+      quoted = true;
+    } else if (ch === ",") {
+      record.push(field);
+      field = "";
+    } else if (ch === "\n" || ch === "\r") {
+      if (ch === "\r" && input[i + 1] === "\n") {
+        i += 1;
+      }
+      record.push(field);
+      records.push(record);
+      record = [];
+      field = "";
+    } else {
+      field += ch;
+    }
+  }
+  if (field !== "" || record.length > 0) {
+    record.push(field);
+    records.push(record);
+  }
+  return records.filter((r) => r.some((value) => value.trim() !== ""));
+};
+
+const normaliseHeader = (name) =>
+  name.trim().toLowerCase().replace(/[\s-]+/g, "_");
+
+const toRow = (entry, row) => {
+  const name =
+    entry.name ||
+    [entry.first_name, entry.last_name].filter(Boolean).join(" ");
+  return {
+    row,
+    email: String(entry.email || "").trim(),
+    name: String(name || "").trim(),
+    password: entry.password ? String(entry.password) : "",
+  };
+};
+
+// Turn a CSV string (header row with email, name, password columns) or a
+// JSON array / { students: [...] } into rows numbered as the user sees them
+const parseRoster = (body) => {
+  if (typeof body === "string") {
+    const [header, ...records] = parseCsv(body);
+    if (!header) {
+      return [];
+    }
+    const columns = header.map(normaliseHeader);
+    if (!columns.includes("email")) {
+      throw new Error("The CSV header must include an email column");
+    }
+    // Row numbers count the header as row 1, like a spreadsheet
+    return records.map((values, i) =>
+      toRow(
+        Object.fromEntries(columns.map((column, c) => [column, values[c]])),
+        i + 2
+      )
+    );
+  }
+  const entries = Array.isArray(body) ? body : body && body.students;
+  if (!Array.isArray(entries)) {
+    throw new Error(
+      "Send the roster as text/csv, a JSON array or { students: [...] }"
+    );
+  }
+  return entries.map((entry, i) =>
+    toRow(
+      Object.fromEntries(
+        Object.entries(entry || {}).map(([k, v]) => [normaliseHeader(k), v])
+      ),
+      i + 1
+    )
+  );
+};
+
+// Run fn over items with at most `limit` calls in flight
+const mapWithLimit = async (items, limit, fn) => {
+  const results = new Array(items.length);
+  let next = 0;
+  const worker = async () => {
+    while (next < items.length) {
+      const index = next;
+      next += 1;
+      results[index] = await fn(items[index], index);
+    }
+  };
+  await Promise.all(
+    Array.from({ length: Math.min(limit, items.length) }, worker)
+  );
+  return results;
+};
+
+const importRoster = async (lectureId, rows, options = {}) => {
+  const { mode = "add", resetLinks = false, dryRun = false } = options;
+  const onProgress = options.onProgress || (() => {});
+  const linkBase = `${
+    process.env.FRONTEND_URL || "http://localhost:5173"
+  }/reset-password`;
+
+  const lecture = await Lecture.findById(lectureId).select("students").lean();
+  const enrolled = new Set(lecture.students.map(String));
+  const members = new Set();
+  // Existing accounts named by the roster, whether or not their row succeeded
+  const listed = new Set();
+
+  const summary = {
+    total: rows.length,
+    processed: 0,
+    created: 0,
+    activated: 0,
+    existing: 0,
+    enrolled: 0,
+    alreadyEnrolled: 0,
+    removed: 0,
+    failed: 0,
+    dryRun,
+  };
+  const errors = [];
+  const links = [];
+  const fail = (row, message) => {
+    summary.failed += 1;
+    if (errors.length < MAX_REPORTED_ERRORS) {
+      errors.push({ row: row.row, email: row.email, message });
+    }
+  };
+
+  // Validate everything up front; later duplicates of an email are errors
+  const seen = new Set();
+  const valid = [];
+  for (const row of rows) {
+    if (!EMAIL.test(row.email)) {
+      fail(row, "Invalid email address");
+    } else if (seen.has(row.email)) {
+      fail(row, "Duplicate email in roster");
+    } else {
+      seen.add(row.email);
+      valid.push(row);
+    }
+  }
+  summary.processed = rows.length - valid.length;
+  await onProgress({ ...summary });
+
+  const hashConcurrency = passwordHasherStats().maxThreads * 2;
+  const enrol = (id) => {
+    const key = String(id);
+    members.add(key);
+    if (enrolled.has(key)) {
+      summary.alreadyEnrolled += 1;
+    } else {
+      summary.enrolled += 1;
+    }
+  };
+
+  for (let start = 0; start < valid.length; start += BATCH_SIZE) {
+    const batch = valid.slice(start, start + BATCH_SIZE);
+    const existing = await User.find({
+      email: { $in: batch.map((row) => row.email) },
+    })
+      .select("_id email role active")
+      .lean();
+    const byEmail = new Map(existing.map((user) => [user.email, user]));
+    existing.forEach((user) => listed.add(String(user._id)));
+
+    const toCreate = [];
+    const toActivate = [];
+    const batchMembers = [];
+    for (const row of batch) {
+      const user = byEmail.get(row.email);
+      if (!user) {
+        if (row.name) {
+          toCreate.push({ row, _id: new mongoose.Types.ObjectId() });
+        } else {
+          fail(row, "Name is required for a new account");
+        }
+      } else if (user.role !== "student") {
+        fail(row, `Existing ${user.role} account`);
+      } else if (!user.active) {
+        toActivate.push({ row, _id: user._id });
+      } else {
+        summary.existing += 1;
+        batchMembers.push(user._id);
+      }
+    }
+
+    // Hash the passwords (or reset tokens) of new and activated accounts
+    const pending = [...toCreate, ...toActivate];
+    if (!dryRun) {
+      await mapWithLimit(pending, hashConcurrency, async (item) => {
+        try {
+          if (item.row.password) {
+            item.password = await hashPassword(item.row.password, 10);
+          } else if (resetLinks) {
+            item.token = crypto.randomBytes(32).toString("hex");
+            item.resetToken = await hashPassword(item.token, 10);
+          }
+        } catch (error) {
+          item.error = error.message;
+        }
+      });
+    }
+    const credentials = (item) => ({
+      ...(item.password
+        ? { password: item.password, passwordReset: false }
+        : { passwordReset: true }),
+      ...(item.resetToken
+        ? {
+            resetToken: item.resetToken,
+            resetTokenExpires: Date.now() + RESET_TOKEN_TTL_MS,
+          }
+        : {}),
+    });
+    const ready = (item) => {
+      if (item.error) {
+        fail(item.row, item.error);
+        return false;
+      }
+      return true;
+    };
+    const creating = toCreate.filter(ready);
+    const activating = toActivate.filter(ready);
+
+    let created = creating;
+    let activated = activating;
+    if (!dryRun && creating.length > 0) {
+      const writeErrors = new Map();
+      try {
+        await User.insertMany(
+          creating.map((item) => ({
+            _id: item._id,
+            email: item.row.email,
+            name: item.row.name,
+            role: "student",
+            active: true,
+            ...credentials(item),
+          })),
+          { ordered: false }
+        );
+      } catch (error) {
+        for (const writeError of error.writeErrors || []) {
+          writeErrors.set(writeError.index, writeError.errmsg);
+        }
+        if (!error.writeErrors) {
+          console.error("Roster insert error:", error);
+        }
+      }
+      // Ask the database which inserts landed rather than trusting the error
+      const inserted = new Set(
+        (
+          await User.find({ _id: { $in: creating.map((item) => item._id) } })
+            .select("_id")
+            .lean()
+        ).map((user) => String(user._id))
+      );
+      created = creating.filter((item, i) => {
+        if (inserted.has(String(item._id))) {
+          return true;
+        }
+        const message = writeErrors.get(i) || "Could not create account";
+        fail(
+          item.row,
+          /E11000/.test(message) ? "Email already registered" : message
+        );
+        return false;
+      });
+    }
+    if (!dryRun && activating.length > 0) {
+      const failedIndexes = new Set();
+      try {
+        await User.bulkWrite(
+          activating.map((item) => ({
+            updateOne: {
+              filter: { _id: item._id },
+              update: { $set: { active: true, ...credentials(item) } },
+            },
+          })),
+          { ordered: false }
+        );
+      } catch (error) {
+        const writeErrors = error.writeErrors || [];
+        if (writeErrors.length === 0) {
+          throw error;
+        }
+        for (const writeError of writeErrors) {
+          failedIndexes.add(writeError.index);
+        }
+      }
+      activated = activating.filter((item, i) => {
+        if (failedIndexes.has(i)) {
+          fail(item.row, "Could not activate account");
+          return false;
+        }
+        invalidatePrincipal(item._id);
+        return true;
+      });
+      if (activated.length > 0) {
+        await setLectureScoresActive(activated.map((item) => item._id), true);
+      }
+    }
+
+    summary.created += created.length;
+    summary.activated += activated.length;
+    for (const item of [...created, ...activated]) {
+      batchMembers.push(item._id);
+      if (item.token) {
+        links.push({
+          row: item.row.row,
+          email: item.row.email,
+          userId: String(item._id),
+          resetLink: `${linkBase}?token=${item.token}&id=${item._id}`,
+        });
+      }
+    }
+    batchMembers.forEach(enrol);
+    if (!dryRun && batchMembers.length > 0) {
+      await Lecture.updateOne(
+        { _id: lectureId },
+        { $addToSet: { students: { $each: batchMembers } } }
+      );
+    }
+
+    summary.processed += batch.length;
+    await onProgress({ ...summary });
+  }
+
+  // Replace mode: students missing from the roster leave the lecture; a
+  // student whose row failed is still on the roster and stays
+  if (mode === "replace") {
+    const leaving = [...enrolled].filter(
+      (id) => !members.has(id) && !listed.has(id)
+    );
+    summary.removed = leaving.length;
+    if (!dryRun && leaving.length > 0) {
+      await Lecture.updateOne(
+        { _id: lectureId },
+        { $pullAll: { students: leaving } }
+      );
+    }
+  }
+
+  errors.sort((a, b) => a.row - b.row);
+  return { ...summary, errors, links };
+};
+
+module.exports = { ROSTER_BODY_LIMIT, parseRoster, importRoster };
@@ -0,0 +1,149 @@
+const ScoreEvent = require("../models/ScoreEvent");
+const User = require("../models/User");
+const { applyLectureScores } = require("./leaderboard");
+
+// Append events to the ledger and apply them to User.score and the lecture
+// leaderboards. The round trips per call do not depend on how many events it
+// carries: one insertMany for the ledger, then one bulkWrite of $inc updates
+// (one per user) alongside the lecture leaderboard update.
+const recordScoreEvents = async (events) => {
+  const scored = events.filter((event) => event.points);
+  if (scored.length === 0) {
+    return;
+  }
+
+  await ScoreEvent.insertMany(scored, { ordered: false });
+
+  const totals = new Map();
+  for (const { user, points } of scored) {
+    const key = user.toString();
+    totals.set(key, (totals.get(key) || 0) + points);
+  }
+
+  const operations = [];
+  for (const [user, points] of totals) {
+    if (points !== 0) {
+      operations.push({
+        updateOne: {
+          filter: { _id: user },
+          update: { $inc: { score: points } },
+        },
+      });
+    }
+  }
+  await Promise.all([
+    operations.length > 0
+      ? User.bulkWrite(operations, { ordered: false })
+      : null,
+    applyLectureScores(scored),
+  ]);
+};
+
+const recordScoreEvent = (user, type, points, question) =>
+  recordScoreEvents([{ user, type, points, question }]);
+
+// Set a user's score and ledger the change as an adjustment. The change is
+// taken from the score the $set replaced, so an event recorded concurrently
+// is neither lost nor counted twice. Returns { previous, score }, or null
+// if there is no such user.
+const setScore = async (userId, score) => {
+  const before = await User.findOneAndUpdate(
+    { _id: userId },
+    { $set: { score } },
+    { new: false }
+  )
+    .select("score")
+    .lean();
+  if (!before) {
+    return null;
+  }
+  const previous = before.score || 0;
+  if (score !== previous) {
+    await ScoreEvent.create({
+      user: before._id,
+      type: "adjustment",
+      points: score - previous,
+    });
+  }
+  return { previous, score };
+};
+
+// Sum the ledger per user
+const ledgerTotals = async () => {
+  const rows = await ScoreEvent.aggregate([
+    { $group: { _id: "$user", score: { $sum: "$points" } } },
+  ]).allowDiskUse(true);
+  return new Map(rows.map((row) => [row._id.toString(), row.score]));
+};
+
+// Rewrite every User.score from the ledger. Users without events get 0.
+// Returns the users whose stored score disagreed with the ledger.
+const recomputeScores = async ({ dryRun = false, batchSize = 1000 } = {}) => {
+  const totals = await ledgerTotals();
+  const mismatches = [];
+  let operations = [];
+
+  const flush = async () => {
+    if (!dryRun && operations.length > 0) {
+      await User.bulkWrite(operations, { ordered: false });
+    }
+    operations = [];
+  };
+
+  const cursor = User.find().select("score").lean().cursor();
+  for await (const user of cursor) {
+    const expected = totals.get(user._id.toString()) || 0;
+    if (user.score !== expected) {
+      mismatches.push({ user: user._id, stored: user.score, ledger: expected });
+      operations.push({
+        updateOne: {
+          filter: { _id: user._id },
+          update: { $set: { score: expected } },
+        },
+      });
+      if (operations.length >= batchSize) {
+        await flush();
+      }
+    }
+  }
+  await flush();
+  return mismatches;
+};
+
+// Record each user's unledgered score (stored score minus ledger total) as a
+// baseline event, so data that predates the ledger survives a recompute
+const seedBaseline = async ({ dryRun = false, batchSize = 1000 } = {}) => {
+  const totals = await ledgerTotals();
+  let events = [];
+  let seeded = 0;
+
+  const flush = async () => {
+    if (!dryRun && events.length > 0) {
+      await ScoreEvent.insertMany(events, { ordered: false });
+    }
+    seeded += events.length;
+    events = [];
+  };
+
+  const cursor = User.find().select("score").lean().cursor();
+  for await (const user of cursor) {
+    const difference =
+      (user.score || 0) - (totals.get(user._id.toString()) || 0);
+    if (difference !== 0) {
+      events.push({ user: user._id, type: "baseline", points: difference });
+      if (events.length >= batchSize) {
+        await flush();
+      }
+    }
+  }
+  await flush();
+  return seeded;
+};
+
+module.exports = {
+  recordScoreEvents,
+  recordScoreEvent,
+  setScore,
+  recomputeScores,
+  seedBaseline,
+};
@@ -0,0 +1,140 @@
+const ScoringConfig = require("../models/ScoringConfig");
+
+// In-process cache of the ScoringConfig singleton.
+//
+// The config is read on every scoring event but changes rarely. A cached copy
+// is served until it is older than SCORING_CONFIG_TTL_MS. It is then
+// revalidated by comparing its version field, which is a small projected read,
+// and reloaded only if another process saved a newer version. Writes made
+// through this process call invalidateScoringConfig(). When the database
+// supports change streams, watchScoringConfig() also invalidates the cache as
+// soon as any process writes, so the TTL becomes only a fallback. Every
+// invalidation bumps a generation counter; a load or revalidation that was
+// already in flight when it happened does not overwrite the cache.
+
+const TTL_MS = parseInt(process.env.SCORING_CONFIG_TTL_MS || "5000", 10);
+
+let cached = null; // plain object snapshot of the config document
+let checkedAt = 0;
+let pending = null; // shared promise so concurrent misses query once
+let generation = 0; // bumped by every invalidation
+let changeStream = null;
+
+const stats = {
+  hits: 0,
+  misses: 0,
+  revalidations: 0,
+  reloads: 0,
+  invalidations: 0,
+  changeEvents: 0,
+};
+
+const load = async () => {
+  const started = generation;
+  const config = await ScoringConfig.getConfig();
+  stats.reloads += 1;
+  const snapshot = Object.freeze(config.toObject());
+  if (started !== generation) {
+    // Invalidated while reading: keep whatever the invalidation left
+    return cached || snapshot;
+  }
+  cached = snapshot;
+  checkedAt = Date.now();
+  return cached;
+};
+
+const revalidate = async () => {
+  const started = generation;
+  stats.revalidations += 1;
+  const current = await ScoringConfig.findOne().select("version").lean();
+  if (started !== generation) {
+    return cached || load();
+  }
+  const unchanged =
+    current &&
+    cached &&
+    current._id.equals(cached._id) &&
+    (current.version || 0) === (cached.version || 0);
+  if (unchanged) {
+    checkedAt = Date.now();
+    return cached;
+  }
+  return load();
+};
+
+// Return the current scoring config as a frozen plain object
+const getScoringConfig = async () => {
+  if (cached && Date.now() - checkedAt < TTL_MS) {
+    stats.hits += 1;
+    return cached;
+  }
+  stats.misses += 1;
+  if (!pending) {
+    const promise = (cached ? revalidate() : load()).finally(() => {
+      if (pending === promise) {
+        pending = null;
+      }
+    });
+    pending = promise;
+  }
+  return pending;
+};
+
+// Drop the cached copy, or replace it with a freshly saved document
+const invalidateScoringConfig = (config) => {
+  stats.invalidations += 1;
+  generation += 1;
+  pending = null; // later misses must not join a read from before the write
+  if (config) {
+    cached = Object.freeze(config.toObject ? config.toObject() : config);
+    checkedAt = Date.now();
+  } else {
+    cached = null;
+    checkedAt = 0;
+  }
+};
+
+// Invalidate on writes from any process. Change streams need a replica set;
+// on a standalone server this fails and the TTL check remains in effect.
+const watchScoringConfig = () => {
+  if (changeStream || process.env.SCORING_CONFIG_WATCH === "false") {
+    return;
+  }
+  try {
+    changeStream = ScoringConfig.watch([], { fullDocument: "updateLookup" });
+  } catch (error) {
+    console.log(`Scoring config change stream unavailable: ${error.message}`);
+    return;
+  }
+  changeStream.on("change", (change) => {
+    stats.changeEvents += 1;
+    invalidateScoringConfig(change.fullDocument);
+  });
+  changeStream.on("error", (error) => {
+    console.log(
+      `Scoring config change stream closed (${error.message}); ` +
+        `falling back to ${TTL_MS}ms revalidation`
+    );
+    changeStream.close().catch(() => {});
+    changeStream = null;
+  });
+};
+
+const scoringConfigCacheStats = () => ({
+  ...stats,
+  hitRate:
+    stats.hits + stats.misses > 0
+      ? stats.hits / (stats.hits + stats.misses)
+      : 0,
+  ttlMs: TTL_MS,
+  version: cached ? cached.version || 0 : null,
+  ageMs: cached ? Date.now() - checkedAt : null,
+  watching: changeStream !== null,
+});
+
+module.exports = {
+  getScoringConfig,
+  invalidateScoringConfig,
+  watchScoringConfig,
+  scoringConfigCacheStats,
+};
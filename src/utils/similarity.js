@@ -0,0 +1,147 @@
+// Near-duplicate detection for questions.
+//
+// A question's stem and answer texts are normalized and cut into character
+// shingles, and a MinHash signature estimates the Jaccard similarity of two
+// shingle sets as the share of equal entries. The signature uses one
+// permutation hashing: each shingle is hashed once, the top bits choose one
+// of NUM_BINS bins and the bin keeps the smallest remaining value. Empty bins
+// borrow from the next non-empty bin ("rotation" densification). This costs
+// one hash per shingle instead of one per shingle per signature entry.
+//
+// The signature is split into BANDS bands of ROWS values, and each band is
+// hashed into a key stored on the question under a multikey index. Questions
+// sharing any band key are candidates (about 0.9998 likely at similarity 0.8,
+// 0.64 at 0.5), so a lookup reads a handful of index entries instead of
+// comparing against the whole bank. Candidates are then confirmed against
+// DUPLICATE_THRESHOLD using their signatures.
+//
+// scripts/find-duplicates.py computes identical signatures and keys in Python;
+// keep the two in step.
+
+const SHINGLE_SIZE = 5;
+const BIN_BITS = 6;
+const NUM_BINS = 1 << BIN_BITS;
+const VALUE_BITS = 32 - BIN_BITS;
+const VALUE_MASK = (1 << VALUE_BITS) - 1;
+const EMPTY = 0xffffffff;
+const BANDS = 16;
+const ROWS = NUM_BINS / BANDS;
+const DUPLICATE_THRESHOLD = 0.7;
+
+const FNV_OFFSET = 0x811c9dc5;
+const FNV_PRIME = 0x01000193;
+
+// MurmurHash3 32-bit finalizer
+const fmix32 = (value) => {
+  let h = value >>> 0;
+  h ^= h >>> 16;
+  h = Math.imul(h, 0x85ebca6b);
+  h ^= h >>> 13;
+  h = Math.imul(h, 0xc2b2ae35);
+  h ^= h >>> 16;
+  return h >>> 0;
+};
+
+// Lowercase, keep letters and digits, collapse everything else to one space
+const normalize = (text) =>
+  text
+    .normalize("NFKC")
+    .toLowerCase()
+    .replace(/[^\p{L}\p{N}]+/gu, " ")
+    .trim();
+
+// Text compared for a question: stem plus answers, in a fixed order so that
+// reordered answers do not change the signature
+const questionText = (question, answers = []) =>
+  [
+    normalize(question),
+    ...answers.map((a) => normalize(a.text || "")).sort(),
+  ].join(" ");
+
+// FNV-1a over the code points of one shingle
+const hashShingle = (codePoints, start) => {
+  let h = FNV_OFFSET;
+  for (let i = start; i < start + SHINGLE_SIZE && i < codePoints.length; i++) {
+    h ^= codePoints[i];
+    h = Math.imul(h, FNV_PRIME) >>> 0;
+  }
+  return h;
+};
+
+const shingleHashes = (text) => {
+  const codePoints = Array.from(text, (c) => c.codePointAt(0));
+  const count = Math.max(1, codePoints.length - SHINGLE_SIZE + 1);
+  const hashes = new Set();
+  for (let i = 0; i < count; i++) {
+    hashes.add(hashShingle(codePoints, i));
+  }
+  return hashes;
+};
+
+const minhash = (text) => {
+  const signature = new Array(NUM_BINS).fill(EMPTY);
+  for (const shingle of shingleHashes(text)) {
+    const h = fmix32(shingle);
+    const bin = h >>> VALUE_BITS;
+    const value = h & VALUE_MASK;
+    if (value < signature[bin]) {
+      signature[bin] = value;
+    }
+  }
+
+  // Fill each empty bin from the next non-empty one, offset by the distance
+  // so borrowed values cannot collide with a bin's own values
+  for (let bin = 0; bin < NUM_BINS; bin++) {
+    if (signature[bin] !== EMPTY) {
+      continue;
+    }
+    for (let distance = 1; distance < NUM_BINS; distance++) {
+      const value = signature[(bin + distance) % NUM_BINS];
+      if (value !== EMPTY && value <= VALUE_MASK) {
+        signature[bin] = value + distance * (VALUE_MASK + 1);
+        break;
+      }
+    }
+  }
+  return signature;
+};
+
+const bandKeys = (signature) => {
+  const keys = [];
+  for (let band = 0; band < BANDS; band++) {
+    let h = FNV_OFFSET;
+    for (let row = band * ROWS; row < (band + 1) * ROWS; row++) {
+      h = fmix32(h ^ signature[row]);
+    }
+    keys.push(`${band}-${h.toString(16)}`);
+  }
+  return keys;
+};
+
+// { minhash, bands } to store on a question
+const questionSignature = (question, answers) => {
+  const signature = minhash(questionText(question, answers));
+  return { minhash: signature, bands: bandKeys(signature) };
+};
+
+// Estimated Jaccard similarity of two signatures
+const estimateSimilarity = (a, b) => {
+  if (!a || !b || a.length !== b.length) {
+    return 0;
+  }
+  let equal = 0;
+  for (let i = 0; i < a.length; i++) {
+    if (a[i] === b[i]) {
+      equal += 1;
+    }
+  }
+  return equal / a.length;
+};
+
+module.exports = {
+  DUPLICATE_THRESHOLD,
+  normalize,
+  questionText,
+  questionSignature,
+  estimateSimilarity,
+};
@@ -0,0 +1,109 @@
+const crypto = require("crypto");
+const mongoose = require("mongoose");
+
+// Conditional GETs and sync cursors for the question and lecture lists.
+//
+// A list's version is the number of documents matching its filter plus the
+// latest updatedAt among them; any insert, update or delete changes one of
+// the two. getQuestions and getLectures send it as an ETag (and the time as
+// Last-Modified) and answer 304 Not Modified when the client already holds
+// it, after two small index reads instead of loading, populating and
+// serialising every document. Paged requests (?limit= or ?cursor=) carry no
+// validators, since counting the whole filter would cost more than the page.
+// A list filtered through another document, like a lecture's questions, also
+// passes a scope (the id list) that is folded into the version: swapping one
+// question for an older one leaves the count and latest updatedAt as they
+// were. Grade and suggestion writes touch their question's updatedAt, so
+// they count too.
+//
+// A sync cursor is a time in milliseconds, followed by "_<id>" when a page of
+// changes was cut short at that document. New cursors are taken before the
+// reads they cover and backed off by SYNC_SKEW_MS, so writes still in flight
+// (or stamped by a process whose clock runs a little behind) are picked up by
+// the next sync. A change delivered twice merges harmlessly on the client.
+
+const SKEW_MS = parseInt(process.env.SYNC_SKEW_MS || "2000", 10);
+
+const listVersion = async (Model, filter, scope = "") => {
+  const [count, latest] = await Promise.all([
+    Model.countDocuments(filter),
+    Model.findOne(filter).sort({ updatedAt: -1 }).select("updatedAt").lean(),
+  ]);
+  return {
+    count,
+    modified: latest && latest.updatedAt ? latest.updatedAt : new Date(0),
+    scope,
+  };
+};
+
+// Set the validators for this user and URL, and answer 304 if the client's
+// copy is current. Returns true when the response has been sent.
+const sendIfModified = (req, res, { count, modified, scope = "" }) => {
+  const hash = crypto
+    .createHash("sha1")
+    .update(
+      [
+        req.user._id,
+        req.originalUrl,
+        req.get("Accept"),
+        count,
+        modified.getTime(),
+        scope,
+      ].join("|")
+    )
+    .digest("base64url");
+  res.set("Cache-Control", "private, no-cache");
+  res.set("ETag", `W/"${hash}"`);
+  res.set("Last-Modified", modified.toUTCString());
+  if (req.fresh) {
+    res.status(304).end();
+    return true;
+  }
+  return false;
+};
+
+// Scope for a list filtered to these ids
+const idListScope = (ids) =>
+  crypto
+    .createHash("sha1")
+    .update(ids.map(String).sort().join(","))
+    .digest("base64url");
+
+// Cursor from which a client can ask for changes after reading now
+const newCursor = () => String(Date.now() - SKEW_MS);
+
+const pageCursor = (doc) => `${doc.updatedAt.getTime()}_${doc._id}`;
+
+// { time, id } from a cursor string, or null if it is malformed
+const parseCursor = (value) => {
+  const match = /^(\d{1,15})(?:_([0-9a-f]{24}))?$/.exec(String(value || ""));
+  if (!match) {
+    return null;
+  }
+  return {
+    time: new Date(Number(match[1])),
+    id: match[2] ? new mongoose.Types.ObjectId(match[2]) : null,
+  };
+};
+
+// Filter for documents modified at or after the cursor, in (updatedAt, _id)
+// order so a page cut short resumes after its last document
+const changedSince = ({ time, id }) =>
+  id
+    ? {
+        $or: [
+          { updatedAt: { $gt: time } },
+          { updatedAt: time, _id: { $gt: id } },
+        ],
+      }
+    : { updatedAt: { $gte: time } };
+
+module.exports = {
+  listVersion,
+  idListScope,
+  sendIfModified,
+  newCursor,
+  pageCursor,
+  parseCursor,
+  changedSince,
+};